@@ -0,0 +1,88 @@
+"""Хранение одинаковых текстов заключений в одном экземпляре (по содержимому)"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Тексты короче хранятся прямо в записи: ссылка на общий текст не намного короче их
+BLOB_MIN_SIZE = 64
+
+DIGEST_SIZE = 20
+
+# Ссылка на общий текст в постоянных хранилищах: метка (TextCodec помечает сжатый текст 1) и хеш
+BLOB_REF_TAG = 2
+
+
+def text_digest(text: str) -> bytes:
+    """Ключ текста — хеш содержимого (BLAKE2b, 20 байт)"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+def blob_ref(text: str) -> bytes:
+    """Ссылка на общий текст: метка BLOB_REF_TAG и хеш содержимого"""
+    return bytes((BLOB_REF_TAG,)) + text_digest(text)
+
+
+@dataclass
+class DedupStats:
+    """Статистика дедупликации текстов"""
+    references: int  # полей заключений, ссылающихся на общие тексты
+    blobs: int  # различных общих текстов
+    referenced_bytes: int  # объём, если бы каждая ссылка хранила свою копию
+    stored_bytes: int  # объём, который занимают общие тексты
+
+    @property
+    def ratio(self) -> float:
+        """Во сколько раз дедупликация уменьшает объём текстов"""
+        return self.referenced_bytes / self.stored_bytes if self.stored_bytes else 1.0
+
+
+class BlobStore:
+    """Тексты в памяти: один объект str на одинаковое содержимое, со счётчиком ссылок.
+
+    Словарь Python и есть хеш-таблица по содержимому, поэтому в памяти ключ —
+    сама строка. Тексты без ссылок остаются до collect_garbage(): частые
+    «нормы» переживают перезапись заключения, и их не приходится добавлять заново.
+    """
+
+    def __init__(self, min_size: int = BLOB_MIN_SIZE):
+        self.min_size = min_size
+        self._texts: Dict[str, str] = {}
+        self._refs: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def acquire(self, text: Optional[str]) -> Optional[str]:
+        """Общий экземпляр текста (ссылок +1); короткие тексты и None возвращаются как есть"""
+        if text is None or len(text) < self.min_size:
+            return text
+        shared = self._texts.setdefault(text, text)
+        self._refs[shared] = self._refs.get(shared, 0) + 1
+        return shared
+
+    def release(self, text: Optional[str]) -> None:
+        """Ссылок -1 (текст удаляется только при collect_garbage)"""
+        if text is not None and text in self._refs:
+            self._refs[text] -= 1
+
+    def collect_garbage(self) -> int:
+        """Удалить тексты без ссылок; возвращает их число"""
+        unused = [text for text, refs in self._refs.items() if refs <= 0]
+        for text in unused:
+            del self._texts[text]
+            del self._refs[text]
+        return len(unused)
+
+    def stats(self) -> DedupStats:
+        """Статистика по живым ссылкам"""
+        references = referenced_bytes = stored_bytes = blobs = 0
+        for text, refs in self._refs.items():
+            if refs <= 0:
+                continue
+            size = len(text.encode("utf-8"))
+            blobs += 1
+            references += refs
+            referenced_bytes += size * refs
+            stored_bytes += size
+        return DedupStats(references, blobs, referenced_bytes, stored_bytes)
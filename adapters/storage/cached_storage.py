@@ -0,0 +1,265 @@
+"""Кэширующая обёртка над любым хранилищем с отложенной записью (write-behind)"""
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from ports.storage_port import StorageAdapter
+from domain.entities import Modality, Report, Template
+
+logger = logging.getLogger(__name__)
+
+
+class CachedStorage(StorageAdapter):
+    """Обёртка над StorageAdapter: чтение из LRU в памяти, запись через очередь.
+
+    - save_report кладёт заключение в буфер и сразу возвращается — диск не трогается;
+      повторные сохранения одного заключения до сброса схлопываются;
+    - фоновый поток сбрасывает буфер в обёрнутое хранилище пачкой (save_reports)
+      каждые flush_interval секунд или сразу, как в буфере набралось flush_batch
+      заключений; при сбое процесса теряется не больше одного интервала;
+    - close() останавливает поток, сбрасывает остаток и закрывает хранилище;
+      сохранить заключение после close() нельзя (RuntimeError);
+    - выборки по всем заключениям (get_all_reports, iter_reports, search_reports)
+      и история версий сначала сбрасывают буфер, чтобы хранилище видело последние
+      версии; в историю попадают версии на момент сброса;
+    - шаблоны меняются редко и пишутся сразу.
+
+    В буфере и LRU лежат копии: изменения объекта после save_report (или
+    заключения, полученного из get_report) в хранилище не попадают.
+    """
+
+    def __init__(
+        self,
+        backend: StorageAdapter,
+        cache_size: int = 10_000,
+        flush_interval: float = 1.0,
+        flush_batch: int = 500,
+        on_flush_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        self.backend = backend
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        # Последняя ошибка фонового сброса (сброс повторится на следующем интервале).
+        # Ошибка пишется в журнал и передаётся в on_flush_error — из фонового потока
+        self.last_error: Optional[BaseException] = None
+        self.on_flush_error = on_flush_error
+
+        self._lock = threading.Lock()
+        # Сериализует сбросы: фоновый поток и явные flush()/close()
+        self._flush_lock = threading.Lock()
+        self._cache: "OrderedDict[str, Report]" = OrderedDict()
+        self._pending: Dict[str, Report] = {}
+        # Пачка, которая пишется прямо сейчас: читается отсюда, пока запись не завершена
+        self._in_flight: Dict[str, Report] = {}
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._flush_loop, name="cached-storage-flush", daemon=True)
+        self._thread.start()
+
+    # --- заключения ---
+
+    def save_report(self, report: Report) -> None:
+        """Поставить заключение в очередь на запись (без ожидания диска)"""
+        stored = replace(report)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Хранилище закрыто: заключение не будет записано")
+            self._pending[report.id] = stored
+            self._cache[report.id] = stored
+            self._cache.move_to_end(report.id)
+            self._trim_cache()
+            full = len(self._pending) >= self.flush_batch
+        if full:
+            self._wakeup.set()
+
+    def save_reports(self, reports: Iterable[Report]) -> None:
+        """Поставить пачку заключений в очередь на запись"""
+        for report in reports:
+            self.save_report(report)
+
+    def get_report(self, report_id: str) -> Optional[Report]:
+        """Получить заключение: буфер записи, LRU, затем обёрнутое хранилище"""
+        with self._lock:
+            report = self._buffered(report_id)
+            if report is not None:
+                return replace(report)
+        report = self.backend.get_report(report_id)
+        if report is not None:
+            with self._lock:
+                # Пока шло чтение, могла прийти более новая версия — её не затираем
+                if self._buffered(report_id) is None:
+                    self._remember(report)
+        return report
+
+    def get_reports(self, report_ids: Iterable[str]) -> List[Optional[Report]]:
+        """Получить заключения по списку ID; промахи кэша читаются из хранилища одним вызовом"""
+        report_ids = list(report_ids)
+        with self._lock:
+            found = [self._buffered(report_id) for report_id in report_ids]
+        found = [replace(report) if report is not None else None for report in found]
+        missing = list(dict.fromkeys(report_id for report_id, report in zip(report_ids, found) if report is None))
+        if missing:
+            loaded = {report_id: report for report_id, report in zip(missing, self.backend.get_reports(missing))}
+            with self._lock:
+                for report in loaded.values():
+                    if report is not None and self._buffered(report.id) is None:
+                        self._remember(report)
+            found = [report if report is not None else loaded[report_id] for report_id, report in zip(report_ids, found)]
+        return found
+
+    def get_all_reports(self) -> List[Report]:
+        """Получить все заключения (после сброса буфера)"""
+        self.flush()
+        return self.backend.get_all_reports()
+
+    def iter_reports(
+        self, modality: Optional[Modality] = None, after_id: Optional[str] = None, batch_size: int = 500
+    ) -> Iterator[Report]:
+        """Обойти заключения по возрастанию ID; буфер сбрасывается перед каждой пачкой"""
+        if batch_size <= 0:
+            raise ValueError("batch_size должен быть положительным")
+        last_id = after_id
+        while True:
+            self.flush()
+            batch = list(itertools.islice(self.backend.iter_reports(modality, last_id, batch_size), batch_size))
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1].id
+
+    def search_reports(self, query: str, modality: Optional[Modality] = None, limit: int = 20) -> List[Report]:
+        """Полнотекстовый поиск (после сброса буфера)"""
+        self.flush()
+        return self.backend.search_reports(query, modality, limit)
+
+    def get_report_history(self, report_id: str) -> List[Report]:
+        """История версий заключения (после сброса буфера)"""
+        self.flush()
+        return self.backend.get_report_history(report_id)
+
+    def get_report_at(self, report_id: str, version: int) -> Optional[Report]:
+        """Версия заключения (после сброса буфера)"""
+        self.flush()
+        return self.backend.get_report_at(report_id, version)
+
+    # --- шаблоны: без кэша ---
+
+    def save_template(self, template: Template) -> None:
+        """Сохранить шаблон"""
+        self.backend.save_template(template)
+
+    def get_template(self, template_name: str) -> Optional[Template]:
+        """Получить шаблон по имени"""
+        return self.backend.get_template(template_name)
+
+    def delete_template(self, template_name: str, modality: Optional[Modality] = None) -> bool:
+        """Удалить шаблон"""
+        return self.backend.delete_template(template_name, modality)
+
+    def get_all_templates(self) -> List[Template]:
+        """Получить все шаблоны"""
+        return self.backend.get_all_templates()
+
+    def get_templates_by_modality(self, modality: Modality) -> List[Template]:
+        """Получить шаблоны для конкретной модальности"""
+        return self.backend.get_templates_by_modality(modality)
+
+    # --- сброс ---
+
+    def pending_count(self) -> int:
+        """Сколько заключений ещё не записано в хранилище"""
+        with self._lock:
+            return len(self._pending) + len(self._in_flight)
+
+    def flush(self) -> None:
+        """Записать буфер в хранилище и дождаться завершения (ошибка записи пробрасывается)"""
+        with self._flush_lock:
+            self._flush_pending()
+
+    def close(self) -> None:
+        """Остановить фоновый поток, записать остаток буфера и закрыть хранилище;
+        после этого save_report выбрасывает RuntimeError.
+
+        Если запись не удалась, ошибка пробрасывается, а буфер и хранилище остаются
+        открытыми: close() можно вызвать ещё раз.
+        """
+        if self._closed:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join()
+        while True:
+            self.flush()
+            with self._lock:
+                # Заключение, сохранённое во время сброса, запишется следующим проходом
+                if not self._pending:
+                    self._closed = True
+                    break
+        self.backend.close()
+
+    # --- внутреннее ---
+
+    def _buffered(self, report_id: str) -> Optional[Report]:
+        report = self._pending.get(report_id) or self._in_flight.get(report_id)
+        if report is not None:
+            return report
+        report = self._cache.get(report_id)
+        if report is not None:
+            self._cache.move_to_end(report_id)
+        return report
+
+    def _remember(self, report: Report) -> None:
+        # Копия: объект, который получил вызывающий, может меняться дальше
+        self._cache[report.id] = replace(report)
+        self._cache.move_to_end(report.id)
+        self._trim_cache()
+
+    def _trim_cache(self) -> None:
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _flush_pending(self) -> None:
+        """Один сброс; вызывается под _flush_lock"""
+        with self._lock:
+            if not self._pending:
+                return
+            self._in_flight, self._pending = self._pending, {}
+        try:
+            self.backend.save_reports(list(self._in_flight.values()))
+        except BaseException:
+            with self._lock:
+                # Вернуть пачку в буфер, не затирая версии, сохранённые во время записи
+                self._in_flight.update(self._pending)
+                self._pending, self._in_flight = self._in_flight, {}
+            raise
+        with self._lock:
+            self._in_flight = {}
+
+    def _flush_loop(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                logger.warning("Не удалось записать %d заключений, повтор через %g с",
+                               self.pending_count(), self.flush_interval, exc_info=True)
+                if self.on_flush_error is not None:
+                    self.on_flush_error(e)
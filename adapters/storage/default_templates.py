@@ -0,0 +1,49 @@
+"""Шаблоны по умолчанию для адаптеров хранения"""
+
+from typing import List
+
+from domain.entities import Modality, Template
+
+
+def default_templates() -> List[Template]:
+    """Предустановленные шаблоны (новые объекты при каждом вызове)"""
+    return [
+        # XRAY
+        Template(
+            name="Стандартный",
+            modality=Modality.XRAY,
+            replacements={
+                "без патологических изменений": "без патологических изменений в легких",
+                "легкие без особенностей": "легкие без патологических изменений",
+                "сердце в норме": "сердце без патологических изменений",
+                "без изменений": "без патологических изменений"
+            }
+        ),
+        Template(
+            name="Формализованный",
+            modality=Modality.XRAY,
+            replacements={
+                "норма": "патологических изменений не выявлено",
+                "все ок": "патологических изменений не обнаружено",
+                "здоров": "признаков патологии не определяется"
+            }
+        ),
+        # MAMMOGRAPHY
+        Template(
+            name="Mammo: стандарт",
+            modality=Modality.MAMMOGRAPHY,
+            replacements={
+                "без очаговых образований": "очаговых и инфильтративных изменений не выявлено",
+                "микрокальцинаты не выявлены": "патологических микрокальцинатов не определяется",
+            },
+        ),
+        # DENSITOMETRY
+        Template(
+            name="DXA: стандарт",
+            modality=Modality.DENSITOMETRY,
+            replacements={
+                "остеопороз": "денситометрические признаки остеопороза",
+                "остеопения": "денситометрические признаки остеопении",
+            },
+        ),
+    ]
@@ -8,99 +8,160 @@ project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from typing import List, Optional, Dict
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, List, Optional
 from ports.storage_port import StorageAdapter
+from adapters.storage.blob_store import BlobStore, DedupStats
+from adapters.storage.default_templates import default_templates
+from adapters.storage.sorted_keys import SortedKeys
+from adapters.storage.template_index import TemplateIndex
 from domain.entities import Modality, Report, Template
+from domain.report_history import KEYFRAME_INTERVAL, ReportHistory
+from domain.template_cache import TemplateCache, default_template_cache
+from domain.text_search import SearchIndex
 
 
 class InMemoryStorage(StorageAdapter):
-    """In-memory реализация хранилища данных"""
+    """In-memory реализация хранилища данных.
+
+    Заключение хранится копией, тексты которой взяты из BlobStore: одинаковые
+    тексты (типовые «нормы») занимают память один раз (deduplication=True).
+    get_report возвращает эту копию, а не объект, переданный в save_report.
+
+    История версий (history) и полнотекстовый индекс (search_index) стоят памяти
+    на каждое заключение (benchmarks/bench_entities.py); без них get_report_history
+    отдаёт только текущую версию, а search_reports строит индекс на каждый запрос.
+    """
+
+    # Каждая HISTORY_KEYFRAME_INTERVAL-я версия заключения хранится целиком, остальные — дельтой
+    HISTORY_KEYFRAME_INTERVAL = KEYFRAME_INTERVAL
     
-    def __init__(self):
+    def __init__(self, template_cache: Optional[TemplateCache] = None, deduplication: bool = True,
+                 history: bool = True, search_index: bool = True):
+        self.deduplication = deduplication
         self._reports: Dict[str, Report] = {}
-        self._templates: Dict[str, Template] = {}
+        self._history: Optional[Dict[str, ReportHistory]] = {} if history else None
+        self._blobs = BlobStore()
+        self._report_ids = SortedKeys()
+        self._search: Optional[SearchIndex] = SearchIndex() if search_index else None
+        self._templates = TemplateIndex()
+        # Сохранённые шаблоны сразу компилируются в кэш, которым пользуется ReportService
+        self.template_cache = template_cache if template_cache is not None else default_template_cache
         self._init_default_templates()
     
     def _init_default_templates(self):
         """Инициализация шаблонов по умолчанию"""
-        # XRAY
-        default_template = Template(
-            name="Стандартный",
-            modality=Modality.XRAY,
-            replacements={
-                "без патологических изменений": "без патологических изменений в легких",
-                "легкие без особенностей": "легкие без патологических изменений",
-                "сердце в норме": "сердце без патологических изменений",
-                "без изменений": "без патологических изменений"
-            }
-        )
-        self.save_template(default_template)
-        
-        formal_template = Template(
-            name="Формализованный",
-            modality=Modality.XRAY,
-            replacements={
-                "норма": "патологических изменений не выявлено",
-                "все ок": "патологических изменений не обнаружено",
-                "здоров": "признаков патологии не определяется"
-            }
-        )
-        self.save_template(formal_template)
-
-        # MAMMOGRAPHY
-        mammo_standard = Template(
-            name="Mammo: стандарт",
-            modality=Modality.MAMMOGRAPHY,
-            replacements={
-                "без очаговых образований": "очаговых и инфильтративных изменений не выявлено",
-                "микрокальцинаты не выявлены": "патологических микрокальцинатов не определяется",
-            },
-        )
-        self.save_template(mammo_standard)
-
-        # DENSITOMETRY
-        densito_standard = Template(
-            name="DXA: стандарт",
-            modality=Modality.DENSITOMETRY,
-            replacements={
-                "остеопороз": "денситометрические признаки остеопороза",
-                "остеопения": "денситометрические признаки остеопении",
-            },
-        )
-        self.save_template(densito_standard)
+        for template in default_templates():
+            self.save_template(template)
     
     def save_report(self, report: Report) -> None:
         """Сохранить заключение"""
-        self._reports[report.id] = report
+        stored = replace(
+            report,
+            original_text=self._shared_text(report.original_text),
+            processed_text=self._shared_text(report.processed_text),
+        )
+        previous = self._reports.get(report.id)
+        if previous is None:
+            self._report_ids.add(report.id)
+        else:
+            self._blobs.release(previous.original_text)
+            self._blobs.release(previous.processed_text)
+        self._reports[report.id] = stored
+        if self._history is not None:
+            history = self._history.get(report.id)
+            if history is None:
+                history = self._history[report.id] = ReportHistory(self.HISTORY_KEYFRAME_INTERVAL)
+            history.record(stored)
+        if self._search is not None:
+            self._search.add(stored)
     
     def get_report(self, report_id: str) -> Optional[Report]:
         """Получить заключение по ID"""
         return self._reports.get(report_id)
+
+    def get_reports(self, report_ids: Iterable[str]) -> List[Optional[Report]]:
+        """Получить заключения по списку ID (None для отсутствующих)"""
+        get = self._reports.get
+        return [get(report_id) for report_id in report_ids]
     
     def get_all_reports(self) -> List[Report]:
         """Получить все заключения"""
         return list(self._reports.values())
+
+    def iter_reports(
+        self, modality: Optional[Modality] = None, after_id: Optional[str] = None, batch_size: int = 500
+    ) -> Iterator[Report]:
+        """Обойти заключения по возрастанию ID пачками по batch_size (без копии всего словаря)"""
+        if batch_size <= 0:
+            raise ValueError("batch_size должен быть положительным")
+        last_id = after_id
+        while True:
+            # Позиция ищется заново для каждой пачки: заключения, сохранённые во время обхода, не теряются
+            ids = self._report_ids.after(last_id, batch_size)
+            if not ids:
+                return
+            for report_id in ids:
+                report = self._reports[report_id]
+                if modality is None or report.modality == modality:
+                    yield report
+            last_id = ids[-1]
+
+    def search_reports(self, query: str, modality: Optional[Modality] = None, limit: int = 20) -> List[Report]:
+        """Полнотекстовый поиск по индексу, который обновляется при save_report"""
+        if self._search is None:
+            return super().search_reports(query, modality, limit)
+        return [self._reports[report_id] for report_id in self._search.search(query, modality, limit)]
+    
+    def get_report_history(self, report_id: str) -> List[Report]:
+        """Все версии заключения от первой к текущей"""
+        if self._history is None:
+            return super().get_report_history(report_id)
+        history = self._history.get(report_id)
+        return history.versions(report_id) if history is not None else []
+
+    def get_report_at(self, report_id: str, version: int) -> Optional[Report]:
+        """Версия заключения: от ближайшей ключевой версии применяются дельты"""
+        if self._history is None:
+            return super().get_report_at(report_id, version)
+        history = self._history.get(report_id)
+        return history.at(report_id, version) if history is not None else None
+    
+    def _shared_text(self, text: Optional[str]) -> Optional[str]:
+        return self._blobs.acquire(text) if self.deduplication else text
+
+    def dedup_stats(self) -> DedupStats:
+        """Статистика дедупликации текстов заключений"""
+        return self._blobs.stats()
+
+    def collect_garbage(self) -> int:
+        """Удалить общие тексты, на которые больше не ссылается ни одно заключение"""
+        return self._blobs.collect_garbage()
     
     def save_template(self, template: Template) -> None:
         """Сохранить шаблон"""
-        # Ключ делаем составным: modality:name (чтобы имена могли повторяться между модальностями)
-        key = f"{template.modality.value}:{template.name}"
-        self._templates[key] = template
+        # Ключ составной: modality:name (чтобы имена могли повторяться между модальностями)
+        self._templates.save(template)
+        self.template_cache.put(template)
     
     def get_template(self, template_name: str) -> Optional[Template]:
         """Получить шаблон по имени"""
-        # Для совместимости: сначала пробуем точное попадание по ключу, затем по "концу" (name)
-        if template_name in self._templates:
-            return self._templates.get(template_name)
-        for t in self._templates.values():
-            if t.name == template_name:
-                return t
-        return None
+        # Для совместимости: сначала точное попадание по ключу modality:name, затем по имени
+        return self._templates.resolve(template_name)
+    
+    def delete_template(self, template_name: str, modality: Optional[Modality] = None) -> bool:
+        """Удалить шаблон"""
+        template = self._templates.resolve(template_name, modality)
+        if template is None:
+            return False
+        self._templates.remove(template)
+        self.template_cache.invalidate(template.modality, template.name)
+        return True
     
     def get_all_templates(self) -> List[Template]:
         """Получить все шаблоны"""
-        return list(self._templates.values())
+        return self._templates.all()
 
     def get_templates_by_modality(self, modality: Modality) -> List[Template]:
         """Получить шаблоны для конкретной модальности"""
-        return [t for t in self._templates.values() if t.modality == modality]
+        return self._templates.by_modality(modality)
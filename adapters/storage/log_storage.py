@@ -0,0 +1,896 @@
+"""Файловое хранилище: журнал сегментов с дозаписью (log-structured)"""
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import itertools
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from ports.storage_port import StorageAdapter
+from adapters.storage.blob_store import BLOB_MIN_SIZE, DIGEST_SIZE, DedupStats, text_digest
+from adapters.storage.default_templates import default_templates
+from adapters.storage.sorted_keys import SortedKeys
+from adapters.storage.template_index import TemplateIndex, template_key
+from adapters.storage.text_codec import TextCodec, build_dictionary, plugin_seed_texts
+from domain.entities import Modality, Report, Template
+from domain.report_history import KEYFRAME_INTERVAL, Revision, keyframe_base, latest, make_revision, replay
+from domain.template_cache import TemplateCache, default_template_cache
+from domain.text_search import SearchIndex
+
+# Типы записей журнала
+RECORD_REPORT = 1
+RECORD_TEMPLATE = 2
+RECORD_TEMPLATE_DELETE = 3
+# Общий текст: хеш содержимого и текст (adapters.storage.blob_store)
+RECORD_BLOB = 4
+# Версия заключения для истории (domain.report_history): поля как у заключения, затем номер и признак ключевой
+RECORD_REVISION = 5
+
+# Заголовок записи: тип, длина данных, CRC32 данных
+_RECORD_HEADER = struct.Struct("<BII")
+_U32 = struct.Struct("<I")
+# Хвост записи версии: номер версии, ключевая (1) или дельта (0)
+_REVISION_TRAILER = struct.Struct("<IB")
+_NONE_LENGTH = 0xFFFFFFFF
+# Старший бит длины текстового поля: данные сжаты TextCodec (словарь — в файле рядом с журналом)
+_COMPRESSED_FLAG = 0x80000000
+# Вместо длины: поле — ссылка на общий текст, дальше хеш содержимого
+_BLOB_LENGTH = 0xFFFFFFFE
+
+_CHECKPOINT_MAGIC = b"RLCP"
+_CHECKPOINT_VERSION = 3
+# magic, версия, сегмент и смещение, до которых отражено состояние, число записей индекса
+_CHECKPOINT_HEADER = struct.Struct("<4sHIQI")
+# длина id, сегмент, смещение записи, длина данных
+_CHECKPOINT_ENTRY = struct.Struct("<HIQI")
+# хеш общего текста, сегмент, смещение записи, длина данных
+_CHECKPOINT_BLOB = struct.Struct(f"<{DIGEST_SIZE}sIQI")
+# длина id, число версий; затем id и по _CHECKPOINT_LOCATION на версию
+_CHECKPOINT_HISTORY = struct.Struct("<HI")
+_CHECKPOINT_LOCATION = struct.Struct("<IQI")
+
+# Положение записи: (номер сегмента, смещение заголовка, длина данных)
+Location = Tuple[int, int, int]
+
+
+class CorruptedLogError(ValueError):
+    """Запись в середине журнала не читается (CRC или длина): отрезать можно только
+    недописанный хвост последнего сегмента, иначе пропали бы следующие записи"""
+
+
+def _pack_str(value: Optional[str]) -> bytes:
+    if value is None:
+        return _U32.pack(_NONE_LENGTH)
+    data = value.encode("utf-8")
+    return _U32.pack(len(data)) + data
+
+
+def _unpack_str(buf, pos: int) -> Tuple[Optional[str], int]:
+    (length,) = _U32.unpack_from(buf, pos)
+    pos += _U32.size
+    if length == _NONE_LENGTH:
+        return None, pos
+    return bytes(buf[pos:pos + length]).decode("utf-8"), pos + length
+
+
+def _pack_text(
+    value: Optional[str], codec: Optional[TextCodec], shared: Optional[Dict[bytes, bytes]] = None
+) -> bytes:
+    encoded = codec.encode(value) if codec is not None else value
+    if isinstance(encoded, bytes):
+        packed = _U32.pack(len(encoded) | _COMPRESSED_FLAG) + encoded
+    else:
+        packed = _pack_str(encoded)
+    if shared is None or value is None or len(packed) < BLOB_MIN_SIZE:
+        return packed
+    digest = text_digest(value)
+    shared[digest] = packed
+    return _U32.pack(_BLOB_LENGTH) + digest
+
+
+def _unpack_text(
+    buf, pos: int, codec: Optional[TextCodec], resolve: Optional[Callable[[bytes], str]] = None
+) -> Tuple[Optional[str], int]:
+    (length,) = _U32.unpack_from(buf, pos)
+    if length == _BLOB_LENGTH:
+        if resolve is None:
+            raise ValueError("Ссылка на общий текст без хранилища общих текстов")
+        start = pos + _U32.size
+        return resolve(bytes(buf[start:start + DIGEST_SIZE])), start + DIGEST_SIZE
+    if length == _NONE_LENGTH or not length & _COMPRESSED_FLAG:
+        return _unpack_str(buf, pos)
+    if codec is None:
+        raise ValueError("Сжатый текст без словаря")
+    start = pos + _U32.size
+    end = start + (length & ~_COMPRESSED_FLAG)
+    return codec.decode(bytes(buf[start:end])), end
+
+
+def encode_report(
+    report: Report, codec: Optional[TextCodec] = None, shared: Optional[Dict[bytes, bytes]] = None
+) -> bytes:
+    """Компактное двоичное представление заключения (строки с префиксом длины, тексты — через codec).
+
+    С shared тексты, которые и после сжатия занимают от BLOB_MIN_SIZE байт, заменяются
+    ссылкой на общий текст, а сами (упакованные) складываются в shared по хешу.
+    """
+    return b"".join((
+        _pack_str(report.id),
+        _pack_str(report.modality.value),
+        _pack_text(report.original_text, codec, shared),
+        _pack_text(report.processed_text, codec, shared),
+        _pack_str(report.template_name),
+    ))
+
+
+def decode_report(
+    buf, codec: Optional[TextCodec] = None, resolve: Optional[Callable[[bytes], str]] = None
+) -> Report:
+    report_id, pos = _unpack_str(buf, 0)
+    modality, pos = _unpack_str(buf, pos)
+    original_text, pos = _unpack_text(buf, pos, codec, resolve)
+    processed_text, pos = _unpack_text(buf, pos, codec, resolve)
+    template_name, pos = _unpack_str(buf, pos)
+    return Report(
+        id=report_id,
+        modality=Modality(modality),
+        original_text=original_text,
+        processed_text=processed_text,
+        template_name=template_name,
+    )
+
+
+def encode_revision(
+    report_id: str, revision: Revision, codec: Optional[TextCodec] = None, shared: Optional[Dict[bytes, bytes]] = None
+) -> bytes:
+    """Запись версии: поля в том же порядке, что у заключения (ссылки на общие тексты
+    находит _report_refs), затем номер версии и признак ключевой. Общими текстами
+    становятся только тексты ключевых версий — дельты у каждой версии свои"""
+    keyframe_shared = shared if revision.keyframe else None
+    return b"".join((
+        _pack_str(report_id),
+        _pack_str(revision.modality.value),
+        _pack_text(revision.original_text, codec, keyframe_shared),
+        _pack_text(revision.processed_text, codec, keyframe_shared),
+        _pack_str(revision.template_name),
+        _REVISION_TRAILER.pack(revision.version, revision.keyframe),
+    ))
+
+
+def decode_revision(
+    buf, codec: Optional[TextCodec] = None, resolve: Optional[Callable[[bytes], str]] = None
+) -> Tuple[str, Revision]:
+    report_id, pos = _unpack_str(buf, 0)
+    modality, pos = _unpack_str(buf, pos)
+    original_text, pos = _unpack_text(buf, pos, codec, resolve)
+    processed_text, pos = _unpack_text(buf, pos, codec, resolve)
+    template_name, pos = _unpack_str(buf, pos)
+    version, keyframe = _REVISION_TRAILER.unpack_from(buf, pos)
+    return report_id, Revision(version, bool(keyframe), Modality(modality), original_text, processed_text, template_name)
+
+
+def _revision_key(buf) -> Tuple[str, int]:
+    """id заключения и номер версии из записи версии (тексты не распаковываются)"""
+    report_id, pos = _unpack_str(buf, 0)
+    return report_id, _REVISION_TRAILER.unpack_from(buf, len(buf) - _REVISION_TRAILER.size)[0]
+
+
+def _report_refs(buf) -> List[bytes]:
+    """Хеши общих текстов, на которые ссылается запись заключения или версии (тексты не распаковываются)"""
+    refs = []
+    pos = 0
+    for _ in range(4):  # id, модальность, исходный и обработанный текст
+        (length,) = _U32.unpack_from(buf, pos)
+        pos += _U32.size
+        if length == _BLOB_LENGTH:
+            refs.append(bytes(buf[pos:pos + DIGEST_SIZE]))
+            pos += DIGEST_SIZE
+        elif length != _NONE_LENGTH:
+            pos += length & ~_COMPRESSED_FLAG
+    return refs
+
+
+def _encode_template(template: Template) -> bytes:
+    return json.dumps(
+        {"modality": template.modality.value, "name": template.name, "replacements": template.replacements},
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+
+def _decode_template(buf) -> Template:
+    data = json.loads(bytes(buf).decode("utf-8"))
+    return Template(name=data["name"], modality=Modality(data["modality"]), replacements=data["replacements"])
+
+
+class LogStructuredStorage(StorageAdapter):
+    """Хранилище для рабочих мест без SQLite: записи дописываются в журнал сегментов.
+
+    - каждая запись — заголовок (тип, длина, CRC32) и данные; изменение заключения
+      дописывает новую запись, старая становится неактуальной;
+    - в памяти держится только индекс id -> (сегмент, смещение, длина);
+      get_report читает срез через mmap, не загружая файл целиком;
+    - compact() переписывает актуальные записи из сегментов, где неактуальных
+      больше garbage_ratio, в конец журнала и удаляет эти сегменты; при
+      compaction_interval это делает фоновый поток;
+    - при закрытии (и после уплотнения) индекс сохраняется в файл контрольной
+      точки, и при запуске дочитываются только записи после неё;
+    - полнотекстовый индекс обновляется при save_report и сохраняется рядом
+      с контрольной точкой;
+    - тексты заключений сжимаются zlib со словарём (compression=True); словари
+      лежат рядом с журналом в файлах dictionary-NNNNNN.zdict, новую версию
+      строит rebuild_compression_dictionary();
+    - тексты от BLOB_MIN_SIZE символов пишутся один раз отдельной записью-общим
+      текстом (deduplication=True), заключения ссылаются на него по хешу;
+      collect_garbage() убирает общие тексты без ссылок, место освобождает уплотнение;
+    - изменённое заключение дописывает и запись версии (history=True): каждая
+      HISTORY_KEYFRAME_INTERVAL-я целиком, остальные — дельтой от предыдущей.
+      Версии всегда актуальны — уплотнение переносит их, а не удаляет; в памяти
+      только их положения.
+    """
+
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".log"
+    CHECKPOINT_NAME = "checkpoint.bin"
+    SEARCH_INDEX_NAME = "search.idx"
+    DICTIONARY_PREFIX = "dictionary-"
+    DICTIONARY_SUFFIX = ".zdict"
+    # Заключений в образце для словаря сжатия
+    COMPRESSION_SAMPLE_SIZE = 2000
+    # Заключений в одной порции save_reports: один сброс буфера (и fsync) на порцию
+    SAVE_CHUNK_SIZE = 1000
+    # Каждая HISTORY_KEYFRAME_INTERVAL-я версия заключения хранится целиком, остальные — дельтой
+    HISTORY_KEYFRAME_INTERVAL = KEYFRAME_INTERVAL
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        segment_size: int = 64 * 1024 * 1024,
+        garbage_ratio: float = 0.5,
+        compaction_interval: Optional[float] = None,
+        sync_writes: bool = False,
+        template_cache: Optional[TemplateCache] = None,
+        compression: bool = True,
+        deduplication: bool = True,
+        history: bool = True,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.garbage_ratio = garbage_ratio
+        self.sync_writes = sync_writes
+        self.compression = compression
+        self.deduplication = deduplication
+        self.history = history
+        self._codec = TextCodec()
+        self.template_cache = template_cache if template_cache is not None else default_template_cache
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Location] = {}
+        # Общие тексты: хеш -> положение записи (без ссылок остаются до collect_garbage)
+        self._blobs: Dict[bytes, Location] = {}
+        # Положения записей версий каждого заключения, от первой к последней
+        self._revisions: Dict[str, List[Location]] = {}
+        self._report_ids = SortedKeys()
+        self._templates = TemplateIndex()
+        self._search = SearchIndex()
+        # Последняя запись по каждому ключу шаблона (в т.ч. удаления) — для уплотнения
+        self._template_locations: Dict[str, Tuple[Location, Optional[Template]]] = {}
+        # Байты актуальных записей и всех записей по сегментам
+        self._live_bytes: Dict[int, int] = {}
+        self._total_bytes: Dict[int, int] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._active_no = 0
+        self._active: Optional[BinaryIO] = None
+        self._active_size = 0
+        self._closed = False
+
+        self._load()
+
+        self._stop_compaction = threading.Event()
+        self._compaction_thread: Optional[threading.Thread] = None
+        if compaction_interval:
+            self._compaction_thread = threading.Thread(
+                target=self._compaction_loop, args=(compaction_interval,), name="log-storage-compaction", daemon=True
+            )
+            self._compaction_thread.start()
+
+    # --- заключения ---
+
+    def save_report(self, report: Report) -> None:
+        """Сохранить заключение (дозапись в журнал; изменённый текст добавляет версию в историю)"""
+        shared = self._shared_texts()
+        payload = encode_report(report, self._write_codec(), shared)
+        with self._lock:
+            self._write_report(report, payload, shared)
+            self._commit()
+
+    def save_reports(self, reports: Iterable[Report], chunk_size: Optional[int] = None) -> None:
+        """Сохранить пачку заключений порциями: записи порции дописываются подряд и сбрасываются разом"""
+        iterator = iter(reports)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size or self.SAVE_CHUNK_SIZE))
+            if not chunk:
+                return
+            shared = self._shared_texts()
+            payloads = [encode_report(report, self._write_codec(), shared) for report in chunk]
+            with self._lock:
+                # Записи порции ещё в буфере файла — предыдущая версия повторного id берётся отсюда
+                written: Dict[str, Report] = {}
+                for report, payload in zip(chunk, payloads):
+                    self._write_report(report, payload, shared, written)
+                    written[report.id] = report
+                self._commit()
+
+    def get_report(self, report_id: str) -> Optional[Report]:
+        """Получить заключение по ID (чтение среза сегмента через mmap)"""
+        with self._lock:
+            location = self._index.get(report_id)
+            if location is None:
+                return None
+            return self._decode(location)
+
+    def get_reports(self, report_ids: Iterable[str]) -> List[Optional[Report]]:
+        """Получить заключения по списку ID под одной блокировкой (None для отсутствующих)"""
+        with self._lock:
+            locations = [self._index.get(report_id) for report_id in report_ids]
+            return [self._decode(location) if location else None for location in locations]
+
+    def get_all_reports(self) -> List[Report]:
+        """Получить все заключения"""
+        with self._lock:
+            return [self._decode(location) for location in self._index.values()]
+
+    def iter_reports(
+        self, modality: Optional[Modality] = None, after_id: Optional[str] = None, batch_size: int = 500
+    ) -> Iterator[Report]:
+        """Обойти заключения по возрастанию ID; пачка читается под блокировкой, выдаётся без неё"""
+        if batch_size <= 0:
+            raise ValueError("batch_size должен быть положительным")
+        last_id = after_id
+        while True:
+            with self._lock:
+                ids = self._report_ids.after(last_id, batch_size)
+                batch = [self._decode(self._index[report_id]) for report_id in ids]
+            if not batch:
+                return
+            for report in batch:
+                if modality is None or report.modality == modality:
+                    yield report
+            last_id = ids[-1]
+
+    def search_reports(self, query: str, modality: Optional[Modality] = None, limit: int = 20) -> List[Report]:
+        """Полнотекстовый поиск по индексу (заключения читаются только для найденных ID)"""
+        with self._lock:
+            return [self._decode(self._index[report_id]) for report_id in self._search.search(query, modality, limit)]
+
+    def get_report_history(self, report_id: str) -> List[Report]:
+        """Все версии заключения от первой к текущей"""
+        if not self.history:
+            return super().get_report_history(report_id)
+        with self._lock:
+            revisions = [self._decode_revision(location) for location in self._revisions.get(report_id, ())]
+        return replay(report_id, revisions)
+
+    def get_report_at(self, report_id: str, version: int) -> Optional[Report]:
+        """Версия заключения: читаются версии только от ближайшей ключевой"""
+        if not self.history:
+            return super().get_report_at(report_id, version)
+        with self._lock:
+            locations = self._revisions.get(report_id, ())
+            if not 1 <= version <= len(locations):
+                return None
+            start = keyframe_base(version, self.HISTORY_KEYFRAME_INTERVAL)
+            revisions = [self._decode_revision(location) for location in locations[start - 1:version]]
+        return latest(report_id, revisions)
+
+    # --- шаблоны ---
+
+    def save_template(self, template: Template) -> None:
+        """Сохранить шаблон"""
+        with self._lock:
+            location = self._append(RECORD_TEMPLATE, _encode_template(template))
+            self._apply_template(template_key(template.modality, template.name), location, template)
+            self._commit()
+        self.template_cache.put(template)
+
+    def get_template(self, template_name: str) -> Optional[Template]:
+        """Получить шаблон по имени"""
+        with self._lock:
+            return self._templates.resolve(template_name)
+
+    def delete_template(self, template_name: str, modality: Optional[Modality] = None) -> bool:
+        """Удалить шаблон (дописывается запись-удаление)"""
+        with self._lock:
+            template = self._templates.resolve(template_name, modality)
+            if template is None:
+                return False
+            location = self._append(RECORD_TEMPLATE_DELETE, _encode_template(template))
+            self._apply_template(template_key(template.modality, template.name), location, None)
+            self._commit()
+        self.template_cache.invalidate(template.modality, template.name)
+        return True
+
+    def get_all_templates(self) -> List[Template]:
+        """Получить все шаблоны"""
+        with self._lock:
+            return self._templates.all()
+
+    def get_templates_by_modality(self, modality: Modality) -> List[Template]:
+        """Получить шаблоны для конкретной модальности"""
+        with self._lock:
+            return self._templates.by_modality(modality)
+
+    # --- общие тексты ---
+
+    def dedup_stats(self) -> DedupStats:
+        """Статистика дедупликации: ссылки из заключений и истории на общие тексты (объём — хранимый)"""
+        with self._lock:
+            refs = self._referenced_blobs()
+            stats = DedupStats(0, 0, 0, 0)
+            for digest, count in refs.items():
+                size = self._blobs[digest][2] - DIGEST_SIZE - _U32.size
+                stats.references += count
+                stats.blobs += 1
+                stats.referenced_bytes += size * count
+                stats.stored_bytes += size
+            return stats
+
+    def collect_garbage(self) -> int:
+        """Убрать из индекса общие тексты без ссылок и уплотнить журнал; возвращает их число"""
+        with self._lock:
+            refs = self._referenced_blobs()
+            unused = [digest for digest in self._blobs if digest not in refs]
+            for digest in unused:
+                no, _, length = self._blobs.pop(digest)
+                self._live_bytes[no] -= _RECORD_HEADER.size + length
+            if unused:
+                self.compact()
+            return len(unused)
+
+    # --- уплотнение и контрольная точка ---
+
+    def compact(self) -> int:
+        """Уплотнить закрытые сегменты с долей неактуальных записей выше garbage_ratio.
+
+        Возвращает число удалённых сегментов.
+        """
+        with self._lock:
+            candidates = [
+                no for no, total in self._total_bytes.items()
+                if no != self._active_no and total
+                and 1 - self._live_bytes.get(no, 0) / total >= self.garbage_ratio
+            ]
+            if not candidates:
+                return 0
+            for no in sorted(candidates):
+                self._copy_forward(no)
+            self._commit()
+            # Контрольная точка пишется до удаления сегментов: индекс в ней уже на новых местах
+            self.checkpoint()
+            for no in candidates:
+                self._drop_segment(no)
+            return len(candidates)
+
+    def checkpoint(self) -> None:
+        """Сохранить индекс, чтобы при запуске не перечитывать весь журнал"""
+        with self._lock:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+            parts = [_CHECKPOINT_HEADER.pack(
+                _CHECKPOINT_MAGIC, _CHECKPOINT_VERSION, self._active_no, self._active_size, len(self._index)
+            )]
+            for report_id, (no, offset, length) in self._index.items():
+                encoded_id = report_id.encode("utf-8")
+                parts.append(_CHECKPOINT_ENTRY.pack(len(encoded_id), no, offset, length))
+                parts.append(encoded_id)
+            parts.append(_U32.pack(len(self._blobs)))
+            for digest, (no, offset, length) in self._blobs.items():
+                parts.append(_CHECKPOINT_BLOB.pack(digest, no, offset, length))
+            parts.append(_U32.pack(len(self._revisions)))
+            for report_id, locations in self._revisions.items():
+                encoded_id = report_id.encode("utf-8")
+                parts.append(_CHECKPOINT_HISTORY.pack(len(encoded_id), len(locations)))
+                parts.append(encoded_id)
+                parts.extend(_CHECKPOINT_LOCATION.pack(*location) for location in locations)
+            templates = [
+                {"key": key, "location": list(location), "template": None if t is None else json.loads(_encode_template(t))}
+                for key, (location, t) in self._template_locations.items()
+            ]
+            parts.append(json.dumps(templates, ensure_ascii=False).encode("utf-8"))
+            # Метка — позиция журнала: индекс поиска подходит только к этой контрольной точке
+            self._search.save(self.directory / self.SEARCH_INDEX_NAME, stamp=(self._active_no, self._active_size))
+            path = self.directory / self.CHECKPOINT_NAME
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(parts))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+    def rebuild_compression_dictionary(self, sample_size: Optional[int] = None) -> int:
+        """Построить новую версию словаря по текстам плагинов и заключениям из журнала.
+
+        Новые записи сжимаются новым словарём, старые читаются своим. Возвращает номер версии.
+        """
+        with self._lock:
+            samples = plugin_seed_texts()
+            locations = list(self._index.values())[-(sample_size or self.COMPRESSION_SAMPLE_SIZE):]
+            for location in locations:
+                report = self._decode(location)
+                samples.append(report.original_text)
+                if report.processed_text is not None:
+                    samples.append(report.processed_text)
+            version = self._codec.version + 1
+            data = build_dictionary(samples)
+            # Словарь на диске раньше первой записи, сжатой им
+            path = self._dictionary_path(version)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            self._codec.add_dictionary(version, data)
+        return version
+
+    def close(self) -> None:
+        """Остановить фоновое уплотнение, сохранить контрольную точку и закрыть файлы"""
+        if self._compaction_thread is not None:
+            self._stop_compaction.set()
+            self._compaction_thread.join()
+        with self._lock:
+            if self._closed:
+                return
+            self.checkpoint()
+            self._active.close()
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            self._closed = True
+
+    # --- внутреннее: запись и чтение ---
+
+    def _segment_path(self, no: int) -> Path:
+        return self.directory / f"{self.SEGMENT_PREFIX}{no:06d}{self.SEGMENT_SUFFIX}"
+
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for path in self.directory.glob(f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}"):
+            stem = path.name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]
+            if stem.isdigit():
+                numbers.append(int(stem))
+        return sorted(numbers)
+
+    def _dictionary_path(self, version: int) -> Path:
+        return self.directory / f"{self.DICTIONARY_PREFIX}{version:06d}{self.DICTIONARY_SUFFIX}"
+
+    def _write_codec(self) -> Optional[TextCodec]:
+        return self._codec if self.compression else None
+
+    def _shared_texts(self) -> Optional[Dict[bytes, bytes]]:
+        """Куда encode_report сложит общие тексты (None — дедупликация выключена)"""
+        return {} if self.deduplication else None
+
+    def _append_blobs(self, shared: Optional[Dict[bytes, bytes]]) -> None:
+        """Дописать общие тексты, которых ещё нет в журнале (до записей, которые на них ссылаются)"""
+        for digest, packed in (shared or {}).items():
+            if digest not in self._blobs:
+                location = self._append(RECORD_BLOB, digest + packed)
+                self._set_blob_location(digest, location)
+
+    def _decode(self, location: Location) -> Report:
+        return decode_report(self._read(location), self._codec, self._read_blob)
+
+    def _decode_revision(self, location: Location) -> Revision:
+        return decode_revision(self._read(location), self._codec, self._read_blob)[1]
+
+    def _write_report(
+        self,
+        report: Report,
+        payload: bytes,
+        shared: Optional[Dict[bytes, bytes]],
+        written: Optional[Dict[str, Report]] = None,
+    ) -> None:
+        """Дописать заключение (и его новую версию) под блокировкой; общие тексты — раньше ссылок на них.
+        written — заключения, дописанные до сброса буфера (их записи ещё не видны через mmap)"""
+        revision_payload = None
+        if self.history:
+            locations = self._revisions.get(report.id, [])
+            previous = (written or {}).get(report.id)
+            if previous is None and report.id in self._index:
+                previous = self._decode(self._index[report.id])
+            if previous != report or not locations:
+                revision = make_revision(
+                    previous if locations else None, report, len(locations) + 1, self.HISTORY_KEYFRAME_INTERVAL
+                )
+                revision_payload = encode_revision(report.id, revision, self._write_codec(), shared)
+        self._append_blobs(shared)
+        if revision_payload is not None:
+            self._add_revision(report.id, self._append(RECORD_REVISION, revision_payload))
+        self._set_report_location(report.id, self._append(RECORD_REPORT, payload))
+        self._search.add(report)
+
+    def _read_blob(self, digest: bytes) -> str:
+        location = self._blobs.get(digest)
+        if location is None:
+            raise ValueError(f"Общий текст {digest.hex()} не найден в журнале")
+        text, _ = _unpack_text(self._read(location), DIGEST_SIZE, self._codec)
+        return text
+
+    def _referenced_blobs(self) -> Dict[bytes, int]:
+        """Число ссылок на каждый общий текст из актуальных заключений"""
+        refs: Dict[bytes, int] = {}
+        revisions = itertools.chain.from_iterable(self._revisions.values())
+        for location in itertools.chain(self._index.values(), revisions):
+            for digest in _report_refs(self._read(location)):
+                refs[digest] = refs.get(digest, 0) + 1
+        return refs
+
+    def _open_active(self, no: int) -> None:
+        if self._active is not None:
+            self._active.close()
+        self._active_no = no
+        self._active = open(self._segment_path(no), "ab")
+        self._active_size = self._active.tell()
+        self._total_bytes.setdefault(no, self._active_size)
+
+    def _append(self, record_type: int, payload: bytes) -> Location:
+        if self._active_size >= self.segment_size:
+            self._open_active(self._active_no + 1)
+        offset = self._active_size
+        self._active.write(_RECORD_HEADER.pack(record_type, len(payload), zlib.crc32(payload)))
+        self._active.write(payload)
+        size = _RECORD_HEADER.size + len(payload)
+        self._active_size += size
+        self._total_bytes[self._active_no] = self._total_bytes.get(self._active_no, 0) + size
+        return self._active_no, offset, len(payload)
+
+    def _commit(self) -> None:
+        """Сбросить буфер в ОС (чтобы запись была видна через mmap); fsync — по sync_writes"""
+        self._active.flush()
+        if self.sync_writes:
+            os.fsync(self._active.fileno())
+
+    def _read(self, location: Location) -> bytes:
+        no, offset, length = location
+        start = offset + _RECORD_HEADER.size
+        mapped = self._maps.get(no)
+        if mapped is None or len(mapped) < start + length:
+            # Активный сегмент растёт — отображение пересоздаётся, когда запись за его концом
+            if mapped is not None:
+                mapped.close()
+            with open(self._segment_path(no), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[no] = mapped
+        # Срез mmap — копия только этой записи; memoryview не отдаём, иначе mmap нельзя закрыть
+        return mapped[start:start + length]
+
+    def _set_report_location(self, report_id: str, location: Location) -> None:
+        previous = self._index.get(report_id)
+        if previous is not None:
+            self._live_bytes[previous[0]] -= _RECORD_HEADER.size + previous[2]
+        else:
+            self._report_ids.add(report_id)
+        self._index[report_id] = location
+        self._live_bytes[location[0]] = self._live_bytes.get(location[0], 0) + _RECORD_HEADER.size + location[2]
+
+    def _add_revision(self, report_id: str, location: Location, version: Optional[int] = None) -> None:
+        """Положение версии version (по умолчанию — следующей); перенесённая уплотнением версия заменяет прежнюю"""
+        locations = self._revisions.setdefault(report_id, [])
+        if version is None or version == len(locations) + 1:
+            locations.append(location)
+        elif version <= len(locations):
+            previous = locations[version - 1]
+            self._live_bytes[previous[0]] -= _RECORD_HEADER.size + previous[2]
+            locations[version - 1] = location
+        else:
+            raise ValueError(f"Версия {version} заключения {report_id} без предыдущих")
+        self._live_bytes[location[0]] = self._live_bytes.get(location[0], 0) + _RECORD_HEADER.size + location[2]
+
+    def _set_blob_location(self, digest: bytes, location: Location) -> None:
+        previous = self._blobs.get(digest)
+        if previous is not None:
+            self._live_bytes[previous[0]] -= _RECORD_HEADER.size + previous[2]
+        self._blobs[digest] = location
+        self._live_bytes[location[0]] = self._live_bytes.get(location[0], 0) + _RECORD_HEADER.size + location[2]
+
+    def _apply_template(self, key: str, location: Location, template: Optional[Template]) -> None:
+        previous = self._template_locations.get(key)
+        if previous is not None:
+            (no, _, length), old_template = previous
+            self._live_bytes[no] -= _RECORD_HEADER.size + length
+            if old_template is not None and template is None:
+                self._templates.remove(old_template)
+        self._template_locations[key] = (location, template)
+        self._live_bytes[location[0]] = self._live_bytes.get(location[0], 0) + _RECORD_HEADER.size + location[2]
+        if template is not None:
+            self._templates.save(template)
+
+    # --- внутреннее: уплотнение ---
+
+    def _copy_forward(self, no: int) -> None:
+        for digest, location in list(self._blobs.items()):
+            if location[0] == no:
+                self._set_blob_location(digest, self._append(RECORD_BLOB, self._read(location)))
+        for report_id, location in list(self._index.items()):
+            if location[0] == no:
+                self._set_report_location(report_id, self._append(RECORD_REPORT, self._read(location)))
+        for report_id, locations in list(self._revisions.items()):
+            for version, location in enumerate(list(locations), start=1):
+                if location[0] == no:
+                    self._add_revision(report_id, self._append(RECORD_REVISION, self._read(location)), version)
+        for key, (location, template) in list(self._template_locations.items()):
+            if location[0] == no:
+                record_type = RECORD_TEMPLATE if template is not None else RECORD_TEMPLATE_DELETE
+                new_location = self._append(record_type, self._read(location))
+                self._apply_template(key, new_location, template)
+
+    def _drop_segment(self, no: int) -> None:
+        mapped = self._maps.pop(no, None)
+        if mapped is not None:
+            mapped.close()
+        self._live_bytes.pop(no, None)
+        self._total_bytes.pop(no, None)
+        self._segment_path(no).unlink(missing_ok=True)
+
+    def _compaction_loop(self, interval: float) -> None:
+        while not self._stop_compaction.wait(interval):
+            self.compact()
+
+    # --- внутреннее: загрузка ---
+
+    def _load(self) -> None:
+        """Восстановить индекс: контрольная точка + дочитывание журнала после неё"""
+        for path in self.directory.glob(f"{self.DICTIONARY_PREFIX}*{self.DICTIONARY_SUFFIX}"):
+            stem = path.name[len(self.DICTIONARY_PREFIX):-len(self.DICTIONARY_SUFFIX)]
+            if stem.isdigit():
+                self._codec.add_dictionary(int(stem), path.read_bytes())
+        segments = self._segment_numbers()
+        start_no, start_offset = self._read_checkpoint(segments)
+        search = None
+        if start_no:
+            search = SearchIndex.load(self.directory / self.SEARCH_INDEX_NAME, stamp=(start_no, start_offset))
+        if search is not None:
+            self._search = search
+        replayed: Set[str] = set()
+        revisions: Dict[str, Dict[int, Location]] = {}
+        for no in segments:
+            if no < start_no:
+                continue
+            self._replay_segment(no, start_offset if no == start_no else 0, segments[-1] == no, replayed, revisions)
+        # Уплотнение переносит прежние версии в конец журнала — после более новых; порядок — по номеру версии
+        for report_id, versions in revisions.items():
+            for version in sorted(versions):
+                self._add_revision(report_id, versions[version], version)
+        for no in segments:
+            self._total_bytes[no] = self._segment_path(no).stat().st_size
+        # Заключения разбираются только после чтения всего журнала: после уплотнения
+        # общий текст может лежать дальше ссылающегося на него заключения
+        if search is None:
+            # Индекс поиска не сохранён или устарел — строим заново по актуальным записям
+            self._search = SearchIndex()
+            replayed = set(self._index)
+        for report_id in replayed:
+            self._search.add(self._decode(self._index[report_id]))
+        self._open_active(segments[-1] if segments else 1)
+        if self.compression and not self._codec.version:
+            self.rebuild_compression_dictionary()
+        if not segments:
+            for template in default_templates():
+                self.save_template(template)
+        else:
+            for template in self._templates.all():
+                self.template_cache.put(template)
+
+    def _read_checkpoint(self, segments: List[int]) -> Tuple[int, int]:
+        path = self.directory / self.CHECKPOINT_NAME
+        if not path.exists():
+            return 0, 0
+        data = path.read_bytes()
+        try:
+            magic, version, active_no, active_offset, count = _CHECKPOINT_HEADER.unpack_from(data, 0)
+            if magic != _CHECKPOINT_MAGIC or version != _CHECKPOINT_VERSION:
+                return 0, 0
+            pos = _CHECKPOINT_HEADER.size
+            index: Dict[str, Location] = {}
+            for _ in range(count):
+                id_length, no, offset, length = _CHECKPOINT_ENTRY.unpack_from(data, pos)
+                pos += _CHECKPOINT_ENTRY.size
+                index[data[pos:pos + id_length].decode("utf-8")] = (no, offset, length)
+                pos += id_length
+            (blob_count,) = _U32.unpack_from(data, pos)
+            pos += _U32.size
+            blobs: Dict[bytes, Location] = {}
+            for _ in range(blob_count):
+                digest, no, offset, length = _CHECKPOINT_BLOB.unpack_from(data, pos)
+                pos += _CHECKPOINT_BLOB.size
+                blobs[digest] = (no, offset, length)
+            (history_count,) = _U32.unpack_from(data, pos)
+            pos += _U32.size
+            revisions: Dict[str, List[Location]] = {}
+            for _ in range(history_count):
+                id_length, version_count = _CHECKPOINT_HISTORY.unpack_from(data, pos)
+                pos += _CHECKPOINT_HISTORY.size
+                report_id = data[pos:pos + id_length].decode("utf-8")
+                pos += id_length
+                revisions[report_id] = [
+                    _CHECKPOINT_LOCATION.unpack_from(data, pos + i * _CHECKPOINT_LOCATION.size)
+                    for i in range(version_count)
+                ]
+                pos += version_count * _CHECKPOINT_LOCATION.size
+            templates = json.loads(data[pos:].decode("utf-8"))
+        except (struct.error, UnicodeDecodeError, ValueError):
+            # Повреждённая контрольная точка — перечитываем журнал целиком
+            return 0, 0
+        revision_locations = itertools.chain.from_iterable(revisions.values())
+        if any(loc[0] not in segments for loc in itertools.chain(index.values(), blobs.values(), revision_locations)):
+            return 0, 0
+        for report_id, location in index.items():
+            self._set_report_location(report_id, location)
+        for digest, location in blobs.items():
+            self._set_blob_location(digest, location)
+        for report_id, locations in revisions.items():
+            for location in locations:
+                self._add_revision(report_id, location)
+        for item in templates:
+            raw = item["template"]
+            template = None if raw is None else Template(
+                name=raw["name"], modality=Modality(raw["modality"]), replacements=raw["replacements"]
+            )
+            self._apply_template(item["key"], tuple(item["location"]), template)
+        return active_no, active_offset
+
+    def _replay_segment(
+        self, no: int, offset: int, is_last: bool, replayed: Set[str], revisions: Dict[str, Dict[int, Location]]
+    ) -> None:
+        """Дочитать записи сегмента в индекс; id заключений складываются в replayed,
+        положения версий — в revisions (более поздняя копия версии заменяет прежнюю)"""
+        path = self._segment_path(no)
+        with open(path, "rb") as f:
+            data = f.read()
+        for record_type, location, payload in self._iter_records(no, data, offset):
+            if record_type == RECORD_REPORT:
+                report_id, _ = _unpack_str(payload, 0)
+                self._set_report_location(report_id, location)
+                replayed.add(report_id)
+            elif record_type == RECORD_BLOB:
+                self._set_blob_location(bytes(payload[:DIGEST_SIZE]), location)
+            elif record_type == RECORD_REVISION:
+                report_id, version = _revision_key(payload)
+                revisions.setdefault(report_id, {})[version] = location
+            else:
+                template = _decode_template(payload)
+                key = template_key(template.modality, template.name)
+                self._apply_template(key, location, template if record_type == RECORD_TEMPLATE else None)
+            offset = location[1] + _RECORD_HEADER.size + location[2]
+        if offset < len(data):
+            if not is_last:
+                raise CorruptedLogError(
+                    f"Сегмент {path.name} повреждён: запись со смещения {offset} не читается, "
+                    f"после неё {len(data) - offset} байт"
+                )
+            # Недописанная запись после сбоя — отрезаем
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+    @staticmethod
+    def _iter_records(no: int, data: bytes, offset: int) -> Iterator[Tuple[int, Location, memoryview]]:
+        view = memoryview(data)
+        while offset + _RECORD_HEADER.size <= len(data):
+            record_type, length, crc = _RECORD_HEADER.unpack_from(data, offset)
+            start = offset + _RECORD_HEADER.size
+            payload = view[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            yield record_type, (no, offset, length), payload
+            offset = start + length
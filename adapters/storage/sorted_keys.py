@@ -0,0 +1,31 @@
+"""Упорядоченный список ключей для постраничного обхода адаптеров хранения"""
+
+from bisect import bisect_right
+from typing import List, Optional
+
+
+class SortedKeys:
+    """Ключи в порядке возрастания, досортировываемые лениво.
+
+    Новые ключи копятся отдельно и вливаются при первом чтении: timsort
+    сливает отсортированную часть и отсортированную добавку за линейное время,
+    поэтому массовая загрузка не пересортировывает список на каждой вставке.
+    """
+
+    def __init__(self):
+        self._sorted: List[str] = []
+        self._pending: List[str] = []
+
+    def add(self, key: str) -> None:
+        """Добавить ключ, которого ещё нет"""
+        self._pending.append(key)
+
+    def after(self, key: Optional[str], count: int) -> List[str]:
+        """До count ключей строго больше key (None — с начала)"""
+        if self._pending:
+            self._pending.sort()
+            self._sorted.extend(self._pending)
+            self._sorted.sort()
+            self._pending = []
+        start = 0 if key is None else bisect_right(self._sorted, key)
+        return self._sorted[start:start + count]
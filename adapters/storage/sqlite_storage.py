@@ -0,0 +1,549 @@
+"""SQLite реализация хранилища"""
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import itertools
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from ports.storage_port import StorageAdapter
+from adapters.storage.blob_store import BLOB_MIN_SIZE, DedupStats, blob_ref
+from adapters.storage.default_templates import default_templates
+from adapters.storage.text_codec import TextCodec, build_dictionary, plugin_seed_texts
+from domain.entities import Modality, Report, Template
+from domain.report_history import KEYFRAME_INTERVAL, Revision, keyframe_base, latest, make_revision, replay
+from domain.template_cache import TemplateCache, default_template_cache
+from domain.text_search import report_tokens, tokenize
+
+# Версия схемы (PRAGMA user_version); при её изменении в _init_schema добавляется миграция
+SCHEMA_VERSION = 1
+
+_MODALITY_VALUES = frozenset(m.value for m in Modality)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id TEXT PRIMARY KEY,
+    modality TEXT NOT NULL,
+    original_text TEXT NOT NULL,
+    processed_text TEXT,
+    template_name TEXT
+);
+-- (modality, id): выборка по модальности и постраничный обход модальности по ID
+DROP INDEX IF EXISTS idx_reports_modality;
+CREATE INDEX IF NOT EXISTS idx_reports_modality_id ON reports(modality, id);
+CREATE INDEX IF NOT EXISTS idx_reports_template_name ON reports(template_name);
+
+CREATE TABLE IF NOT EXISTS templates (
+    modality TEXT NOT NULL,
+    name TEXT NOT NULL,
+    replacements TEXT NOT NULL,
+    PRIMARY KEY (modality, name)
+);
+CREATE INDEX IF NOT EXISTS idx_templates_name ON templates(name);
+
+-- Полнотекстовый индекс: FTS5 по нормализованным токенам (domain.text_search), rowid = reports.rowid
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(tokens, tokenize = 'unicode61 remove_diacritics 0');
+
+-- История версий (domain.report_history): ключевые версии целиком, остальные — дельтой от предыдущей
+CREATE TABLE IF NOT EXISTS report_revisions (
+    report_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    keyframe INTEGER NOT NULL,
+    modality TEXT NOT NULL,
+    original_text TEXT NOT NULL,
+    processed_text TEXT,
+    template_name TEXT,
+    PRIMARY KEY (report_id, version)
+) WITHOUT ROWID;
+
+-- Словари сжатия текста (adapters.storage.text_codec): тексты в reports и report_revisions
+-- хранятся строкой или BLOB, сжатым словарём своей версии
+CREATE TABLE IF NOT EXISTS compression_dictionaries (
+    version INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+
+-- Общие тексты (adapters.storage.blob_store): одинаковые тексты заключений хранятся один раз,
+-- в reports и report_revisions вместо них — ссылка (метка + хеш), она же ключ здесь
+CREATE TABLE IF NOT EXISTS text_blobs (
+    hash BLOB PRIMARY KEY,
+    data NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _resolved(column: str) -> str:
+    """Текст столбца: ссылка на общий текст подменяется им прямо в запросе (строка и BLOB не равны ссылке)"""
+    return f"COALESCE((SELECT data FROM text_blobs WHERE hash = {column}), {column})"
+
+
+# Запросы — константные строки: sqlite3 держит подготовленные выражения в кэше
+# соединения и переиспользует их, не разбирая SQL повторно
+_SAVE_REPORT = (
+    "INSERT INTO reports (id, modality, original_text, processed_text, template_name) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET modality = excluded.modality, original_text = excluded.original_text, "
+    "processed_text = excluded.processed_text, template_name = excluded.template_name"
+)
+_REPORT_COLUMNS = f"id, modality, {_resolved('original_text')}, {_resolved('processed_text')}, template_name"
+_GET_REPORT = f"SELECT {_REPORT_COLUMNS} FROM reports WHERE id = ?"
+# Список ID передаётся одним JSON-параметром: текст запроса не зависит от длины списка
+_GET_REPORTS = f"SELECT {_REPORT_COLUMNS} FROM reports WHERE id IN (SELECT value FROM json_each(?))"
+_ALL_REPORTS = f"SELECT {_REPORT_COLUMNS} FROM reports ORDER BY rowid"
+# Порядок rowid сохраняет порядок первого сохранения (upsert не меняет rowid)
+# Постраничная выборка по ключу: WHERE id > последний ID вместо OFFSET
+_REPORTS_PAGE = f"SELECT {_REPORT_COLUMNS} FROM reports ORDER BY id LIMIT ?"
+_REPORTS_PAGE_AFTER = f"SELECT {_REPORT_COLUMNS} FROM reports WHERE id > ? ORDER BY id LIMIT ?"
+_REPORTS_PAGE_BY_MODALITY = f"SELECT {_REPORT_COLUMNS} FROM reports WHERE modality = ? ORDER BY id LIMIT ?"
+_REPORTS_PAGE_BY_MODALITY_AFTER = (
+    f"SELECT {_REPORT_COLUMNS} FROM reports WHERE modality = ? AND id > ? ORDER BY id LIMIT ?"
+)
+_SAVE_TEMPLATE = (
+    "INSERT INTO templates (modality, name, replacements) VALUES (?, ?, ?) "
+    "ON CONFLICT(modality, name) DO UPDATE SET replacements = excluded.replacements"
+)
+_TEMPLATE_COLUMNS = "modality, name, replacements"
+_GET_TEMPLATE_BY_KEY = f"SELECT {_TEMPLATE_COLUMNS} FROM templates WHERE modality = ? AND name = ?"
+_GET_TEMPLATE_BY_NAME = f"SELECT {_TEMPLATE_COLUMNS} FROM templates WHERE name = ? ORDER BY rowid LIMIT 1"
+_ALL_TEMPLATES = f"SELECT {_TEMPLATE_COLUMNS} FROM templates ORDER BY rowid"
+_TEMPLATES_BY_MODALITY = f"SELECT {_TEMPLATE_COLUMNS} FROM templates WHERE modality = ? ORDER BY rowid"
+_DELETE_TEMPLATE = "DELETE FROM templates WHERE modality = ? AND name = ?"
+_DELETE_REPORT_TOKENS = "DELETE FROM reports_fts WHERE rowid = (SELECT rowid FROM reports WHERE id = ?)"
+_INSERT_REPORT_TOKENS = "INSERT INTO reports_fts (rowid, tokens) SELECT rowid, ? FROM reports WHERE id = ?"
+# Текущая версия и номер последней версии в истории — перед записью новой версии
+_LAST_VERSION = "(SELECT MAX(version) FROM report_revisions WHERE report_id = reports.id)"
+_GET_REPORT_WITH_VERSION = f"SELECT {_REPORT_COLUMNS}, {_LAST_VERSION} FROM reports WHERE id = ?"
+_GET_REPORTS_WITH_VERSION = (
+    f"SELECT {_REPORT_COLUMNS}, {_LAST_VERSION} FROM reports WHERE id IN (SELECT value FROM json_each(?))"
+)
+_INSERT_REVISION = (
+    "INSERT INTO report_revisions (report_id, version, keyframe, modality, original_text, processed_text, "
+    "template_name) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_REVISION_COLUMNS = (
+    f"version, keyframe, modality, {_resolved('original_text')}, {_resolved('processed_text')}, template_name"
+)
+_GET_REVISIONS = f"SELECT {_REVISION_COLUMNS} FROM report_revisions WHERE report_id = ? ORDER BY version"
+_GET_REVISIONS_RANGE = (
+    f"SELECT {_REVISION_COLUMNS} FROM report_revisions WHERE report_id = ? AND version BETWEEN ? AND ? ORDER BY version"
+)
+_ALL_DICTIONARIES = "SELECT version, data FROM compression_dictionaries ORDER BY version"
+_INSERT_DICTIONARY = "INSERT INTO compression_dictionaries (version, data) VALUES (?, ?)"
+# Образец для словаря — последние сохранённые заключения
+_RECENT_TEXTS = (
+    f"SELECT {_resolved('original_text')}, {_resolved('processed_text')} FROM reports ORDER BY rowid DESC LIMIT ?"
+)
+_INSERT_BLOB = "INSERT OR IGNORE INTO text_blobs (hash, data) VALUES (?, ?)"
+# Все значения текстовых полей: ссылки среди них — живые общие тексты
+_TEXT_VALUES = (
+    "SELECT original_text AS ref FROM reports UNION ALL SELECT processed_text FROM reports "
+    "UNION ALL SELECT original_text FROM report_revisions UNION ALL SELECT processed_text FROM report_revisions"
+)
+_COLLECT_GARBAGE = f"DELETE FROM text_blobs WHERE hash NOT IN (SELECT ref FROM ({_TEXT_VALUES}) WHERE ref IS NOT NULL)"
+_DEDUP_STATS = (
+    "SELECT COUNT(*), COALESCE(SUM(refs), 0), COALESCE(SUM(size * refs), 0), COALESCE(SUM(size), 0) FROM ("
+    f"SELECT COUNT(*) AS refs, LENGTH(CAST(b.data AS BLOB)) AS size FROM ({_TEXT_VALUES}) t "
+    "JOIN text_blobs b ON b.hash = t.ref GROUP BY b.hash)"
+)
+_SEARCH_COLUMNS = (
+    f"r.id, r.modality, {_resolved('r.original_text')}, {_resolved('r.processed_text')}, r.template_name"
+)
+_SEARCH_REPORTS = (
+    f"SELECT {_SEARCH_COLUMNS} FROM reports_fts "
+    "JOIN reports r ON r.rowid = reports_fts.rowid WHERE reports_fts MATCH ? "
+    "ORDER BY bm25(reports_fts), r.rowid LIMIT ?"
+)
+_SEARCH_REPORTS_BY_MODALITY = (
+    f"SELECT {_SEARCH_COLUMNS} FROM reports_fts "
+    "JOIN reports r ON r.rowid = reports_fts.rowid WHERE reports_fts MATCH ? AND r.modality = ? "
+    "ORDER BY bm25(reports_fts), r.rowid LIMIT ?"
+)
+
+
+class SqliteStorage(StorageAdapter):
+    """Постоянное хранилище на stdlib sqlite3 (режим WAL).
+
+    Соединение одно на хранилище и защищено блокировкой, поэтому адаптером можно
+    пользоваться из нескольких потоков. Шаблоны по умолчанию записываются при
+    создании новой базы.
+
+    Тексты заключений и версий сжимаются zlib со словарём (compression=True):
+    первый словарь строится из текстов плагинов и уже сохранённых заключений,
+    rebuild_compression_dictionary() добавляет новую версию по свежим заключениям.
+
+    Тексты от BLOB_MIN_SIZE символов хранятся в text_blobs по хешу содержимого
+    (deduplication=True): одинаковые «нормы» и ключевая версия истории, равная
+    текущему тексту, занимают место один раз. collect_garbage() удаляет тексты
+    без ссылок, dedup_stats() — статистика дедупликации.
+    """
+
+    # Заключений в одной транзакции save_reports и ID в одном запросе get_reports
+    SAVE_CHUNK_SIZE = 1000
+    GET_CHUNK_SIZE = 1000
+    # Каждая HISTORY_KEYFRAME_INTERVAL-я версия заключения хранится целиком, остальные — дельтой
+    HISTORY_KEYFRAME_INTERVAL = KEYFRAME_INTERVAL
+    # Заключений в образце для словаря сжатия
+    COMPRESSION_SAMPLE_SIZE = 2000
+    # Сколько последних ссылок на общие тексты помнить, чтобы не сжимать и не вставлять их повторно
+    KNOWN_BLOBS_CACHE_SIZE = 10_000
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        template_cache: Optional[TemplateCache] = None,
+        compression: bool = True,
+        deduplication: bool = True,
+    ):
+        self.path = str(path)
+        self.template_cache = template_cache if template_cache is not None else default_template_cache
+        self.compression = compression
+        self.deduplication = deduplication
+        self._codec = TextCodec()
+        # Ссылки на общие тексты, которые точно есть в text_blobs (сбрасывается сборкой мусора)
+        self._known_blobs: "OrderedDict[bytes, None]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # В WAL режим NORMAL не теряет согласованность, но избавляет от fsync на каждую транзакцию
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        if self.compression and not self._codec.version:
+            # Первый словарь: тексты плагинов и уже сохранённые (несжатые) заключения
+            self.rebuild_compression_dictionary()
+
+    def _init_schema(self):
+        """Создание таблиц, загрузка словарей сжатия, шаблоны по умолчанию для новой базы"""
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            self._conn.executescript(_SCHEMA)
+            for dictionary_version, data in self._conn.execute(_ALL_DICTIONARIES).fetchall():
+                self._codec.add_dictionary(dictionary_version, data)
+        if version == 0:
+            with self._lock, self._conn:
+                self._conn.executemany(_SAVE_TEMPLATE, [self._template_row(t) for t in default_templates()])
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        elif version != SCHEMA_VERSION:
+            # Миграций пока нет: схема первой версии сразу создаёт все таблицы
+            raise ValueError(f"Неподдерживаемая версия схемы базы: {version} (ожидается {SCHEMA_VERSION})")
+
+    def rebuild_compression_dictionary(self, sample_size: Optional[int] = None) -> int:
+        """Построить новую версию словаря по текстам плагинов и последним заключениям.
+
+        Новые записи сжимаются новым словарём, старые читаются своим. Возвращает номер версии.
+        """
+        with self._lock:
+            rows = self._conn.execute(_RECENT_TEXTS, (sample_size or self.COMPRESSION_SAMPLE_SIZE,)).fetchall()
+            samples = plugin_seed_texts()
+            for original_text, processed_text in rows:
+                samples.append(self._codec.decode(original_text))
+                if processed_text is not None:
+                    samples.append(self._codec.decode(processed_text))
+            version = self._codec.version + 1
+            data = build_dictionary(samples)
+            with self._conn:
+                self._conn.execute(_INSERT_DICTIONARY, (version, data))
+            self._codec.add_dictionary(version, data)
+        return version
+
+    # --- заключения ---
+
+    def save_report(self, report: Report) -> None:
+        """Сохранить заключение (изменённый текст добавляет версию в историю)"""
+        blobs: Dict[bytes, Union[str, bytes]] = {}
+        with self._lock:
+            with self._conn:
+                row = self._conn.execute(_GET_REPORT_WITH_VERSION, (report.id,)).fetchone()
+                revision = self._next_revision(report, *self._current_version(row))
+                self._conn.execute(_DELETE_REPORT_TOKENS, (report.id,))
+                self._conn.execute(_SAVE_REPORT, self._report_row(report, blobs))
+                self._conn.execute(_INSERT_REPORT_TOKENS, self._tokens_row(report))
+                if revision is not None:
+                    self._conn.execute(_INSERT_REVISION, self._revision_row(report.id, revision, blobs))
+                self._write_blobs(blobs)
+            self._remember_blobs(blobs)
+
+    def save_reports(self, reports: Iterable[Report], chunk_size: Optional[int] = None) -> None:
+        """Сохранить пачку заключений: по транзакции на каждые chunk_size заключений.
+
+        При ошибке откатывается только текущая порция; между порциями блокировка
+        отпускается, и другие потоки успевают читать и писать.
+        """
+        iterator = iter(reports)
+        while True:
+            reports_chunk = list(itertools.islice(iterator, chunk_size or self.SAVE_CHUNK_SIZE))
+            if not reports_chunk:
+                return
+            # Повтор ID внутри порции: в таблице остаётся последняя версия, в истории — все (как при save_report)
+            chunk = {report.id: report for report in reports_chunk}
+            blobs: Dict[bytes, Union[str, bytes]] = {}
+            report_rows = [self._report_row(report, blobs) for report in chunk.values()]
+            token_rows = [self._tokens_row(report) for report in chunk.values()]
+            ids = json.dumps(list(chunk), ensure_ascii=False)
+            with self._lock:
+                with self._conn:
+                    current = {row[0]: self._current_version(row)
+                               for row in self._conn.execute(_GET_REPORTS_WITH_VERSION, (ids,))}
+                    revision_rows = []
+                    for report in reports_chunk:
+                        revision = self._next_revision(report, *current.get(report.id, (None, None)))
+                        if revision is not None:
+                            revision_rows.append(self._revision_row(report.id, revision, blobs))
+                            current[report.id] = (report, revision.version)
+                    self._conn.executemany(_DELETE_REPORT_TOKENS, ((report_id,) for report_id in chunk))
+                    self._conn.executemany(_SAVE_REPORT, report_rows)
+                    self._conn.executemany(_INSERT_REPORT_TOKENS, token_rows)
+                    self._conn.executemany(_INSERT_REVISION, revision_rows)
+                    self._write_blobs(blobs)
+                self._remember_blobs(blobs)
+
+    def get_report(self, report_id: str) -> Optional[Report]:
+        """Получить заключение по ID"""
+        with self._lock:
+            row = self._conn.execute(_GET_REPORT, (report_id,)).fetchone()
+        return self._report_from_row(row) if row else None
+
+    def get_reports(self, report_ids: Iterable[str]) -> List[Optional[Report]]:
+        """Получить заключения по списку ID: один запрос на GET_CHUNK_SIZE ID (None для отсутствующих)"""
+        report_ids = list(report_ids)
+        rows = {}
+        for start in range(0, len(report_ids), self.GET_CHUNK_SIZE):
+            chunk = json.dumps(report_ids[start:start + self.GET_CHUNK_SIZE], ensure_ascii=False)
+            with self._lock:
+                rows.update((row[0], row) for row in self._conn.execute(_GET_REPORTS, (chunk,)))
+        return [self._report_from_row(rows[report_id]) if report_id in rows else None for report_id in report_ids]
+
+    def get_all_reports(self) -> List[Report]:
+        """Получить все заключения"""
+        with self._lock:
+            rows = self._conn.execute(_ALL_REPORTS).fetchall()
+        return [self._report_from_row(row) for row in rows]
+
+    def iter_reports(
+        self, modality: Optional[Modality] = None, after_id: Optional[str] = None, batch_size: int = 500
+    ) -> Iterator[Report]:
+        """Обойти заключения по возрастанию ID: по запросу на пачку, блокировка только на время запроса"""
+        if batch_size <= 0:
+            raise ValueError("batch_size должен быть положительным")
+        last_id = after_id
+        while True:
+            with self._lock:
+                if modality is None:
+                    if last_id is None:
+                        rows = self._conn.execute(_REPORTS_PAGE, (batch_size,)).fetchall()
+                    else:
+                        rows = self._conn.execute(_REPORTS_PAGE_AFTER, (last_id, batch_size)).fetchall()
+                elif last_id is None:
+                    rows = self._conn.execute(_REPORTS_PAGE_BY_MODALITY, (modality.value, batch_size)).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        _REPORTS_PAGE_BY_MODALITY_AFTER, (modality.value, last_id, batch_size)
+                    ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._report_from_row(row)
+            last_id = rows[-1][0]
+
+    def search_reports(self, query: str, modality: Optional[Modality] = None, limit: int = 20) -> List[Report]:
+        """Полнотекстовый поиск через FTS5 (все слова запроса, ранжирование bm25)"""
+        terms = dict.fromkeys(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+        # Токены состоят только из букв и цифр; в кавычках FTS5 не разбирает их как операторы
+        match = " ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            if modality is None:
+                rows = self._conn.execute(_SEARCH_REPORTS, (match, limit)).fetchall()
+            else:
+                rows = self._conn.execute(_SEARCH_REPORTS_BY_MODALITY, (match, modality.value, limit)).fetchall()
+        return [self._report_from_row(row) for row in rows]
+
+    def get_report_history(self, report_id: str) -> List[Report]:
+        """Все версии заключения от первой к текущей"""
+        with self._lock:
+            rows = self._conn.execute(_GET_REVISIONS, (report_id,)).fetchall()
+        return replay(report_id, (self._revision_from_row(row) for row in rows))
+
+    def get_report_at(self, report_id: str, version: int) -> Optional[Report]:
+        """Версия заключения: читается от ближайшей ключевой версии, не вся история"""
+        if version < 1:
+            return None
+        start = keyframe_base(version, self.HISTORY_KEYFRAME_INTERVAL)
+        with self._lock:
+            rows = self._conn.execute(_GET_REVISIONS_RANGE, (report_id, start, version)).fetchall()
+        if not rows or rows[-1][0] != version:
+            return None
+        return latest(report_id, [self._revision_from_row(row) for row in rows])
+
+    # --- общие тексты ---
+
+    def dedup_stats(self) -> DedupStats:
+        """Статистика дедупликации: ссылки из заключений и истории на общие тексты (объём — хранимый)"""
+        with self._lock:
+            blobs, references, referenced_bytes, stored_bytes = self._conn.execute(_DEDUP_STATS).fetchone()
+        return DedupStats(references, blobs, referenced_bytes, stored_bytes)
+
+    def collect_garbage(self) -> int:
+        """Удалить общие тексты, на которые не ссылаются ни заключения, ни история; возвращает их число"""
+        with self._lock:
+            with self._conn:
+                removed = self._conn.execute(_COLLECT_GARBAGE).rowcount
+            self._known_blobs.clear()
+        return removed
+
+    # --- шаблоны ---
+
+    def save_template(self, template: Template) -> None:
+        """Сохранить шаблон"""
+        with self._lock, self._conn:
+            self._conn.execute(_SAVE_TEMPLATE, self._template_row(template))
+        self.template_cache.put(template)
+
+    def get_template(self, template_name: str) -> Optional[Template]:
+        """Получить шаблон по ключу modality:name или по имени"""
+        with self._lock:
+            row = self._find_template_row(template_name)
+        return self._template_from_row(row) if row else None
+
+    def delete_template(self, template_name: str, modality: Optional[Modality] = None) -> bool:
+        """Удалить шаблон"""
+        with self._lock, self._conn:
+            if modality is not None:
+                row = self._conn.execute(_GET_TEMPLATE_BY_KEY, (modality.value, template_name)).fetchone()
+            else:
+                row = self._find_template_row(template_name)
+            if row is None:
+                return False
+            self._conn.execute(_DELETE_TEMPLATE, (row[0], row[1]))
+        self.template_cache.invalidate(Modality(row[0]), row[1])
+        return True
+
+    def _find_template_row(self, template_name: str) -> Optional[Tuple]:
+        # Как в InMemoryStorage: сначала точный ключ modality:name, затем первый шаблон с таким именем
+        modality, sep, name = template_name.partition(":")
+        if sep and modality in _MODALITY_VALUES:
+            row = self._conn.execute(_GET_TEMPLATE_BY_KEY, (modality, name)).fetchone()
+            if row is not None:
+                return row
+        return self._conn.execute(_GET_TEMPLATE_BY_NAME, (template_name,)).fetchone()
+
+    def get_all_templates(self) -> List[Template]:
+        """Получить все шаблоны"""
+        with self._lock:
+            rows = self._conn.execute(_ALL_TEMPLATES).fetchall()
+        return [self._template_from_row(row) for row in rows]
+
+    def get_templates_by_modality(self, modality: Modality) -> List[Template]:
+        """Получить шаблоны для конкретной модальности (фильтр выполняется в SQL по индексу)"""
+        with self._lock:
+            rows = self._conn.execute(_TEMPLATES_BY_MODALITY, (modality.value,)).fetchall()
+        return [self._template_from_row(row) for row in rows]
+
+    def close(self) -> None:
+        """Закрыть соединение с базой"""
+        with self._lock:
+            self._conn.close()
+
+    # --- преобразование строк ---
+
+    def _encode_text(self, text: Optional[str]) -> Union[str, bytes, None]:
+        return self._codec.encode(text) if self.compression else text
+
+    def _store_text(self, text: Optional[str], blobs: Dict[bytes, Union[str, bytes]]) -> Union[str, bytes, None]:
+        """Значение текстового поля: ссылка на общий текст (сжатый текст — в blobs) или текст в записи.
+
+        По ссылке хранятся тексты, которые и после сжатия не короче BLOB_MIN_SIZE: сжатая
+        словарём «норма» и так занимает меньше ссылки с отдельной строкой text_blobs.
+        """
+        encoded = self._encode_text(text)
+        if not self.deduplication or encoded is None or len(encoded) < BLOB_MIN_SIZE:
+            return encoded
+        ref = blob_ref(text)
+        blobs[ref] = encoded
+        return ref
+
+    def _write_blobs(self, blobs: Dict[bytes, Union[str, bytes]]) -> None:
+        """Вставить общие тексты, которых может не быть в text_blobs (вызывается в транзакции записи)"""
+        rows = [item for item in blobs.items() if item[0] not in self._known_blobs]
+        if rows:
+            self._conn.executemany(_INSERT_BLOB, rows)
+
+    def _remember_blobs(self, blobs: Dict[bytes, Union[str, bytes]]) -> None:
+        """Запомнить ссылки после фиксации транзакции"""
+        for ref in blobs:
+            self._known_blobs[ref] = None
+            self._known_blobs.move_to_end(ref)
+        while len(self._known_blobs) > self.KNOWN_BLOBS_CACHE_SIZE:
+            self._known_blobs.popitem(last=False)
+
+    def _report_row(self, report: Report, blobs: Dict[bytes, Union[str, bytes]]) -> Tuple:
+        return (
+            report.id, report.modality.value, self._store_text(report.original_text, blobs),
+            self._store_text(report.processed_text, blobs), report.template_name,
+        )
+
+    def _report_from_row(self, row: Tuple) -> Report:
+        report_id, modality, original_text, processed_text, template_name = row
+        return Report(
+            id=report_id,
+            modality=Modality(modality),
+            original_text=self._codec.decode(original_text),
+            processed_text=self._codec.decode(processed_text),
+            template_name=template_name,
+        )
+
+    def _current_version(self, row: Optional[Tuple]) -> Tuple[Optional[Report], Optional[int]]:
+        """Текущая версия и номер последней версии в истории из строки _GET_REPORT(S)_WITH_VERSION"""
+        if row is None:
+            return None, None
+        return self._report_from_row(row[:5]), row[5]
+
+    def _next_revision(
+        self, report: Report, previous: Optional[Report], last_version: Optional[int]
+    ) -> Optional[Revision]:
+        """Новая версия для report (None, если заключение не изменилось)"""
+        if previous is None:
+            return make_revision(None, report, 1, self.HISTORY_KEYFRAME_INTERVAL)
+        if previous == report:
+            return None
+        return make_revision(previous, report, (last_version or 0) + 1, self.HISTORY_KEYFRAME_INTERVAL)
+
+    def _revision_row(self, report_id: str, revision: Revision, blobs: Dict[bytes, Union[str, bytes]]) -> Tuple:
+        if revision.keyframe:
+            # Ключевая версия — полный текст: обычно совпадает с текущим и ссылается на тот же общий текст
+            original_text = self._store_text(revision.original_text, blobs)
+            processed_text = self._store_text(revision.processed_text, blobs)
+        else:
+            original_text = self._encode_text(revision.original_text)
+            processed_text = self._encode_text(revision.processed_text)
+        return (
+            report_id, revision.version, int(revision.keyframe), revision.modality.value,
+            original_text, processed_text, revision.template_name,
+        )
+
+    def _revision_from_row(self, row: Tuple) -> Revision:
+        version, keyframe, modality, original_text, processed_text, template_name = row
+        return Revision(
+            version, bool(keyframe), Modality(modality), self._codec.decode(original_text),
+            self._codec.decode(processed_text), template_name,
+        )
+
+    @staticmethod
+    def _tokens_row(report: Report) -> Tuple:
+        return (" ".join(report_tokens(report)), report.id)
+
+    @staticmethod
+    def _template_row(template: Template) -> Tuple:
+        return (template.modality.value, template.name, json.dumps(template.replacements, ensure_ascii=False))
+
+    @staticmethod
+    def _template_from_row(row: Tuple) -> Template:
+        modality, name, replacements = row
+        return Template(name=name, modality=Modality(modality), replacements=json.loads(replacements))
@@ -0,0 +1,63 @@
+"""Индексы шаблонов для адаптеров хранения"""
+
+from typing import Dict, List, Optional
+
+from domain.entities import Modality, Template
+
+
+def template_key(modality: Modality, name: str) -> str:
+    """Составной ключ шаблона: modality:name (имена могут повторяться между модальностями)"""
+    return f"{modality.value}:{name}"
+
+
+class TemplateIndex:
+    """Шаблоны с вторичными индексами по имени и по модальности.
+
+    Все индексы — словари в порядке первого сохранения, поэтому выборки идут
+    в том же порядке, что и прежний линейный просмотр, а поиск стоит O(1)
+    или O(размера результата).
+    """
+
+    def __init__(self):
+        self._by_key: Dict[str, Template] = {}
+        self._by_name: Dict[str, Dict[str, Template]] = {}
+        self._by_modality: Dict[Modality, Dict[str, Template]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def save(self, template: Template) -> None:
+        """Сохранить шаблон (существующий с тем же ключом заменяется на месте)"""
+        key = template_key(template.modality, template.name)
+        self._by_key[key] = template
+        self._by_name.setdefault(template.name, {})[key] = template
+        self._by_modality.setdefault(template.modality, {})[key] = template
+
+    def resolve(self, template_name: str, modality: Optional[Modality] = None) -> Optional[Template]:
+        """Найти шаблон по ключу modality:name, по имени в модальности или по одному имени"""
+        if modality is not None:
+            return self._by_key.get(template_key(modality, template_name))
+        template = self._by_key.get(template_name)
+        if template is not None:
+            return template
+        same_name = self._by_name.get(template_name)
+        if same_name:
+            return next(iter(same_name.values()))
+        return None
+
+    def remove(self, template: Template) -> None:
+        """Удалить шаблон из всех индексов"""
+        key = template_key(template.modality, template.name)
+        if self._by_key.pop(key, None) is None:
+            return
+        for index, bucket in ((self._by_name, template.name), (self._by_modality, template.modality)):
+            entries = index[bucket]
+            del entries[key]
+            if not entries:
+                del index[bucket]
+
+    def all(self) -> List[Template]:
+        return list(self._by_key.values())
+
+    def by_modality(self, modality: Modality) -> List[Template]:
+        return list(self._by_modality.get(modality, {}).values())
@@ -0,0 +1,110 @@
+"""Сжатие текста заключений zlib с общим словарём (preset dictionary)"""
+
+import json
+import re
+import struct
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+# Окно deflate — 32 КБ: словарь длиннее zlib не использует
+DICTIONARY_SIZE = 32 * 1024
+
+PLUGINS_DIR = Path(__file__).resolve().parent.parent.parent / "plugins"
+
+# Сжатое значение: метка формата, версия словаря, поток raw deflate
+_TAG_ZLIB = 1
+_HEADER = struct.Struct("<BH")
+_WBITS = -15
+
+# Фрагменты словаря — предложения и части перечислений
+_FRAGMENT_SPLIT_RE = re.compile(r"(?<=[.;:!?\n])\s+|\{[^{}]*\}")
+
+
+def plugin_seed_texts(plugins_dir: Path = PLUGINS_DIR) -> List[str]:
+    """Строки из JSON-файлов плагинов: типовые тексты описаний и заключений"""
+    texts: List[str] = []
+
+    def collect(value) -> None:
+        if isinstance(value, str):
+            texts.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+
+    for path in sorted(plugins_dir.glob("*/*.json")):
+        try:
+            collect(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return texts
+
+
+def build_dictionary(samples: Iterable[str], size: int = DICTIONARY_SIZE) -> bytes:
+    """Словарь zlib из образцов текста.
+
+    Образцы режутся на предложения; в словарь попадают фрагменты с наибольшей
+    выгодой (число повторов × длина). zlib дешевле кодирует ближние совпадения,
+    поэтому самые выгодные фрагменты ставятся в конец словаря.
+    """
+    counts: Counter = Counter()
+    for sample in samples:
+        for fragment in _FRAGMENT_SPLIT_RE.split(sample):
+            fragment = fragment.strip()
+            if len(fragment) >= 8:
+                counts[fragment] += 1
+    chosen: List[bytes] = []
+    total = 0
+    for fragment, count in sorted(counts.items(), key=lambda item: item[1] * len(item[0]), reverse=True):
+        data = fragment.encode("utf-8") + b" "
+        if total + len(data) > size:
+            continue
+        chosen.append(data)
+        total += len(data)
+    return b"".join(reversed(chosen))
+
+
+class TextCodec:
+    """Кодирование текстовых полей для постоянных хранилищ.
+
+    encode возвращает bytes (метка, версия словаря, сжатые данные), если со словарём
+    выходит короче, иначе исходную строку — короткие тексты и старые записи хранятся
+    как есть. Словари версионируются: новые записи сжимаются последним, старые
+    читаются тем, с которым были записаны.
+    """
+
+    def __init__(self, level: int = 6):
+        self.level = level
+        self.version = 0
+        self._dictionaries: Dict[int, bytes] = {}
+
+    def add_dictionary(self, version: int, data: bytes) -> None:
+        """Зарегистрировать словарь; последний по номеру становится текущим"""
+        if not 0 < version <= 0xFFFF:
+            raise ValueError(f"Недопустимая версия словаря: {version}")
+        self._dictionaries[version] = bytes(data)
+        self.version = max(self.version, version)
+
+    def encode(self, text: Optional[str]) -> Union[str, bytes, None]:
+        """Сжать текст текущим словарём (или вернуть как есть, если сжатие не выгодно)"""
+        if not text or not self.version:
+            return text
+        data = text.encode("utf-8")
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, _WBITS, zdict=self._dictionaries[self.version])
+        packed = _HEADER.pack(_TAG_ZLIB, self.version) + compressor.compress(data) + compressor.flush()
+        return packed if len(packed) < len(data) else text
+
+    def decode(self, value: Union[str, bytes, None]) -> Optional[str]:
+        """Восстановить текст из значения encode (строки возвращаются как есть)"""
+        if value is None or isinstance(value, str):
+            return value
+        tag, version = _HEADER.unpack_from(value)
+        dictionary = self._dictionaries.get(version)
+        if tag != _TAG_ZLIB or dictionary is None:
+            raise ValueError(f"Неизвестный формат сжатого текста: метка {tag}, словарь {version}")
+        decompressor = zlib.decompressobj(_WBITS, zdict=dictionary)
+        return (decompressor.decompress(value[_HEADER.size:]) + decompressor.flush()).decode("utf-8")
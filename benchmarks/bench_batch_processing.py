@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пакетной обработки ReportService.process_reports: масштабирование по числу процессов.
+Запуск из корня проекта: python benchmarks/bench_batch_processing.py [--reports 20000] [--keys 300]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.bench_replacement import make_report, make_template
+from domain.entities import Modality, Report, Template
+from domain.services import ReportService
+from domain.template_cache import TemplateCache
+
+
+def worker_counts(limit: int):
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=20000)
+    parser.add_argument("--report-kb", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=300)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    template = Template(name="bench", modality=Modality.XRAY, replacements=make_template(rnd, args.keys))
+    texts = [make_report(rnd, args.report_kb) for _ in range(64)]
+    service = ReportService(template, template_cache=TemplateCache())
+
+    print(f"Заключений: {args.reports}, ~{args.report_kb} КБ каждое, ключей в шаблоне: {args.keys}, ядер: {os.cpu_count()}")
+    print(f"{'процессов':>9} {'время, с':>9} {'заключений/с':>13} {'ускорение':>10}")
+    baseline = None
+    for workers in worker_counts(args.max_workers):
+        reports = (Report(id=str(i), modality=Modality.XRAY, original_text=texts[i % len(texts)]) for i in range(args.reports))
+        start = time.perf_counter()
+        for _ in service.process_reports(reports, workers=workers, chunk_size=args.chunk_size):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>9} {elapsed:>9.2f} {args.reports / elapsed:>13.0f} {baseline / elapsed:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
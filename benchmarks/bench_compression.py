@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк сжатия текста со словарём: размер хранилища, скорость записи и чтения.
+Запуск из корня проекта: python benchmarks/bench_compression.py [--size 50000]
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from adapters.storage.log_storage import LogStructuredStorage
+from adapters.storage.sqlite_storage import SqliteStorage
+from adapters.storage.text_codec import plugin_seed_texts
+from domain.entities import Modality, Report
+from domain.template_cache import TemplateCache
+
+DENSITIES = ["Тип плотности ACR-A", "Тип плотности ACR-В", "Тип плотности ACR-С", "Тип плотности ACR-D"]
+MODALITIES = list(Modality)
+# Заключений, по которым строится словарь в режиме «словарь по архиву»
+CORPUS_SAMPLE = 2000
+
+
+def make_reports(n: int, seed: int = 1):
+    """Заключения из типовых текстов плагинов с переменными подробностями (размеры, даты, плотность)"""
+    rnd = random.Random(seed)
+    phrases = [text for text in plugin_seed_texts() if len(text) > 40]
+    for i in range(n):
+        parts = [rnd.choice(phrases).replace("{density}", rnd.choice(DENSITIES)) for _ in range(rnd.randint(2, 5))]
+        parts.append(f"Размер {rnd.randint(3, 40)}x{rnd.randint(3, 40)} мм, контроль {rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}")
+        text = " ".join(parts)
+        yield Report(
+            id=f"{i:08d}",
+            modality=MODALITIES[i % len(MODALITIES)],
+            original_text=text,
+            processed_text=text.upper(),
+            template_name="Стандартный",
+        )
+
+
+def directory_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def open_storage(kind: str, tmp: Path, compression: bool):
+    if kind == "sqlite":
+        return SqliteStorage(tmp / "bench.db", template_cache=TemplateCache(), compression=compression)
+    return LogStructuredStorage(tmp / "log", template_cache=TemplateCache(), compression=compression)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+    n = args.size
+    text_bytes = sum(len(r.original_text.encode()) + len(r.processed_text.encode()) for r in make_reports(n))
+    print(f"{n} заключений, текста {text_bytes / 2**20:.1f} МБ")
+    print(f"{'адаптер':>8} {'режим':>18} {'размер, МБ':>11} {'сжатие':>7} {'запись, 1/с':>12} {'get, мкс':>9}")
+    rnd = random.Random(2)
+    ids = [f"{rnd.randrange(n):08d}" for _ in range(args.lookups)]
+    for kind in ("sqlite", "log"):
+        baseline = None
+        for mode in ("без сжатия", "словарь плагинов", "словарь по архиву"):
+            with tempfile.TemporaryDirectory() as tmp:
+                storage = open_storage(kind, Path(tmp), compression=mode != "без сжатия")
+                reports = make_reports(n)
+                start = time.perf_counter()
+                if mode == "словарь по архиву":
+                    storage.save_reports(itertools.islice(reports, CORPUS_SAMPLE))
+                    storage.rebuild_compression_dictionary()
+                storage.save_reports(reports)
+                t_save = time.perf_counter() - start
+                start = time.perf_counter()
+                for report_id in ids:
+                    storage.get_report(report_id)
+                t_get = (time.perf_counter() - start) / len(ids)
+                storage.close()
+                size = directory_size(Path(tmp))
+            baseline = baseline or size
+            print(f"{kind:>8} {mode:>18} {size / 2**20:>11.1f} {baseline / size:>6.1f}x "
+                  f"{n / t_save:>12.0f} {t_get * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк дедупликации одинаковых текстов: коэффициент, память InMemoryStorage, размер на диске.
+Запуск из корня проекта: python benchmarks/bench_dedup.py [--size 50000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from adapters.storage.in_memory_storage import InMemoryStorage
+from adapters.storage.log_storage import LogStructuredStorage
+from adapters.storage.sqlite_storage import SqliteStorage
+from adapters.storage.text_codec import plugin_seed_texts
+from domain.entities import Modality, Report
+from domain.template_cache import TemplateCache
+
+MODALITIES = list(Modality)
+
+
+def make_reports(n: int, norm_share: float, seed: int = 1):
+    """Заключения: доля norm_share — типовая «норма» плагина без правок, остальные — с подробностями.
+
+    Тексты собираются заново для каждого заключения, как при вводе в интерфейсе:
+    одинаковые по содержимому строки — разные объекты.
+    """
+    rnd = random.Random(seed)
+    norms = [text for text in plugin_seed_texts() if len(text) > 80]
+    for i in range(n):
+        if rnd.random() < norm_share:
+            text = "".join(list(rnd.choice(norms)))
+        else:
+            text = f"{rnd.choice(norms)} Размер {rnd.randint(3, 40)}x{rnd.randint(3, 40)} мм, контроль {rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}"
+        yield Report(
+            id=f"{i:08d}",
+            modality=MODALITIES[i % len(MODALITIES)],
+            original_text=text,
+            processed_text="".join(list(text.upper())),
+            template_name="Стандартный",
+        )
+
+
+def directory_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def measure_memory(n: int, norm_share: float, deduplication: bool):
+    """Память под заключения в InMemoryStorage (tracemalloc)"""
+    tracemalloc.start()
+    storage = InMemoryStorage(template_cache=TemplateCache(), deduplication=deduplication)
+    before = tracemalloc.get_traced_memory()[0]
+    storage.save_reports(make_reports(n, norm_share))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, 0.0, storage.dedup_stats()
+
+
+def measure_disk(kind: str, n: int, norm_share: float, deduplication: bool):
+    """Размер каталога хранилища после записи и закрытия"""
+    with tempfile.TemporaryDirectory() as tmp:
+        if kind == "sqlite":
+            storage = SqliteStorage(Path(tmp) / "bench.db", template_cache=TemplateCache(), deduplication=deduplication)
+        else:
+            storage = LogStructuredStorage(Path(tmp) / "log", template_cache=TemplateCache(), deduplication=deduplication)
+        start = time.perf_counter()
+        storage.save_reports(make_reports(n, norm_share))
+        t_save = time.perf_counter() - start
+        stats = storage.dedup_stats()
+        storage.close()
+        return directory_size(Path(tmp)), t_save, stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--norm-share", type=float, nargs="+", default=[0.3, 0.7])
+    args = parser.parse_args()
+    n = args.size
+    print(f"{n} заключений; объём: память — tracemalloc, диск — размер каталога")
+    print(f"{'норм':>5} {'хранилище':>10} {'дедупл.':>8} {'объём, МБ':>10} {'выигрыш':>8} {'коэфф.':>7} {'запись, 1/с':>12}")
+    for share in args.norm_share:
+        for kind, measure in (("память", measure_memory), ("sqlite", measure_disk), ("log", measure_disk)):
+            baseline = None
+            for deduplication in (False, True):
+                if measure is measure_memory:
+                    size, t_save, stats = measure(n, share, deduplication)
+                else:
+                    size, t_save, stats = measure(kind, n, share, deduplication)
+                baseline = baseline or size
+                ratio = f"{stats.ratio:>6.1f}x" if deduplication else f"{'-':>7}"
+                speed = f"{n / t_save:>12.0f}" if t_save else f"{'':>12}"
+                print(f"{share:>5.0%} {kind:>10} {'да' if deduplication else 'нет':>8} {size / 2**20:>10.1f} "
+                      f"{baseline / size:>7.2f}x {ratio} {speed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк памяти доменных сущностей: байт на заключение для dataclass с __dict__,
+со __slots__ и неизменяемого варианта, а также InMemoryStorage с историей версий и поиском и без них.
+Запуск из корня проекта: python benchmarks/bench_entities.py [--size 1000000]
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from adapters.storage.in_memory_storage import InMemoryStorage
+from benchmarks.bench_search import PHRASES
+from domain.entities import FrozenReport, Modality, Report
+from domain.template_cache import TemplateCache
+
+MODALITIES = list(Modality)
+TEMPLATE_NAMES = ["Стандартный", "Формализованный", "Mammo: стандарт", "DXA: стандарт"]
+
+
+@dataclass
+class DictReport:
+    """Report до перехода на __slots__: __dict__ у каждого экземпляра, имена шаблонов не интернируются"""
+    id: str
+    modality: Modality
+    original_text: str
+    processed_text: Optional[str] = None
+    template_name: Optional[str] = None
+
+
+def make_args(n: int, seed: int = 1):
+    """Аргументы конструктора: тексты из общего набора, имя шаблона — новая строка, как после чтения из базы"""
+    rnd = random.Random(seed)
+    texts = [". ".join(rnd.sample(PHRASES, 3)) for _ in range(1000)]
+    for i in range(n):
+        text = texts[i % len(texts)]
+        name = TEMPLATE_NAMES[i % len(TEMPLATE_NAMES)]
+        yield f"{i:08d}", MODALITIES[i % len(MODALITIES)], text, text, "".join(list(name))
+
+
+def measure(build) -> int:
+    """Байт, выделенных build() и живых после него (tracemalloc)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.size
+    print(f"{n} заключений (тексты общие, id и имя шаблона — свои у каждого)")
+    print(f"{'вариант':>28} {'байт на объект':>15} {'всего, МБ':>10} {'создание, с':>12}")
+    variants = [
+        ("dataclass с __dict__", DictReport),
+        ("Report (__slots__)", Report),
+        ("FrozenReport", FrozenReport),
+    ]
+    for name, cls in variants:
+        start = time.perf_counter()
+        used = measure(lambda: [cls(*fields) for fields in make_args(n)])
+        elapsed = time.perf_counter() - start
+        print(f"{name:>28} {used / n:>15.0f} {used / 2**20:>10.1f} {elapsed:>12.2f}")
+
+    def fill_storage(**options):
+        storage = InMemoryStorage(template_cache=TemplateCache(), **options)
+        storage.save_reports(Report(*fields) for fields in make_args(n))
+        return storage
+
+    # Цена истории версий и полнотекстового индекса — разница со строкой «без истории и поиска»
+    storages = [
+        ("InMemoryStorage (всё)", {}),
+        ("без истории", {"history": False}),
+        ("без поиска", {"search_index": False}),
+        ("без истории и поиска", {"history": False, "search_index": False}),
+    ]
+    for name, options in storages:
+        start = time.perf_counter()
+        used = measure(lambda: fill_storage(**options))
+        elapsed = time.perf_counter() - start
+        print(f"{name:>28} {used / n:>15.0f} {used / 2**20:>10.1f} {elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк импорта логики плагинов без UI: модули движков (engine.py) против модулей
+плагинов (plugin.py, которые тянут PySide6.QtWidgets). Каждый замер — отдельный
+процесс Python, время — от начала импорта до готового объекта движка/плагина.
+Запуск из корня проекта: python benchmarks/bench_headless_import.py [--runs 7]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+PLUGINS = ["densitometry", "mammography", "xray_constructor"]
+
+# Замер в дочернем процессе: импорт модулей и создание объектов, печатает JSON
+CHILD = r"""
+import importlib, json, sys, time
+kind, names = sys.argv[1], sys.argv[2].split(",")
+t0 = time.perf_counter()
+for name in names:
+    module = importlib.import_module(f"plugins.{name}.{kind}")
+    (module.Engine if kind == "engine" else module.Plugin)()
+t1 = time.perf_counter()
+print(json.dumps({"seconds": t1 - t0, "qt": "PySide6.QtWidgets" in sys.modules}))
+"""
+
+
+def run(kind: str, names: list) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, kind, ",".join(names)], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+    print(f"медиана {args.runs} запусков, мс")
+    print(f"{'модули':>18} {'plugin.py':>10} {'engine.py':>10} {'ускорение':>10} {'Qt в engine':>12}")
+    for names in [[name] for name in PLUGINS] + [PLUGINS]:
+        timings = {}
+        qt_loaded = False
+        for kind in ("plugin", "engine"):
+            samples = [run(kind, names) for _ in range(args.runs)]
+            timings[kind] = statistics.median(sample["seconds"] for sample in samples) * 1000
+            if kind == "engine":
+                qt_loaded = any(sample["qt"] for sample in samples)
+        label = "все" if len(names) > 1 else names[0]
+        print(f"{label:>18} {timings['plugin']:>10.1f} {timings['engine']:>10.1f} "
+              f"{timings['plugin'] / timings['engine']:>9.1f}x {'да' if qt_loaded else 'нет':>12}")
+
+
+if __name__ == "__main__":
+    main()
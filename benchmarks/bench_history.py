@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк истории версий: объём истории (полные копии против дельт) и время восстановления версии.
+Запуск из корня проекта: python benchmarks/bench_history.py [--chains 10 100 1000] [--intervals 1 16 64]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from adapters.storage.in_memory_storage import InMemoryStorage
+from adapters.storage.sqlite_storage import SqliteStorage
+from benchmarks.bench_search import PHRASES
+from domain.entities import Modality, Report
+from domain.template_cache import TemplateCache
+
+
+def make_versions(n: int, seed: int = 3):
+    """Цепочка правок одного заключения: каждая версия меняет одну-две фразы"""
+    rnd = random.Random(seed)
+    phrases = [rnd.choice(PHRASES) for _ in range(30)]
+    for _ in range(n):
+        for _ in range(rnd.randint(1, 2)):
+            phrases[rnd.randrange(len(phrases))] = rnd.choice(PHRASES)
+        text = ". ".join(phrases)
+        yield Report(id="r1", modality=Modality.XRAY, original_text=text, processed_text=text.upper())
+
+
+def history_size(storage) -> int:
+    """Символов текста в таблице истории SQLite"""
+    return storage._conn.execute(
+        "SELECT SUM(LENGTH(original_text) + COALESCE(LENGTH(processed_text), 0)) FROM report_revisions"
+    ).fetchone()[0]
+
+
+def timed_per_call(func, args, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for arg in args:
+            func(arg)
+    return (time.perf_counter() - start) / (repeat * len(args))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chains", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--intervals", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'версий':>7} {'ключевая':>9} {'полные копии, КБ':>17} {'история, КБ':>12} {'сжатие':>7} "
+          f"{'запись, мс':>11} {'версия (память), мс':>20} {'версия (SQLite), мс':>20}")
+    for n in args.chains:
+        versions = list(make_versions(n))
+        full = sum(len(r.original_text) + len(r.processed_text) for r in versions)
+        numbers = list(range(1, n + 1, max(1, n // 50)))
+        for interval in args.intervals:
+            memory = InMemoryStorage(template_cache=TemplateCache())
+            memory.HISTORY_KEYFRAME_INTERVAL = interval
+            for report in versions:
+                memory.save_report(report)
+            with tempfile.TemporaryDirectory() as tmp:
+                sqlite = SqliteStorage(Path(tmp) / "bench.db", template_cache=TemplateCache())
+                sqlite.HISTORY_KEYFRAME_INTERVAL = interval
+                start = time.perf_counter()
+                for report in versions:
+                    sqlite.save_report(report)
+                t_save = (time.perf_counter() - start) / n
+                stored = history_size(sqlite)
+                t_memory = timed_per_call(lambda v: memory.get_report_at("r1", v), numbers, args.repeat)
+                t_sqlite = timed_per_call(lambda v: sqlite.get_report_at("r1", v), numbers, args.repeat)
+                sqlite.close()
+            print(f"{n:>7} {interval:>9} {full / 1024:>17.0f} {stored / 1024:>12.0f} {full / stored:>6.1f}x "
+                  f"{t_save * 1e3:>11.2f} {t_memory * 1e3:>20.3f} {t_sqlite * 1e3:>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк горячей перезагрузки плагина: правка данных (JSON) и правка кода (.py)
+открытого плагина против перезапуска приложения до того же экрана. Перезагрузка —
+MainWindow.reload_plugin с пересозданием виджета и восстановлением формы; перезапуск —
+отдельный процесс Python: импорт, QApplication, поиск плагинов, окно, выбор плагина.
+Запуск из корня проекта: python benchmarks/bench_hot_reload.py [--runs 7]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+PLUGINS = ["densitometry", "mammography", "xray_constructor"]
+
+# Перезапуск: от старта интерпретатора до виджета выбранного плагина
+CHILD = r"""
+import sys
+import main
+from PySide6.QtWidgets import QApplication
+from ui.main_window import MainWindow
+app = QApplication(sys.argv)
+plugins, _ = main.load_plugins()
+window = MainWindow(plugins)
+window._on_plugin_selected(next(p for p in plugins if p.manifest.directory.name == sys.argv[1]))
+app.processEvents()
+"""
+
+
+def restart_seconds(name: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", CHILD, name], cwd=PROJECT_ROOT, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def reload_seconds(window, name: str, kind: str, app) -> float:
+    start = time.perf_counter()
+    if not window.reload_plugin(name, kind):
+        raise RuntimeError(f"перезагрузка {name} не удалась")
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    from PySide6.QtWidgets import QApplication
+    from core.plugin_loader import LazyPlugin, read_manifest
+    from core.plugin_reload import CHANGE_CODE, CHANGE_DATA
+    from ui.main_window import MainWindow
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"медиана {args.runs} запусков, мс")
+    print(f"{'плагин':>18} {'данные':>10} {'код':>10} {'перезапуск':>11} {'выигрыш кода':>15}")
+    for name in PLUGINS:
+        plugin = LazyPlugin(read_manifest(PROJECT_ROOT / "plugins" / name))
+        window = MainWindow([plugin])
+        window._on_plugin_selected(plugin)
+        app.processEvents()
+        data = statistics.median(reload_seconds(window, name, CHANGE_DATA, app) for _ in range(args.runs)) * 1000
+        code = statistics.median(reload_seconds(window, name, CHANGE_CODE, app) for _ in range(args.runs)) * 1000
+        restart = statistics.median(restart_seconds(name) for _ in range(args.runs)) * 1000
+        window.deleteLater()
+        print(f"{name:>18} {data:>10.1f} {code:>10.1f} {restart:>11.1f} {restart / code:>14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк импорта архива: save_report/get_report по одному против save_reports/get_reports.
+Запуск из корня проекта: python benchmarks/bench_import.py [--size 50000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from adapters.storage.in_memory_storage import InMemoryStorage
+from adapters.storage.log_storage import LogStructuredStorage
+from adapters.storage.sqlite_storage import SqliteStorage
+from benchmarks.bench_storage import make_reports
+from domain.template_cache import TemplateCache
+
+
+def open_storage(kind: str, tmp: str):
+    if kind == "memory":
+        return InMemoryStorage(template_cache=TemplateCache())
+    if kind == "sqlite":
+        return SqliteStorage(Path(tmp) / "bench.db", template_cache=TemplateCache())
+    return LogStructuredStorage(Path(tmp) / "log", template_cache=TemplateCache())
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50_000)
+    args = parser.parse_args()
+    n = args.size
+    ids = [f"{i:08d}" for i in range(0, n, 3)]
+
+    print(f"{'адаптер':>8} {'по одному, 1/с':>15} {'пачкой, 1/с':>12} {'ускорение':>10} "
+          f"{'get по одному, мкс':>19} {'get_reports, мкс':>17}")
+    for kind in ("memory", "sqlite", "log"):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = open_storage(kind, tmp)
+            t_single = timed(lambda: [storage.save_report(r) for r in make_reports(n)])
+            t_get_single = timed(lambda: [storage.get_report(i) for i in ids])
+            t_get_batch = timed(lambda: storage.get_reports(ids))
+            storage.close()
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = open_storage(kind, tmp)
+            t_batch = timed(lambda: storage.save_reports(make_reports(n)))
+            storage.close()
+        print(f"{kind:>8} {n / t_single:>15.0f} {n / t_batch:>12.0f} {t_single / t_batch:>9.1f}x "
+              f"{t_get_single / len(ids) * 1e6:>19.1f} {t_get_batch / len(ids) * 1e6:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
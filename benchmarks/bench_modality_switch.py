@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк переключения модальностей в MainWindow: пересоздание виджета при каждом
+выборе (кэш на один виджет — прежнее поведение) против кэша виджетов в QStackedWidget.
+Два времени: обработчик выбора (_on_plugin_selected) и он же вместе с обработкой
+событий окна (удаление старого виджета, раскладка, отрисовка); модули плагинов
+импортируются заранее.
+Запуск из корня проекта: python benchmarks/bench_modality_switch.py [--rounds 30]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from core.plugin_loader import discover_plugins
+from ui.main_window import DEFAULT_WIDGET_CACHE_SIZE, MainWindow
+
+
+def switch_times(app, plugins, cache_size, rounds):
+    """Время каждого переключения по кругу: {имя плагина: [(обработчик, с отрисовкой), ...]}, с"""
+    window = MainWindow(plugins, widget_cache_size=cache_size)
+    window.show()
+    for plugin in plugins:  # импорт модулей и первое создание виджетов — не в замере
+        window._on_plugin_selected(plugin)
+        app.processEvents()
+    times = {plugin.get_name(): [] for plugin in plugins}
+    for _ in range(rounds):
+        for plugin in plugins:
+            start = time.perf_counter()
+            window._on_plugin_selected(plugin)
+            handled = time.perf_counter()
+            app.processEvents()
+            times[plugin.get_name()].append((handled - start, time.perf_counter() - start))
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+    app = QApplication.instance() or QApplication(sys.argv)
+    plugins, _ = discover_plugins(PROJECT_ROOT / "plugins")
+    rebuild = switch_times(app, plugins, 1, args.rounds)
+    cached = switch_times(app, plugins, DEFAULT_WIDGET_CACHE_SIZE, args.rounds)
+    print(f"медиана {args.rounds} переключений, мс: обработчик / с отрисовкой")
+    print(f"{'плагин':>16} {'пересоздание':>17} {'кэш виджетов':>17} {'ускорение обработчика':>22}")
+    for name in rebuild:
+        before = [statistics.median(sample[i] for sample in rebuild[name]) * 1000 for i in (0, 1)]
+        after = [statistics.median(sample[i] for sample in cached[name]) * 1000 for i in (0, 1)]
+        print(f"{name:>16} {before[0]:>7.2f} / {before[1]:>6.2f} {after[0]:>7.2f} / {after[1]:>6.2f} "
+              f"{before[0] / after[0]:>21.0f}x")
+
+
+if __name__ == "__main__":
+    main()
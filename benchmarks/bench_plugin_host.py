@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк движка в отдельном процессе (core/plugin_host.py): задержка build_report
+в процессе приложения и через канал к дочернему процессу, время запуска процесса
+и восстановления после его падения (процесс убит — следующий запрос запускает новый).
+Запуск из корня проекта: python benchmarks/bench_plugin_host.py [--requests 500]
+"""
+
+import argparse
+import importlib
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.plugin_host import EngineHost
+
+# Типичный запрос каждого движка
+PARAMS = {
+    "densitometry": {"spine": {"t": -2.6, "z": None, "bmd": 0.812}},
+    "mammography": {"density": "C", "pathology": "локальная_асимметрия", "side": "левая"},
+    "xray_constructor": {},
+}
+
+
+def median_ms(func, count: int) -> float:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--restarts", type=int, default=5)
+    args = parser.parse_args()
+    print(f"медиана: {args.requests} запросов, {args.restarts} запусков; мс")
+    print(f"{'движок':>18} {'в процессе':>11} {'через канал':>12} {'запуск':>8} {'после падения':>14}")
+    for name, params in PARAMS.items():
+        engine = importlib.import_module(f"plugins.{name}.engine").Engine()
+        inline = median_ms(lambda: engine.build_report(params), args.requests)
+
+        host = EngineHost(PROJECT_ROOT / "plugins" / name / "engine.py", f"plugins.{name}.engine")
+        start = time.perf_counter()
+        host.start()
+        started = (time.perf_counter() - start) * 1000
+        piped = median_ms(lambda: host.build_report(params), args.requests)
+
+        recoveries = []
+        for _ in range(args.restarts):
+            host._process.kill()
+            host._process.wait()
+            start = time.perf_counter()
+            host.build_report(params)
+            recoveries.append(time.perf_counter() - start)
+        host.close()
+        print(f"{name:>18} {inline:>11.3f} {piped:>12.3f} {started:>8.1f} "
+              f"{statistics.median(recoveries) * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк фонового прогрева виджетов: первое переключение на плагин после запуска
+без прогрева (импорт модуля, чтение JSON, create_widget) и после прогрева, а также
+повторное переключение (виджет в кэше). Каждый замер — отдельный процесс Python;
+для прогрева — его общая длительность и самый долгий шаг (на столько прогрев
+может задержать ввод пользователя).
+Запуск из корня проекта: python benchmarks/bench_prewarm.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Замер в дочернем процессе: окно показано, затем (при прогреве) шаги прогрева, затем переключения
+CHILD = r"""
+import json, sys, time
+from pathlib import Path
+from PySide6.QtWidgets import QApplication
+from core.plugin_loader import discover_plugins
+from ui.main_window import MainWindow
+
+target, prewarm = sys.argv[1], sys.argv[2] == "1"
+app = QApplication(sys.argv)
+plugins, _ = discover_plugins(Path("plugins"))
+window = MainWindow(plugins, prewarm=False)
+window.show()
+app.processEvents()
+steps = []
+if prewarm:
+    original = window._prewarm_step
+    def timed_step():
+        start = time.perf_counter()
+        original()
+        steps.append(time.perf_counter() - start)
+    window._prewarm_step = timed_step
+    start = time.perf_counter()
+    window.start_prewarm()
+    while window.prewarming:
+        app.processEvents()
+    prewarm_seconds = time.perf_counter() - start
+plugin = next(p for p in plugins if p.manifest.directory.name == target)
+other = next(p for p in plugins if p is not plugin)
+
+def switch(p):
+    start = time.perf_counter()
+    window._on_plugin_selected(p)
+    app.processEvents()
+    return time.perf_counter() - start
+
+first = switch(plugin)
+switch(other)
+again = switch(plugin)
+print(json.dumps({"first": first, "again": again, "prewarm": prewarm_seconds if prewarm else 0.0,
+                  "max_step": max(steps, default=0.0)}))
+"""
+
+
+def run(target: str, prewarm: bool) -> dict:
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    out = subprocess.run([sys.executable, "-c", CHILD, target, "1" if prewarm else "0"], cwd=PROJECT_ROOT,
+                         capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    print(f"медиана {args.runs} запусков, мс")
+    print(f"{'плагин':>18} {'первое без прогрева':>20} {'первое с прогревом':>19} {'повторное':>10} "
+          f"{'прогрев всего':>14} {'макс. шаг':>10}")
+    for target in ("densitometry", "mammography", "xray_constructor"):
+        cold = [run(target, False) for _ in range(args.runs)]
+        warm = [run(target, True) for _ in range(args.runs)]
+
+        def med(samples, key):
+            return statistics.median(sample[key] for sample in samples) * 1000
+
+        print(f"{target:>18} {med(cold, 'first'):>20.1f} {med(warm, 'first'):>19.1f} {med(cold, 'again'):>10.1f} "
+              f"{med(warm, 'prewarm'):>14.1f} {med(warm, 'max_step'):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк замены текста по шаблону: цикл str.replace по ключам против однопроходного ReplacementMatcher.
+Запуск из корня проекта: python benchmarks/bench_replacement.py [--keys 50 200 800] [--report-kb 64 1024]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from domain.replacement import ReplacementMatcher
+
+WORDS = [
+    "легкие", "без", "патологических", "изменений", "сердце", "норма", "корни", "структурны",
+    "синусы", "свободны", "диафрагма", "очаговых", "теней", "инфильтрации", "плевра", "средостение",
+    "тень", "расширена", "деформирован", "рисунок", "усилен", "справа", "слева", "в", "и", "не",
+]
+
+
+def make_template(rnd: random.Random, n_keys: int) -> dict:
+    """Синтетический шаблон: фразы из 1–4 слов с пересекающимися префиксами."""
+    replacements = {}
+    while len(replacements) < n_keys:
+        phrase = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 4)))
+        replacements[phrase] = phrase.upper()
+    return replacements
+
+
+def make_report(rnd: random.Random, size_kb: int) -> str:
+    """Длинный отчёт из словаря WORDS (примерно size_kb килобайт в UTF-8)."""
+    parts = []
+    size = 0
+    while size < size_kb * 1024:
+        word = rnd.choice(WORDS)
+        parts.append(word)
+        size += len(word.encode("utf-8")) + 1
+    return " ".join(parts)
+
+
+def naive_replace(replacements: dict, text: str) -> str:
+    """Прежняя реализация ReportService.process_report."""
+    for original, replacement in replacements.items():
+        text = text.replace(original, replacement)
+    return text
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--report-kb", type=int, nargs="+", default=[4, 256, 2048])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    print(f"{'ключей':>7} {'отчёт, КБ':>10} {'компиляция, мс':>15} {'str.replace, МБ/с':>18} {'matcher, МБ/с':>14} {'ускорение':>10}")
+    for n_keys in args.keys:
+        replacements = make_template(rnd, n_keys)
+        start = time.perf_counter()
+        matcher = ReplacementMatcher(replacements)
+        compile_ms = (time.perf_counter() - start) * 1000
+        for size_kb in args.report_kb:
+            text = make_report(rnd, size_kb)
+            mb = len(text.encode("utf-8")) / 1024 / 1024
+            t_naive = best_of(lambda: naive_replace(replacements, text), args.repeat)
+            t_matcher = best_of(lambda: matcher.replace(text), args.repeat)
+            print(
+                f"{n_keys:>7} {size_kb:>10} {compile_ms:>15.2f} {mb / t_naive:>18.1f} "
+                f"{mb / t_matcher:>14.1f} {t_naive / t_matcher:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк полнотекстового поиска: SearchIndex против построения индекса на каждый запрос (перебор).
+Запуск из корня проекта: python benchmarks/bench_search.py [--sizes 100000 1000000]
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from domain.entities import Modality, Report
+from domain.text_search import SearchIndex
+
+PHRASES = [
+    "в легких без видимых очагово-инфильтративных теней",
+    "корни структурны, легочный рисунок не изменен",
+    "синусы свободны, средостение и диафрагма без особенностей",
+    "тип плотности ACR-В, кожные покровы, сосок, ареола без особенностей",
+    "очаговых образований и микрокальцинатов не выявлено",
+    "МПКТ позвоночника снижена, T-критерий -1.2, остеопения",
+    "признаки остеопороза шейки бедра",
+    "справа в нижней доле определяется участок затенения",
+    "контуры ровные, четкие",
+    "динамическое наблюдение через 12 месяцев",
+]
+MODALITIES = list(Modality)
+SYLLABLES = ["ка", "ло", "ре", "ни", "ту", "ва", "ми", "по", "су", "де", "ры", "го"]
+QUERIES = [
+    ("редкое слово", None),
+    ("среднее + фраза", None),
+    ("частая фраза", "без особенностей"),
+    ("с модальностью", "остеопения"),
+]
+
+
+def make_vocabulary(size: int, seed: int = 2):
+    rnd = random.Random(seed)
+    return ["".join(rnd.choice(SYLLABLES) for _ in range(4)) + "ом" for _ in range(size)]
+
+
+def make_reports(n: int, vocabulary, seed: int = 1):
+    """Несколько типовых фраз и пара слов из «хвоста» словаря (распределение Ципфа)"""
+    rnd = random.Random(seed)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    for i in range(n):
+        phrases = rnd.sample(PHRASES, 3) + rnd.choices(vocabulary, cum_weights=cum_weights, k=2)
+        yield Report(id=f"{i:08d}", modality=MODALITIES[i % len(MODALITIES)], original_text=". ".join(phrases))
+
+
+def scan(reports, query: str, modality=None, limit: int = 20):
+    """Поиск без индекса: как StorageAdapter.search_reports по умолчанию"""
+    index = SearchIndex()
+    for report in reports:
+        index.add(report)
+    return index.search(query, modality, limit)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scan-limit", type=int, default=100_000, help="перебор только до этого числа заключений")
+    args = parser.parse_args()
+
+    vocabulary = make_vocabulary(50_000)
+    queries = dict(QUERIES)
+    queries["редкое слово"] = vocabulary[20_000]
+    queries["среднее + фраза"] = f"{vocabulary[50]} очаговых теней"
+    for n in args.sizes:
+        reports = list(make_reports(n, vocabulary))
+        index = SearchIndex()
+        start = time.perf_counter()
+        for report in reports:
+            index.add(report)
+        t_build = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "search.idx"
+            start = time.perf_counter()
+            index.save(path)
+            t_save = time.perf_counter() - start
+            start = time.perf_counter()
+            SearchIndex.load(path)
+            t_load = time.perf_counter() - start
+        print(f"\n{n} заключений: построение {t_build:.1f} с, сохранение {t_save:.2f} с, загрузка {t_load:.2f} с")
+        print(f"{'запрос':>16} {'найдено':>8} {'индекс, мс':>11} {'перебор, мс':>12}")
+        for title, query in queries.items():
+            modality = Modality.DENSITOMETRY if title == "с модальностью" else None
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                found = index.search(query, modality)
+            t_index = (time.perf_counter() - start) / args.repeat
+            t_scan = "-"
+            if n <= args.scan_limit:
+                start = time.perf_counter()
+                scan(reports, query, modality)
+                t_scan = f"{(time.perf_counter() - start) * 1e3:.0f}"
+            print(f"{title:>16} {len(found):>8} {t_index * 1e3:>11.2f} {t_scan:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк запуска: поиск плагинов и создание главного окна при загрузке всех модулей
+плагинов сразу (как до манифестов), по манифестам с импортом при первом выборе
+(пустой кэш поиска) и по манифестам с заполненным кэшем поиска плагинов.
+Каждый замер — отдельный процесс Python (импорты не кэшируются между замерами).
+Запуск из корня проекта: python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Замер в дочернем процессе: печатает JSON с длительностями этапов
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from PySide6.QtWidgets import QApplication
+app = QApplication(sys.argv[:1])
+t1 = time.perf_counter()
+import main
+from ui.main_window import MainWindow
+t2 = time.perf_counter()
+plugins, _ = main.load_plugins()
+if sys.argv[1] == "eager":
+    for plugin in plugins:
+        plugin.load()
+t3 = time.perf_counter()
+window = MainWindow(plugins)
+t4 = time.perf_counter()
+window._on_plugin_selected(plugins[0])
+t5 = time.perf_counter()
+print(json.dumps({"qt": t1 - t0, "app": t2 - t1, "plugins": t3 - t2, "window": t4 - t3,
+                  "first_select": t5 - t4, "total": t4 - t0}))
+"""
+
+
+def run(mode: str, cache_home: str) -> dict:
+    # Папка кэша пользователя (QStandardPaths.CacheLocation) — своя на каждый режим
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"), XDG_CACHE_HOME=cache_home)
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, mode], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    phases = ["qt", "app", "plugins", "window", "total", "first_select"]
+    print(f"медиана {args.runs} запусков, мс")
+    print(f"{'режим':>10} " + " ".join(f"{phase:>12}" for phase in phases))
+    for mode in ("eager", "lazy", "cached"):
+        samples = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as cache_home:
+                if mode == "cached":
+                    run(mode, cache_home)  # заполнить кэш поиска
+                samples.append(run(mode, cache_home))
+        medians = [statistics.median(sample[phase] for sample in samples) * 1000 for phase in phases]
+        print(f"{mode:>10} " + " ".join(f"{value:>12.1f}" for value in medians))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк адаптеров хранения: InMemoryStorage, SqliteStorage и LogStructuredStorage.
+Запуск из корня проекта: python benchmarks/bench_storage.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Корень проекта
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from adapters.storage.in_memory_storage import InMemoryStorage
+from adapters.storage.log_storage import LogStructuredStorage
+from adapters.storage.sqlite_storage import SqliteStorage
+from domain.entities import Modality, Report
+from domain.template_cache import TemplateCache
+
+TEXTS = [
+    "В легких без видимых очагово-инфильтративных теней, корни структурны, легочный рисунок не изменен, "
+    "синусы свободны, средостение и диафрагма без особенностей. Без видимой патологии в легких.",
+    "ПРАВАЯ МОЛОЧНАЯ ЖЕЛЕЗА В ДВУХ ПРОЕКЦИЯХ: Тип плотности ACR-В. Кожные покровы, сосок, ареола без особенностей.",
+    "Позвоночник (L1-L4): МПКТ 0.950 г/см², T-критерий -1.2, Z-критерий -0.4. Заключение: остеопения.",
+]
+MODALITIES = list(Modality)
+
+
+def make_reports(n: int):
+    for i in range(n):
+        yield Report(
+            id=f"{i:08d}",
+            modality=MODALITIES[i % len(MODALITIES)],
+            original_text=TEXTS[i % len(TEXTS)],
+            processed_text=TEXTS[i % len(TEXTS)],
+            template_name="Стандартный",
+        )
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def bench(name: str, storage, n: int, lookups: int) -> None:
+    t_insert, _ = timed(lambda: storage.save_reports(make_reports(n)))
+    rnd = random.Random(1)
+    ids = [f"{rnd.randrange(n):08d}" for _ in range(lookups)]
+    t_get, _ = timed(lambda: [storage.get_report(i) for i in ids])
+    t_all, _ = timed(storage.get_all_reports)
+    t_tpl, _ = timed(lambda: [storage.get_templates_by_modality(m) for m in MODALITIES * 100])
+    t_first, _ = timed(lambda: next(storage.iter_reports()))
+    t_iter, _ = timed(lambda: sum(1 for _ in storage.iter_reports(batch_size=1000)))
+    print(
+        f"{name:>10} {n:>9} {n / t_insert:>14.0f} {t_get / lookups * 1e6:>14.1f} "
+        f"{t_all:>14.2f} {t_tpl / (len(MODALITIES) * 100) * 1e6:>16.1f} {t_first * 1e3:>16.2f} {t_iter:>12.2f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'адаптер':>10} {'отчётов':>9} {'вставка, 1/с':>14} {'get_report, мкс':>14} {'get_all, с':>14} {'по модальности, мкс':>16} {'iter: первое, мс':>16} {'iter: все, с':>12}")
+    for n in args.sizes:
+        bench("memory", InMemoryStorage(template_cache=TemplateCache()), n, args.lookups)
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = SqliteStorage(Path(tmp) / "bench.db", template_cache=TemplateCache())
+            bench("sqlite", storage, n, args.lookups)
+            storage.close()
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = LogStructuredStorage(tmp, template_cache=TemplateCache())
+            bench("log", storage, n, args.lookups)
+            storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """Базовые классы для плагинов - БЕЗ зависимостей от UI"""
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Dict, Mapping, NamedTuple, Optional
 
 
 class BasePlugin(ABC):
@@ -18,6 +18,44 @@ class BasePlugin(ABC):
         pass
 
 
+class ReportText(NamedTuple):
+    """Сформированный отчёт: описание и заключение"""
+    description: str
+    conclusion: str
+
+
+class ReportEngine(ABC):
+    """Логика формирования текста плагина - без UI.
+
+    Модуль движка (plugins/<плагин>/engine.py) не импортирует PySide6: тексты можно
+    строить на сервере без графических библиотек, а виджет плагина (plugin.py)
+    только собирает параметры из полей ввода и показывает результат.
+    """
+
+    @abstractmethod
+    def get_modality(self) -> str:
+        """Код модальности (значение domain.entities.Modality)"""
+        pass
+
+    @abstractmethod
+    def build_report(self, params: Mapping[str, Any]) -> ReportText:
+        """
+        Формирует описание и заключение по параметрам исследования.
+        params — простые значения (строки, числа, списки, словари), как их
+        собирает виджет плагина; состав описан в движке. При некорректных
+        параметрах — ValueError с сообщением для пользователя.
+        """
+        pass
+
+    def split_report(self, text: str) -> ReportText:
+        """Делит отредактированный текст отчёта на описание и заключение. По умолчанию всё — описание."""
+        return ReportText(text.strip(), "")
+
+    def reload_data(self) -> None:
+        """Перечитать файлы данных плагина (шаблоны, справочники) после их изменения. По умолчанию данных нет."""
+        pass
+
+
 class ModalityPlugin(BasePlugin):
     """Базовый класс для плагинов модальностей"""
     
@@ -31,6 +69,25 @@ class ModalityPlugin(BasePlugin):
         """
         pass
 
+    def get_modality(self) -> Optional[str]:
+        """Код модальности (значение domain.entities.Modality), под которым сохраняются
+        сформированные отчёты. None — отчёты плагина не сохраняются."""
+        return None
+
+    def get_engine(self) -> Optional[ReportEngine]:
+        """Движок формирования текста (без UI). None — плагин без отдельного движка."""
+        return None
+
+    def save_state(self) -> Dict[str, Any]:
+        """Состояние формы (выбор и введённый текст) простыми значениями — переживает
+        перезагрузку плагина и пересоздание виджета. По умолчанию пусто."""
+        return {}
+
+    def restore_state(self, state: Mapping[str, Any]) -> None:
+        """Восстановить состояние из save_state после create_widget; значения, которых
+        больше нет в данных плагина, пропускаются. По умолчанию ничего не делает."""
+        pass
+
     def get_description_text(self) -> str:
         """Текст описания для горячих клавиш (описание). По умолчанию пусто."""
         return ""
@@ -0,0 +1,160 @@
+"""Кэш поиска плагинов по времени изменения и размеру файлов - БЕЗ зависимостей от UI"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+CACHE_VERSION = 1
+CACHE_FILE_NAME = "plugin_cache.json"
+
+# Подпись файла: [st_mtime_ns, st_size]; None — файла нет
+Signature = Optional[List[int]]
+
+
+def file_signature(path: Path) -> Signature:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+@dataclass(frozen=True)
+class CachedPlugin:
+    """Запись кэша о папке плагина"""
+    directory: str
+    files: Dict[str, Signature]  # подписи файлов, от которых зависит запись
+    manifest: Optional[Dict[str, Any]]  # поля манифеста; None — папка не плагин
+    class_name: Optional[str] = None  # класс Plugin, проверенный при импорте
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"files": self.files, "manifest": self.manifest, "class_name": self.class_name}
+
+
+def make_entry(plugin_dir: Path, file_names: Iterable[str], manifest: Optional[Dict[str, Any]],
+               class_name: Optional[str] = None) -> CachedPlugin:
+    """Запись о папке с подписями файлов на текущий момент"""
+    files = {name: file_signature(plugin_dir / name) for name in file_names}
+    return CachedPlugin(plugin_dir.name, files, manifest, class_name)
+
+
+class PluginDiscoveryCache:
+    """Результаты поиска плагинов между запусками (JSON в папке кэша пользователя).
+
+    Запись о папке плагина действительна, пока у её файлов (plugin.json, модуль
+    плагина) те же время изменения и размер: вместо чтения файлов — только stat.
+    Список папок берётся из кэша, пока не изменилось время изменения самой
+    plugins/ (добавление, удаление и переименование папок его меняют). Изменённые
+    записи перепроверяются автоматически; неудачные загрузки не кэшируются.
+    Кэш необязателен: нечитаемый или чужой версии файл игнорируется, ошибки записи — тоже.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._plugins_dir: Optional[str] = None
+        self._plugins_dir_signature: Signature = None
+        self._directories: Optional[List[str]] = None
+        self._entries: Dict[str, CachedPlugin] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != CACHE_VERSION:
+                return
+            entries = {
+                name: CachedPlugin(name, dict(entry["files"]), entry["manifest"], entry.get("class_name"))
+                for name, entry in data["plugins"].items()
+            }
+            plugins_dir, signature, directories = data["plugins_dir"], data["signature"], data["directories"]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+        self._plugins_dir, self._plugins_dir_signature = plugins_dir, signature
+        self._directories, self._entries = directories, entries
+
+    def directories(self, plugins_dir: Path) -> Optional[List[Path]]:
+        """Папки-кандидаты в плагины из кэша; None — plugins/ изменилась, нужно перечитать"""
+        with self._lock:
+            if (self._directories is None or self._plugins_dir != str(plugins_dir)
+                    or file_signature(plugins_dir) != self._plugins_dir_signature):
+                return None
+            return [plugins_dir / name for name in self._directories]
+
+    def set_directories(self, plugins_dir: Path, directories: Iterable[Path]) -> None:
+        """Запомнить список папок; записи о пропавших папках удаляются"""
+        names = [directory.name for directory in directories]
+        with self._lock:
+            if self._plugins_dir != str(plugins_dir):
+                self._entries.clear()
+            self._plugins_dir = str(plugins_dir)
+            self._plugins_dir_signature = file_signature(plugins_dir)
+            self._directories = names
+            for name in set(self._entries) - set(names):
+                del self._entries[name]
+            self._dirty = True
+
+    def lookup(self, plugin_dir: Path) -> Optional[CachedPlugin]:
+        """Запись о папке, если её файлы не изменились"""
+        with self._lock:
+            entry = self._entries.get(plugin_dir.name)
+        if entry is not None and all(file_signature(plugin_dir / name) == signature
+                                     for name, signature in entry.files.items()):
+            with self._lock:
+                self.hits += 1
+            return entry
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, entry: CachedPlugin) -> None:
+        """Запомнить готовую запись (make_entry)"""
+        with self._lock:
+            self._entries[entry.directory] = entry
+            self._dirty = True
+
+    def mark_validated(self, directory: str, class_name: str) -> None:
+        """Модуль плагина импортирован, класс проверен"""
+        with self._lock:
+            entry = self._entries.get(directory)
+            if entry is not None and entry.class_name != class_name:
+                self._entries[directory] = CachedPlugin(entry.directory, entry.files, entry.manifest, class_name)
+                self._dirty = True
+
+    def forget(self, directory: str) -> None:
+        with self._lock:
+            if self._entries.pop(directory, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        """Записать кэш, если он изменился (атомарно: временный файл и замена).
+
+        Записи из разных потоков идут по очереди (_save_lock): файл не пишут двое сразу,
+        и последним записывается последний снимок. put во время записи не ждёт её.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = {
+                    "version": CACHE_VERSION,
+                    "plugins_dir": self._plugins_dir,
+                    "signature": self._plugins_dir_signature,
+                    "directories": self._directories,
+                    "plugins": {name: entry.to_json() for name, entry in sorted(self._entries.items())},
+                }
+                self._dirty = False
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
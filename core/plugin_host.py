@@ -0,0 +1,356 @@
+"""Движок плагина в отдельном процессе - БЕЗ зависимостей от UI
+
+Протокол — кадры «длина (4 байта, big-endian) + pickle» по stdin/stdout дочернего
+процесса. Запрос: (id, op, имя, args, kwargs), op — OP_CALL (вызов метода движка)
+OP_GET (значение атрибута) или OP_VALUES (значения всех атрибутов). Ответ: (id, True,
+значение) или (id, False, (имя типа исключения, сообщение, traceback)). Первый кадр
+процесса — (0, True, {"methods": [...], "attributes": [...], "values": {...},
+"modality": ...}): открытые методы и атрибуты движка, значения атрибутов, которые
+передаются по каналу, и модальность.
+"""
+
+import importlib.util
+import itertools
+import pickle
+import queue
+import struct
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Mapping, Optional, Tuple
+
+# Добавляем корневую директорию проекта в sys.path (файл запускается и как скрипт дочернего процесса)
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.plugin_base import ReportEngine, ReportText
+
+OP_CALL = "call"
+OP_GET = "get"
+OP_VALUES = "values"
+
+# Сколько ждать ответа на запрос и запуска процесса, с; дольше — процесс считается зависшим
+DEFAULT_REQUEST_TIMEOUT = 5.0
+DEFAULT_START_TIMEOUT = 10.0
+# Ответ дольше бюджета не прерывается, а учитывается в HostStats.over_budget
+DEFAULT_LATENCY_BUDGET = 0.05
+# Подряд неудачных запусков, после которых процесс больше не перезапускается (до restart())
+DEFAULT_MAX_RESTARTS = 3
+
+_HEADER = struct.Struct(">I")
+
+
+class PluginHostError(RuntimeError):
+    """Процесс движка не запустился, упал или движок выбросил непредусмотренное исключение"""
+
+
+class PluginHostTimeout(PluginHostError):
+    """Движок не ответил за отведённое время; процесс остановлен и будет запущен заново"""
+
+
+class _ProcessExited(Exception):
+    pass
+
+
+def write_frame(stream: BinaryIO, message: Any) -> None:
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def read_frame(stream: BinaryIO) -> Any:
+    """Следующий кадр (EOFError — поток закрыт)"""
+    (size,) = _HEADER.unpack(_read_exact(stream, _HEADER.size))
+    return pickle.loads(_read_exact(stream, size))
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+@dataclass
+class HostStats:
+    """Счётчики процесса движка"""
+    requests: int = 0
+    over_budget: int = 0  # ответов дольше latency_budget
+    timeouts: int = 0
+    crashes: int = 0  # процесс завершился во время запроса
+    restarts: int = 0  # запусков процесса, кроме первого
+    max_latency: float = 0.0
+
+
+class EngineHost(ReportEngine):
+    """ReportEngine, который выполняется в дочернем процессе Python.
+
+    Процесс импортирует engine.py плагина и создаёт его Engine; вызовы методов
+    и чтение атрибутов движка (включая специфичные для плагина: validate_spine,
+    densities и т.п.) передаются по каналу, поэтому прокси подставляется в виджет
+    вместо обычного движка. Атрибуты движка — его данные (справочники, конфигурация),
+    меняющиеся только в reload_data: их значения приходят при запуске процесса
+    и после reload_data, а чтение атрибута берёт копию без запроса. Ошибка
+    ValueError движка (сообщение для пользователя) пробрасывается как есть,
+    остальные — PluginHostError. Упавший процесс перезапускается, и запрос
+    повторяется один раз: движки не хранят состояния между запросами. Зависший
+    процесс останавливается по timeout (PluginHostTimeout). Запросы выполняются
+    по одному; вызов из потока UI — через call_async (ui.engine_calls.call_engine).
+    """
+
+    def __init__(self, engine_path: Path, module_name: str, timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 latency_budget: float = DEFAULT_LATENCY_BUDGET, max_restarts: int = DEFAULT_MAX_RESTARTS,
+                 start_timeout: float = DEFAULT_START_TIMEOUT):
+        self.engine_path = Path(engine_path)
+        self.module_name = module_name
+        self.timeout = timeout
+        self.latency_budget = latency_budget
+        self.max_restarts = max_restarts
+        self.start_timeout = start_timeout
+        self.stats = HostStats()
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._process: Optional[subprocess.Popen] = None
+        self._replies: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+        # Первый кадр процесса: методы, атрибуты, модальность; значения атрибутов — отдельно
+        self._schema: Dict[str, Any] = {}
+        self._values: Dict[str, Any] = {}
+        self._starts = 0
+        self._failed_in_row = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # --- процесс ---
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self.running else None
+
+    def start(self) -> None:
+        """Запустить процесс заранее (иначе — при первом запросе)"""
+        with self._lock:
+            self._ensure_started()
+
+    def restart(self) -> None:
+        """Остановить процесс и сбросить счётчик неудачных запусков: следующий запрос
+        запустит движок заново из текущих файлов (после правки кода плагина)"""
+        with self._lock:
+            self._stop()
+            self._failed_in_row = 0
+            self._schema, self._values = {}, {}
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _ensure_started(self) -> None:
+        if self.running:
+            return
+        self._stop()
+        if self._failed_in_row >= self.max_restarts:
+            raise PluginHostError(f"Движок {self.module_name} падает при запуске ({self._failed_in_row} раз подряд)")
+        if self._starts:
+            self.stats.restarts += 1
+        self._starts += 1
+        self._failed_in_row += 1
+        self._process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), str(self.engine_path), self.module_name],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=str(project_root),
+        )
+        self._replies = queue.SimpleQueue()
+        threading.Thread(target=_read_replies, args=(self._process.stdout, self._replies),
+                         name=f"plugin-host-{self.module_name}", daemon=True).start()
+        try:
+            _, _, schema = self._wait(0, self.start_timeout)
+        except (_ProcessExited, queue.Empty):
+            self._stop()
+            raise PluginHostError(f"Движок {self.module_name} не запустился (подробности — в stderr)") from None
+        self._values = schema.pop("values")
+        self._schema = schema
+
+    def _stop(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stdout.close()
+
+    def _wait(self, request_id: int, timeout: float) -> tuple:
+        """Ответ на запрос request_id (queue.Empty — не дождались, _ProcessExited — процесс завершился)"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            reply = self._replies.get(timeout=max(deadline - time.perf_counter(), 0.0))
+            if reply is None:
+                raise _ProcessExited
+            if reply[0] == request_id:
+                return reply
+
+    # --- запросы ---
+
+    def request(self, op: str, name: str, args: Tuple = (), kwargs: Optional[Mapping[str, Any]] = None) -> Any:
+        """Выполнить запрос в процессе движка и вернуть результат"""
+        with self._lock:
+            for attempt in range(2):
+                self._ensure_started()
+                request_id = next(self._ids)
+                start = time.perf_counter()
+                try:
+                    write_frame(self._process.stdin, (request_id, op, name, tuple(args), dict(kwargs or {})))
+                    _, ok, value = self._wait(request_id, self.timeout)
+                except queue.Empty:
+                    self.stats.timeouts += 1
+                    self._stop()
+                    raise PluginHostTimeout(f"{self.module_name}.{name}: нет ответа за {self.timeout:g} с") from None
+                except (_ProcessExited, OSError):
+                    self.stats.crashes += 1
+                    self._stop()
+                    if attempt == 0:
+                        continue
+                    raise PluginHostError(f"{self.module_name}.{name}: процесс движка завершился") from None
+                self._record_latency(time.perf_counter() - start)
+                self._failed_in_row = 0
+                if ok:
+                    return value
+                raise _remote_error(value)
+
+    def _record_latency(self, seconds: float) -> None:
+        self.stats.requests += 1
+        self.stats.max_latency = max(self.stats.max_latency, seconds)
+        if seconds > self.latency_budget:
+            self.stats.over_budget += 1
+
+    def call(self, name: str, *args, **kwargs) -> Any:
+        return self.request(OP_CALL, name, args, kwargs)
+
+    def call_async(self, name: str, *args, **kwargs) -> "Future[Any]":
+        """Вызов без ожидания в вызывающем потоке (UI): результат — в Future"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"plugin-host-{self.module_name}")
+            return self._executor.submit(self.call, name, *args, **kwargs)
+
+    def _get_schema(self) -> Dict[str, Any]:
+        # Без блокировки, пока описание есть: его не ждёт поток UI, когда идёт запрос из call_async
+        schema = self._schema
+        if not schema:
+            self.start()
+            schema = self._schema
+        return schema
+
+    def __getattr__(self, name: str) -> Any:
+        # Вызывается только для имён, которых нет у прокси: методы и атрибуты самого движка
+        if name.startswith("_"):
+            raise AttributeError(name)
+        schema = self._get_schema()
+        if name in schema["methods"]:
+            return lambda *args, **kwargs: self.request(OP_CALL, name, args, kwargs)
+        if name in schema["attributes"]:
+            values = self._values
+            # Значение, которое не передаётся по каналу целиком, читается запросом
+            return values[name] if name in values else self.request(OP_GET, name)
+        raise AttributeError(f"У движка {self.module_name} нет атрибута {name}")
+
+    # --- ReportEngine ---
+
+    def get_modality(self) -> str:
+        return self._get_schema()["modality"]
+
+    def build_report(self, params: Mapping[str, Any]) -> ReportText:
+        return self.call("build_report", dict(params))
+
+    def split_report(self, text: str) -> ReportText:
+        return self.call("split_report", text)
+
+    def reload_data(self) -> None:
+        self.call("reload_data")
+        self._values = self.request(OP_VALUES, "")
+
+
+def _read_replies(stream: BinaryIO, replies: "queue.SimpleQueue[Optional[tuple]]") -> None:
+    """Поток чтения ответов процесса; None в очереди — процесс завершился"""
+    try:
+        while True:
+            replies.put(read_frame(stream))
+    except (EOFError, OSError, ValueError, pickle.UnpicklingError):
+        replies.put(None)
+
+
+def _remote_error(error: Tuple[str, str, str]) -> Exception:
+    type_name, message, remote_traceback = error
+    if type_name == "ValueError":
+        return ValueError(message)
+    return PluginHostError(f"{type_name}: {message}\n{remote_traceback}")
+
+
+def _attribute_values(engine: ReportEngine, attributes: List[str]) -> Dict[str, Any]:
+    """Значения атрибутов движка, которые передаются по каналу (остальные читаются запросом OP_GET)"""
+    values = {}
+    for name in attributes:
+        try:
+            value = getattr(engine, name)
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            continue
+        values[name] = value
+    return values
+
+
+def serve(engine_path: Path, module_name: str, stdin: BinaryIO, stdout: BinaryIO) -> None:
+    """Цикл дочернего процесса: импорт движка, описание его интерфейса, затем запросы до закрытия stdin"""
+    spec = importlib.util.spec_from_file_location(module_name, engine_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    engine = module.Engine()
+
+    names = [name for name in dir(engine) if not name.startswith("_")]
+    methods = [name for name in names if callable(getattr(engine, name, None))]
+    attributes = [name for name in names if name not in methods]
+    write_frame(stdout, (0, True, {"methods": methods, "attributes": attributes,
+                                   "values": _attribute_values(engine, attributes),
+                                   "modality": engine.get_modality()}))
+
+    while True:
+        try:
+            request_id, op, name, args, kwargs = read_frame(stdin)
+        except EOFError:
+            return
+        try:
+            if op == OP_VALUES:
+                value = _attribute_values(engine, attributes)
+            elif op == OP_GET:
+                value = getattr(engine, name)
+            else:
+                value = getattr(engine, name)(*args, **kwargs)
+            # Кадр собирается целиком до записи: непередаваемое значение не портит поток
+            write_frame(stdout, (request_id, True, value))
+        except Exception as e:
+            write_frame(stdout, (request_id, False, (type(e).__name__, str(e), traceback.format_exc())))
+
+
+if __name__ == "__main__":
+    # stdout занят протоколом — print() движка уходит в stderr
+    protocol_out = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    serve(Path(sys.argv[1]), sys.argv[2], sys.stdin.buffer, protocol_out)
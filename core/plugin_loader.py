@@ -0,0 +1,483 @@
+"""Поиск плагинов по манифестам и отложенная загрузка их модулей - БЕЗ зависимостей от UI"""
+
+import importlib.util
+import json
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from core.plugin_base import ModalityPlugin, ReportEngine
+from core.plugin_cache import CachedPlugin, PluginDiscoveryCache, make_entry
+from core.plugin_host import EngineHost
+from core.plugin_reload import CHANGE_DATA, CHANGE_MANIFEST, purge_plugin_modules
+
+# Манифест в папке плагина: имя, описание и порядок кнопки — без импорта plugin.py
+MANIFEST_NAME = "plugin.json"
+# Порядок плагина без поля order в манифесте — после перечисленных
+DEFAULT_ORDER = 1000
+# Потоков для чтения манифестов и импорта плагинов без манифеста; сколько ждать один плагин, с
+DEFAULT_LOAD_WORKERS = 4
+DEFAULT_LOAD_TIMEOUT = 10.0
+
+# Где выполняется движок плагина (поле engine_host манифеста): в процессе приложения или в дочернем
+ENGINE_INLINE = "inline"
+ENGINE_PROCESS = "process"
+# Модуль движка в папке плагина (класс Engine, без UI)
+ENGINE_MODULE = "engine.py"
+
+# Состояния плагина в отчёте о загрузке
+STATUS_FOUND = "found"  # манифест прочитан, модуль ещё не импортирован
+STATUS_LOADED = "loaded"  # модуль импортирован, Plugin создан
+STATUS_FAILED = "failed"
+STATUS_TIMEOUT = "timeout"
+
+
+@dataclass(frozen=True)
+class PluginManifest:
+    """Содержимое plugin.json"""
+    directory: Path
+    name: str
+    description: str
+    modality: Optional[str] = None
+    order: int = DEFAULT_ORDER
+    entry: str = "plugin.py"  # модуль с классом Plugin, относительно папки плагина
+    engine_host: str = ENGINE_INLINE
+
+    @property
+    def module_name(self) -> str:
+        return f"plugin_{self.directory.name}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Поля plugin.json (для кэша поиска)"""
+        return {"name": self.name, "description": self.description, "modality": self.modality,
+                "order": self.order, "entry": self.entry, "engine_host": self.engine_host}
+
+
+@dataclass(frozen=True)
+class PluginLoadResult:
+    """Загрузка одного плагина: время поиска (манифест или импорт без манифеста) и импорта"""
+    directory: str
+    status: str
+    name: Optional[str] = None
+    discover_seconds: float = 0.0
+    import_seconds: Optional[float] = None
+    error: Optional[str] = None
+    # Начало поиска (time.perf_counter) и поток, в котором он шёл, — для профиля запуска
+    discover_started: Optional[float] = None
+    discover_thread: Optional[int] = None
+    cached: bool = False  # найден по кэшу поиска, файлы плагина не читались
+
+
+class PluginLoadReport:
+    """Отчёт о загрузке плагинов: по записи на папку; LazyPlugin дописывает время импорта"""
+
+    def __init__(self):
+        self._results: Dict[str, PluginLoadResult] = {}
+        self._lock = threading.Lock()
+        self.total_seconds = 0.0
+
+    def record(self, result: PluginLoadResult) -> None:
+        with self._lock:
+            self._results[result.directory] = result
+
+    def update(self, directory: str, **changes) -> None:
+        with self._lock:
+            self._results[directory] = replace(self._results[directory], **changes)
+
+    def remove(self, directory: str) -> None:
+        with self._lock:
+            self._results.pop(directory, None)
+
+    def get(self, directory: str) -> Optional[PluginLoadResult]:
+        with self._lock:
+            return self._results.get(directory)
+
+    @property
+    def results(self) -> List[PluginLoadResult]:
+        with self._lock:
+            return sorted(self._results.values(), key=lambda result: result.directory)
+
+    def failures(self) -> List[PluginLoadResult]:
+        return [result for result in self.results if result.status in (STATUS_FAILED, STATUS_TIMEOUT)]
+
+    def format(self) -> str:
+        """Таблица для журнала запуска"""
+        lines = [f"Плагины: {len(self._results)}, поиск {self.total_seconds * 1000:.1f} мс"]
+        for result in self.results:
+            imported = f"{result.import_seconds * 1000:.1f}" if result.import_seconds is not None else "-"
+            line = (f"  {result.directory:<20} {result.status:<8} поиск {result.discover_seconds * 1000:.1f} мс"
+                    f"{' (кэш)' if result.cached else ''}, импорт {imported} мс")
+            if result.error:
+                line += f": {result.error}"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class _JobResult:
+    value: Any
+    error: Optional[BaseException]
+    seconds: float
+    timed_out: bool = False
+    started: Optional[float] = None  # time.perf_counter() запуска задания
+    thread: Optional[int] = None
+
+
+def run_with_timeouts(
+    jobs: List[Tuple[str, Callable[[], Any]]], max_workers: int, timeout: float
+) -> Dict[str, _JobResult]:
+    """Выполнить задания в max_workers потоках; задание дольше timeout (с момента запуска) считается зависшим.
+
+    Потоки — daemon: зависшее задание не держит ни запуск, ни выход из приложения.
+    Если все потоки заняты зависшими заданиями, оставшиеся не запускаются.
+    """
+    tasks: "queue.SimpleQueue[Tuple[str, Callable[[], Any]]]" = queue.SimpleQueue()
+    for job in jobs:
+        tasks.put(job)
+    done: "queue.SimpleQueue[Tuple[str, _JobResult]]" = queue.SimpleQueue()
+    started: Dict[str, float] = {}
+
+    def worker() -> None:
+        while True:
+            try:
+                key, func = tasks.get_nowait()
+            except queue.Empty:
+                return
+            start = started[key] = time.perf_counter()
+            try:
+                value, error = func(), None
+            except Exception as e:
+                value, error = None, e
+            done.put((key, _JobResult(value, error, time.perf_counter() - start, False, start, threading.get_ident())))
+
+    workers = max(1, min(max_workers, len(jobs)))
+    for i in range(workers):
+        threading.Thread(target=worker, name=f"plugin-loader-{i}", daemon=True).start()
+
+    results: Dict[str, _JobResult] = {}
+    finished_late = set()
+    while len(results) < len(jobs):
+        now = time.perf_counter()
+        for key, start in list(started.items()):
+            if key not in results and now - start >= timeout:
+                results[key] = _JobResult(None, TimeoutError(f"не загрузился за {timeout:g} с"), now - start, True, start)
+        hung = sum(1 for key, result in results.items() if result.timed_out and key not in finished_late)
+        if hung >= workers:
+            for key, _ in jobs:
+                if key not in results:
+                    results[key] = _JobResult(None, TimeoutError("не запущен: все потоки заняты зависшими плагинами"), 0.0, True)
+            break
+        deadlines = [start + timeout - now for key, start in list(started.items()) if key not in results]
+        try:
+            key, result = done.get(timeout=max(min(deadlines, default=timeout), 0.001))
+        except queue.Empty:
+            continue
+        if key in results:
+            finished_late.add(key)
+        else:
+            results[key] = result
+    return results
+
+
+def read_manifest(plugin_dir: Path) -> PluginManifest:
+    """Прочитать манифест папки плагина (ValueError/OSError, если он некорректен)"""
+    return manifest_from_dict(plugin_dir, json.loads((plugin_dir / MANIFEST_NAME).read_text(encoding="utf-8")))
+
+
+def manifest_from_dict(plugin_dir: Path, data: Any) -> PluginManifest:
+    """Манифест из разобранного plugin.json (или записи кэша поиска); ValueError, если он некорректен"""
+    if not isinstance(data, dict) or not isinstance(data.get("name"), str):
+        raise ValueError(f"{MANIFEST_NAME}: нет строкового поля name")
+    order = data.get("order", DEFAULT_ORDER)
+    if not isinstance(order, int):
+        raise ValueError(f"{MANIFEST_NAME}: order должен быть целым числом")
+    engine_host = data.get("engine_host", ENGINE_INLINE)
+    if engine_host not in (ENGINE_INLINE, ENGINE_PROCESS):
+        raise ValueError(f"{MANIFEST_NAME}: engine_host должен быть {ENGINE_INLINE!r} или {ENGINE_PROCESS!r}")
+    return PluginManifest(
+        directory=plugin_dir,
+        name=data["name"],
+        description=str(data.get("description", "")),
+        modality=data.get("modality"),
+        order=order,
+        entry=str(data.get("entry", "plugin.py")),
+        engine_host=engine_host,
+    )
+
+
+def import_plugin(plugin_dir: Path, entry: str = "plugin.py", module_name: Optional[str] = None,
+                  engine: Optional[ReportEngine] = None) -> ModalityPlugin:
+    """Импортировать модуль плагина и создать его Plugin (ImportError/TypeError при ошибке).
+    engine передаётся в конструктор Plugin вместо собственного движка плагина (EngineHost)"""
+    plugin_file = plugin_dir / entry
+    spec = importlib.util.spec_from_file_location(module_name or f"plugin_{plugin_dir.name}", plugin_file)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Не удалось загрузить спецификацию для {plugin_dir.name}")
+    module = importlib.util.module_from_spec(spec)
+    # Модуль регистрируется до выполнения (как при обычном импорте) и убирается, если оно не удалось
+    sys.modules[spec.name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(spec.name, None)
+        raise
+    if not hasattr(module, "Plugin"):
+        raise ImportError(f"Плагин {plugin_dir.name} не содержит класс Plugin")
+    plugin = module.Plugin(engine=engine) if engine is not None else module.Plugin()
+    if not isinstance(plugin, ModalityPlugin):
+        raise TypeError(f"Плагин {plugin_dir.name} не наследуется от ModalityPlugin")
+    return plugin
+
+
+class LazyPlugin(ModalityPlugin):
+    """Плагин по манифесту: имя, описание и модальность берутся из plugin.json,
+    модуль плагина импортируется при первом create_widget (или load()).
+
+    Время импорта и ошибка попадают в report, если он передан; проверенный класс
+    Plugin — в кэш поиска, если он передан. При engine_host = "process" движок
+    плагина работает в дочернем процессе (EngineHost), виджет получает прокси.
+    """
+
+    def __init__(self, manifest: PluginManifest, report: Optional[PluginLoadReport] = None,
+                 cache: Optional[PluginDiscoveryCache] = None):
+        self.manifest = manifest
+        self.report = report
+        self.cache = cache
+        self._plugin: Optional[ModalityPlugin] = None
+        self._host: Optional[EngineHost] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._plugin is not None
+
+    def load(self) -> ModalityPlugin:
+        """Импортировать модуль плагина (один раз) и вернуть его Plugin"""
+        with self._lock:
+            if self._plugin is None:
+                start = time.perf_counter()
+                try:
+                    self._plugin = self._import()
+                except Exception as e:
+                    self._report(STATUS_FAILED, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+                    raise
+                self._report(STATUS_LOADED, time.perf_counter() - start, None)
+                if self.cache is not None:
+                    self.cache.mark_validated(self.manifest.directory.name, type(self._plugin).__name__)
+                    self.cache.save()
+            return self._plugin
+
+    def reload(self, kind: str) -> None:
+        """Применить изменение файлов плагина (CHANGE_* из core.plugin_reload).
+
+        CHANGE_MANIFEST — перечитать plugin.json; CHANGE_DATA — движок перечитывает
+        свои данные (у плагина без движка данные читаются в __init__, поэтому он
+        импортируется заново); CHANGE_CODE — модули плагина импортируются заново
+        и создаётся новый Plugin. Ещё не загруженный плагин только сбрасывает
+        модули — при первом выборе он загрузится из новых файлов. При ошибке
+        остаются прежние Plugin и модули, исключение пробрасывается.
+        """
+        with self._lock:
+            if kind == CHANGE_MANIFEST:
+                self.manifest = read_manifest(self.manifest.directory)
+                return
+            if self._plugin is None:
+                purge_plugin_modules(self.manifest.directory.name, self.manifest.module_name)
+                return
+            if kind == CHANGE_DATA:
+                engine = self._plugin.get_engine()
+                if engine is not None:
+                    engine.reload_data()
+                    return
+            purged = purge_plugin_modules(self.manifest.directory.name, self.manifest.module_name)
+            if self._host is not None:
+                self._host.restart()
+            start = time.perf_counter()
+            try:
+                plugin = self._import()
+            except Exception:
+                sys.modules.update(purged)
+                raise
+            self._plugin = plugin
+            self._report(STATUS_LOADED, time.perf_counter() - start, None)
+
+    def prepare_engine(self) -> None:
+        """Подготовить движок без импорта модуля плагина (он тянет Qt): запустить процесс
+        движка или импортировать engine.py. Можно вызывать из фонового потока — Plugin
+        и виджет затем создаются в потоке UI (load, create_widget)"""
+        with self._lock:
+            if self._plugin is not None:
+                return
+            self._update_host()
+            if self._host is not None:
+                self._host.start()
+                return
+            directory = self.manifest.directory
+            module_name = f"plugins.{directory.name}.engine"
+            engine_path = directory / ENGINE_MODULE
+            if module_name in sys.modules or not engine_path.exists():
+                return
+            spec = importlib.util.spec_from_file_location(module_name, engine_path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                sys.modules.pop(module_name, None)
+                raise
+
+    def _update_host(self) -> None:
+        """Создать или закрыть EngineHost по полю engine_host манифеста"""
+        if self.manifest.engine_host == ENGINE_PROCESS and self._host is None:
+            directory = self.manifest.directory
+            self._host = EngineHost(directory / ENGINE_MODULE, f"plugins.{directory.name}.engine")
+        elif self.manifest.engine_host != ENGINE_PROCESS and self._host is not None:
+            self._host.close()
+            self._host = None
+
+    def _import(self) -> ModalityPlugin:
+        """Импорт модуля плагина; движок — в дочернем процессе, если так указано в манифесте"""
+        self._update_host()
+        if self._host is not None:
+            # Процесс запускается при загрузке: данные движка приходят один раз, а не при чтении из виджета
+            self._host.start()
+        return import_plugin(self.manifest.directory, self.manifest.entry, self.manifest.module_name, self._host)
+
+    def close(self) -> None:
+        """Остановить процесс движка (при выходе из приложения)"""
+        with self._lock:
+            if self._host is not None:
+                self._host.close()
+                self._host = None
+
+    def _report(self, status: str, seconds: float, error: Optional[str]) -> None:
+        if self.report is not None and self.report.get(self.manifest.directory.name) is not None:
+            self.report.update(self.manifest.directory.name, status=status, import_seconds=seconds, error=error)
+
+    def get_name(self) -> str:
+        return self.manifest.name
+
+    def get_description(self) -> str:
+        return self.manifest.description
+
+    def get_modality(self) -> Optional[str]:
+        return self.manifest.modality
+
+    def create_widget(self, on_report_generated=None) -> Any:
+        return self.load().create_widget(on_report_generated=on_report_generated)
+
+    def get_engine(self) -> Optional[ReportEngine]:
+        return self._plugin.get_engine() if self._plugin is not None else None
+
+    def save_state(self) -> Dict[str, Any]:
+        return self._plugin.save_state() if self._plugin is not None else {}
+
+    def restore_state(self, state: Mapping[str, Any]) -> None:
+        if self._plugin is not None:
+            self._plugin.restore_state(state)
+
+    def get_description_text(self) -> str:
+        return self._plugin.get_description_text() if self._plugin is not None else ""
+
+    def get_conclusion_text(self) -> str:
+        return self._plugin.get_conclusion_text() if self._plugin is not None else ""
+
+
+def _discover_one(
+    plugin_dir: Path, report: PluginLoadReport, cache: Optional[PluginDiscoveryCache] = None
+) -> Tuple[Optional[Tuple[int, ModalityPlugin]], Optional[CachedPlugin]]:
+    """Плагин одной папки: LazyPlugin по манифесту или импорт plugin.py без манифеста (None — не плагин)
+    и новая запись кэша. Запись кладёт в кэш discover_plugins — только если задание не зависло"""
+    if cache is not None:
+        cached = cache.lookup(plugin_dir)
+        if cached is not None:
+            if cached.manifest is None:
+                return None, None
+            manifest = manifest_from_dict(plugin_dir, cached.manifest)
+            report.update(plugin_dir.name, cached=True)
+            return (manifest.order, LazyPlugin(manifest, report, cache)), None
+    # Запись кэша зависит от манифеста и модуля плагина (и от plugin.py — вдруг манифест удалят)
+    entry = None
+    if (plugin_dir / MANIFEST_NAME).exists():
+        manifest = read_manifest(plugin_dir)
+        if not (plugin_dir / manifest.entry).exists():
+            raise ImportError(f"нет файла {manifest.entry}")
+        if cache is not None:
+            entry = make_entry(plugin_dir, {MANIFEST_NAME, "plugin.py", manifest.entry}, manifest.to_dict())
+        return (manifest.order, LazyPlugin(manifest, report, cache)), entry
+    if (plugin_dir / "plugin.py").exists():
+        plugin = import_plugin(plugin_dir)
+        if cache is not None:
+            # Плагин без манифеста проверен импортом: со следующего запуска он загружается лениво
+            manifest = PluginManifest(plugin_dir, plugin.get_name(), plugin.get_description(), plugin.get_modality())
+            entry = make_entry(plugin_dir, (MANIFEST_NAME, "plugin.py"), manifest.to_dict(), type(plugin).__name__)
+        return (DEFAULT_ORDER, plugin), entry
+    if cache is not None:
+        entry = make_entry(plugin_dir, (MANIFEST_NAME, "plugin.py"), None)
+    return None, entry
+
+
+def discover_plugins(
+    plugins_dir: Path, max_workers: int = DEFAULT_LOAD_WORKERS, timeout: float = DEFAULT_LOAD_TIMEOUT,
+    cache: Optional[PluginDiscoveryCache] = None,
+) -> Tuple[List[ModalityPlugin], PluginLoadReport]:
+    """Плагины из поддиректорий plugins_dir по порядку манифестов (затем по имени папки) и отчёт о загрузке.
+
+    Папки с plugin.json дают LazyPlugin без импорта кода. Папка только с plugin.py
+    (плагин без манифеста) импортируется сразу, как раньше. Папки обрабатываются
+    параллельно (max_workers потоков); плагин, который не уложился в timeout
+    (например, манифест на недоступном сетевом диске), и ошибочные плагины
+    пропускаются — причина остаётся в отчёте.
+
+    С cache папки, файлы которых не менялись с прошлого запуска, берутся из кэша
+    (только stat, без чтения манифестов); изменённые перечитываются, кэш сохраняется.
+    """
+    started = time.perf_counter()
+    report = PluginLoadReport()
+    plugin_dirs = cache.directories(plugins_dir) if cache is not None else None
+    if plugin_dirs is None:
+        plugin_dirs = [
+            plugin_dir for plugin_dir in sorted(plugins_dir.iterdir())
+            if plugin_dir.is_dir() and not plugin_dir.name.startswith(".") and plugin_dir.name != "__pycache__"
+        ]
+        if cache is not None:
+            cache.set_directories(plugins_dir, plugin_dirs)
+    jobs = [(plugin_dir.name, lambda plugin_dir=plugin_dir: _discover_one(plugin_dir, report, cache))
+            for plugin_dir in plugin_dirs]
+    # Запись в отчёте появляется раньше LazyPlugin: ранний импорт из другого потока найдёт, что обновить
+    for plugin_dir in plugin_dirs:
+        report.record(PluginLoadResult(plugin_dir.name, STATUS_FOUND))
+    found = []
+    for directory, result in run_with_timeouts(jobs, max_workers, timeout).items():
+        if result.error is None:
+            # Кэш пополняется здесь, а не в задании: зависшее задание, закончив позже, в кэш не пишет
+            value, entry = result.value
+            if entry is not None:
+                cache.put(entry)
+            result = replace(result, value=value)
+        if result.value is None and result.error is None:
+            # Папка без plugin.py и манифеста — не плагин
+            report.remove(directory)
+            continue
+        if result.error is not None:
+            if cache is not None:
+                cache.forget(directory)
+            status = STATUS_TIMEOUT if result.timed_out else STATUS_FAILED
+            report.update(directory, status=status, discover_seconds=result.seconds,
+                          discover_started=result.started, discover_thread=result.thread,
+                          error=f"{type(result.error).__name__}: {result.error}")
+            continue
+        order, plugin = result.value
+        status = STATUS_FOUND if isinstance(plugin, LazyPlugin) else STATUS_LOADED
+        report.update(directory, status=status, name=plugin.get_name(), discover_seconds=result.seconds,
+                      discover_started=result.started, discover_thread=result.thread)
+        found.append((order, directory, plugin))
+    found.sort(key=lambda item: item[:2])
+    if cache is not None:
+        cache.save()
+    report.total_seconds = time.perf_counter() - started
+    return [plugin for _, _, plugin in found], report
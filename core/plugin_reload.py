@@ -0,0 +1,59 @@
+"""Что изменилось в папке плагина и что перезагружать - БЕЗ зависимостей от UI"""
+
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List, Mapping, Optional
+
+from core.plugin_cache import Signature, file_signature
+
+# Виды изменений — от самого лёгкого к самому тяжёлому
+CHANGE_DATA = "data"  # JSON и прочие файлы данных: движок перечитывает их, модуль не импортируется заново
+CHANGE_MANIFEST = "manifest"  # plugin.json: имя, описание, порядок кнопки
+CHANGE_CODE = "code"  # .py: модули плагина импортируются заново
+
+_WEIGHT = {CHANGE_DATA: 0, CHANGE_MANIFEST: 1, CHANGE_CODE: 2}
+
+# Временные файлы редакторов и кэш байт-кода не считаются изменениями плагина
+_IGNORED_SUFFIXES = (".tmp", ".swp", ".swx", "~", ".pyc", ".bak")
+
+
+def is_ignored(name: str) -> bool:
+    return name.startswith(".") or name == "__pycache__" or name.endswith(_IGNORED_SUFFIXES)
+
+
+def snapshot(plugin_dir: Path) -> Dict[str, Signature]:
+    """Подписи (mtime, размер) файлов папки плагина — только stat, без чтения"""
+    try:
+        names = [path.name for path in plugin_dir.iterdir() if path.is_file() and not is_ignored(path.name)]
+    except OSError:
+        return {}
+    return {name: file_signature(plugin_dir / name) for name in sorted(names)}
+
+
+def change_kind(name: str) -> str:
+    """Вид изменения по имени файла"""
+    if name.endswith(".py"):
+        return CHANGE_CODE
+    if name == "plugin.json":
+        return CHANGE_MANIFEST
+    return CHANGE_DATA
+
+
+def changed_files(before: Mapping[str, Signature], after: Mapping[str, Signature]) -> List[str]:
+    """Добавленные, удалённые и изменённые файлы"""
+    return sorted(name for name in set(before) | set(after) if before.get(name) != after.get(name))
+
+
+def classify_changes(before: Mapping[str, Signature], after: Mapping[str, Signature]) -> Optional[str]:
+    """Самый тяжёлый вид среди изменений (None — ничего не изменилось)"""
+    kinds = [change_kind(name) for name in changed_files(before, after)]
+    return max(kinds, key=_WEIGHT.__getitem__) if kinds else None
+
+
+def purge_plugin_modules(directory: str, module_name: str) -> Dict[str, ModuleType]:
+    """Убрать из sys.modules модуль плагина и модули его пакета plugins.<папка> (движок, валидаторы),
+    чтобы следующий импорт выполнил их заново; возвращает убранные модули (для отката)"""
+    package = f"plugins.{directory}"
+    return {name: sys.modules.pop(name) for name in list(sys.modules)
+            if name == module_name or name == package or name.startswith(package + ".")}
@@ -0,0 +1,57 @@
+"""Статистика открытия плагинов между запусками - БЕЗ зависимостей от UI"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+USAGE_VERSION = 1
+USAGE_FILE_NAME = "plugin_usage.json"
+
+
+class PluginUsageStats:
+    """Сколько раз пользователь открывал каждый плагин (JSON в папке данных пользователя).
+
+    Ключ плагина — имя его папки. По статистике MainWindow выбирает порядок
+    фонового прогрева виджетов. Файл необязателен: нечитаемый или чужой версии
+    игнорируется, ошибки записи — тоже.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.opens: Dict[str, int] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != USAGE_VERSION:
+                return
+            opens = {str(key): int(count) for key, count in data["opens"].items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+        self.opens = opens
+
+    def record(self, key: str) -> None:
+        self.opens[key] = self.opens.get(key, 0) + 1
+        self._dirty = True
+
+    def ranked(self, keys: Iterable[str]) -> List[str]:
+        """Ключи по убыванию числа открытий; при равенстве — в исходном порядке (порядок кнопок)"""
+        keys = list(keys)
+        return sorted(keys, key=lambda key: -self.opens.get(key, 0))
+
+    def save(self) -> None:
+        """Записать статистику, если она изменилась (атомарно: временный файл и замена)"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps({"version": USAGE_VERSION, "opens": self.opens}, ensure_ascii=False, indent=2),
+                           encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
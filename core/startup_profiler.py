@@ -0,0 +1,245 @@
+"""Профилирование запуска (--profile-startup): этапы, импорты, Chrome trace - БЕЗ зависимостей от UI"""
+
+import importlib.abc
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+PROFILE_FLAG = "--profile-startup"
+DEFAULT_TRACE_PATH = "startup_trace.json"
+# Допустимое время запуска (SPECIFICATION.md, 8.1), с
+STARTUP_BUDGET = 3.0
+
+
+@dataclass(frozen=True)
+class Span:
+    """Отрезок времени запуска; start и duration — секунды от начала профилирования"""
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread: int
+    import_seconds: float = 0.0  # сколько из duration заняли импорты верхнего уровня в том же потоке
+    args: Dict[str, object] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class ImportRecord:
+    """Импорт одного модуля (как строка python -X importtime)"""
+    module: str
+    start: float
+    self_seconds: float
+    cumulative_seconds: float
+    depth: int
+    thread: int
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Finder в начале sys.meta_path: находит spec остальными finder'ами и замеряет
+    exec_module загрузчика. Тип загрузчика не меняется — на экземпляр ставится обёртка,
+    которая снимается после выполнения модуля."""
+
+    def __init__(self, origin: float):
+        self.origin = origin
+        self.records: List[ImportRecord] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        loader = spec.loader
+        # Встроенные и замороженные модули грузит общий класс-загрузчик — их не трогаем (и они быстрые)
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+            self._wrap(fullname, loader)
+        return spec
+
+    def _wrap(self, fullname: str, loader) -> None:
+        original = loader.exec_module
+
+        def exec_module(module):
+            stack = self._local.__dict__.setdefault("stack", [])
+            stack.append(0.0)  # время вложенных импортов
+            start = time.perf_counter()
+            try:
+                original(module)
+            finally:
+                cumulative = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += cumulative
+                record = ImportRecord(
+                    fullname, start - self.origin, cumulative - children, cumulative, len(stack), threading.get_ident()
+                )
+                with self._lock:
+                    self.records.append(record)
+                try:
+                    del loader.exec_module
+                except AttributeError:
+                    pass
+
+        try:
+            loader.exec_module = exec_module
+        except AttributeError:
+            # Загрузчик со __slots__ — без замера
+            pass
+
+
+class StartupProfiler:
+    """Замер этапов запуска. Выключенный (enabled=False) ничего не делает и не ставит таймер импортов."""
+
+    def __init__(self, enabled: bool = True, trace_path: Optional[str] = None):
+        self.enabled = enabled
+        self.trace_path = Path(trace_path or DEFAULT_TRACE_PATH)
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self.imports: Optional[ImportTimer] = None
+        if enabled:
+            self.imports = ImportTimer(self.origin)
+            self.imports.install()
+
+    @classmethod
+    def from_argv(cls, argv: Sequence[str]) -> "StartupProfiler":
+        """--profile-startup или --profile-startup=путь/к/trace.json"""
+        for arg in argv[1:]:
+            if arg == PROFILE_FLAG:
+                return cls(True)
+            if arg.startswith(PROFILE_FLAG + "="):
+                return cls(True, arg.split("=", 1)[1])
+        return cls(False)
+
+    def now(self) -> float:
+        """Секунды от начала профилирования"""
+        return time.perf_counter() - self.origin
+
+    @contextmanager
+    def phase(self, name: str, category: str = "phase", **args) -> Iterator[None]:
+        """Замерить этап запуска в текущем потоке"""
+        if not self.enabled:
+            yield
+            return
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, self.now() - start, category, **args)
+
+    def add_span(self, name: str, start: float, duration: float, category: str = "phase",
+                 thread: Optional[int] = None, **args) -> None:
+        """Добавить отрезок, замеренный снаружи (start — секунды от начала профилирования)"""
+        if not self.enabled:
+            return
+        thread = thread if thread is not None else threading.get_ident()
+        span = Span(name, category, start, duration, thread, self._import_seconds(start, duration, thread), args)
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self) -> str:
+        """Снять таймер импортов, записать Chrome trace и вернуть текстовый отчёт"""
+        if not self.enabled:
+            return ""
+        if self.imports is not None:
+            self.imports.uninstall()
+        self.write_chrome_trace(self.trace_path)
+        return self.format_report()
+
+    # --- отчёты ---
+
+    def heaviest_imports(self, limit: int = 15) -> List[ImportRecord]:
+        """Импорты верхнего уровня с наибольшим суммарным временем — кандидаты на отложенный импорт"""
+        records = self.imports.records if self.imports is not None else []
+        return sorted(records, key=lambda record: record.cumulative_seconds, reverse=True)[:limit]
+
+    def format_report(self, import_limit: int = 15) -> str:
+        """Этапы по убыванию длительности и самые тяжёлые импорты"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.duration, reverse=True)
+        total = max((span.start + span.duration for span in spans), default=0.0)
+        lines = [
+            f"Запуск: {total * 1000:.0f} мс (допустимо {STARTUP_BUDGET * 1000:.0f} мс)"
+            + (" — ПРЕВЫШЕНО" if total > STARTUP_BUDGET else ""),
+            f"{'этап':<44} {'начало, мс':>10} {'время, мс':>10} {'импорт, мс':>11}",
+        ]
+        for span in spans:
+            lines.append(f"{span.name[:44]:<44} {span.start * 1000:>10.1f} {span.duration * 1000:>10.1f} "
+                         f"{span.import_seconds * 1000:>11.1f}")
+        heaviest = self.heaviest_imports(import_limit)
+        if heaviest:
+            lines.append("")
+            lines.append("Самые тяжёлые импорты (как python -X importtime), мс")
+            lines.append(f"{'собственное':>12} {'суммарное':>10}  модуль")
+            for record in heaviest:
+                lines.append(f"{record.self_seconds * 1000:>12.1f} {record.cumulative_seconds * 1000:>10.1f}  "
+                             f"{'  ' * record.depth}{record.module}")
+        lines.append(f"Chrome trace: {self.trace_path} (chrome://tracing или https://ui.perfetto.dev)")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """События в формате Trace Event (complete events, микросекунды)"""
+        pid = os.getpid()
+        threads: Dict[int, int] = {threading.main_thread().ident: 0}
+
+        def tid(ident: int) -> int:
+            return threads.setdefault(ident, len(threads))
+
+        events = []
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            events.append({
+                "name": span.name, "cat": span.category, "ph": "X", "pid": pid, "tid": tid(span.thread),
+                "ts": round(span.start * 1e6, 1), "dur": round(span.duration * 1e6, 1),
+                "args": {"import_ms": round(span.import_seconds * 1000, 2), **span.args},
+            })
+        for record in (self.imports.records if self.imports is not None else []):
+            events.append({
+                "name": record.module, "cat": "import", "ph": "X", "pid": pid, "tid": tid(record.thread),
+                "ts": round(record.start * 1e6, 1), "dur": round(record.cumulative_seconds * 1e6, 1),
+                "args": {"self_ms": round(record.self_seconds * 1000, 2)},
+            })
+        for ident, number in threads.items():
+            name = "main" if number == 0 else f"thread-{number}"
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": number, "args": {"name": name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        path = Path(path)
+        path.write_text(json.dumps(self.chrome_trace(), ensure_ascii=False), encoding="utf-8")
+
+    def _import_seconds(self, start: float, duration: float, thread: int) -> float:
+        if self.imports is None:
+            return 0.0
+        end = start + duration
+        with self.imports._lock:
+            records = list(self.imports.records)
+        return sum(
+            record.cumulative_seconds for record in records
+            if record.depth == 0 and record.thread == thread and start <= record.start and record.start + record.cumulative_seconds <= end
+        )
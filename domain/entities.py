@@ -1,8 +1,16 @@
-"""Доменные сущности"""
+"""Доменные сущности.
 
+Сущности — dataclass со __slots__: без __dict__ у каждого экземпляра, что заметно
+на сотнях тысяч заключений в памяти. Имена шаблонов интернируются — тысячи
+заключений ссылаются на одну строку «Стандартный». FrozenReport и FrozenTemplate —
+неизменяемые (и хешируемые) варианты для данных только на чтение.
+"""
+
+import sys
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
 
 
 class Modality(str, Enum):
@@ -11,7 +19,11 @@ class Modality(str, Enum):
     DENSITOMETRY = "densitometry"
 
 
-@dataclass
+def _intern(name: Optional[str]) -> Optional[str]:
+    return sys.intern(name) if name is not None else None
+
+
+@dataclass(slots=True)
 class Report:
     """Сущность рентгеновского заключения"""
     id: str
@@ -20,10 +32,66 @@ class Report:
     processed_text: Optional[str] = None
     template_name: Optional[str] = None
 
+    def __post_init__(self):
+        self.template_name = _intern(self.template_name)
+
+    def freeze(self) -> "FrozenReport":
+        """Неизменяемая копия"""
+        return FrozenReport(self.id, self.modality, self.original_text, self.processed_text, self.template_name)
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenReport:
+    """Неизменяемое заключение (те же поля, что у Report)"""
+    id: str
+    modality: Modality
+    original_text: str
+    processed_text: Optional[str] = None
+    template_name: Optional[str] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "template_name", _intern(self.template_name))
 
-@dataclass
+    def thaw(self) -> Report:
+        """Изменяемая копия"""
+        return Report(self.id, self.modality, self.original_text, self.processed_text, self.template_name)
+
+
+@dataclass(slots=True)
 class Template:
     """Шаблон для замены текста"""
     name: str
     modality: Modality
     replacements: Dict[str, str]  # Словарь замен: исходный текст -> целевой текст
+
+    def __post_init__(self):
+        self.name = sys.intern(self.name)
+
+    def freeze(self) -> "FrozenTemplate":
+        """Неизменяемая копия (замены копируются)"""
+        return FrozenTemplate(self.name, self.modality, self.replacements)
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenTemplate:
+    """Неизменяемый шаблон: замены — копия, доступная только на чтение"""
+    name: str
+    modality: Modality
+    replacements: Mapping[str, str]
+
+    def __post_init__(self):
+        object.__setattr__(self, "name", sys.intern(self.name))
+        object.__setattr__(self, "replacements", MappingProxyType(dict(self.replacements)))
+
+    def __reduce__(self):
+        # MappingProxyType не сериализуется (pickle для пула процессов при spawn, deepcopy):
+        # экземпляр восстанавливается через конструктор из обычного словаря
+        return (type(self), (self.name, self.modality, dict(self.replacements)))
+
+    def __hash__(self) -> int:
+        # MappingProxyType не хешируется: замены в хеш не входят, равенство их учитывает
+        return hash((self.name, self.modality))
+
+    def thaw(self) -> Template:
+        """Изменяемая копия (замены копируются)"""
+        return Template(self.name, self.modality, dict(self.replacements))
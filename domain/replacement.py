@@ -0,0 +1,267 @@
+"""Однопроходная замена текста по словарю шаблона"""
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+
+@dataclass
+class ReplacementResult:
+    """Результат замены вместе с позициями вхождений — основа для инкрементальной переобработки.
+
+    starts/ends — границы вхождений в исходном тексте, out_starts/out_ends — границы
+    подставленных замен в результате (списки упорядочены и не пересекаются).
+    """
+    source: str
+    output: str
+    starts: List[int] = field(default_factory=list)
+    ends: List[int] = field(default_factory=list)
+    out_starts: List[int] = field(default_factory=list)
+    out_ends: List[int] = field(default_factory=list)
+
+    def output_offset(self, pos: int, count: int) -> int:
+        """Позиция в результате для позиции исходного текста вне вхождений.
+
+        count — число вхождений, начинающихся раньше pos.
+        """
+        if count == 0:
+            return pos
+        return self.out_ends[count - 1] + pos - self.ends[count - 1]
+
+
+class ReplacementMatcher:
+    """Скомпилированный набор замен шаблона.
+
+    Все ключи ищутся за один проход слева направо. Приоритет при пересечении:
+    побеждает самое левое вхождение, а среди вхождений, начинающихся в одной
+    позиции, — самое длинное («без патологических изменений» важнее
+    «без изменений»). Подставленный текст повторно не сканируется.
+    """
+
+    def __init__(self, replacements: Mapping[str, str]):
+        # Пустой ключ не имеет смысла (str.replace вставил бы замену между всеми символами)
+        self._replacements: Dict[str, str] = {k: v for k, v in replacements.items() if k}
+        self.max_key_length = max(map(len, self._replacements), default=0)
+        self._pattern: Optional[re.Pattern] = _compile_keys(self._replacements) if self._replacements else None
+
+    def __len__(self) -> int:
+        return len(self._replacements)
+
+    def replace(self, text: str) -> str:
+        """Применить все замены к тексту за один проход"""
+        if self._pattern is None or not text:
+            return text
+        # Цельный текст — частный случай потока из одного последнего куска
+        return self._scan(text, final=True)[0]
+
+    def iter_replace(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Потоковая замена: текст поступает и выдаётся кусками.
+
+        Вхождение, начинающееся в позиции s, окончательно только когда известны
+        max_key_length символов начиная с s, поэтому между кусками удерживается
+        хвост короче самого длинного ключа — совпадения на стыке кусков находятся
+        так же, как в цельном тексте, а память ограничена размером куска и хвоста.
+        """
+        if self._pattern is None:
+            yield from (chunk for chunk in chunks if chunk)
+            return
+        tail = ""
+        for chunk in chunks:
+            if not chunk:
+                continue
+            out, tail = self._scan(tail + chunk if tail else chunk, final=False)
+            if out:
+                yield out
+        if tail:
+            out, _ = self._scan(tail, final=True)
+            yield out
+
+    def replace_tracked(self, text: str) -> ReplacementResult:
+        """Заменить с запоминанием позиций вхождений (для последующего apply_edit)"""
+        result = ReplacementResult(source=text, output=text)
+        if self._pattern is None:
+            return result
+        result.output = self._emit_matches(text, self._pattern.finditer(text), 0, len(text), 0, result)
+        return result
+
+    def apply_edit(
+        self,
+        previous: ReplacementResult,
+        offset: int,
+        removed_length: int,
+        inserted_text: str,
+    ) -> ReplacementResult:
+        """Переобработать текст после правки, не сканируя его целиком.
+
+        Правка заменяет removed_length символов исходного текста, начиная с offset,
+        на inserted_text. Вхождения, решение о которых не зависит от правки (начинаются
+        не ближе max_key_length символов до неё), берутся из previous. Сканирование
+        начинается перед правкой и останавливается, как только после неё находится
+        позиция, свободная от вхождений и в новом, и в старом разборе: дальше оба
+        разбора совпадают, и хвост результата переиспользуется со сдвигом.
+        Результат всегда совпадает с replace_tracked(новый текст).
+        """
+        new_source = apply_text_edit(previous.source, offset, removed_length, inserted_text)
+        if self._pattern is None:
+            return ReplacementResult(source=new_source, output=new_source)
+
+        starts, ends = previous.starts, previous.ends
+        delta = len(inserted_text) - removed_length
+        edit_end = offset + len(inserted_text)
+
+        # Решения о вхождениях, начавшихся до restart_from, правка не затрагивает
+        restart_from = max(0, offset - self.max_key_length + 1)
+        kept = bisect_left(starts, restart_from)
+        if kept:
+            restart_from = max(restart_from, ends[kept - 1])
+        out_restart = previous.output_offset(restart_from, kept)
+
+        result = ReplacementResult(
+            source=new_source,
+            output="",
+            starts=starts[:kept],
+            ends=ends[:kept],
+            out_starts=previous.out_starts[:kept],
+            out_ends=previous.out_ends[:kept],
+        )
+
+        # Ищем точку синхронизации: свободную позицию после правки в обоих разборах
+        found = []
+        pos = restart_from
+        stop, old_stop = len(new_source), None
+        while True:
+            m = self._pattern.search(new_source, pos)
+            next_start = m.start() if m else len(new_source)
+            candidate = max(pos, edit_end)
+            if candidate <= next_start:
+                old_pos = candidate - delta
+                j = bisect_right(starts, old_pos) - 1
+                if j >= 0 and starts[j] < old_pos < ends[j]:
+                    # Старый разбор был внутри вхождения — ближайшая свободная позиция его конец
+                    old_pos = ends[j]
+                    candidate = old_pos + delta
+                if candidate <= next_start:
+                    stop, old_stop = candidate, old_pos
+                    break
+            if m is None:
+                break
+            found.append(m)
+            pos = m.end()
+
+        middle = self._emit_matches(new_source, found, restart_from, stop, out_restart, result)
+        if old_stop is None:
+            result.output = previous.output[:out_restart] + middle
+            return result
+
+        tail_from = bisect_left(starts, old_stop)
+        old_out_stop = previous.output_offset(old_stop, tail_from)
+        out_delta = out_restart + len(middle) - old_out_stop
+        result.output = previous.output[:out_restart] + middle + previous.output[old_out_stop:]
+        result.starts += [x + delta for x in starts[tail_from:]]
+        result.ends += [x + delta for x in ends[tail_from:]]
+        result.out_starts += [x + out_delta for x in previous.out_starts[tail_from:]]
+        result.out_ends += [x + out_delta for x in previous.out_ends[tail_from:]]
+        return result
+
+    def _emit_matches(
+        self,
+        text: str,
+        matches: Iterable[re.Match],
+        start: int,
+        stop: int,
+        out_pos: int,
+        result: ReplacementResult,
+    ) -> str:
+        """Собирает результат для text[start:stop] по найденным вхождениям, дописывая их позиции в result"""
+        lookup = self._replacements.__getitem__
+        pieces = []
+        pos = start
+        for m in matches:
+            m_start, m_end = m.span()
+            replacement = lookup(m.group())
+            out_pos += m_start - pos
+            result.starts.append(m_start)
+            result.ends.append(m_end)
+            result.out_starts.append(out_pos)
+            out_pos += len(replacement)
+            result.out_ends.append(out_pos)
+            pieces.append(text[pos:m_start])
+            pieces.append(replacement)
+            pos = m_end
+        pieces.append(text[pos:stop])
+        return "".join(pieces)
+
+    def _scan(self, buffer: str, final: bool) -> Tuple[str, str]:
+        """Заменяет окончательные вхождения в буфере; возвращает (готовый текст, хвост)"""
+        # split с захватывающей группой: [текст, ключ, текст, ключ, ..., текст] — весь разбор в C
+        parts = self._pattern.split(buffer)
+        tail = ""
+        if not final:
+            # Вхождение в позиции s окончательно, если s + max_key_length <= len(buffer);
+            # неокончательные (их не больше хвоста) отбрасываем с конца
+            last_final_start = len(buffer) - self.max_key_length
+            end = len(buffer)
+            i = len(parts) - 1
+            while i > 0:
+                match_start = end - len(parts[i]) - len(parts[i - 1])
+                if match_start <= last_final_start:
+                    break
+                end = match_start
+                i -= 2
+            segment_start = end - len(parts[i])
+            safe = max(segment_start, last_final_start + 1)
+            tail = buffer[safe:]
+            del parts[i + 1:]
+            parts[i] = buffer[segment_start:safe]
+        parts[1::2] = map(self._replacements.__getitem__, parts[1::2])
+        return "".join(parts), tail
+
+
+def apply_text_edit(text: str, offset: int, removed_length: int, inserted_text: str) -> str:
+    """Применить правку (offset, removed_length, inserted_text) к тексту"""
+    if not (0 <= offset <= len(text) and removed_length >= 0 and offset + removed_length <= len(text)):
+        raise ValueError(f"Правка ({offset}, {removed_length}) выходит за пределы текста длиной {len(text)}")
+    return text[:offset] + inserted_text + text[offset + removed_length:]
+
+
+def _compile_keys(keys: Iterable[str]) -> re.Pattern:
+    """Компилирует ключи в регулярное выражение, повторяющее структуру префиксного дерева.
+
+    Такое выражение проверяет в каждой позиции не все ключи подряд, а только ветви
+    дерева, совпадающие с текстом, — фактически это автомат по trie, исполняемый
+    движком re. Жадные необязательные группы дают «самое длинное» совпадение.
+    """
+    keys = list(keys)
+    trie: dict = {}
+    for key in keys:
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    # Внешняя захватывающая группа нужна для разбора через split (см. _scan)
+    try:
+        return re.compile("(" + _node_pattern(trie) + ")")
+    except RecursionError:
+        # Патологически глубокое дерево: плоская альтернатива с тем же приоритетом
+        ordered = sorted(keys, key=len, reverse=True)
+        return re.compile("(" + "|".join(re.escape(k) for k in ordered) + ")")
+
+
+def _node_pattern(node: dict) -> str:
+    """Шаблон для поддерева trie (цепочки без ветвлений сворачиваются в литерал)"""
+    branches = []
+    for ch in sorted(k for k in node if k):
+        literal = [ch]
+        child = node[ch]
+        while len(child) == 1 and "" not in child:
+            (next_ch, child), = child.items()
+            literal.append(next_ch)
+        branches.append(re.escape("".join(literal)) + _node_pattern(child))
+
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        body = "(?:" + body + ")?"
+    return body
@@ -0,0 +1,111 @@
+"""История версий заключений: ключевые версии целиком, остальные — дельтой от предыдущей"""
+
+from dataclasses import dataclass, replace
+from typing import Iterable, List, Optional, Sequence
+
+from domain.entities import Modality, Report
+from domain.text_delta import apply_delta, make_delta
+
+# Каждая KEYFRAME_INTERVAL-я версия (1, 17, 33, ...) хранится целиком: чтобы восстановить
+# любую версию, достаточно применить не больше KEYFRAME_INTERVAL - 1 дельт
+KEYFRAME_INTERVAL = 16
+
+
+@dataclass(slots=True)
+class Revision:
+    """Сохранённая версия заключения.
+
+    У ключевой версии original_text/processed_text — сам текст, у остальных —
+    дельта (domain.text_delta) от текста предыдущей версии; processed_text=None
+    означает, что обработанного текста в этой версии нет.
+    """
+    version: int
+    keyframe: bool
+    modality: Modality
+    original_text: str
+    processed_text: Optional[str] = None
+    template_name: Optional[str] = None
+
+
+def keyframe_base(version: int, interval: int = KEYFRAME_INTERVAL) -> int:
+    """Номер обязательной ключевой версии, с которой начинается восстановление version"""
+    return (version - 1) // interval * interval + 1
+
+
+def make_revision(
+    previous: Optional[Report], report: Report, version: int, interval: int = KEYFRAME_INTERVAL
+) -> Revision:
+    """Версия version для report; previous — предыдущая версия (None для первой)"""
+    if previous is not None and version != keyframe_base(version, interval):
+        original = make_delta(previous.original_text, report.original_text)
+        processed = None
+        if report.processed_text is not None:
+            processed = make_delta(previous.processed_text or "", report.processed_text)
+        # Дельта длиннее текста (текст переписан целиком) — выгоднее хранить версию целиком
+        if len(original) + len(processed or "") < len(report.original_text) + len(report.processed_text or ""):
+            return Revision(version, False, report.modality, original, processed, report.template_name)
+    return Revision(version, True, report.modality, report.original_text, report.processed_text, report.template_name)
+
+
+def replay(report_id: str, revisions: Iterable[Revision]) -> List[Report]:
+    """Восстановить версии по порядку; первая из revisions должна быть ключевой"""
+    reports: List[Report] = []
+    previous: Optional[Report] = None
+    for revision in revisions:
+        if revision.keyframe:
+            original, processed = revision.original_text, revision.processed_text
+        else:
+            if previous is None:
+                raise ValueError(f"Версия {revision.version} заключения {report_id} не ключевая и не имеет предыдущей")
+            original = apply_delta(previous.original_text, revision.original_text)
+            processed = None
+            if revision.processed_text is not None:
+                processed = apply_delta(previous.processed_text or "", revision.processed_text)
+        previous = Report(
+            id=report_id,
+            modality=revision.modality,
+            original_text=original,
+            processed_text=processed,
+            template_name=revision.template_name,
+        )
+        reports.append(previous)
+    return reports
+
+
+def latest(report_id: str, revisions: Sequence[Revision]) -> Report:
+    """Последняя версия цепочки: восстанавливается от ближайшей ключевой версии"""
+    start = len(revisions) - 1
+    while not revisions[start].keyframe:
+        start -= 1
+    return replay(report_id, revisions[start:])[-1]
+
+
+class ReportHistory:
+    """История одного заключения в памяти"""
+
+    def __init__(self, interval: int = KEYFRAME_INTERVAL):
+        self.interval = interval
+        self.revisions: List[Revision] = []
+        self._last: Optional[Report] = None
+
+    def __len__(self) -> int:
+        return len(self.revisions)
+
+    def record(self, report: Report) -> bool:
+        """Добавить версию; повторное сохранение без изменений версию не добавляет"""
+        if report == self._last:
+            return False
+        self.revisions.append(make_revision(self._last, report, len(self.revisions) + 1, self.interval))
+        # Копия: вызывающий код может менять сохранённый объект Report на месте
+        self._last = replace(report)
+        return True
+
+    def versions(self, report_id: str) -> List[Report]:
+        """Все версии от первой к последней"""
+        return replay(report_id, self.revisions)
+
+    def at(self, report_id: str, version: int) -> Optional[Report]:
+        """Версия с номером version (с 1) или None"""
+        if not 1 <= version <= len(self.revisions):
+            return None
+        return latest(report_id, self.revisions[keyframe_base(version, self.interval) - 1:version])
@@ -8,34 +8,174 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from typing import Optional
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
 from domain.entities import Modality, Report, Template
+from domain.replacement import ReplacementResult, apply_text_edit
+from domain.template_cache import CompiledTemplate, TemplateCache, default_template_cache
+
+# Шаблон, переданный процессу-исполнителю один раз при его запуске (см. process_reports)
+_worker_template: Optional[CompiledTemplate] = None
+
+
+def _init_worker(compiled: CompiledTemplate):
+    """Инициализатор процесса пула: сохраняет скомпилированный шаблон"""
+    global _worker_template
+    _worker_template = compiled
+
+
+def _process_chunk(texts: List[str]) -> List[str]:
+    """Обработка пачки текстов в процессе пула"""
+    return [_worker_template.apply(text) for text in texts]
 
 
 class ReportService:
     """Сервис для работы с рентгеновскими заключениями"""
     
-    def __init__(self, template: Optional[Template] = None):
+    # Сколько последних редактируемых заключений держать с позициями вхождений
+    EDIT_STATE_LIMIT = 32
+
+    def __init__(self, template: Optional[Template] = None, template_cache: Optional[TemplateCache] = None):
+        self.template_cache = template_cache if template_cache is not None else default_template_cache
         self.template = template
+        self._compiled: Optional[CompiledTemplate] = None
+        self._compiled_for: Optional[Template] = None
+        # report.id -> (шаблон, результат с позициями вхождений) для reprocess_edit
+        self._edit_states: "OrderedDict[str, Tuple[CompiledTemplate, ReplacementResult]]" = OrderedDict()
     
     def set_template(self, template: Template):
-        """Установить шаблон для замены"""
+        """Установить шаблон для замены.
+
+        Шаблон компилируется (или берётся из кэша) один раз; после изменения
+        словаря замен на месте шаблон нужно установить заново.
+        """
         self.template = template
+        if template:
+            self._get_compiled()
+    
+    def _get_compiled(self) -> CompiledTemplate:
+        """Скомпилированный текущий шаблон (кэш опрашивается только при смене шаблона)"""
+        if self._compiled is None or self._compiled_for is not self.template:
+            self._compiled = self.template_cache.get(self.template)
+            self._compiled_for = self.template
+        return self._compiled
     
     def process_report(self, report: Report) -> Report:
-        """Обработать заключение по шаблону"""
+        """Обработать заключение по шаблону (все замены применяются за один проход)"""
         if not self.template:
             report.processed_text = report.original_text
             return report
         
-        processed_text = report.original_text
-        for original, replacement in self.template.replacements.items():
-            processed_text = processed_text.replace(original, replacement)
-        
-        report.processed_text = processed_text
+        report.processed_text = self._get_compiled().apply(report.original_text)
         report.template_name = self.template.name
         return report
     
+    def reprocess_edit(self, report: Report, offset: int, removed_length: int, inserted_text: str) -> Report:
+        """Применить правку к original_text и переобработать только затронутый участок.
+
+        Правка: removed_length символов начиная с offset заменяются на inserted_text.
+        Результат совпадает с полной переобработкой, но сканируется только окно правки
+        плюс длина самого длинного ключа; остальной результат берётся из предыдущей
+        обработки. Первая правка заключения (или правка после смены шаблона)
+        обрабатывает текст целиком и запоминает позиции вхождений.
+        """
+        if not self.template:
+            report.original_text = apply_text_edit(report.original_text, offset, removed_length, inserted_text)
+            return self.process_report(report)
+
+        compiled = self._get_compiled()
+        state = self._edit_states.pop(report.id, None)
+        if state is None or state[0] is not compiled or state[1].source != report.original_text:
+            previous = compiled.matcher.replace_tracked(report.original_text)
+        else:
+            previous = state[1]
+        result = compiled.matcher.apply_edit(previous, offset, removed_length, inserted_text)
+
+        self._edit_states[report.id] = (compiled, result)
+        while len(self._edit_states) > self.EDIT_STATE_LIMIT:
+            self._edit_states.popitem(last=False)
+
+        report.original_text = result.source
+        report.processed_text = result.output
+        report.template_name = self.template.name
+        return report
+
+    def process_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Обработать текст, поступающий кусками (например, многомегабайтную выгрузку архива).
+
+        Совпадения на стыках кусков обрабатываются так же, как в цельном тексте;
+        в памяти держится только текущий кусок и хвост короче самого длинного ключа.
+        """
+        if not self.template:
+            yield from (chunk for chunk in chunks if chunk)
+            return
+        yield from self._get_compiled().matcher.iter_replace(chunks)
+
+    def write_stream(self, chunks: Iterable[str], sink: TextIO) -> int:
+        """Обработать поток кусков и записать результат в файлоподобный sink.
+
+        Возвращает число записанных символов.
+        """
+        written = 0
+        for piece in self.process_stream(chunks):
+            sink.write(piece)
+            written += len(piece)
+        return written
+
+    def process_reports(
+        self,
+        reports: Iterable[Report],
+        workers: int = 1,
+        chunk_size: int = 256,
+    ) -> Iterator[Report]:
+        """Обработать поток заключений по шаблону, выдавая результаты в порядке входа.
+
+        При workers > 1 заключения делятся на пачки по chunk_size и обрабатываются
+        в ProcessPoolExecutor. Скомпилированный шаблон передаётся каждому процессу
+        один раз (через инициализатор), в задачах пересылаются только тексты.
+        Одновременно в работе не больше 2 * workers пачек, поэтому вход читается
+        по мере выдачи результатов. Неположительные workers или chunk_size —
+        ValueError сразу при вызове, а не при обходе результата.
+        """
+        if workers <= 0:
+            raise ValueError("workers должен быть положительным")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size должен быть положительным")
+        return self._iter_processed(reports, workers, chunk_size)
+
+    def _iter_processed(self, reports: Iterable[Report], workers: int, chunk_size: int) -> Iterator[Report]:
+        if not self.template or workers <= 1:
+            for report in reports:
+                yield self.process_report(report)
+            return
+
+        compiled = self._get_compiled()
+        template_name = self.template.name
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(compiled,))
+        pending: "deque[Tuple[List[Report], Future]]" = deque()
+        try:
+            source = iter(reports)
+            while True:
+                chunk = list(islice(source, chunk_size))
+                if not chunk:
+                    break
+                pending.append((chunk, executor.submit(_process_chunk, [r.original_text for r in chunk])))
+                if len(pending) >= 2 * workers:
+                    yield from self._finish_chunk(*pending.popleft(), template_name)
+            while pending:
+                yield from self._finish_chunk(*pending.popleft(), template_name)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _finish_chunk(chunk: List[Report], future: Future, template_name: str) -> Iterator[Report]:
+        for report, processed_text in zip(chunk, future.result()):
+            report.processed_text = processed_text
+            report.template_name = template_name
+            yield report
+    
     def create_report(self, report_id: str, modality: Modality, original_text: str) -> Report:
         """Создать новое заключение"""
         return Report(id=report_id, modality=modality, original_text=original_text)
@@ -0,0 +1,149 @@
+"""Кэш скомпилированных шаблонов"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from domain.entities import Modality, Template
+from domain.replacement import ReplacementMatcher
+
+
+def template_content_hash(template: Template) -> str:
+    """Хэш содержимого шаблона (версия): меняется при любом изменении словаря замен.
+
+    Порядок ключей на результат замены не влияет, поэтому словарь хэшируется отсортированным.
+    """
+    payload = json.dumps(sorted(template.replacements.items()), ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Шаблон вместе с готовым к работе набором замен"""
+    template: Template
+    content_hash: str
+    matcher: ReplacementMatcher
+
+    @property
+    def name(self) -> str:
+        return self.template.name
+
+    @property
+    def modality(self) -> Modality:
+        return self.template.modality
+
+    def apply(self, text: str) -> str:
+        """Применить замены шаблона к тексту"""
+        return self.matcher.replace(text)
+
+
+@dataclass(frozen=True)
+class TemplateCacheStats:
+    """Счётчики кэша — чтобы проверить, что кэш окупается"""
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+CacheKey = Tuple[Modality, str, str]
+
+
+class TemplateCache:
+    """LRU-кэш скомпилированных шаблонов с ключом (модальность, имя, хэш содержимого).
+
+    Хранилище заполняет кэш при save_template; новая версия шаблона вытесняет старую.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._entries: "OrderedDict[CacheKey, CompiledTemplate]" = OrderedDict()
+        # (модальность, имя) -> хэш актуальной версии
+        self._versions: Dict[Tuple[Modality, str], str] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, template: Template) -> CompiledTemplate:
+        """Вернуть скомпилированный шаблон, компилируя его при промахе"""
+        content_hash = template_content_hash(template)
+        with self._lock:
+            compiled = self._lookup(template, content_hash)
+            if compiled is not None:
+                self._hits += 1
+                return compiled
+            self._misses += 1
+        return self._store(template, content_hash)
+
+    def put(self, template: Template) -> CompiledTemplate:
+        """Скомпилировать и положить шаблон в кэш (вызывается при сохранении шаблона)"""
+        content_hash = template_content_hash(template)
+        with self._lock:
+            compiled = self._lookup(template, content_hash)
+            if compiled is not None:
+                return compiled
+        return self._store(template, content_hash)
+
+    def invalidate(self, modality: Modality, name: str) -> None:
+        """Удалить шаблон из кэша"""
+        with self._lock:
+            self._drop(modality, name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self) -> TemplateCacheStats:
+        with self._lock:
+            return TemplateCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                max_size=self.max_size,
+            )
+
+    def _lookup(self, template: Template, content_hash: str) -> Optional[CompiledTemplate]:
+        key = (template.modality, template.name, content_hash)
+        compiled = self._entries.get(key)
+        if compiled is not None:
+            self._entries.move_to_end(key)
+        return compiled
+
+    def _store(self, template: Template, content_hash: str) -> CompiledTemplate:
+        # Компиляция вне блокировки: для больших шаблонов она заметно дольше поиска
+        compiled = CompiledTemplate(
+            template=template,
+            content_hash=content_hash,
+            matcher=ReplacementMatcher(template.replacements),
+        )
+        with self._lock:
+            # Держим только актуальную версию шаблона: новая вытесняет старую
+            self._drop(template.modality, template.name)
+            self._versions[(template.modality, template.name)] = content_hash
+            self._entries[(template.modality, template.name, content_hash)] = compiled
+            while len(self._entries) > self.max_size:
+                (modality, name, _), _ = self._entries.popitem(last=False)
+                del self._versions[(modality, name)]
+                self._evictions += 1
+        return compiled
+
+    def _drop(self, modality: Modality, name: str) -> None:
+        content_hash = self._versions.pop((modality, name), None)
+        if content_hash is not None:
+            del self._entries[(modality, name, content_hash)]
+
+
+# Общий кэш по умолчанию: хранилище и ReportService без явного кэша используют его совместно
+default_template_cache = TemplateCache()
@@ -0,0 +1,67 @@
+"""Разность двух версий текста (дельта) для компактного хранения истории"""
+
+import json
+import re
+from difflib import SequenceMatcher
+from itertools import accumulate
+from typing import List, Union
+
+# Слово или знак вместе с пробелами после него; вместе покрывают весь текст. Пробелы не
+# выделяются в отдельные токены: частые одинаковые токены сильно замедляют SequenceMatcher
+_TOKEN_RE = re.compile(r"\w+\s*|[^\w\s]\s*|\s+")
+
+
+def make_delta(old: str, new: str) -> str:
+    """Дельта, превращающая old в new.
+
+    Тексты сравниваются по словам (difflib), дельта — JSON-список операций:
+    [начало, длина] — скопировать кусок old, строка — вставить её.
+    Общие начало и конец отрезаются до сравнения: правка обычно затрагивает
+    небольшой кусок текста.
+    """
+    old_tokens = _TOKEN_RE.findall(old)
+    new_tokens = _TOKEN_RE.findall(new)
+    offsets = [0, *accumulate(len(token) for token in old_tokens)]
+    common = min(len(old_tokens), len(new_tokens))
+    prefix = 0
+    while prefix < common and old_tokens[prefix] == new_tokens[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < common - prefix and old_tokens[-1 - suffix] == new_tokens[-1 - suffix]:
+        suffix += 1
+
+    ops: List[Union[List[int], str]] = []
+
+    def copy(i1: int, i2: int) -> None:
+        if i2 <= i1:
+            return
+        last = ops[-1] if ops else None
+        if isinstance(last, list) and last[0] + last[1] == offsets[i1]:
+            last[1] += offsets[i2] - offsets[i1]
+        else:
+            ops.append([offsets[i1], offsets[i2] - offsets[i1]])
+
+    def insert(j1: int, j2: int) -> None:
+        if j2 > j1:
+            inserted = "".join(new_tokens[j1:j2])
+            if ops and isinstance(ops[-1], str):
+                ops[-1] += inserted
+            else:
+                ops.append(inserted)
+
+    copy(0, prefix)
+    matcher = SequenceMatcher(
+        None, old_tokens[prefix:len(old_tokens) - suffix], new_tokens[prefix:len(new_tokens) - suffix], autojunk=False
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            copy(prefix + i1, prefix + i2)
+        else:
+            insert(prefix + j1, prefix + j2)
+    copy(len(old_tokens) - suffix, len(old_tokens))
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(old: str, delta: str) -> str:
+    """Восстановить новый текст по старому и дельте из make_delta"""
+    return "".join(op if isinstance(op, str) else old[op[0]:op[0] + op[1]] for op in json.loads(delta))
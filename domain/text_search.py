@@ -0,0 +1,324 @@
+"""Полнотекстовый поиск по заключениям"""
+
+import heapq
+import math
+import pickle
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from domain.entities import Modality, Report
+
+_WORD_RE = re.compile(r"[0-9a-zа-я]+")
+
+# Окончания русских слов по длине, от длинных к коротким; отрезается первое
+# подходящее, если от слова остаётся не меньше _MIN_STEM букв
+_SUFFIXES = (
+    (4, frozenset({"иями"})),
+    (3, frozenset({"ями", "ами", "ией", "иях", "ого", "его", "ому", "ему", "ыми", "ими"})),
+    (2, frozenset({
+        "ях", "ах", "ой", "ей", "ий", "ый", "ая", "яя", "ое", "ее", "ые", "ие", "ую", "юю", "ом", "ем",
+        "ам", "ям", "ов", "ев", "ия", "ья", "ию", "ью", "ии", "ых", "их", "ым", "им",
+    })),
+    (1, frozenset({"а", "я", "о", "е", "и", "ы", "у", "ю", "ь"})),
+)
+_MIN_STEM = 3
+
+_MODALITY_CODES = {m: i for i, m in enumerate(Modality)}
+
+# Параметры BM25
+_K1 = 1.2
+_B = 0.75
+
+# Если самый редкий список вхождений или пересечение не больше этого, совпадения ранжируются целиком
+_SMALL_CANDIDATE_SET = 4096
+
+INDEX_FORMAT_VERSION = 1
+
+
+@lru_cache(maxsize=65536)
+def normalize_token(word: str) -> str:
+    """Нормализованная форма слова: нижний регистр, ё -> е, без окончания"""
+    word = word.lower().replace("ё", "е")
+    for length, suffixes in _SUFFIXES:
+        if len(word) - length >= _MIN_STEM and word[-length:] in suffixes:
+            return word[:-length]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Нормализованные токены текста в порядке следования"""
+    return [normalize_token(word) for word in _WORD_RE.findall(text.lower().replace("ё", "е"))]
+
+
+def report_tokens(report: Report) -> List[str]:
+    """Токены заключения: исходный текст и результат обработки"""
+    tokens = tokenize(report.original_text)
+    if report.processed_text and report.processed_text != report.original_text:
+        tokens.extend(tokenize(report.processed_text))
+    return tokens
+
+
+def _term_weight(tf: int, length: int, avg_length: float) -> float:
+    """Вклад термина в BM25 без idf: зависит только от tf и длины документа"""
+    norm = _K1 * (1 - _B + _B * length / avg_length) if avg_length else _K1
+    return tf * (_K1 + 1) / (tf + norm)
+
+
+class SearchIndex:
+    """Инвертированный индекс по нормализованным токенам с ранжированием BM25.
+
+    Каждому сохранению заключения выдаётся новый номер документа, поэтому списки
+    вхождений (array) только дописываются и остаются отсортированными по номеру.
+    Вхождения термина дополнительно сгруппированы по паре (tf, длина документа):
+    вклад в BM25 у группы общий, и запрос обходит группы самого редкого термина
+    от самых весомых, останавливаясь, когда оставшиеся уже не попадут в top-k.
+    Остальные слова запроса (AND) проверяются пересечением множеств и двоичным
+    поиском. Старые версии помечаются удалёнными; когда их становится больше,
+    чем живых документов, они вычищаются, а живые документы перенумеровываются.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._groups: Dict[str, Dict[Tuple[int, int], array]] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self._doc_lengths = array("I")
+        self._doc_modalities = bytearray()
+        self._doc_numbers: Dict[str, int] = {}
+        self._total_length = 0
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_numbers)
+
+    def add(self, report: Report) -> None:
+        """Проиндексировать заключение (предыдущая версия с тем же id заменяется)"""
+        self.remove(report.id)
+        tokens = report_tokens(report)
+        length = len(tokens)
+        doc = len(self._doc_ids)
+        self._doc_ids.append(report.id)
+        self._doc_lengths.append(length)
+        self._doc_modalities.append(_MODALITY_CODES[report.modality])
+        self._doc_numbers[report.id] = doc
+        self._total_length += length
+        for term, tf in Counter(tokens).items():
+            tf = min(tf, 0xFFFF)
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+                self._groups[term] = {}
+            postings[0].append(doc)
+            postings[1].append(tf)
+            group = self._groups[term].get((tf, length))
+            if group is None:
+                group = self._groups[term][(tf, length)] = array("I")
+            group.append(doc)
+
+    def remove(self, report_id: str) -> bool:
+        """Убрать заключение из индекса"""
+        doc = self._doc_numbers.pop(report_id, None)
+        if doc is None:
+            return False
+        self._doc_ids[doc] = None
+        self._total_length -= self._doc_lengths[doc]
+        self._dead += 1
+        if self._dead > len(self._doc_numbers):
+            self._vacuum()
+        return True
+
+    def search(self, query: str, modality: Optional[Modality] = None, limit: int = 20) -> List[str]:
+        """ID заключений, содержащих все слова запроса, по убыванию релевантности"""
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+        if any(term not in self._postings for term in terms):
+            return []
+        terms = sorted(terms, key=lambda term: len(self._postings[term][0]))
+        rarest, others = terms[0], terms[1:]
+
+        n_docs = len(self._doc_numbers)
+        avg_length = self._total_length / n_docs if n_docs else 0.0
+        idfs = {
+            term: math.log(1 + (n_docs - len(self._postings[term][0]) + 0.5) / (len(self._postings[term][0]) + 0.5))
+            for term in terms
+        }
+        modality_code = _MODALITY_CODES[modality] if modality is not None else None
+        doc_ids = self._doc_ids
+        doc_lengths = self._doc_lengths
+        doc_modalities = self._doc_modalities
+        other_postings = [(idfs[term], self._postings[term]) for term in others]
+
+        def score(doc: int, rarest_tf: int) -> Optional[float]:
+            length = doc_lengths[doc]
+            total = idfs[rarest] * _term_weight(rarest_tf, length, avg_length)
+            for idf, (docs, tfs) in other_postings:
+                j = bisect_left(docs, doc)
+                if j == len(docs) or docs[j] != doc:
+                    return None
+                total += idf * _term_weight(tfs[j], length, avg_length)
+            return total
+
+        def accept(doc: int) -> bool:
+            return doc_ids[doc] is not None and (modality_code is None or doc_modalities[doc] == modality_code)
+
+        def intersect() -> set:
+            # Пересечение в C: для редких сочетаний частых слов ранжировать почти нечего
+            found = set(self._postings[rarest][0])
+            for term in others:
+                found.intersection_update(self._postings[term][0])
+            return found
+
+        def rank_all(found: Optional[set]) -> List[str]:
+            # found=None: проверяются все документы редкого слова (остальные слова — двоичным поиском)
+            docs, tfs = self._postings[rarest]
+            scored = []
+            for i, doc in enumerate(docs):
+                if found is not None and doc not in found:
+                    continue
+                if accept(doc):
+                    value = score(doc, tfs[i])
+                    if value is not None:
+                        scored.append((value, -doc))
+            return [doc_ids[-neg_doc] for _, neg_doc in heapq.nlargest(limit, scored)]
+
+        candidates = None
+        if len(self._postings[rarest][0]) <= _SMALL_CANDIDATE_SET:
+            return rank_all(None)
+
+        # Граница для группы: длина документа в ней известна, поэтому вклад каждого
+        # другого слова не больше веса его наибольшего tf среди документов той же длины
+        other_bounds = []
+        for term in others:
+            max_tf: Dict[int, int] = {}
+            for tf, length in self._groups[term]:
+                if tf > max_tf.get(length, 0):
+                    max_tf[length] = tf
+            other_bounds.append((idfs[term], max_tf))
+        groups = []
+        for (tf, length), docs in self._groups[rarest].items():
+            bound = idfs[rarest] * _term_weight(tf, length, avg_length)
+            for idf, max_tf in other_bounds:
+                if length not in max_tf:
+                    break
+                bound += idf * _term_weight(max_tf[length], length, avg_length)
+            else:
+                groups.append((bound, tf, docs))
+        groups.sort(key=lambda group: group[0], reverse=True)
+
+        top: List[Tuple[float, int]] = []
+        examined = 0
+        for bound, tf, docs in groups:
+            # Документ из оставшихся групп не наберёт больше bound
+            if len(top) == limit and bound < top[0][0] - 1e-9:
+                break
+            if others and candidates is None and examined > _SMALL_CANDIDATE_SET:
+                # Совпадений мало относительно просмотренного — дешевле сначала пересечь списки
+                candidates = intersect()
+                if len(candidates) <= _SMALL_CANDIDATE_SET:
+                    return rank_all(candidates)
+            examined += len(docs)
+            for doc in docs:
+                if candidates is not None and doc not in candidates:
+                    continue
+                if not accept(doc):
+                    continue
+                value = score(doc, tf)
+                if value is None:
+                    continue
+                # При равной релевантности раньше идут ранее сохранённые заключения
+                item = (value, -doc)
+                if len(top) < limit:
+                    heapq.heappush(top, item)
+                elif item > top[0]:
+                    heapq.heapreplace(top, item)
+        return [doc_ids[-neg_doc] for _, neg_doc in sorted(top, reverse=True)]
+
+    def _vacuum(self) -> None:
+        """Выбросить удалённые версии и перенумеровать живые документы подряд.
+
+        Порядок документов сохраняется, поэтому списки вхождений остаются
+        отсортированными, а равные по релевантности — в прежнем порядке. Таблицы
+        документов сжимаются до живых: повторные сохранения не растят индекс.
+        """
+        renumber: List[int] = []
+        doc_ids: List[Optional[str]] = []
+        doc_lengths = array("I")
+        doc_modalities = bytearray()
+        for doc, report_id in enumerate(self._doc_ids):
+            if report_id is None:
+                renumber.append(-1)
+                continue
+            renumber.append(len(doc_ids))
+            doc_ids.append(report_id)
+            doc_lengths.append(self._doc_lengths[doc])
+            doc_modalities.append(self._doc_modalities[doc])
+        for term in list(self._postings):
+            docs, tfs = self._postings[term]
+            keep = [i for i, doc in enumerate(docs) if renumber[doc] >= 0]
+            if not keep:
+                del self._postings[term]
+                del self._groups[term]
+                continue
+            self._postings[term] = (array("I", (renumber[docs[i]] for i in keep)), array("H", (tfs[i] for i in keep)))
+            groups = self._groups[term]
+            for key in list(groups):
+                alive = array("I", (renumber[doc] for doc in groups[key] if renumber[doc] >= 0))
+                if alive:
+                    groups[key] = alive
+                else:
+                    del groups[key]
+        self._doc_ids = doc_ids
+        self._doc_lengths = doc_lengths
+        self._doc_modalities = doc_modalities
+        self._doc_numbers = {report_id: doc for doc, report_id in enumerate(doc_ids)}
+        self._dead = 0
+
+    # --- сохранение ---
+
+    def save(self, path: Union[str, Path], stamp=None) -> None:
+        """Записать индекс в файл; stamp — метка состояния хранилища, на момент которого он снят"""
+        state = {
+            "version": INDEX_FORMAT_VERSION,
+            "stamp": stamp,
+            "postings": self._postings,
+            "groups": self._groups,
+            "doc_ids": self._doc_ids,
+            "doc_lengths": self._doc_lengths,
+            "doc_modalities": bytes(self._doc_modalities),
+            "total_length": self._total_length,
+            "dead": self._dead,
+        }
+        path = Path(path)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], stamp=None) -> Optional["SearchIndex"]:
+        """Прочитать индекс, записанный save(); None, если файла нет, он повреждён или метка другая.
+
+        Файл — локальные данные приложения (pickle), открывать чужие файлы этим методом нельзя.
+        """
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get("version") != INDEX_FORMAT_VERSION or state.get("stamp") != stamp:
+            return None
+        index = cls()
+        index._postings = state["postings"]
+        index._groups = state["groups"]
+        index._doc_ids = state["doc_ids"]
+        index._doc_lengths = state["doc_lengths"]
+        index._doc_modalities = bytearray(state["doc_modalities"])
+        index._doc_numbers = {report_id: doc for doc, report_id in enumerate(index._doc_ids) if report_id is not None}
+        index._total_length = state["total_length"]
+        index._dead = state["dead"]
+        return index
@@ -1,87 +1,111 @@
 """Точка входа в приложение"""
 
 import sys
-import importlib.util
-from pathlib import Path
-from typing import List
 
-from PySide6.QtWidgets import QApplication
-from core.plugin_base import ModalityPlugin
-from ui.main_window import MainWindow
+# Профиль запуска (--profile-startup) начинается до импорта Qt и модулей приложения
+from core.startup_profiler import StartupProfiler
 
+startup_profiler = StartupProfiler.from_argv(sys.argv)
 
-def load_plugins() -> List[ModalityPlugin]:
-    """Динамически загружает все плагины из папки plugins/"""
-    plugins = []
+with startup_profiler.phase("импорт модулей приложения"):
+    import logging
+    from pathlib import Path
+    from typing import List, Tuple
+
+    from PySide6.QtCore import QStandardPaths, QTimer
+    from PySide6.QtWidgets import QApplication
+    from adapters.storage.cached_storage import CachedStorage
+    from adapters.storage.sqlite_storage import SqliteStorage
+    from core.plugin_base import ModalityPlugin
+    from core.plugin_cache import CACHE_FILE_NAME, PluginDiscoveryCache
+    from core.plugin_loader import LazyPlugin, PluginLoadReport, discover_plugins
+    from core.plugin_usage import USAGE_FILE_NAME, PluginUsageStats
+    from ui.main_window import MainWindow
+    from ui.plugin_watcher import PluginWatcher
+
+logger = logging.getLogger(__name__)
+
+
+def load_plugins() -> Tuple[List[ModalityPlugin], PluginLoadReport]:
+    """Находит плагины в папке plugins/ по манифестам; код плагина импортируется при первом выборе"""
     plugins_dir = Path(__file__).parent / "plugins"
-    
+
     if not plugins_dir.exists():
         print(f"Папка {plugins_dir} не найдена!")
-        return plugins
-    
-    # Сканируем поддиректории в plugins/ (сначала xray_constructor, чтобы «Рентген» был в списке)
-    subdirs = sorted(plugins_dir.iterdir(), key=lambda d: (0 if d.name == "xray_constructor" else 1, d.name))
-    for plugin_dir in subdirs:
-        if not plugin_dir.is_dir() or plugin_dir.name.startswith(".") or plugin_dir.name == "__pycache__":
-            continue
-        
-        plugin_file = plugin_dir / "plugin.py"
-        if not plugin_file.exists():
-            continue
-        
-        try:
-            # Динамический импорт плагина
-            spec = importlib.util.spec_from_file_location(
-                f"plugin_{plugin_dir.name}",
-                plugin_file
+        return [], PluginLoadReport()
+
+    # Порядок кнопок — поле order в plugin.json («Рентген» первым); папки читаются параллельно,
+    # зависший плагин пропускается по таймауту и не задерживает запуск. Неизменённые плагины берутся
+    # из кэша в папке кэша пользователя — на сетевом диске это только stat вместо чтения файлов
+    cache_dir = Path(QStandardPaths.writableLocation(QStandardPaths.CacheLocation))
+    plugins, report = discover_plugins(plugins_dir, cache=PluginDiscoveryCache(cache_dir / CACHE_FILE_NAME))
+    if report.failures():
+        logger.warning("Не все плагины загружены:\n%s", report.format())
+    return plugins, report
+
+
+def app_data_dir() -> Path:
+    """Папка данных пользователя (отчёты, статистика открытия плагинов)"""
+    return Path(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation))
+
+
+def open_storage() -> CachedStorage:
+    """Хранилище сформированных отчётов: SQLite в папке данных пользователя, запись через кэш"""
+    data_dir = app_data_dir()
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return CachedStorage(SqliteStorage(data_dir / "reports.db"))
+
+
+def profile_plugins(report: PluginLoadReport) -> None:
+    """Отрезки поиска каждого плагина (в потоках загрузчика) — в профиль запуска"""
+    for result in report.results:
+        if result.discover_started is not None:
+            startup_profiler.add_span(
+                f"плагин {result.directory}", result.discover_started - startup_profiler.origin,
+                result.discover_seconds, "plugin", result.discover_thread, status=result.status,
             )
-            if spec is None or spec.loader is None:
-                print(f"Не удалось загрузить спецификацию для {plugin_dir.name}")
-                continue
-            
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # Проверяем наличие класса Plugin
-            if not hasattr(module, "Plugin"):
-                print(f"Плагин {plugin_dir.name} не содержит класс Plugin")
-                continue
-            
-            plugin_instance = module.Plugin()
-            
-            # Проверяем, что это ModalityPlugin
-            if not isinstance(plugin_instance, ModalityPlugin):
-                print(f"Плагин {plugin_dir.name} не наследуется от ModalityPlugin")
-                continue
-            
-            plugins.append(plugin_instance)
-            print(f"Загружен плагин: {plugin_instance.get_name()}")
-            
-        except Exception as e:
-            print(f"Ошибка при загрузке плагина {plugin_dir.name}: {e}")
-            if plugin_dir.name == "xray_constructor":
-                import traceback
-                traceback.print_exc()
-            continue
-    
-    return plugins
 
 
 def main():
     """Главная функция"""
-    app = QApplication(sys.argv)
-    
+    # Предупреждения (ошибки плагинов, фоновой записи отчётов) — в stderr
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    with startup_profiler.phase("QApplication"):
+        app = QApplication(sys.argv)
+        app.setApplicationName("radiologists_agent")
+
     # Загружаем плагины
-    plugins = load_plugins()
-    
+    with startup_profiler.phase("load_plugins"):
+        plugins, report = load_plugins()
+    profile_plugins(report)
+
     if not plugins:
         print("Не найдено ни одного плагина!")
         return
-    
+
     # Создаем и показываем главное окно
-    window = MainWindow(plugins)
+    with startup_profiler.phase("open_storage"):
+        storage = open_storage()
+    with startup_profiler.phase("MainWindow"):
+        # После первой отрисовки окно заранее создаёт виджеты плагинов — чаще открываемые первыми
+        window = MainWindow(plugins, storage=storage, usage=PluginUsageStats(app_data_dir() / USAGE_FILE_NAME))
+    # Ошибка фоновой записи отчётов (недоступный диск) видна сразу, а не только при закрытии окна
+    storage.on_flush_error = window.report_storage_error
+    if startup_profiler.enabled:
+        shown = startup_profiler.now()
+
+        def on_first_paint():
+            startup_profiler.add_span("show → первая отрисовка", shown, startup_profiler.now() - shown)
+            # Отчёт — после того как кадр ушёл на экран
+            QTimer.singleShot(0, lambda: print(startup_profiler.finish()))
+
+        window.first_painted.connect(on_first_paint)
     window.show()
-    
+
+    # Правка JSON-шаблонов или кода плагина применяется сразу, без перезапуска
+    watcher = PluginWatcher([p.manifest.directory for p in plugins if isinstance(p, LazyPlugin)], parent=window)
+    watcher.plugin_changed.connect(window.reload_plugin)
+
     sys.exit(app.exec())
 
 
@@ -0,0 +1,213 @@
+"""Формирование текста денситометрии - БЕЗ зависимостей от UI"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+# Добавляем корневую директорию проекта в sys.path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.plugin_base import ReportEngine, ReportText
+
+_CONCLUSION_RE = re.compile(r"\n\n\s*Заключение[.:]", re.IGNORECASE)
+
+
+class DensitometryEngine(ReportEngine):
+    """Текст денситометрии по T/Z-критериям, костной массе (МПК) и FRAX.
+
+    Значения участков — словари {"t", "z", "bmd"} (у шейки бедра ещё "frax");
+    None — поле не заполнено, 0.0 — заполнено нулём. Параметры build_report:
+    spine (позвоночник L1–L4), femur (шейка бедренной кости) и total_hip
+    (проксимальный отдел бедра в целом) — позвоночник, бедро или всё вместе.
+    """
+
+    def get_modality(self) -> str:
+        return "densitometry"
+
+    # --- критерии и диагноз ---
+
+    def criterion_display_and_value(self, t_val: Optional[float], z_val: Optional[float]) -> tuple[Optional[str], Optional[float]]:
+        """
+        Определяет, какой критерий использовать для отображения и диагноза.
+        Возвращает (строка для отображения, значение для диагноза).
+        Если оба критерия заполнены или оба пусты, возвращает (None, None) — нужно показать ошибку.
+        Точное равенство 0.0 считается заполненным значением.
+        """
+        if t_val is None and z_val is None:
+            return (None, None)
+        if t_val is not None and z_val is not None:
+            return (None, None)
+        if t_val is not None:
+            return (f"Т-критерий – {t_val:.1f}", t_val)
+        return (f"Z-критерий – {z_val:.1f}", z_val)
+
+    def criterion_type(self, t_val: Optional[float], z_val: Optional[float]) -> Optional[str]:
+        """Возвращает тип критерия (T или Z) по введённым значениям или None."""
+        if t_val is not None and z_val is not None:
+            return None
+        if t_val is not None:
+            return "T"
+        if z_val is not None:
+            return "Z"
+        return None
+
+    def diagnosis(self, score: float, criterion_type: str = "T") -> str:
+        """Определяет диагноз по значению критерия (T или Z)."""
+        if criterion_type == "Z":
+            return "Остеопороз" if score <= -2.0 else "Норма"
+        if score <= -2.5:
+            return "Остеопороз"
+        elif -2.5 < score <= -2.0:
+            return "Остеопения 3 ст."
+        elif -2.0 < score <= -1.5:
+            return "Остеопения 2 ст"
+        elif -1.5 < score <= -1.1:
+            return "Остеопения 1 ст"
+        else:  # score > -1.1
+            return "Норма"
+
+    # --- валидация ---
+
+    def validate_spine(self, spine: Mapping[str, Optional[float]]) -> Optional[str]:
+        """Ошибка в полях позвоночника или None"""
+        if spine.get("bmd") is None or (spine.get("t") is None and spine.get("z") is None):
+            return "Для позвоночника заполните костную массу и хотя бы один критерий (T или Z)"
+        if spine.get("t") is not None and spine.get("z") is not None:
+            return "Введите либо T, либо Z критерий (не оба сразу)"
+        return None
+
+    def validate_femur(self, femur: Mapping[str, Optional[float]], total_hip: Mapping[str, Optional[float]]) -> Optional[str]:
+        """Ошибка в полях бедренной кости (шейка и total hip) или None"""
+        femur_t, femur_z = femur.get("t"), femur.get("z")
+        if femur.get("bmd") is None or (femur_t is None and femur_z is None) or femur.get("frax") is None:
+            return "Для шейки бедренной кости заполните костную массу, хотя бы один критерий (T или Z) и FRAX"
+        if femur_t is not None and femur_z is not None:
+            return "Для шейки бедренной кости введите либо T, либо Z критерий (не оба сразу)"
+
+        total_hip_t, total_hip_z = total_hip.get("t"), total_hip.get("z")
+        if total_hip.get("bmd") is None or (total_hip_t is None and total_hip_z is None):
+            return "Для проксимального отдела бедра (total hip) заполните костную массу и хотя бы один критерий (T или Z)"
+        if total_hip_t is not None and total_hip_z is not None:
+            return "Для проксимального отдела бедра (total hip) введите либо T, либо Z критерий (не оба сразу)"
+
+        femur_type = self.criterion_type(femur_t, femur_z)
+        total_hip_type = self.criterion_type(total_hip_t, total_hip_z)
+        if femur_type and total_hip_type and femur_type != total_hip_type:
+            return "Для бедренной кости используйте один тип критерия (либо T для обоих участков, либо Z)"
+        return None
+
+    # --- тексты ---
+
+    def spine_report(self, spine: Mapping[str, Optional[float]]) -> ReportText:
+        """Описание и заключение позвоночника (ValueError, если критерий не определён)"""
+        spine_t, spine_z, spine_bmd = spine.get("t"), spine.get("z"), spine.get("bmd")
+        criterion_str, value_for_diagnosis = self.criterion_display_and_value(spine_t, spine_z)
+        if criterion_str is None:
+            raise ValueError("Введите либо T, либо Z критерий (не оба сразу)")
+        spine_diagnosis = self.diagnosis(value_for_diagnosis, "T" if spine_t is not None else "Z")
+
+        bmd_text = f"{spine_bmd:.3f}" if spine_bmd is not None else None
+        if bmd_text is not None:
+            description = f"""Поясничный отдел позвоночника. Поясничные позвонки: L1–L4. Среднее значение МПК составило {bmd_text} г/см. {criterion_str}"""
+        else:
+            description = f"""Поясничный отдел позвоночника. Поясничные позвонки: L1–L4. {criterion_str}"""
+        conclusion = f"""Заключение. Позвоночник - {spine_diagnosis}"""
+        return ReportText(description, conclusion)
+
+    def femur_report(self, femur: Mapping[str, Optional[float]], total_hip: Mapping[str, Optional[float]]) -> ReportText:
+        """Описание и заключение бедренной кости (ValueError, если критерий не определён)"""
+        femur_t, femur_z, femur_bmd, femur_frax = femur.get("t"), femur.get("z"), femur.get("bmd"), femur.get("frax")
+        femur_criterion_str, femur_value = self.criterion_display_and_value(femur_t, femur_z)
+        if femur_criterion_str is None:
+            raise ValueError("Для шейки бедренной кости введите либо T, либо Z критерий (не оба сразу)")
+        femur_diagnosis = self.diagnosis(femur_value, self.criterion_type(femur_t, femur_z))
+
+        total_hip_t, total_hip_z, total_hip_bmd = total_hip.get("t"), total_hip.get("z"), total_hip.get("bmd")
+        total_hip_criterion_str, total_hip_value = self.criterion_display_and_value(total_hip_t, total_hip_z)
+        if total_hip_criterion_str is None:
+            raise ValueError("Для проксимального отдела бедра (total hip) введите либо T, либо Z критерий (не оба сразу)")
+        total_hip_diagnosis = self.diagnosis(total_hip_value, self.criterion_type(total_hip_t, total_hip_z))
+
+        femur_bmd_text = f"{femur_bmd:.3f}" if femur_bmd is not None else None
+        total_hip_bmd_text = f"{total_hip_bmd:.3f}" if total_hip_bmd is not None else None
+        frax_text = f"{femur_frax:.1f}%" if femur_frax is not None else None
+        if femur_bmd_text is not None:
+            femur_line = f"Шейка бедренной кости (femoral neck). Значение МПК составило {femur_bmd_text} г/см. {femur_criterion_str}."
+        else:
+            femur_line = f"Шейка бедренной кости (femoral neck). {femur_criterion_str}."
+        if frax_text is not None:
+            femur_line = f"{femur_line} FRAX – {frax_text}"
+        if total_hip_bmd_text is not None:
+            total_hip_line = f"Проксимальный отдел бедра в целом (total hip). Значение МПК составило {total_hip_bmd_text} г/см. {total_hip_criterion_str}."
+        else:
+            total_hip_line = f"Проксимальный отдел бедра в целом (total hip). {total_hip_criterion_str}."
+        description = f"""Проксимальный отдел бедра. Бедренная кость: левая.
+{femur_line}
+{total_hip_line}"""
+        conclusion = f"""Заключение: Проксимальный отдел бедра в целом: {total_hip_diagnosis}. Шейка бедренной кости: {femur_diagnosis}."""
+        return ReportText(description, conclusion)
+
+    def build_report(self, params: Mapping[str, Any]) -> ReportText:
+        """Отчёт по позвоночнику (spine), бедру (femur и total_hip) или обоим сразу"""
+        spine = params.get("spine")
+        femur, total_hip = params.get("femur"), params.get("total_hip")
+        has_femur = femur is not None or total_hip is not None
+        if spine is None and not has_femur:
+            raise ValueError("Нет данных ни по позвоночнику, ни по бедренной кости")
+        femur, total_hip = femur or {}, total_hip or {}
+
+        error = (self.validate_spine(spine) if spine is not None else None) or \
+            (self.validate_femur(femur, total_hip) if has_femur else None)
+        if error:
+            raise ValueError(error)
+        if spine is None:
+            return self.femur_report(femur, total_hip)
+        if not has_femur:
+            return self.spine_report(spine)
+
+        types = {self.criterion_type(site.get("t"), site.get("z")) for site in (spine, femur, total_hip)}
+        if len(types) > 1:
+            raise ValueError("Для общего отчета используйте один тип критерия: либо T, либо Z")
+        spine_text, femur_text = self.spine_report(spine), self.femur_report(femur, total_hip)
+        return ReportText(f"{spine_text.description}\n\n{femur_text.description}",
+                          f"{spine_text.conclusion}\n\n{femur_text.conclusion}")
+
+    def editor_texts(self, params: Mapping[str, Any]) -> Tuple[ReportText, str, str]:
+        """build_report и тексты блоков для редакторов позвоночника и бедра (пустой — участка нет
+        в params) — одним вызовом для виджета"""
+        report = self.build_report(params)
+        spine_text = self.full_text(self.spine_report(params["spine"])) if params.get("spine") is not None else ""
+        has_femur = params.get("femur") is not None or params.get("total_hip") is not None
+        femur_text = self.full_text(self.femur_report(params.get("femur") or {}, params.get("total_hip") or {})) \
+            if has_femur else ""
+        return report, spine_text, femur_text
+
+    def full_text(self, report: ReportText) -> str:
+        """Текст блока для редактора: описание, пустая строка, заключение"""
+        return f"{report.description}\n\n{report.conclusion}"
+
+    def split_report(self, text: str) -> ReportText:
+        """Разбивает текст блока на описание и заключение по маркеру «Заключение.» / «Заключение:»."""
+        if not text or not text.strip():
+            return ReportText("", "")
+        match = _CONCLUSION_RE.search(text)
+        if match:
+            return ReportText(text[: match.start()].strip(), text[match.start() :].strip())
+        return ReportText(text.strip(), "")
+
+    def combine(self, texts: Iterable[str]) -> ReportText:
+        """Объединённые описание и заключение нескольких блоков (пустые части пропускаются)"""
+        descriptions, conclusions = [], []
+        for text in texts:
+            description, conclusion = self.split_report(text.strip())
+            if description:
+                descriptions.append(description)
+            if conclusion:
+                conclusions.append(conclusion)
+        return ReportText("\n\n".join(descriptions), "\n\n".join(conclusions))
+
+
+Engine = DensitometryEngine
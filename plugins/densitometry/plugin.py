@@ -1,7 +1,6 @@
-"""Плагин денситометрии с улучшенной обработкой текста"""
+"""Плагин денситометрии: виджет с полями ввода; текст формирует DensitometryEngine (engine.py)"""
 
 import sys
-import re
 from pathlib import Path
 from typing import Optional
 
@@ -15,19 +14,29 @@ from PySide6.QtWidgets import (
     QPushButton, QGroupBox, QFormLayout, QTextEdit
 )
 from PySide6.QtCore import Qt
-from core.plugin_base import ModalityPlugin
+from core.plugin_base import ModalityPlugin, ReportEngine, ReportText
+from plugins.densitometry.engine import DensitometryEngine
+from ui.engine_calls import call_engine
 from plugins.densitometry.validators import (
     TZCriteriaLineEdit,
     DensityLineEdit,
     FRAXLineEdit,
 )
 
+# Поля ввода, которые переживают перезагрузку плагина (save_state / restore_state)
+_INPUT_FIELDS = (
+    "spine_t_score", "spine_z_score", "spine_bmd",
+    "femur_t_score", "femur_z_score", "femur_bmd", "femur_frax",
+    "total_hip_t_score", "total_hip_z_score", "total_hip_bmd",
+)
+
 
 class DensitometryPlugin(ModalityPlugin):
     """Плагин для работы с денситометрией"""
     
-    def __init__(self):
-        pass
+    def __init__(self, engine: Optional[ReportEngine] = None):
+        # engine — движок в отдельном процессе (EngineHost), если так указано в plugin.json
+        self.engine = engine if engine is not None else DensitometryEngine()
         
     def get_name(self) -> str:
         return "Денситометрия"
@@ -35,6 +44,32 @@ class DensitometryPlugin(ModalityPlugin):
     def get_description(self) -> str:
         return "Плагин для работы с денситометрическими исследованиями"
     
+    def get_modality(self) -> str:
+        return self.engine.get_modality()
+
+    def get_engine(self) -> ReportEngine:
+        return self.engine
+
+    def save_state(self) -> dict:
+        """Текст полей ввода (как введён, вместе с незавершённым вводом) и обоих редакторов"""
+        if not hasattr(self, "spine_text_edit"):
+            return {}
+        state = {name: getattr(self, name).text() for name in _INPUT_FIELDS}
+        state["spine_text"] = self.spine_text_edit.toPlainText()
+        state["femur_text"] = self.femur_text_edit.toPlainText()
+        return state
+
+    def restore_state(self, state) -> None:
+        if not hasattr(self, "spine_text_edit"):
+            return
+        for name in _INPUT_FIELDS:
+            if name in state:
+                getattr(self, name).setText(state[name])
+        if "spine_text" in state:
+            self.spine_text_edit.setPlainText(state["spine_text"])
+        if "femur_text" in state:
+            self.femur_text_edit.setPlainText(state["femur_text"])
+    
     def create_widget(self, on_report_generated=None) -> QWidget:
         """Создает виджет с полями для T/Z-критериев и костной массы"""
         self._on_report_generated = on_report_generated
@@ -171,89 +206,26 @@ class DensitometryPlugin(ModalityPlugin):
         
         return widget
     
-    def _get_criterion_display_and_value(self, t_val: Optional[float], z_val: Optional[float]) -> tuple[Optional[str], Optional[float]]:
-        """
-        Определяет, какой критерий использовать для отображения и диагноза.
-        Возвращает (строка для отображения, значение для диагноза).
-        Если оба критерия не равны 0, возвращает (None, None) — нужно показать ошибку.
-        Точное равенство 0.0 считается заполненным значением.
-        """
-        if t_val is None and z_val is None:
-            return (None, None)
-        if t_val is not None and z_val is not None:
-            return (None, None)
-        if t_val is not None:
-            return (f"Т-критерий – {t_val:.1f}", t_val)
-        if z_val is not None:
-            return (f"Z-критерий – {z_val:.1f}", z_val)
-        return (None, None)
+    def _spine_values(self) -> dict:
+        """Значения полей позвоночника для движка"""
+        return {"t": self.spine_t_score.value(), "z": self.spine_z_score.value(), "bmd": self.spine_bmd.value()}
 
-    def _get_criterion_type(self, t_val: Optional[float], z_val: Optional[float]) -> Optional[str]:
-        """Возвращает тип критерия (T или Z) по введённым значениям или None."""
-        if t_val is not None and z_val is not None:
-            return None
-        if t_val is not None:
-            return "T"
-        if z_val is not None:
-            return "Z"
-        return None
+    def _femur_values(self) -> dict:
+        """Значения полей шейки бедренной кости для движка"""
+        return {"t": self.femur_t_score.value(), "z": self.femur_z_score.value(),
+                "bmd": self.femur_bmd.value(), "frax": self.femur_frax.value()}
+
+    def _total_hip_values(self) -> dict:
+        """Значения полей проксимального отдела бедра (total hip) для движка"""
+        return {"t": self.total_hip_t_score.value(), "z": self.total_hip_z_score.value(), "bmd": self.total_hip_bmd.value()}
 
-    def _get_diagnosis(self, score: float, criterion_type: str = "T") -> str:
-        """Определяет диагноз по значению критерия (T или Z)."""
-        if criterion_type == "Z":
-            return "Остеопороз" if score <= -2.0 else "Норма"
-        if score <= -2.5:
-            return "Остеопороз"
-        elif -2.5 < score <= -2.0:
-            return "Остеопения 3 ст."
-        elif -2.0 < score <= -1.5:
-            return "Остеопения 2 ст"
-        elif -1.5 < score <= -1.1:
-            return "Остеопения 1 ст"
-        else:  # score > -1.1
-            return "Норма"
-    
     def _validate_spine(self) -> Optional[str]:
         """Валидация полей позвоночника"""
-        spine_bmd = self.spine_bmd.value()
-        spine_t = self.spine_t_score.value()
-        spine_z = self.spine_z_score.value()
-        
-        if spine_bmd is None or (spine_t is None and spine_z is None):
-            return "Для позвоночника заполните костную массу и хотя бы один критерий (T или Z)"
-        if spine_t is not None and spine_z is not None:
-            return "Введите либо T, либо Z критерий (не оба сразу)"
-        return None
+        return self.engine.validate_spine(self._spine_values())
     
     def _validate_femur(self) -> Optional[str]:
         """Валидация полей бедренной кости"""
-        # Проверка шейки бедренной кости
-        femur_bmd = self.femur_bmd.value()
-        femur_t = self.femur_t_score.value()
-        femur_z = self.femur_z_score.value()
-        femur_frax = self.femur_frax.value()
-        
-        if femur_bmd is None or (femur_t is None and femur_z is None) or femur_frax is None:
-            return "Для шейки бедренной кости заполните костную массу, хотя бы один критерий (T или Z) и FRAX"
-        if femur_t is not None and femur_z is not None:
-            return "Для шейки бедренной кости введите либо T, либо Z критерий (не оба сразу)"
-        
-        # Проверка total hip
-        total_hip_bmd = self.total_hip_bmd.value()
-        total_hip_t = self.total_hip_t_score.value()
-        total_hip_z = self.total_hip_z_score.value()
-        
-        if total_hip_bmd is None or (total_hip_t is None and total_hip_z is None):
-            return "Для проксимального отдела бедра (total hip) заполните костную массу и хотя бы один критерий (T или Z)"
-        if total_hip_t is not None and total_hip_z is not None:
-            return "Для проксимального отдела бедра (total hip) введите либо T, либо Z критерий (не оба сразу)"
-        
-        femur_type = self._get_criterion_type(femur_t, femur_z)
-        total_hip_type = self._get_criterion_type(total_hip_t, total_hip_z)
-        if femur_type and total_hip_type and femur_type != total_hip_type:
-            return "Для бедренной кости используйте один тип критерия (либо T для обоих участков, либо Z)"
-        
-        return None
+        return self.engine.validate_femur(self._femur_values(), self._total_hip_values())
     
     def _show_error_tooltip(self, button: QPushButton, error_message: str):
         """Показывает ошибку в tooltip кнопки"""
@@ -288,44 +260,17 @@ class DensitometryPlugin(ModalityPlugin):
         self._clear_spine_input_fields()
         self._clear_femur_input_fields()
     
-    def _split_description_conclusion(self, text: str) -> tuple[str, str]:
-        """Разбивает текст блока на описание и заключение по маркеру «Заключение.» / «Заключение:»."""
-        if not text or not text.strip():
-            return "", ""
-        match = re.search(r"\n\n\s*Заключение[.:]", text, re.IGNORECASE)
-        if match:
-            return text[: match.start()].strip(), text[match.start() :].strip()
-        return text.strip(), ""
-    
+    def _editor_texts(self) -> list[str]:
+        """Тексты обоих редакторов (позвоночник, бедро)"""
+        return [self.spine_text_edit.toPlainText(), self.femur_text_edit.toPlainText()]
+
     def _get_combined_description(self) -> str:
         """Возвращает объединённое описание из обоих редакторов (без заключений)."""
-        parts = []
-        spine_text = self.spine_text_edit.toPlainText().strip()
-        if spine_text:
-            desc, _ = self._split_description_conclusion(spine_text)
-            if desc:
-                parts.append(desc)
-        femur_text = self.femur_text_edit.toPlainText().strip()
-        if femur_text:
-            desc, _ = self._split_description_conclusion(femur_text)
-            if desc:
-                parts.append(desc)
-        return "\n\n".join(parts)
+        return self.engine.combine(self._editor_texts()).description
     
     def _get_combined_conclusion(self) -> str:
         """Возвращает объединённое заключение из обоих редакторов."""
-        parts = []
-        spine_text = self.spine_text_edit.toPlainText().strip()
-        if spine_text:
-            _, conc = self._split_description_conclusion(spine_text)
-            if conc:
-                parts.append(conc)
-        femur_text = self.femur_text_edit.toPlainText().strip()
-        if femur_text:
-            _, conc = self._split_description_conclusion(femur_text)
-            if conc:
-                parts.append(conc)
-        return "\n\n".join(parts)
+        return self.engine.combine(self._editor_texts()).conclusion
     
     def _copy_spine_description(self):
         """Копирует в буфер только описание позвоночника."""
@@ -334,8 +279,8 @@ class DensitometryPlugin(ModalityPlugin):
             self._show_error_tooltip(self.spine_copy_desc_btn, "Текстовое поле позвоночника пустое")
             return
         self._clear_error_tooltip(self.spine_copy_desc_btn)
-        description, _ = self._split_description_conclusion(text)
-        QApplication.clipboard().setText(description)
+        call_engine(self.engine, self.spine_copy_desc_btn, "split_report", text,
+                    on_result=lambda report: QApplication.clipboard().setText(report.description))
 
     def _copy_spine_conclusion(self):
         """Копирует в буфер только заключение позвоночника."""
@@ -344,8 +289,8 @@ class DensitometryPlugin(ModalityPlugin):
             self._show_error_tooltip(self.spine_copy_conc_btn, "Текстовое поле позвоночника пустое")
             return
         self._clear_error_tooltip(self.spine_copy_conc_btn)
-        _, conclusion = self._split_description_conclusion(text)
-        QApplication.clipboard().setText(conclusion)
+        call_engine(self.engine, self.spine_copy_conc_btn, "split_report", text,
+                    on_result=lambda report: QApplication.clipboard().setText(report.conclusion))
 
     def _copy_femur_description(self):
         """Копирует в буфер только описание бедренной кости."""
@@ -354,8 +299,8 @@ class DensitometryPlugin(ModalityPlugin):
             self._show_error_tooltip(self.femur_copy_desc_btn, "Текстовое поле бедра пустое")
             return
         self._clear_error_tooltip(self.femur_copy_desc_btn)
-        description, _ = self._split_description_conclusion(text)
-        QApplication.clipboard().setText(description)
+        call_engine(self.engine, self.femur_copy_desc_btn, "split_report", text,
+                    on_result=lambda report: QApplication.clipboard().setText(report.description))
 
     def _copy_femur_conclusion(self):
         """Копирует в буфер только заключение бедренной кости."""
@@ -364,16 +309,18 @@ class DensitometryPlugin(ModalityPlugin):
             self._show_error_tooltip(self.femur_copy_conc_btn, "Текстовое поле бедра пустое")
             return
         self._clear_error_tooltip(self.femur_copy_conc_btn)
-        _, conclusion = self._split_description_conclusion(text)
-        QApplication.clipboard().setText(conclusion)
+        call_engine(self.engine, self.femur_copy_conc_btn, "split_report", text,
+                    on_result=lambda report: QApplication.clipboard().setText(report.conclusion))
 
     def _copy_description(self):
         """Копирует в буфер только описание."""
-        QApplication.clipboard().setText(self._get_combined_description())
+        call_engine(self.engine, self.spine_text_edit, "combine", self._editor_texts(),
+                    on_result=lambda report: QApplication.clipboard().setText(report.description))
     
     def _copy_conclusion(self):
         """Копирует в буфер только заключение."""
-        QApplication.clipboard().setText(self._get_combined_conclusion())
+        call_engine(self.engine, self.spine_text_edit, "combine", self._editor_texts(),
+                    on_result=lambda report: QApplication.clipboard().setText(report.conclusion))
 
     def get_description_text(self) -> str:
         """Текст описания для горячих клавиш."""
@@ -385,257 +332,42 @@ class DensitometryPlugin(ModalityPlugin):
     
     def _generate_spine_text(self):
         """Формирует текст для позвоночника с валидацией и копированием в буфер"""
-        # Валидация
-        error = self._validate_spine()
-        if error:
-            self._show_error_tooltip(self.spine_generate_btn, error)
-            return
-        
-        # Очищаем tooltip при успешной валидации
-        self._clear_error_tooltip(self.spine_generate_btn)
-        
-        spine_t = self.spine_t_score.value()
-        spine_z = self.spine_z_score.value()
-        spine_bmd = self.spine_bmd.value()
-        criterion_str, value_for_diagnosis = self._get_criterion_display_and_value(spine_t, spine_z)
-        if criterion_str is None:
-            self._show_error_tooltip(self.spine_generate_btn, "Введите либо T, либо Z критерий (не оба сразу)")
-            return
-        spine_criterion_type = "T" if spine_t is not None else "Z"
-        spine_diagnosis = self._get_diagnosis(value_for_diagnosis, spine_criterion_type)
-        
-        bmd_text = f"{spine_bmd:.3f}" if spine_bmd is not None else None
-        if bmd_text is not None:
-            description = f"""Поясничный отдел позвоночника. Поясничные позвонки: L1–L4. Среднее значение МПК составило {bmd_text} г/см. {criterion_str}"""
-        else:
-            description = f"""Поясничный отдел позвоночника. Поясничные позвонки: L1–L4. {criterion_str}"""
-        conclusion = f"""Заключение. Позвоночник - {spine_diagnosis}"""
-        full_text = f"{description}\n\n{conclusion}"
-        
-        self.spine_text_edit.setPlainText(full_text)
-        self._clear_spine_input_fields()
-        if self.femur_text_edit.toPlainText().strip():
-            self.femur_text_edit.clear()
-        QApplication.clipboard().setText(description)
-        if getattr(self, "_on_report_generated", None):
-            self._on_report_generated(description, conclusion)
+        self._request_report({"spine": self._spine_values()}, self.spine_generate_btn)
     
     def _generate_femur_text(self):
         """Формирует текст для бедренной кости с валидацией и копированием в буфер"""
-        error = self._validate_femur()
-        if error:
-            self._show_error_tooltip(self.femur_generate_btn, error)
-            return
-        
-        self._clear_error_tooltip(self.femur_generate_btn)
-        
-        femur_t = self.femur_t_score.value()
-        femur_z = self.femur_z_score.value()
-        femur_bmd = self.femur_bmd.value()
-        femur_frax = self.femur_frax.value()
-        femur_criterion_str, femur_value = self._get_criterion_display_and_value(femur_t, femur_z)
-        if femur_criterion_str is None:
-            self._show_error_tooltip(self.femur_generate_btn, "Для шейки бедренной кости введите либо T, либо Z критерий (не оба сразу)")
-            return
-        femur_criterion_type = self._get_criterion_type(femur_t, femur_z)
-        femur_diagnosis = self._get_diagnosis(femur_value, femur_criterion_type)
-        
-        total_hip_t = self.total_hip_t_score.value()
-        total_hip_z = self.total_hip_z_score.value()
-        total_hip_bmd = self.total_hip_bmd.value()
-        total_hip_criterion_str, total_hip_value = self._get_criterion_display_and_value(total_hip_t, total_hip_z)
-        if total_hip_criterion_str is None:
-            self._show_error_tooltip(self.femur_generate_btn, "Для проксимального отдела бедра (total hip) введите либо T, либо Z критерий (не оба сразу)")
-            return
-        total_hip_criterion_type = self._get_criterion_type(total_hip_t, total_hip_z)
-        total_hip_diagnosis = self._get_diagnosis(total_hip_value, total_hip_criterion_type)
-        
-        femur_bmd_text = f"{femur_bmd:.3f}" if femur_bmd is not None else None
-        total_hip_bmd_text = f"{total_hip_bmd:.3f}" if total_hip_bmd is not None else None
-        frax_text = f"{femur_frax:.1f}%" if femur_frax is not None else None
-        if femur_bmd_text is not None:
-            femur_line = f"Шейка бедренной кости (femoral neck). Значение МПК составило {femur_bmd_text} г/см. {femur_criterion_str}."
-        else:
-            femur_line = f"Шейка бедренной кости (femoral neck). {femur_criterion_str}."
-        if frax_text is not None:
-            femur_line = f"{femur_line} FRAX – {frax_text}"
-        if total_hip_bmd_text is not None:
-            total_hip_line = f"Проксимальный отдел бедра в целом (total hip). Значение МПК составило {total_hip_bmd_text} г/см. {total_hip_criterion_str}."
-        else:
-            total_hip_line = f"Проксимальный отдел бедра в целом (total hip). {total_hip_criterion_str}."
-        description = f"""Проксимальный отдел бедра. Бедренная кость: левая.
-{femur_line}
-{total_hip_line}"""
-        conclusion = f"""Заключение: Проксимальный отдел бедра в целом: {total_hip_diagnosis}. Шейка бедренной кости: {femur_diagnosis}."""
-        full_text = f"{description}\n\n{conclusion}"
-        
-        self.femur_text_edit.setPlainText(full_text)
-        self._clear_femur_input_fields()
-        if self.spine_text_edit.toPlainText().strip():
-            self.spine_text_edit.clear()
-        QApplication.clipboard().setText(description)
-        if getattr(self, "_on_report_generated", None):
-            self._on_report_generated(description, conclusion)
+        self._request_report({"femur": self._femur_values(), "total_hip": self._total_hip_values()},
+                             self.femur_generate_btn)
     
     def _generate_all_text(self):
         """Формирует весь отчет целиком (позвоночник и бедренная кость) с валидацией"""
-        # Валидация позвоночника
-        spine_error = self._validate_spine()
-        if spine_error:
-            self._show_error_tooltip(self.generate_all_btn, spine_error)
-            return
-        
-        # Валидация бедренной кости
-        femur_error = self._validate_femur()
-        if femur_error:
-            self._show_error_tooltip(self.generate_all_btn, femur_error)
-            return
-        
-        spine_t = self.spine_t_score.value()
-        spine_z = self.spine_z_score.value()
-        spine_type = self._get_criterion_type(spine_t, spine_z)
-        femur_t = self.femur_t_score.value()
-        femur_z = self.femur_z_score.value()
-        femur_type = self._get_criterion_type(femur_t, femur_z)
-        total_hip_t = self.total_hip_t_score.value()
-        total_hip_z = self.total_hip_z_score.value()
-        total_hip_type = self._get_criterion_type(total_hip_t, total_hip_z)
-        if spine_type and femur_type and total_hip_type:
-            if spine_type != femur_type or spine_type != total_hip_type:
-                self._show_error_tooltip(
-                    self.generate_all_btn,
-                    "Для общего отчета используйте один тип критерия: либо T, либо Z",
-                )
-                return
+        # Движок проверяет позвоночник, бедро и единый тип критерия (T или Z) для всех участков
+        self._request_report({"spine": self._spine_values(), "femur": self._femur_values(),
+                              "total_hip": self._total_hip_values()}, self.generate_all_btn)
+
+    def _request_report(self, params: dict, button: QPushButton):
+        """Отчёт и тексты редакторов от движка одним вызовом; ошибка проверки полей — в подсказке кнопки"""
+        call_engine(self.engine, button, "editor_texts", params,
+                    on_result=lambda result: self._show_report(params, button, *result),
+                    on_error=lambda error: self._show_error_tooltip(button, str(error)))
 
+    def _show_report(self, params: dict, button: QPushButton, report: ReportText, spine_text: str, femur_text: str):
         # Очищаем tooltip при успешной валидации
-        self._clear_error_tooltip(self.generate_all_btn)
-        
-        # Генерируем оба текста (редакторы уже заполнены с правильными описаниями и заключениями)
-        self._generate_spine_text_internal()
-        self._generate_femur_text_internal()
-        
-        # Формируем объединённое описание и заключение для копирования (та же логика T/Z)
-        spine_t = self.spine_t_score.value()
-        spine_z = self.spine_z_score.value()
-        spine_bmd = self.spine_bmd.value()
-        spine_criterion_str, spine_value = self._get_criterion_display_and_value(spine_t, spine_z)
-        spine_criterion_type = self._get_criterion_type(spine_t, spine_z)
-        spine_bmd_text = f"{spine_bmd:.3f}" if spine_bmd is not None else None
-        if spine_criterion_str:
-            if spine_bmd_text is not None:
-                spine_desc = f"""Поясничный отдел позвоночника. Поясничные позвонки: L1–L4. Среднее значение МПК составило {spine_bmd_text} г/см. {spine_criterion_str}"""
-            else:
-                spine_desc = f"""Поясничный отдел позвоночника. Поясничные позвонки: L1–L4. {spine_criterion_str}"""
-        else:
-            spine_desc = ""
-        
-        femur_t = self.femur_t_score.value()
-        femur_z = self.femur_z_score.value()
-        femur_bmd = self.femur_bmd.value()
-        femur_frax = self.femur_frax.value()
-        femur_criterion_str, femur_value = self._get_criterion_display_and_value(femur_t, femur_z)
-        femur_criterion_type = self._get_criterion_type(femur_t, femur_z)
-        total_hip_t = self.total_hip_t_score.value()
-        total_hip_z = self.total_hip_z_score.value()
-        total_hip_bmd = self.total_hip_bmd.value()
-        total_hip_criterion_str, total_hip_value = self._get_criterion_display_and_value(total_hip_t, total_hip_z)
-        total_hip_criterion_type = self._get_criterion_type(total_hip_t, total_hip_z)
-        
-        femur_bmd_text = f"{femur_bmd:.3f}" if femur_bmd is not None else None
-        total_hip_bmd_text = f"{total_hip_bmd:.3f}" if total_hip_bmd is not None else None
-        frax_text = f"{femur_frax:.1f}%" if femur_frax is not None else None
-        if femur_bmd_text is not None:
-            femur_line = f"Шейка бедренной кости (femoral neck). Значение МПК составило {femur_bmd_text} г/см. {femur_criterion_str}."
-        else:
-            femur_line = f"Шейка бедренной кости (femoral neck). {femur_criterion_str}."
-        if frax_text is not None:
-            femur_line = f"{femur_line} FRAX – {frax_text}"
-        if total_hip_bmd_text is not None:
-            total_hip_line = f"Проксимальный отдел бедра в целом (total hip). Значение МПК составило {total_hip_bmd_text} г/см. {total_hip_criterion_str}."
-        else:
-            total_hip_line = f"Проксимальный отдел бедра в целом (total hip). {total_hip_criterion_str}."
-        femur_desc = f"""Проксимальный отдел бедра. Бедренная кость: левая.
-{femur_line}
-{total_hip_line}"""
-        
-        description = f"{spine_desc}\n\n{femur_desc}" if spine_desc else femur_desc
-        
-        spine_diagnosis = self._get_diagnosis(spine_value, spine_criterion_type) if spine_criterion_str else ""
-        femur_diagnosis = self._get_diagnosis(femur_value, femur_criterion_type) if femur_criterion_str else ""
-        total_hip_diagnosis = self._get_diagnosis(total_hip_value, total_hip_criterion_type) if total_hip_criterion_str else ""
-        
-        spine_conc = f"Заключение. Позвоночник - {spine_diagnosis}" if spine_criterion_str else ""
-        femur_conc = f"Заключение: Проксимальный отдел бедра в целом: {total_hip_diagnosis}. Шейка бедренной кости: {femur_diagnosis}."
-        conclusion = f"{spine_conc}\n\n{femur_conc}" if spine_conc else femur_conc
-        
-        self._clear_all_input_fields()
-        QApplication.clipboard().setText(description)
+        self._clear_error_tooltip(button)
+        # Каждый редактор — свой блок с описанием и заключением; блок участка не из этого отчёта очищается
+        self.spine_text_edit.setPlainText(spine_text)
+        self.femur_text_edit.setPlainText(femur_text)
+        if "spine" in params:
+            self._clear_spine_input_fields()
+        if "femur" in params:
+            self._clear_femur_input_fields()
+        self._report_generated(report)
+
+    def _report_generated(self, report: ReportText):
+        """Описание — в буфер обмена, отчёт — главному окну (для горячих клавиш и сохранения)"""
+        QApplication.clipboard().setText(report.description)
         if getattr(self, "_on_report_generated", None):
-            self._on_report_generated(description, conclusion)
-    
-    def _generate_spine_text_internal(self):
-        """Внутренний метод генерации текста позвоночника без копирования в буфер"""
-        spine_t = self.spine_t_score.value()
-        spine_z = self.spine_z_score.value()
-        spine_bmd = self.spine_bmd.value()
-        criterion_str, value_for_diagnosis = self._get_criterion_display_and_value(spine_t, spine_z)
-        if criterion_str is None:
-            return
-        spine_criterion_type = "T" if spine_t is not None else "Z"
-        spine_diagnosis = self._get_diagnosis(value_for_diagnosis, spine_criterion_type)
-        
-        bmd_text = f"{spine_bmd:.3f}" if spine_bmd is not None else None
-        if bmd_text is not None:
-            description = f"""Поясничный отдел позвоночника. Поясничные позвонки: L1–L4. Среднее значение МПК составило {bmd_text} г/см. {criterion_str}"""
-        else:
-            description = f"""Поясничный отдел позвоночника. Поясничные позвонки: L1–L4. {criterion_str}"""
-        conclusion = f"""Заключение. Позвоночник - {spine_diagnosis}"""
-        full_text = f"{description}\n\n{conclusion}"
-        
-        self.spine_text_edit.setPlainText(full_text)
-    
-    def _generate_femur_text_internal(self):
-        """Внутренний метод генерации текста бедренной кости без копирования в буфер"""
-        femur_t = self.femur_t_score.value()
-        femur_z = self.femur_z_score.value()
-        femur_bmd = self.femur_bmd.value()
-        femur_frax = self.femur_frax.value()
-        femur_criterion_str, femur_value = self._get_criterion_display_and_value(femur_t, femur_z)
-        if femur_criterion_str is None:
-            return
-        femur_criterion_type = self._get_criterion_type(femur_t, femur_z)
-        femur_diagnosis = self._get_diagnosis(femur_value, femur_criterion_type)
-        
-        total_hip_t = self.total_hip_t_score.value()
-        total_hip_z = self.total_hip_z_score.value()
-        total_hip_bmd = self.total_hip_bmd.value()
-        total_hip_criterion_str, total_hip_value = self._get_criterion_display_and_value(total_hip_t, total_hip_z)
-        if total_hip_criterion_str is None:
-            return
-        total_hip_criterion_type = self._get_criterion_type(total_hip_t, total_hip_z)
-        total_hip_diagnosis = self._get_diagnosis(total_hip_value, total_hip_criterion_type)
-        
-        femur_bmd_text = f"{femur_bmd:.3f}" if femur_bmd is not None else None
-        total_hip_bmd_text = f"{total_hip_bmd:.3f}" if total_hip_bmd is not None else None
-        frax_text = f"{femur_frax:.1f}%" if femur_frax is not None else None
-        if femur_bmd_text is not None:
-            femur_line = f"Шейка бедренной кости (femoral neck). Значение МПК составило {femur_bmd_text} г/см. {femur_criterion_str}."
-        else:
-            femur_line = f"Шейка бедренной кости (femoral neck). {femur_criterion_str}."
-        if frax_text is not None:
-            femur_line = f"{femur_line} FRAX – {frax_text}"
-        if total_hip_bmd_text is not None:
-            total_hip_line = f"Проксимальный отдел бедра в целом (total hip). Значение МПК составило {total_hip_bmd_text} г/см. {total_hip_criterion_str}."
-        else:
-            total_hip_line = f"Проксимальный отдел бедра в целом (total hip). {total_hip_criterion_str}."
-        description = f"""Проксимальный отдел бедра. Бедренная кость: левая.
-{femur_line}
-{total_hip_line}"""
-        conclusion = f"""Заключение: Проксимальный отдел бедра в целом: {total_hip_diagnosis}. Шейка бедренной кости: {femur_diagnosis}."""
-        full_text = f"{description}\n\n{conclusion}"
-        
-        self.femur_text_edit.setPlainText(full_text)
+            self._on_report_generated(report.description, report.conclusion)
     
     def get_generated_text(self) -> str:
         """Возвращает сформированный текст из редакторов"""
@@ -0,0 +1,149 @@
+"""Формирование текста маммографии - БЕЗ зависимостей от UI"""
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Mapping
+
+# Добавляем корневую директорию проекта в sys.path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.plugin_base import ReportEngine, ReportText
+
+PLUGIN_DIR = Path(__file__).parent
+
+LOCALIZATIONS = [
+    "В верхне-наружном квадранте",
+    "В верхне-внутреннем квадранте",
+    "В нижне-наружном квадранте",
+    "В нижне-внутреннем квадранте",
+    "На границе верхних квадрантов",
+    "На границе нижних квадрантов",
+    "На границе внутренних квадрантов",
+    "На границе наружных квадрантов",
+]
+
+# Параметры по умолчанию: плотность B, норма, правая сторона, первая локализация
+DEFAULT_PARAMS = {"density": "B", "pathology": "норма", "side": "правая", "localization": LOCALIZATIONS[0]}
+
+_CONCLUSION_RE = re.compile(r"ЗАКЛЮЧЕНИЕ\s*:", re.IGNORECASE)
+
+
+def _load_json(name: str) -> dict:
+    """Загружает JSON из папки плагина."""
+    path = PLUGIN_DIR / name
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class MammographyEngine(ReportEngine):
+    """Текст маммографии по плотности (ACR), патологии, стороне и локализации.
+
+    Параметры build_report: density («A»–«D»), pathology (ключ pathologies.json),
+    side («правая»/«левая»), localization (одна из LOCALIZATIONS); отсутствующие
+    берутся из DEFAULT_PARAMS.
+    """
+
+    def __init__(self):
+        self.densities: Dict[str, Any] = {}
+        self.pathologies: Dict[str, Any] = {}
+        self.reload_data()
+
+    def get_modality(self) -> str:
+        return "mammography"
+
+    def reload_data(self) -> None:
+        """Перечитать densities.json и pathologies.json; при ошибке в JSON остаются прежние данные"""
+        densities = _load_json("densities.json") or {}
+        pathologies = _load_json("pathologies.json") or {}
+        self.densities, self.pathologies = densities, pathologies
+
+    def pathology(self, key: str) -> Dict[str, Any]:
+        """Описание патологии из pathologies.json (пустой словарь, если её нет)"""
+        return self.pathologies.get(key, {})
+
+    def _density_description(self, density: str) -> str:
+        """Текст описания плотности для выбранной буквы."""
+        return self.densities.get(density, {}).get("description", "")
+
+    def _base_description_for_side(self, side: str, density: str) -> str:
+        """Базовое описание для стороны из патологии «норма» с подстановкой плотности."""
+        template = self.pathology("норма").get("description", {}).get(side, "")
+        return template.replace("{density}", self._density_description(density))
+
+    def _description_for_side(self, side: str, params: Mapping[str, Any]) -> str:
+        """Формирует описание для одной стороны (правая/левая)."""
+        pathology = self.pathology(params["pathology"])
+
+        if "description_replacements" in pathology:
+            base = self._base_description_for_side(side, params["density"])
+            # Замену применяем только на поражённой стороне
+            if side == params["side"]:
+                repl = pathology["description_replacements"].get(side, {})
+                search_s = repl.get("search", "")
+                replace_s = repl.get("replace", "")
+                if pathology.get("requires_localization"):
+                    replace_s = replace_s.replace("{локализация}", params["localization"])
+                if search_s and replace_s:
+                    base = base.replace(search_s, replace_s)
+            return base
+
+        template = pathology.get("description", {}).get(side, "")
+        return template.replace("{density}", self._density_description(params["density"]))
+
+    def build_full_report(self, params: Mapping[str, Any]) -> str:
+        """Полный текст: описание правой и левой, заключение, BIRADS, рекомендации."""
+        params = {**DEFAULT_PARAMS, **params}
+        pathology = self.pathology(params["pathology"])
+        if not pathology:
+            return ""
+
+        desc_right = self._description_for_side("правая", params)
+        desc_left = self._description_for_side("левая", params)
+
+        if pathology.get("requires_side"):
+            side_display = "справа" if params["side"] == "правая" else "слева"
+            conclusion = pathology.get("conclusion", "").format(side=side_display)
+            birads_right = pathology["birads"]["правая"]
+            birads_left = pathology["birads"]["левая"]
+            if params["side"] == "левая":
+                birads_right, birads_left = birads_left, birads_right
+            birads_line = f"BIRADS {birads_right} справа, BIRADS {birads_left} слева"
+        else:
+            conclusion = pathology.get("conclusion", "")
+            birads = pathology.get("birads", {}).get("правая", "1")
+            birads_line = f"BIRADS {birads} СПРАВА И СЛЕВА"
+
+        followup = pathology.get("followup", "")
+
+        parts = [
+            desc_right,
+            "",
+            desc_left,
+            "",
+            f"ЗАКЛЮЧЕНИЕ: {conclusion}",
+            birads_line,
+            "",
+            followup,
+        ]
+        return "\n".join(parts)
+
+    def build_report(self, params: Mapping[str, Any]) -> ReportText:
+        return self.split_report(self.build_full_report(params))
+
+    def split_report(self, text: str) -> ReportText:
+        """Описание — текст до «ЗАКЛЮЧЕНИЕ:», заключение — с него до конца (BIRADS и рекомендации)."""
+        if not text or not text.strip():
+            return ReportText("", "")
+        match = _CONCLUSION_RE.search(text)
+        if match:
+            return ReportText(text[: match.start()].strip(), text[match.start() :].strip())
+        return ReportText(text.strip(), "")
+
+
+Engine = MammographyEngine
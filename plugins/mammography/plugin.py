@@ -1,8 +1,8 @@
-"""Плагин маммографии"""
+"""Плагин маммографии: виджет; текст формирует MammographyEngine (engine.py)"""
 
-import json
 import sys
 from pathlib import Path
+from typing import Optional
 
 # Добавляем корневую директорию проекта в sys.path
 project_root = Path(__file__).parent.parent.parent
@@ -13,48 +13,33 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QApplication,
     QPushButton, QButtonGroup, QGroupBox, QTextEdit, QComboBox
 )
-import re
-from core.plugin_base import ModalityPlugin
-
-PLUGIN_DIR = Path(__file__).parent
-
-
-def _load_json(name: str) -> dict:
-    """Загружает JSON из папки плагина."""
-    path = PLUGIN_DIR / name
-    if not path.exists():
-        return {}
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+from core.plugin_base import ModalityPlugin, ReportEngine, ReportText
+from plugins.mammography.engine import LOCALIZATIONS, MammographyEngine
+from ui.engine_calls import call_engine
 
 
 class MammographyPlugin(ModalityPlugin):
     """Плагин для работы с маммографией"""
 
-    def __init__(self):
+    def __init__(self, engine: Optional[ReportEngine] = None):
+        # engine — движок в отдельном процессе (EngineHost), если так указано в plugin.json
+        self.engine = engine if engine is not None else MammographyEngine()
         self.density = "B"
         self.pathology_key = "норма"
         self.side = "правая"
 
-        self.localizations = [
-            "В верхне-наружном квадранте",
-            "В верхне-внутреннем квадранте",
-            "В нижне-наружном квадранте",
-            "В нижне-внутреннем квадранте",
-            "На границе верхних квадрантов",
-            "На границе нижних квадрантов",
-            "На границе внутренних квадрантов",
-            "На границе наружных квадрантов",
-        ]
+        self.localizations = LOCALIZATIONS
         self.localization = self.localizations[0]
 
-        self.densities = _load_json("densities.json")
-        self.pathologies = _load_json("pathologies.json")
+    # Справочники всегда берутся у движка: после engine.reload_data() виджет видит новые данные.
+    # Движок в отдельном процессе отдаёт их копию без запроса (EngineHost)
+    @property
+    def densities(self) -> dict:
+        return self.engine.densities
 
-        if not self.densities:
-            self.densities = {}
-        if not self.pathologies:
-            self.pathologies = {}
+    @property
+    def pathologies(self) -> dict:
+        return self.engine.pathologies
 
     def get_name(self) -> str:
         return "Маммография"
@@ -62,80 +47,49 @@ class MammographyPlugin(ModalityPlugin):
     def get_description(self) -> str:
         return "Плагин для работы с маммографическими исследованиями"
 
-    def _get_density_description(self) -> str:
-        """Возвращает текст описания плотности для выбранной буквы."""
-        d = self.densities.get(self.density, {})
-        return d.get("description", "")
-
-    def _apply_localization_to_description(self, text: str) -> str:
-        """Подставляет выбранную локализацию вместо плейсхолдера {локализация}."""
-        return text.replace("{локализация}", self.localization)
-
-    def _get_base_description_for_side(self, side: str) -> str:
-        """Базовое описание для стороны из патологии «норма» с подстановкой плотности."""
-        norm = self.pathologies.get("норма", {})
-        desc = norm.get("description", {})
-        template = desc.get(side, "")
-        density_text = self._get_density_description()
-        return template.replace("{density}", density_text)
-
-    def _get_description_for_side(self, side: str) -> str:
-        """Формирует описание для одной стороны (правая/левая)."""
-        pathology = self.pathologies.get(self.pathology_key, {})
-        density_text = self._get_density_description()
-
-        if "description_replacements" in pathology:
-            base = self._get_base_description_for_side(side)
-            # Замену применяем только на поражённой стороне
-            if side == self.side:
-                repl = pathology["description_replacements"].get(side, {})
-                search_s = repl.get("search", "")
-                replace_s = repl.get("replace", "")
-                if pathology.get("requires_localization"):
-                    replace_s = self._apply_localization_to_description(replace_s)
-                if search_s and replace_s:
-                    base = base.replace(search_s, replace_s)
-            return base
-
-        desc = pathology.get("description", {})
-        template = desc.get(side, "")
-        return template.replace("{density}", density_text)
-
-    def _build_full_report(self) -> str:
-        """Собирает полный отчёт: описание правой и левой, заключение, BIRADS, рекомендации."""
-        pathology = self.pathologies.get(self.pathology_key, {})
-        if not pathology:
-            return ""
-
-        desc_right = self._get_description_for_side("правая")
-        desc_left = self._get_description_for_side("левая")
-
-        if pathology.get("requires_side"):
-            side_display = "справа" if self.side == "правая" else "слева"
-            conclusion = pathology.get("conclusion", "").format(side=side_display)
-            birads_right = pathology["birads"]["правая"]
-            birads_left = pathology["birads"]["левая"]
-            if self.side == "левая":
-                birads_right, birads_left = birads_left, birads_right
-            birads_line = f"BIRADS {birads_right} справа, BIRADS {birads_left} слева"
-        else:
-            conclusion = pathology.get("conclusion", "")
-            birads = pathology.get("birads", {}).get("правая", "1")
-            birads_line = f"BIRADS {birads} СПРАВА И СЛЕВА"
-
-        followup = pathology.get("followup", "")
-
-        parts = [
-            desc_right,
-            "",
-            desc_left,
-            "",
-            f"ЗАКЛЮЧЕНИЕ: {conclusion}",
-            birads_line,
-            "",
-            followup,
-        ]
-        return "\n".join(parts)
+    def get_modality(self) -> str:
+        return self.engine.get_modality()
+
+    def get_engine(self) -> ReportEngine:
+        return self.engine
+
+    def save_state(self) -> dict:
+        state = self._params()
+        if hasattr(self, "text_edit"):
+            state["text"] = self.text_edit.toPlainText()
+        return state
+
+    def restore_state(self, state) -> None:
+        """Выбор кнопок и отредактированный текст; патология, которой больше нет, остаётся прежней"""
+        if state.get("density") in ("A", "B", "C", "D"):
+            self.density = state["density"]
+        if state.get("pathology") in self.pathologies:
+            self.pathology_key = state["pathology"]
+        if state.get("side") in ("правая", "левая"):
+            self.side = state["side"]
+        if not hasattr(self, "text_edit"):
+            return
+        self._sync_buttons()
+        # Видимость группы «Локализация» сбрасывает локализацию на первую — восстанавливаем после
+        if state.get("localization") in self.localizations:
+            self.localization = state["localization"]
+            self.localization_combo.setCurrentIndex(self.localizations.index(self.localization))
+        if "text" in state:
+            self.text_edit.setPlainText(state["text"])
+
+    def _params(self) -> dict:
+        """Параметры для движка из текущего выбора"""
+        return {"density": self.density, "pathology": self.pathology_key,
+                "side": self.side, "localization": self.localization}
+
+    def _pathology(self) -> dict:
+        """Описание выбранной патологии из справочника"""
+        return self.pathologies.get(self.pathology_key, {})
+
+    def _set_initial_text(self, text: str):
+        # Ответ движка в отдельном процессе может прийти после restore_state — восстановленный текст не затираем
+        if not self.text_edit.toPlainText():
+            self.text_edit.setPlainText(text)
 
     def create_widget(self, on_report_generated=None) -> QWidget:
         """Создаёт виджет с выбором плотности, патологии и стороны."""
@@ -150,8 +104,8 @@ class MammographyPlugin(ModalityPlugin):
         text_group = QGroupBox("Текст заключения (редактируемый)")
         text_layout = QVBoxLayout()
         self.text_edit = QTextEdit()
-        self.text_edit.setPlainText(self._build_full_report())
         self.text_edit.setMinimumHeight(400)
+        call_engine(self.engine, self.text_edit, "build_full_report", self._params(), on_result=self._set_initial_text)
         text_layout.addWidget(self.text_edit)
         text_group.setLayout(text_layout)
         left_column.addWidget(text_group)
@@ -186,10 +140,6 @@ class MammographyPlugin(ModalityPlugin):
             density_layout.addWidget(btn)
             self.density_buttons.addButton(btn)
         self.density_buttons.buttonClicked.connect(self._on_density_changed)
-        for btn in self.density_buttons.buttons():
-            if btn.text() == "B":
-                btn.setChecked(True)
-                break
         density_group.setLayout(density_layout)
         right_column.addWidget(density_group)
 
@@ -205,10 +155,6 @@ class MammographyPlugin(ModalityPlugin):
             pathology_layout.addWidget(btn)
             self.pathology_buttons.addButton(btn)
         self.pathology_buttons.buttonClicked.connect(self._on_pathology_changed)
-        for btn in self.pathology_buttons.buttons():
-            if btn.property("pathology_key") == "норма":
-                btn.setChecked(True)
-                break
         pathology_group.setLayout(pathology_layout)
         right_column.addWidget(pathology_group)
 
@@ -217,7 +163,6 @@ class MammographyPlugin(ModalityPlugin):
         self.side_buttons = QButtonGroup()
         btn_right = QPushButton("Правая")
         btn_right.setCheckable(True)
-        btn_right.setChecked(True)
         btn_right.setMinimumHeight(35)
         btn_left = QPushButton("Левая")
         btn_left.setCheckable(True)
@@ -229,7 +174,6 @@ class MammographyPlugin(ModalityPlugin):
         self.side_buttons.buttonClicked.connect(self._on_side_changed)
         self.side_group.setLayout(side_layout)
         right_column.addWidget(self.side_group)
-        self._update_side_group_visibility()
 
         self.localization_group = QGroupBox("Локализация")
         localization_layout = QVBoxLayout()
@@ -241,7 +185,7 @@ class MammographyPlugin(ModalityPlugin):
         self.localization_group.setLayout(localization_layout)
         self.localization_group.setVisible(False)
         right_column.addWidget(self.localization_group)
-        self._update_localization_group_visibility()
+        self._sync_buttons()
 
         right_column.addStretch()
 
@@ -250,17 +194,27 @@ class MammographyPlugin(ModalityPlugin):
 
         return widget
 
+    def _sync_buttons(self):
+        """Отмечает кнопки по текущему выбору и обновляет видимость зависимых групп."""
+        for btn in self.density_buttons.buttons():
+            btn.setChecked(btn.text() == self.density)
+        for btn in self.pathology_buttons.buttons():
+            btn.setChecked(btn.property("pathology_key") == self.pathology_key)
+        side_text = "Правая" if self.side == "правая" else "Левая"
+        for btn in self.side_buttons.buttons():
+            btn.setChecked(btn.text() == side_text)
+        self._update_side_group_visibility()
+        self._update_localization_group_visibility()
+
     def _update_side_group_visibility(self):
         """Показывает группу «Сторона» только для патологий с requires_side."""
-        pathology = self.pathologies.get(self.pathology_key, {})
-        self.side_group.setVisible(bool(pathology.get("requires_side")))
+        self.side_group.setVisible(bool(self._pathology().get("requires_side")))
 
     def _update_localization_group_visibility(self):
         """Показывает группу «Локализация» только для патологий с requires_localization."""
         if not hasattr(self, "localization_group"):
             return
-        pathology = self.pathologies.get(self.pathology_key, {})
-        visible = bool(pathology.get("requires_localization"))
+        visible = bool(self._pathology().get("requires_localization"))
         self.localization_group.setVisible(visible)
         if visible:
             self.localization_combo.setCurrentIndex(0)
@@ -284,50 +238,36 @@ class MammographyPlugin(ModalityPlugin):
 
     def _generate_report(self):
         """Формирует отчёт и подставляет его в редактор, копирует описание в буфер."""
-        full = self._build_full_report()
+        call_engine(self.engine, self.text_edit, "build_full_report", self._params(), on_result=self._show_report)
+
+    def _show_report(self, full: str):
         self.text_edit.setPlainText(full)
-        desc = self._get_description_from_text(full)
-        conc = self._get_conclusion_from_text(full)
+        call_engine(self.engine, self.text_edit, "split_report", full, on_result=self._report_generated)
+
+    def _report_generated(self, report: ReportText):
+        desc, conc = report
         if desc:
             QApplication.clipboard().setText(desc)
         if getattr(self, "_on_report_generated", None):
             self._on_report_generated(desc or "", conc or "")
 
-    def _get_description_from_text(self, text: str) -> str:
-        """Текст до «ЗАКЛЮЧЕНИЕ:» — только описание."""
-        if not text or not text.strip():
-            return ""
-        match = re.search(r"ЗАКЛЮЧЕНИЕ\s*:", text, re.IGNORECASE)
-        if match:
-            return text[: match.start()].strip()
-        return text.strip()
-
-    def _get_conclusion_from_text(self, text: str) -> str:
-        """Текст с «ЗАКЛЮЧЕНИЕ:» до конца — заключение, BIRADS и рекомендации."""
-        if not text or not text.strip():
-            return ""
-        match = re.search(r"ЗАКЛЮЧЕНИЕ\s*:.*", text, re.DOTALL | re.IGNORECASE)
-        if match:
-            return text[match.start() :].strip()
-        return ""
-
     def _copy_description(self):
-        text = self.text_edit.toPlainText()
-        QApplication.clipboard().setText(self._get_description_from_text(text))
+        call_engine(self.engine, self.text_edit, "split_report", self.text_edit.toPlainText(),
+                    on_result=lambda report: QApplication.clipboard().setText(report.description))
 
     def _copy_conclusion(self):
-        text = self.text_edit.toPlainText()
-        QApplication.clipboard().setText(self._get_conclusion_from_text(text))
+        call_engine(self.engine, self.text_edit, "split_report", self.text_edit.toPlainText(),
+                    on_result=lambda report: QApplication.clipboard().setText(report.conclusion))
 
     def get_description_text(self) -> str:
         if not hasattr(self, "text_edit"):
             return ""
-        return self._get_description_from_text(self.text_edit.toPlainText())
+        return self.engine.split_report(self.text_edit.toPlainText()).description
 
     def get_conclusion_text(self) -> str:
         if not hasattr(self, "text_edit"):
             return ""
-        return self._get_conclusion_from_text(self.text_edit.toPlainText())
+        return self.engine.split_report(self.text_edit.toPlainText()).conclusion
 
     def get_generated_text(self) -> str:
         return self.text_edit.toPlainText() if hasattr(self, "text_edit") else ""
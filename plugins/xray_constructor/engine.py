@@ -0,0 +1,177 @@
+"""Формирование текста «Конструктора рентгеновских исследований» - БЕЗ зависимостей от UI"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Optional, Sequence, Tuple
+
+# Добавляем корневую директорию проекта в sys.path
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.plugin_base import ReportEngine, ReportText
+
+PLUGIN_DIR = Path(__file__).parent
+DEFAULT_CONFIG_PATH = PLUGIN_DIR / "config.json"
+
+DEFAULT_SIDE_TEXTS = {
+    "слева": "Слева: Без видимых очагово-инфильтративных теней. Корни структурны. Легочный рисунок не изменен. Синусы свободны. Сердце и диафрагма без особенностей.",
+    "справа": "Справа: Без видимых очагово-инфильтративных теней. Корни структурны. Легочный рисунок не изменен. Синусы свободны. Сердце и диафрагма без особенностей.",
+}
+
+# Патология на снимке: (id патологии, id стороны)
+PathologyChoice = Tuple[str, str]
+
+
+def _load_json(path: Path, default: Any) -> Any:
+    if not path.exists():
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+def _save_json(path: Path, data: Any) -> bool:
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception:
+        return False
+
+
+class XrayEngine(ReportEngine):
+    """Описание и заключение по области исследования и списку патологий со сторонами.
+
+    Параметры build_report: study (id исследования из config.json; по умолчанию
+    первое) и pathologies — список пар [id патологии, id стороны].
+    """
+
+    def __init__(self, config_path: Path = DEFAULT_CONFIG_PATH):
+        self.config_path = config_path
+        self.config = _load_json(config_path, {"исследования": []})
+
+    def get_modality(self) -> str:
+        return "xray"
+
+    def reload_data(self) -> None:
+        """Перечитать config.json; если файл не читается (запись ещё идёт), остаётся прежняя конфигурация"""
+        self.config = _load_json(self.config_path, self.config)
+
+    @property
+    def studies(self) -> list:
+        return self.config.get("исследования", [])
+
+    def get_study(self, study_id: Optional[str]) -> Optional[dict]:
+        """Исследование по id (первое, если такого нет)"""
+        for s in self.studies:
+            if s.get("id") == study_id:
+                return s
+        return self.studies[0] if self.studies else None
+
+    def pathologies_by_id(self, study_id: Optional[str]) -> dict:
+        study = self.get_study(study_id)
+        return {p["id"]: p for p in study.get("патологии", [])} if study else {}
+
+    def build_header(self, study_id: Optional[str]) -> str:
+        study = self.get_study(study_id)
+        if not study:
+            return ""
+        tpl = study.get("шаблон_заголовка", "")
+        return tpl.replace("{сокращение}", study.get("сокращение", ""))
+
+    def _get_template_prefix(self, text: str) -> str | None:
+        t = text.strip()
+        if t.startswith("Слева:"):
+            return "слева"
+        if t.startswith("Справа:"):
+            return "справа"
+        if t.startswith("Справа и слева:"):
+            return "bilateral"
+        return None
+
+    def build_description(self, study_id: Optional[str], pathologies: Iterable[PathologyChoice]) -> str:
+        study = self.get_study(study_id)
+        if not study:
+            return ""
+        structure = study.get("структура_описания", ["слева", "справа"])
+        default_texts_raw = study.get("текст_по_умолчанию_описание")
+        default_texts = default_texts_raw if isinstance(default_texts_raw, dict) else {}
+        default_text_single = default_texts_raw if isinstance(default_texts_raw, str) else None
+        pathology_by_id = {p["id"]: p for p in study.get("патологии", [])}
+
+        left_parts: list[str] = []
+        right_parts: list[str] = []
+        bilateral_parts: list[str] = []
+
+        for pathology_id, side_id in pathologies:
+            pat = pathology_by_id.get(pathology_id)
+            if not pat:
+                continue
+            templates = pat.get("шаблоны", {}).get("описание", {})
+            text = templates.get(side_id, "")
+            if not text:
+                continue
+            prefix = self._get_template_prefix(text)
+            if prefix == "слева":
+                left_parts.append(text)
+            elif prefix == "справа":
+                right_parts.append(text)
+            elif prefix == "bilateral":
+                bilateral_parts.append(text)
+
+        # Один текст по умолчанию для «лёгкие норма» (без патологий)
+        if default_text_single and not left_parts and not right_parts and not bilateral_parts:
+            return default_text_single
+
+        paragraphs: list[str] = []
+        # При наличии двусторонних патологий не подставляем текст по умолчанию для «слева»/«справа»
+        use_default_sides = not bilateral_parts
+        for key in structure:
+            if key == "слева":
+                if left_parts:
+                    paragraphs.append(" ".join(left_parts))
+                elif use_default_sides:
+                    paragraphs.append(default_texts.get("слева", DEFAULT_SIDE_TEXTS["слева"]))
+            elif key == "справа":
+                if right_parts:
+                    paragraphs.append(" ".join(right_parts))
+                elif use_default_sides:
+                    paragraphs.append(default_texts.get("справа", DEFAULT_SIDE_TEXTS["справа"]))
+        if bilateral_parts:
+            paragraphs.append(" ".join(bilateral_parts))
+
+        return "\n\n".join(paragraphs)
+
+    def build_conclusion(self, study_id: Optional[str], pathologies: Iterable[PathologyChoice]) -> str:
+        study = self.get_study(study_id)
+        if not study:
+            return ""
+        pathology_by_id = {p["id"]: p for p in study.get("патологии", [])}
+        parts = []
+        for pathology_id, side_id in pathologies:
+            pat = pathology_by_id.get(pathology_id)
+            if not pat:
+                continue
+            templates = pat.get("шаблоны", {}).get("заключение", {})
+            text = templates.get(side_id, "")
+            if text:
+                parts.append(text)
+        if parts:
+            return ". ".join(parts)
+        return study.get("текст_по_умолчанию_заключение", "")
+
+    def build_report(self, params: Mapping[str, Any]) -> ReportText:
+        """Описание с заголовком исследования и заключение"""
+        study_id = params.get("study")
+        pathologies: Sequence[PathologyChoice] = [tuple(choice) for choice in params.get("pathologies", [])]
+        header = self.build_header(study_id)
+        desc = self.build_description(study_id, pathologies)
+        text = f"{header}\n\n{desc}" if header else desc
+        return ReportText(text, self.build_conclusion(study_id, pathologies))
+
+
+Engine = XrayEngine
@@ -1,9 +1,8 @@
-"""Плагин «Конструктор рентгеновских исследований»"""
+"""Плагин «Конструктор рентгеновских исследований»: виджет; текст формирует XrayEngine (engine.py)"""
 
 import sys
-import json
 from pathlib import Path
-from typing import Any
+from typing import Optional
 
 project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
@@ -15,30 +14,9 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 
-from core.plugin_base import ModalityPlugin
-
-
-PLUGIN_DIR = Path(__file__).parent
-DEFAULT_CONFIG_PATH = PLUGIN_DIR / "config.json"
-
-
-def _load_json(path: Path, default: Any) -> Any:
-    if not path.exists():
-        return default
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return default
-
-
-def _save_json(path: Path, data: Any) -> bool:
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception:
-        return False
+from core.plugin_base import ModalityPlugin, ReportEngine
+from plugins.xray_constructor.engine import XrayEngine
+from ui.engine_calls import call_engine
 
 
 class PathologyCard(QFrame):
@@ -89,9 +67,9 @@ class PathologyCard(QFrame):
 class XrayConstructorPlugin(ModalityPlugin):
     """Плагин для генерации описаний и заключений по рентгеновским исследованиям."""
 
-    def __init__(self):
-        self._config_path = DEFAULT_CONFIG_PATH
-        self._config = _load_json(self._config_path, {"исследования": []})
+    def __init__(self, engine: Optional[ReportEngine] = None):
+        # engine — движок в отдельном процессе (EngineHost), если так указано в plugin.json
+        self.engine = engine if engine is not None else XrayEngine()
         self._current_study_id: str | None = None
         self._pathology_cards: list[tuple[str, str]] = []  # [(pathology_id, side_id), ...]
         self._card_widgets: list[tuple[PathologyCard, str, str]] = []  # [(widget, pathology_id, side_id)]
@@ -102,112 +80,66 @@ class XrayConstructorPlugin(ModalityPlugin):
     def get_description(self) -> str:
         return "Генерация структурированных описаний и заключений по рентгеновским снимкам"
 
+    def get_modality(self) -> str:
+        return self.engine.get_modality()
+
+    def get_engine(self) -> ReportEngine:
+        return self.engine
+
+    @property
+    def _config(self) -> dict:
+        # Всегда конфигурация движка: после engine.reload_data() виджет видит новые данные.
+        # Движок в отдельном процессе отдаёт её копию без запроса (EngineHost)
+        return self.engine.config
+
+    def save_state(self) -> dict:
+        return {"study": self._current_study_id, "pathologies": [list(card) for card in self._pathology_cards]}
+
+    def restore_state(self, state) -> None:
+        """Область исследования и карточки патологий; исчезнувшие из config.json пропускаются"""
+        if not hasattr(self, "_combo_study"):
+            return
+        ids = [s.get("id") for s in self._config.get("исследования", [])]
+        if state.get("study") in ids:
+            # Смена индекса очищает карточки (_on_study_changed) — поэтому они заполняются после
+            self._combo_study.setCurrentIndex(ids.index(state["study"]))
+            self._current_study_id = state["study"]
+        study = self._get_study()
+        valid = {p["id"] for p in study.get("патологии", [])} if study else set()
+        self._pathology_cards = [(pid, side) for pid, side in state.get("pathologies", []) if pid in valid]
+        self._rebuild_cards()
+        self._refresh_texts()
+
     def _get_study(self):
+        """Текущее исследование из конфигурации (первое, если такого нет) — как XrayEngine.get_study"""
         studies = self._config.get("исследования", [])
         for s in studies:
             if s.get("id") == self._current_study_id:
                 return s
         return studies[0] if studies else None
 
-    def _build_header(self) -> str:
-        study = self._get_study()
-        if not study:
-            return ""
-        tpl = study.get("шаблон_заголовка", "")
-        return tpl.replace("{сокращение}", study.get("сокращение", ""))
-
-    def _is_bilateral_template(self, text: str) -> bool:
-        return text.strip().startswith("Справа и слева:")
-
-    def _get_template_prefix(self, text: str) -> str | None:
-        t = text.strip()
-        if t.startswith("Слева:"):
-            return "слева"
-        if t.startswith("Справа:"):
-            return "справа"
-        if t.startswith("Справа и слева:"):
-            return "bilateral"
-        return None
-
-    def _build_description(self) -> str:
-        study = self._get_study()
-        if not study:
-            return ""
-        structure = study.get("структура_описания", ["слева", "справа"])
-        default_texts_raw = study.get("текст_по_умолчанию_описание")
-        default_texts = default_texts_raw if isinstance(default_texts_raw, dict) else {}
-        default_text_single = default_texts_raw if isinstance(default_texts_raw, str) else None
-        pathology_by_id = {p["id"]: p for p in study.get("патологии", [])}
+    def _build_conclusion(self) -> str:
+        return self.engine.build_conclusion(self._current_study_id, self._pathology_cards)
 
-        left_parts: list[str] = []
-        right_parts: list[str] = []
-        bilateral_parts: list[str] = []
+    def _params(self) -> dict:
+        return {"study": self._current_study_id, "pathologies": list(self._pathology_cards)}
 
-        for pathology_id, side_id in self._pathology_cards:
-            pat = pathology_by_id.get(pathology_id)
-            if not pat:
-                continue
-            templates = pat.get("шаблоны", {}).get("описание", {})
-            text = templates.get(side_id, "")
-            if not text:
-                continue
-            prefix = self._get_template_prefix(text)
-            if prefix == "слева":
-                left_parts.append(text)
-            elif prefix == "справа":
-                right_parts.append(text)
-            elif prefix == "bilateral":
-                bilateral_parts.append(text)
-
-        # Один текст по умолчанию для «лёгкие норма» (без патологий)
-        if default_text_single and not left_parts and not right_parts and not bilateral_parts:
-            return default_text_single
-
-        paragraphs: list[str] = []
-        # При наличии двусторонних патологий не подставляем текст по умолчанию для «слева»/«справа»
-        use_default_sides = not bilateral_parts
-        for key in structure:
-            if key == "слева":
-                if left_parts:
-                    paragraphs.append(" ".join(left_parts))
-                elif use_default_sides:
-                    paragraphs.append(default_texts.get("слева", "Слева: Без видимых очагово-инфильтративных теней. Корни структурны. Легочный рисунок не изменен. Синусы свободны. Сердце и диафрагма без особенностей."))
-            elif key == "справа":
-                if right_parts:
-                    paragraphs.append(" ".join(right_parts))
-                elif use_default_sides:
-                    paragraphs.append(default_texts.get("справа", "Справа: Без видимых очагово-инфильтративных теней. Корни структурны. Легочный рисунок не изменен. Синусы свободны. Сердце и диафрагма без особенностей."))
-        if bilateral_parts:
-            paragraphs.append(" ".join(bilateral_parts))
-
-        return "\n\n".join(paragraphs)
+    def _build_report(self):
+        """Описание с заголовком и заключение по текущему выбору"""
+        return self.engine.build_report(self._params())
 
-    def _build_conclusion(self) -> str:
-        study = self._get_study()
-        if not study:
-            return ""
-        pathology_by_id = {p["id"]: p for p in study.get("патологии", [])}
-        parts = []
-        for pathology_id, side_id in self._pathology_cards:
-            pat = pathology_by_id.get(pathology_id)
-            if not pat:
-                continue
-            templates = pat.get("шаблоны", {}).get("заключение", {})
-            text = templates.get(side_id, "")
-            if text:
-                parts.append(text)
-        if parts:
-            return ". ".join(parts)
-        default_conclusion = study.get("текст_по_умолчанию_заключение", "")
-        return default_conclusion
+    def _request_report(self, on_result):
+        """Отчёт по текущему выбору — в on_result, не ожидая движок в потоке UI"""
+        call_engine(self.engine, self._te_description, "build_report", self._params(), on_result=on_result)
 
     def _refresh_texts(self):
         if not hasattr(self, "_te_description") or not self._te_description:
             return
-        header = self._build_header()
-        desc = self._build_description()
-        conc = self._build_conclusion()
-        self._te_description.setPlainText(f"{header}\n\n{desc}" if header else desc)
+        self._request_report(self._show_texts)
+
+    def _show_texts(self, report):
+        text, conc = report
+        self._te_description.setPlainText(text)
         self._te_conclusion.setPlainText(conc)
 
     def _on_study_changed(self, index: int):
@@ -308,30 +240,25 @@ class XrayConstructorPlugin(ModalityPlugin):
 
     def _form_report(self):
         """Формирует отчёт и копирует в буфер только описание (без заключения)."""
-        desc = self._build_description()
-        header = self._build_header()
-        text = f"{header}\n\n{desc}" if header else desc
-        conc = self._build_conclusion()
+        self._request_report(self._report_formed)
+
+    def _report_formed(self, report):
+        text, conc = report
         QApplication.clipboard().setText(text)
         if getattr(self, "_on_report_generated", None):
             self._on_report_generated(text, conc)
 
     def _copy_description(self):
         """Копирует в буфер только описание."""
-        desc = self._build_description()
-        header = self._build_header()
-        text = f"{header}\n\n{desc}" if header else desc
-        QApplication.clipboard().setText(text)
+        self._request_report(lambda report: QApplication.clipboard().setText(report.description))
 
     def _copy_conclusion(self):
         """Копирует в буфер только заключение."""
-        QApplication.clipboard().setText(self._build_conclusion())
+        self._request_report(lambda report: QApplication.clipboard().setText(report.conclusion))
 
     def get_description_text(self) -> str:
         """Текст описания для горячих клавиш. Также копирует в буфер обмена."""
-        desc = self._build_description()
-        header = self._build_header()
-        text = f"{header}\n\n{desc}" if header else desc
+        text = self._build_report().description
         QApplication.clipboard().setText(text)
         return text
 
@@ -1,8 +1,9 @@
 """Порт для хранения данных"""
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 from domain.entities import Modality, Report, Template
+from domain.text_search import SearchIndex
 
 
 class StorageAdapter(ABC):
@@ -15,14 +16,48 @@ class StorageAdapter(ABC):
     
     @abstractmethod
     def get_report(self, report_id: str) -> Optional[Report]:
-        """Получить заключение по ID"""
+        """Получить заключение по ID.
+
+        Возвращается сохранённая хранилищем копия, а не объект, переданный в
+        save_report: изменения этого объекта после сохранения в хранилище не попадают.
+        """
         pass
     
     @abstractmethod
     def get_all_reports(self) -> List[Report]:
         """Получить все заключения"""
         pass
+
+    def save_reports(self, reports: Iterable[Report]) -> None:
+        """Сохранить пачку заключений.
+
+        По умолчанию — save_report для каждого; постоянные хранилища пишут
+        пачку порциями, по транзакции на порцию.
+        """
+        for report in reports:
+            self.save_report(report)
+
+    def get_reports(self, report_ids: Iterable[str]) -> List[Optional[Report]]:
+        """Получить заключения по списку ID: результат в том же порядке, None для отсутствующих"""
+        return [self.get_report(report_id) for report_id in report_ids]
     
+    def iter_reports(
+        self, modality: Optional[Modality] = None, after_id: Optional[str] = None, batch_size: int = 500
+    ) -> Iterator[Report]:
+        """Обойти заключения в порядке возрастания ID, начиная после after_id.
+
+        Адаптеры читают по batch_size заключений за раз (постраничная выборка по ключу),
+        поэтому обход миллионов заключений не держит их в памяти. Реализация по
+        умолчанию сортирует get_all_reports().
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size должен быть положительным")
+        for report in sorted(self.get_all_reports(), key=lambda r: r.id):
+            if after_id is not None and report.id <= after_id:
+                continue
+            if modality is None or report.modality == modality:
+                yield report
+
     @abstractmethod
     def save_template(self, template: Template) -> None:
         """Сохранить шаблон"""
@@ -33,6 +68,15 @@ class StorageAdapter(ABC):
         """Получить шаблон по имени"""
         pass
     
+    def delete_template(self, template_name: str, modality: Optional[Modality] = None) -> bool:
+        """Удалить шаблон (по ключу modality:name, по имени в модальности или по имени).
+
+        Возвращает True, если шаблон был удалён. Не абстрактный, чтобы адаптеры,
+        написанные до появления метода, по-прежнему создавались; такие адаптеры
+        шаблоны не удаляют — по умолчанию False.
+        """
+        return False
+    
     @abstractmethod
     def get_all_templates(self) -> List[Template]:
         """Получить все шаблоны"""
@@ -42,3 +86,33 @@ class StorageAdapter(ABC):
     def get_templates_by_modality(self, modality: Modality) -> List[Template]:
         """Получить шаблоны для конкретной модальности"""
         pass
+
+    def search_reports(self, query: str, modality: Optional[Modality] = None, limit: int = 20) -> List[Report]:
+        """Полнотекстовый поиск: заключения со всеми словами запроса, по убыванию релевантности.
+
+        По умолчанию индекс строится по get_all_reports() на каждый запрос;
+        адаптеры с большим числом заключений ведут индекс сами.
+        """
+        index = SearchIndex()
+        reports = {}
+        for report in self.get_all_reports():
+            index.add(report)
+            reports[report.id] = report
+        return [reports[report_id] for report_id in index.search(query, modality, limit)]
+
+    def get_report_history(self, report_id: str) -> List[Report]:
+        """Все версии заключения от первой (версия 1) к текущей; пустой список, если заключения нет.
+
+        Хранилище без истории версий отдаёт только текущую версию.
+        """
+        report = self.get_report(report_id)
+        return [report] if report is not None else []
+
+    def get_report_at(self, report_id: str, version: int) -> Optional[Report]:
+        """Версия заключения с номером version (нумерация с 1); None, если такой версии нет"""
+        history = self.get_report_history(report_id)
+        return history[version - 1] if 1 <= version <= len(history) else None
+
+    def close(self) -> None:
+        """Освободить ресурсы хранилища (соединения, файлы). По умолчанию ничего не делает."""
+        pass
@@ -0,0 +1,166 @@
+"""Общий контракт StorageAdapter: одни и те же проверки для всех адаптеров хранения."""
+
+from domain.entities import Modality, Report, Template
+
+
+class StorageContract:
+    """Примесь к unittest.TestCase; наследник реализует make_storage()."""
+
+    def make_storage(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.storage = self.make_storage()
+
+    def tearDown(self):
+        self.storage.close()
+
+    def test_save_and_get_report(self):
+        report = Report(id="r1", modality=Modality.XRAY, original_text="норма", processed_text="без патологии", template_name="Стандартный")
+        self.storage.save_report(report)
+        loaded = self.storage.get_report("r1")
+        self.assertEqual(loaded, report)
+        self.assertIsNone(self.storage.get_report("нет"))
+
+    def test_resave_report_overwrites(self):
+        self.storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="первый"))
+        self.storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="второй"))
+        self.assertEqual(self.storage.get_report("r1").original_text, "второй")
+        self.assertEqual(len(self.storage.get_all_reports()), 1)
+
+    def test_get_all_reports_in_save_order(self):
+        for i in (3, 1, 2):
+            self.storage.save_report(Report(id=f"r{i}", modality=Modality.MAMMOGRAPHY, original_text=str(i)))
+        self.assertEqual([r.id for r in self.storage.get_all_reports()], ["r3", "r1", "r2"])
+
+    def test_default_templates(self):
+        self.assertEqual(
+            [t.name for t in self.storage.get_templates_by_modality(Modality.XRAY)],
+            ["Стандартный", "Формализованный"],
+        )
+        self.assertEqual(len(self.storage.get_all_templates()), 4)
+        self.assertEqual(self.storage.get_template("xray:Формализованный").replacements["все ок"], "патологических изменений не обнаружено")
+
+    def test_template_save_lookup_delete(self):
+        template = Template(name="Стандартный", modality=Modality.MAMMOGRAPHY, replacements={"а": "б"})
+        self.storage.save_template(template)
+        self.assertEqual(self.storage.get_template("Стандартный").modality, Modality.XRAY)
+        self.assertEqual(self.storage.get_template("mammography:Стандартный"), template)
+        self.assertTrue(self.storage.delete_template("Стандартный", Modality.XRAY))
+        self.assertEqual(self.storage.get_template("Стандартный"), template)
+        self.assertFalse(self.storage.delete_template("Стандартный", Modality.XRAY))
+        self.assertEqual([t.name for t in self.storage.get_templates_by_modality(Modality.XRAY)], ["Формализованный"])
+
+    def test_search_reports(self):
+        self.storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="Очаговых теней в лёгких нет"))
+        self.storage.save_report(Report(id="r2", modality=Modality.DENSITOMETRY, original_text="остеопения шейки бедра"))
+        self.storage.save_report(Report(id="r3", modality=Modality.XRAY, original_text="очаговая тень, очаговые тени в легком"))
+        self.assertEqual([r.id for r in self.storage.search_reports("очаговые тени")], ["r3", "r1"])
+        self.assertEqual([r.id for r in self.storage.search_reports("легкие", modality=Modality.DENSITOMETRY)], [])
+        self.storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="остеопения"))
+        self.assertEqual([r.id for r in self.storage.search_reports("тени")], ["r3"])
+        self.assertEqual(self.storage.search_reports("остеопения", limit=1)[0].modality, Modality.XRAY)
+
+    def test_iter_reports_by_id(self):
+        for i in (5, 1, 4, 2, 3, 6):
+            modality = Modality.XRAY if i % 2 else Modality.DENSITOMETRY
+            self.storage.save_report(Report(id=f"r{i:02d}", modality=modality, original_text=str(i)))
+        ids = lambda reports: [r.id for r in reports]
+        self.assertEqual(ids(self.storage.iter_reports(batch_size=4)), ["r01", "r02", "r03", "r04", "r05", "r06"])
+        self.assertEqual(ids(self.storage.iter_reports(after_id="r03", batch_size=1)), ["r04", "r05", "r06"])
+        self.assertEqual(ids(self.storage.iter_reports(Modality.XRAY, batch_size=2)), ["r01", "r03", "r05"])
+        self.assertEqual(ids(self.storage.iter_reports(Modality.DENSITOMETRY, after_id="r02")), ["r04", "r06"])
+        self.assertEqual(ids(self.storage.iter_reports(after_id="r06")), [])
+        with self.assertRaises(ValueError):
+            next(self.storage.iter_reports(batch_size=0))
+
+    def test_iter_reports_sees_reports_saved_while_iterating(self):
+        for i in range(1, 5):
+            self.storage.save_report(Report(id=f"r{i}", modality=Modality.XRAY, original_text=str(i)))
+        seen = []
+        for report in self.storage.iter_reports(batch_size=2):
+            seen.append(report.id)
+            if report.id == "r2":
+                self.storage.save_report(Report(id="r9", modality=Modality.XRAY, original_text="новое"))
+                self.storage.save_report(Report(id="r0", modality=Modality.XRAY, original_text="до курсора"))
+        self.assertEqual(seen, ["r1", "r2", "r3", "r4", "r9"])
+
+    def test_save_reports_and_get_reports(self):
+        self.storage.save_reports(
+            Report(id=f"r{i % 5}", modality=Modality.XRAY, original_text=f"версия {i}") for i in range(12)
+        )
+        self.assertEqual([r.id for r in self.storage.get_all_reports()], ["r0", "r1", "r2", "r3", "r4"])
+        found = self.storage.get_reports(["r4", "нет", "r0", "r4"])
+        self.assertEqual([r.original_text if r else None for r in found], ["версия 9", None, "версия 10", "версия 9"])
+        self.assertEqual(self.storage.get_reports([]), [])
+        self.assertEqual([r.id for r in self.storage.search_reports("версия 11")], ["r1"])
+
+
+class HistoryContract:
+    """Примесь для хранилищ с историей версий (вместе со StorageContract)."""
+
+    def test_report_history(self):
+        texts = ["в легких без очагов", "в легких без очаговых теней", "в легких без очаговых теней, корни структурны"]
+        for text in texts:
+            self.storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=text))
+        # Сохранение без изменений версию не добавляет
+        self.storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=texts[-1]))
+        self.storage.save_report(Report(
+            id="r1", modality=Modality.XRAY, original_text=texts[-1], processed_text="норма", template_name="Стандартный"
+        ))
+        history = self.storage.get_report_history("r1")
+        self.assertEqual([r.original_text for r in history], texts + [texts[-1]])
+        self.assertEqual([r.processed_text for r in history], [None, None, None, "норма"])
+        self.assertEqual(history[-1], self.storage.get_report("r1"))
+        self.assertEqual(self.storage.get_report_at("r1", 2).original_text, texts[1])
+        self.assertIsNone(self.storage.get_report_at("r1", 5))
+        self.assertIsNone(self.storage.get_report_at("r1", 0))
+        self.assertEqual(self.storage.get_report_history("нет"), [])
+        self.assertIsNone(self.storage.get_report_at("нет", 1))
+
+    def test_history_of_bulk_save(self):
+        self.storage.save_reports(
+            Report(id=f"r{i % 2}", modality=Modality.XRAY, original_text=f"версия {i // 2}") for i in range(40)
+        )
+        history = self.storage.get_report_history("r1")
+        self.assertEqual([r.original_text for r in history], [f"версия {i}" for i in range(20)])
+        self.assertEqual(self.storage.get_report_at("r0", 18).original_text, "версия 17")
+
+
+# Длинный текст вне словаря сжатия: и после сжатия хранится как общий текст
+DEDUP_TEXT = (
+    "Состояние после остеосинтеза левой ключицы пластиной с семью винтами (2019 г.), металлоконструкция "
+    "стабильна, линия перелома не прослеживается; в S6 правого легкого кальцинат 4 мм без динамики с 2021 г."
+)
+
+
+class DedupContract:
+    """Примесь для хранилищ с дедупликацией текстов (вместе со StorageContract)."""
+
+    def test_identical_texts_stored_once(self):
+        for i in range(3):
+            self.storage.save_report(Report(
+                id=f"r{i}", modality=Modality.XRAY, original_text=DEDUP_TEXT, processed_text=DEDUP_TEXT if i else None
+            ))
+        stats = self.storage.dedup_stats()
+        self.assertEqual(stats.blobs, 1)
+        self.assertGreaterEqual(stats.references, 5)
+        self.assertGreaterEqual(stats.ratio, 5)
+        loaded = self.storage.get_reports(["r0", "r1", "r2"])
+        self.assertEqual([r.original_text for r in loaded], [DEDUP_TEXT] * 3)
+        self.assertEqual([r.processed_text for r in loaded], [None, DEDUP_TEXT, DEDUP_TEXT])
+        self.assertEqual(len(self.storage.search_reports("металлоконструкция")), 3)
+
+    def test_garbage_collection_keeps_live_texts(self):
+        versions = [DEDUP_TEXT, DEDUP_TEXT + " Заключение: норма.", DEDUP_TEXT + " Заключение: без патологии."]
+        for text in versions:
+            self.storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=text))
+        self.storage.save_report(Report(id="r2", modality=Modality.XRAY, original_text=versions[-1]))
+        self.assertGreaterEqual(self.storage.collect_garbage(), 1)
+        self.assertEqual(self.storage.collect_garbage(), 0)
+        self.assertEqual(self.storage.get_report("r1").original_text, versions[-1])
+        self.assertEqual(self.storage.get_report("r2").original_text, versions[-1])
+        history = [r.original_text for r in self.storage.get_report_history("r1")]
+        self.assertIn(history, (versions, versions[-1:]))
+        self.storage.save_report(Report(id="r3", modality=Modality.XRAY, original_text=versions[1]))
+        self.assertEqual(self.storage.get_report("r3").original_text, versions[1])
@@ -0,0 +1,60 @@
+"""Тесты хранения одинаковых текстов в одном экземпляре."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта adapters
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from adapters.storage.blob_store import BLOB_MIN_SIZE, BlobStore, blob_ref, text_digest
+
+
+class TestBlobStore(unittest.TestCase):
+    """Общие экземпляры, счётчики ссылок и сборка мусора."""
+
+    def setUp(self):
+        self.store = BlobStore()
+        self.text = "синусы свободны, " * 10
+
+    def test_identical_texts_share_one_object(self):
+        first = self.store.acquire("".join(["синусы свободны, "] * 10))
+        second = self.store.acquire("".join(["синусы свободны, "] * 10))
+        self.assertIs(first, second)
+        self.assertEqual(len(self.store), 1)
+
+    def test_short_texts_and_none_not_shared(self):
+        short = "x" * (BLOB_MIN_SIZE - 1)
+        self.assertIs(self.store.acquire(short), short)
+        self.assertIsNone(self.store.acquire(None))
+        self.assertEqual(len(self.store), 0)
+
+    def test_garbage_collected_only_without_references(self):
+        self.store.acquire(self.text)
+        self.store.acquire(self.text)
+        self.store.release(self.text)
+        self.assertEqual(self.store.collect_garbage(), 0)
+        self.store.release(self.text)
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.collect_garbage(), 1)
+        self.assertEqual(len(self.store), 0)
+
+    def test_stats(self):
+        for _ in range(4):
+            self.store.acquire(self.text)
+        stats = self.store.stats()
+        size = len(self.text.encode("utf-8"))
+        self.assertEqual((stats.references, stats.blobs, stats.stored_bytes), (4, 1, size))
+        self.assertEqual(stats.ratio, 4.0)
+
+    def test_digest_and_ref(self):
+        self.assertEqual(text_digest(self.text), text_digest("".join(["синусы свободны, "] * 10)))
+        self.assertNotEqual(text_digest(self.text), text_digest(self.text + "."))
+        self.assertEqual(blob_ref(self.text)[1:], text_digest(self.text))
+        self.assertEqual(blob_ref(self.text)[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
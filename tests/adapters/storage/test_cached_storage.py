@@ -0,0 +1,179 @@
+"""Тесты CachedStorage."""
+
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта adapters
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from adapters.storage.cached_storage import CachedStorage
+from adapters.storage.in_memory_storage import InMemoryStorage
+from adapters.storage.sqlite_storage import SqliteStorage
+from domain.entities import Modality, Report
+from domain.template_cache import TemplateCache
+from tests.adapters.storage.storage_contract import StorageContract
+
+
+def make_report(report_id: str, text: str = "норма") -> Report:
+    return Report(id=report_id, modality=Modality.XRAY, original_text=text)
+
+
+class RecordingStorage(InMemoryStorage):
+    """InMemoryStorage, который считает пачки записи и умеет «падать» и «тормозить»"""
+
+    def __init__(self):
+        super().__init__(template_cache=TemplateCache())
+        self.batches = []
+        self.fail_next = False
+        self.gate = threading.Event()
+        self.gate.set()
+        self.closed = False
+
+    def save_reports(self, reports):
+        reports = list(reports)
+        self.gate.wait()
+        if self.fail_next:
+            self.fail_next = False
+            raise OSError("диск недоступен")
+        self.batches.append([r.id for r in reports])
+        super().save_reports(reports)
+
+    def close(self):
+        self.closed = True
+
+
+class TestCachedStorageContract(StorageContract, unittest.TestCase):
+    """Общий контракт хранилища."""
+
+    def make_storage(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        backend = SqliteStorage(Path(self._tmp.name) / "reports.db", template_cache=TemplateCache())
+        return CachedStorage(backend, flush_interval=0.05)
+
+
+class TestCachedStorage(unittest.TestCase):
+    """Отложенная запись, триггеры сброса и LRU."""
+
+    def open(self, **kwargs):
+        self.backend = RecordingStorage()
+        storage = CachedStorage(self.backend, **kwargs)
+        self.addCleanup(storage.close)
+        return storage
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertTrue(condition())
+
+    def test_save_does_not_touch_backend(self):
+        storage = self.open(flush_interval=60)
+        storage.save_report(make_report("r1"))
+        storage.save_report(make_report("r1", "вторая версия"))
+        self.assertIsNone(self.backend.get_report("r1"))
+        self.assertEqual(storage.get_report("r1").original_text, "вторая версия")
+        storage.flush()
+        self.assertEqual(self.backend.batches, [["r1"]])
+        self.assertEqual(self.backend.get_report("r1").original_text, "вторая версия")
+
+    def test_size_trigger(self):
+        storage = self.open(flush_interval=60, flush_batch=3)
+        for i in range(3):
+            storage.save_report(make_report(f"r{i}"))
+        self.wait_for(lambda: self.backend.batches == [["r0", "r1", "r2"]])
+
+    def test_time_trigger(self):
+        storage = self.open(flush_interval=0.02)
+        storage.save_report(make_report("r1"))
+        self.wait_for(lambda: self.backend.get_report("r1") is not None)
+        self.assertEqual(storage.pending_count(), 0)
+
+    def test_close_flushes_and_closes_backend(self):
+        storage = self.open(flush_interval=60)
+        storage.save_reports(make_report(f"r{i}") for i in range(10))
+        storage.close()
+        self.assertEqual(len(self.backend.get_all_reports()), 10)
+        self.assertTrue(self.backend.closed)
+
+    def test_background_flush_error_logged_and_reported(self):
+        errors = []
+        storage = self.open(flush_interval=0.02, on_flush_error=errors.append)
+        self.backend.gate.clear()
+        self.backend.fail_next = True
+        storage.save_report(make_report("r1"))
+        with self.assertLogs("adapters.storage.cached_storage", level="WARNING") as logs:
+            self.backend.gate.set()
+            self.wait_for(lambda: errors)
+        self.assertIsInstance(errors[0], OSError)
+        self.assertIn("Не удалось записать", logs.output[0])
+        self.wait_for(lambda: self.backend.get_report("r1") is not None)
+
+    def test_save_after_close_raises(self):
+        storage = self.open(flush_interval=60)
+        storage.close()
+        with self.assertRaises(RuntimeError):
+            storage.save_report(make_report("r1"))
+        self.assertEqual(storage.pending_count(), 0)
+
+    def test_failed_close_can_be_retried(self):
+        storage = self.open(flush_interval=60)
+        storage.save_report(make_report("r1"))
+        self.backend.fail_next = True
+        with self.assertRaises(OSError):
+            storage.close()
+        self.assertFalse(self.backend.closed)
+        self.assertEqual(storage.pending_count(), 1)
+        storage.close()
+        self.assertIsNotNone(self.backend.get_report("r1"))
+        self.assertTrue(self.backend.closed)
+
+    def test_mutating_saved_or_returned_report_does_not_change_stored_one(self):
+        storage = self.open(flush_interval=60)
+        report = make_report("r1")
+        storage.save_report(report)
+        report.original_text = "изменено после сохранения"
+        returned = storage.get_report("r1")
+        self.assertEqual(returned.original_text, "норма")
+        returned.original_text = "изменено после чтения"
+        self.assertEqual(storage.get_reports(["r1"])[0].original_text, "норма")
+        storage.flush()
+        self.assertEqual(self.backend.get_report("r1").original_text, "норма")
+
+    def test_reads_served_while_batch_is_written(self):
+        storage = self.open(flush_interval=60)
+        storage.save_report(make_report("r1"))
+        self.backend.gate.clear()
+        flusher = threading.Thread(target=storage.flush)
+        flusher.start()
+        self.wait_for(lambda: storage._in_flight)
+        self.assertEqual(storage.get_report("r1").original_text, "норма")
+        self.assertEqual(storage.pending_count(), 1)
+        self.backend.gate.set()
+        flusher.join()
+        self.assertEqual(storage.pending_count(), 0)
+
+    def test_failed_flush_keeps_data_and_retries(self):
+        storage = self.open(flush_interval=0.02)
+        self.backend.fail_next = True
+        storage.save_report(make_report("r1"))
+        self.wait_for(lambda: self.backend.get_report("r1") is not None)
+        self.assertIsNone(storage.last_error)
+
+    def test_lru_is_bounded(self):
+        storage = self.open(flush_interval=60, cache_size=2)
+        storage.save_reports(make_report(f"r{i}") for i in range(5))
+        storage.flush()
+        self.assertEqual(list(storage._cache), ["r3", "r4"])
+        self.assertEqual([r.id for r in storage.get_reports(["r0", "r4", "нет"]) if r], ["r0", "r4"])
+        self.assertEqual(list(storage._cache), ["r4", "r0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
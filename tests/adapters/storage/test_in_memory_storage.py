@@ -0,0 +1,104 @@
+"""Тесты InMemoryStorage: индексы шаблонов и их согласованность при удалении."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта adapters
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from adapters.storage.in_memory_storage import InMemoryStorage
+from domain.entities import Modality, Report, Template
+from domain.template_cache import TemplateCache
+from tests.adapters.storage.storage_contract import (
+    DEDUP_TEXT, DedupContract, HistoryContract, StorageContract,
+)
+
+
+class TestInMemoryStorageContract(StorageContract, HistoryContract, DedupContract, unittest.TestCase):
+    """Общий контракт хранилища."""
+
+    def make_storage(self):
+        return InMemoryStorage(template_cache=TemplateCache())
+
+
+class TestInMemoryStorageWithoutHistoryAndSearch(StorageContract, unittest.TestCase):
+    """Без истории версий и полнотекстового индекса контракт тот же."""
+
+    def make_storage(self):
+        return InMemoryStorage(template_cache=TemplateCache(), history=False, search_index=False)
+
+    def test_only_current_version_and_search_without_index(self):
+        storage = self.make_storage()
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="тень в легком"))
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="очаговая тень"))
+        self.assertEqual([r.original_text for r in storage.get_report_history("r1")], ["очаговая тень"])
+        self.assertIsNone(storage.get_report_at("r1", 2))
+        self.assertEqual([r.id for r in storage.search_reports("очаговая")], ["r1"])
+        self.assertEqual(storage.search_reports("легком"), [])
+
+
+class TestTemplateIndexes(unittest.TestCase):
+    """Поиск по имени и модальности через индексы."""
+
+    def setUp(self):
+        self.cache = TemplateCache()
+        self.storage = InMemoryStorage(template_cache=self.cache)
+
+    def test_default_templates_by_modality(self):
+        names = [t.name for t in self.storage.get_templates_by_modality(Modality.XRAY)]
+        self.assertEqual(names, ["Стандартный", "Формализованный"])
+        self.assertEqual([t.name for t in self.storage.get_templates_by_modality(Modality.DENSITOMETRY)], ["DXA: стандарт"])
+
+    def test_get_by_composite_key_and_bare_name(self):
+        self.assertEqual(self.storage.get_template("xray:Стандартный").name, "Стандартный")
+        self.assertEqual(self.storage.get_template("Mammo: стандарт").modality, Modality.MAMMOGRAPHY)
+        self.assertIsNone(self.storage.get_template("нет такого"))
+
+    def test_same_name_in_two_modalities(self):
+        self.storage.save_template(Template(name="Стандартный", modality=Modality.MAMMOGRAPHY, replacements={}))
+        # По одному имени — первый сохранённый, как и при прежнем линейном поиске
+        self.assertEqual(self.storage.get_template("Стандартный").modality, Modality.XRAY)
+        self.assertEqual(self.storage.get_template("mammography:Стандартный").modality, Modality.MAMMOGRAPHY)
+
+    def test_resave_replaces_in_place(self):
+        updated = Template(name="Стандартный", modality=Modality.XRAY, replacements={"a": "b"})
+        self.storage.save_template(updated)
+        self.assertIs(self.storage.get_template("Стандартный"), updated)
+        self.assertEqual([t.name for t in self.storage.get_templates_by_modality(Modality.XRAY)], ["Стандартный", "Формализованный"])
+
+    def test_delete_keeps_indexes_consistent(self):
+        self.storage.save_template(Template(name="Стандартный", modality=Modality.MAMMOGRAPHY, replacements={}))
+        self.assertTrue(self.storage.delete_template("Стандартный", Modality.XRAY))
+        self.assertEqual(self.storage.get_template("Стандартный").modality, Modality.MAMMOGRAPHY)
+        self.assertEqual([t.name for t in self.storage.get_templates_by_modality(Modality.XRAY)], ["Формализованный"])
+        self.assertTrue(self.storage.delete_template("mammography:Стандартный"))
+        self.assertIsNone(self.storage.get_template("Стандартный"))
+        self.assertFalse(self.storage.delete_template("Стандартный"))
+        self.assertEqual(len(self.storage.get_all_templates()), 3)
+
+    def test_delete_invalidates_compiled_template(self):
+        size = self.cache.stats().size
+        self.storage.delete_template("Формализованный")
+        self.assertEqual(self.cache.stats().size, size - 1)
+
+
+
+class TestTextDeduplication(unittest.TestCase):
+    """Одинаковые тексты заключений — один объект в памяти."""
+
+    def test_identical_texts_share_one_object(self):
+        storage = InMemoryStorage(template_cache=TemplateCache())
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="".join([DEDUP_TEXT])))
+        storage.save_report(Report(id="r2", modality=Modality.XRAY, original_text="".join([DEDUP_TEXT])))
+        self.assertIs(storage.get_report("r1").original_text, storage.get_report("r2").original_text)
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="короткий"))
+        storage.save_report(Report(id="r2", modality=Modality.XRAY, original_text="короткий"))
+        self.assertEqual(storage.collect_garbage(), 1)
+        self.assertEqual(storage.dedup_stats().blobs, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
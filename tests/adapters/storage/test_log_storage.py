@@ -0,0 +1,230 @@
+"""Тесты LogStructuredStorage."""
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта adapters
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from adapters.storage.blob_store import text_digest
+from adapters.storage.log_storage import CorruptedLogError, LogStructuredStorage
+from domain.entities import Modality, Report, Template
+from domain.template_cache import TemplateCache
+from tests.adapters.storage.storage_contract import DEDUP_TEXT, DedupContract, HistoryContract, StorageContract
+
+
+class TestLogStructuredStorageContract(StorageContract, HistoryContract, DedupContract, unittest.TestCase):
+    """Общий контракт хранилища."""
+
+    def make_storage(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        return LogStructuredStorage(self._tmp.name, template_cache=TemplateCache())
+
+
+class TestLogStructuredStorage(unittest.TestCase):
+    """Журнал, уплотнение и контрольная точка."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.directory = Path(self._tmp.name)
+
+    def open(self, **kwargs) -> LogStructuredStorage:
+        storage = LogStructuredStorage(self.directory, template_cache=TemplateCache(), **kwargs)
+        self.addCleanup(storage.close)
+        return storage
+
+    def segments(self):
+        return sorted(p.name for p in self.directory.glob("segment-*.log"))
+
+    def log_size(self):
+        return sum(p.stat().st_size for p in self.directory.glob("segment-*.log"))
+
+    def test_data_survives_reopen(self):
+        storage = self.open()
+        storage.save_report(Report(id="r1", modality=Modality.DENSITOMETRY, original_text="остеопения"))
+        storage.save_template(Template(name="Свой", modality=Modality.XRAY, replacements={"x": "y"}))
+        storage.delete_template("Формализованный")
+        storage.close()
+
+        reopened = self.open()
+        self.assertEqual(reopened.get_report("r1").original_text, "остеопения")
+        self.assertEqual(reopened.get_template("Свой").replacements, {"x": "y"})
+        self.assertIsNone(reopened.get_template("Формализованный"))
+
+    def test_replays_records_after_checkpoint(self):
+        storage = self.open()
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="до"))
+        storage.checkpoint()
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="после"))
+        storage.save_report(Report(id="r2", modality=Modality.XRAY, original_text="новое"))
+        # Закрытие без контрольной точки — как при аварийном завершении
+        storage._active.close()
+        storage._closed = True
+
+        reopened = self.open()
+        self.assertEqual(reopened.get_report("r1").original_text, "после")
+        self.assertEqual([r.id for r in reopened.get_all_reports()], ["r1", "r2"])
+
+    def test_torn_tail_is_truncated(self):
+        storage = self.open()
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="целая"))
+        storage.close()
+        (self.directory / "checkpoint.bin").unlink()
+        segment = self.directory / self.segments()[-1]
+        size = segment.stat().st_size
+        with open(segment, "ab") as f:
+            f.write(b"\x01\xff\x00\x00\x00" + "обрыв".encode("utf-8"))
+
+        reopened = self.open()
+        self.assertEqual(reopened.get_report("r1").original_text, "целая")
+        self.assertEqual(segment.stat().st_size, size)
+        reopened.save_report(Report(id="r2", modality=Modality.XRAY, original_text="дальше"))
+        self.assertEqual(reopened.get_report("r2").original_text, "дальше")
+
+    def test_corruption_before_last_segment_raises(self):
+        storage = self.open(segment_size=1024)
+        for i in range(20):
+            storage.save_report(Report(id=f"r{i}", modality=Modality.XRAY, original_text=f"заключение {i} " * 10))
+        storage.close()
+        (self.directory / "checkpoint.bin").unlink()
+        first = self.directory / self.segments()[0]
+        self.assertGreater(len(self.segments()), 1)
+        data = bytearray(first.read_bytes())
+        data[len(data) // 2] ^= 0xFF
+        first.write_bytes(bytes(data))
+
+        # Записи после повреждения не отбрасываются молча, сегмент не отрезается
+        with self.assertRaises(CorruptedLogError):
+            LogStructuredStorage(self.directory, template_cache=TemplateCache())
+        self.assertEqual(first.read_bytes(), bytes(data))
+
+    def test_compaction_drops_superseded_segments(self):
+        # Без истории прежние версии не актуальны — уплотнение освобождает их место
+        storage = self.open(segment_size=4096, history=False)
+        for version in range(50):
+            for i in range(10):
+                storage.save_report(Report(id=f"r{i}", modality=Modality.XRAY, original_text=f"версия {version} " * 10))
+        before = self.log_size()
+        self.assertGreater(storage.compact(), 0)
+        self.assertLess(self.log_size(), before / 2)
+        self.assertEqual(storage.get_report("r3").original_text, "версия 49 " * 10)
+        self.assertEqual([r.id for r in storage.get_all_reports()], [f"r{i}" for i in range(10)])
+        self.assertEqual(len(storage.get_all_templates()), 4)
+        storage.close()
+
+        reopened = self.open(segment_size=4096, history=False)
+        self.assertEqual(reopened.get_report("r9").original_text, "версия 49 " * 10)
+        self.assertEqual(len(reopened.get_all_templates()), 4)
+
+    def test_search_index_persisted_with_checkpoint(self):
+        storage = self.open()
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="очаговые тени"))
+        storage.close()
+        self.assertTrue((self.directory / "search.idx").exists())
+
+        reopened = self.open()
+        reopened.save_report(Report(id="r2", modality=Modality.XRAY, original_text="тени не выявлены"))
+        # Запись после контрольной точки: при следующем открытии индекс дочитывается из журнала
+        reopened._active.close()
+        reopened._closed = True
+
+        again = self.open()
+        self.assertEqual([r.id for r in again.search_reports("тени")], ["r1", "r2"])
+
+    def test_stale_search_index_is_rebuilt(self):
+        storage = self.open()
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="очаговые тени"))
+        storage.close()
+        (self.directory / "checkpoint.bin").unlink()
+
+        reopened = self.open()
+        self.assertEqual([r.id for r in reopened.search_reports("очаговые")], ["r1"])
+
+    def test_compressed_and_plain_records(self):
+        plain = self.open(compression=False, deduplication=False)
+        plain.save_report(Report(id="plain", modality=Modality.XRAY, original_text="синусы свободны " * 20))
+        plain.close()
+        self.assertEqual(list(self.directory.glob("dictionary-*.zdict")), [])
+
+        storage = self.open(deduplication=False)
+        storage.save_report(Report(id="v1", modality=Modality.XRAY, original_text="синусы свободны " * 20))
+        self.assertLess(storage._index["v1"][2], storage._index["plain"][2] / 3)
+        self.assertEqual(storage.rebuild_compression_dictionary(), 2)
+        storage.save_report(Report(id="v2", modality=Modality.XRAY, original_text="корни структурны " * 20))
+        storage.close()
+        self.assertEqual(len(list(self.directory.glob("dictionary-*.zdict"))), 2)
+
+        reopened = self.open()
+        texts = [r.original_text for r in reopened.get_reports(["plain", "v1", "v2"])]
+        self.assertEqual(texts, ["синусы свободны " * 20, "синусы свободны " * 20, "корни структурны " * 20])
+
+    def test_shared_texts_survive_compaction_and_full_replay(self):
+        storage = self.open(segment_size=4096, history=False)
+        storage.save_report(Report(id="norm", modality=Modality.XRAY, original_text=DEDUP_TEXT))
+        for version in range(200):
+            storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=f"версия {version} " * 3))
+        storage.save_report(Report(id="old", modality=Modality.XRAY, original_text=DEDUP_TEXT + " Устаревшее."))
+        storage.save_report(Report(id="old", modality=Modality.XRAY, original_text="короткий"))
+        storage.save_report(Report(id="norm2", modality=Modality.XRAY, original_text=DEDUP_TEXT))
+        # Общий текст «old» без ссылок убирается, общий текст «norm» уплотнение переносит в конец журнала —
+        # после ссылающейся на него записи norm2
+        self.assertEqual(storage.collect_garbage(), 1)
+        self.assertEqual(storage.dedup_stats().blobs, 1)
+        self.assertGreater(storage._blobs[text_digest(DEDUP_TEXT)][:2], storage._index["norm2"][:2])
+        storage.close()
+        (self.directory / "checkpoint.bin").unlink()
+
+        reopened = self.open(segment_size=4096, history=False)
+        self.assertEqual(reopened.get_report("norm").original_text, DEDUP_TEXT)
+        self.assertEqual(sorted(r.id for r in reopened.search_reports("металлоконструкция")), ["norm", "norm2"])
+        self.assertEqual(reopened.dedup_stats().references, 2)
+
+    def test_history_survives_compaction_and_reopen(self):
+        # Версии актуальны: неактуальны только прежние записи заключения — порог уплотнения ниже
+        storage = self.open(segment_size=4096, garbage_ratio=0.2)
+        storage.HISTORY_KEYFRAME_INTERVAL = 4
+        versions = [f"версия {version} " * 10 for version in range(30)]
+        for text in versions:
+            storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=text))
+        self.assertGreater(storage.compact(), 0)
+        self.assertEqual([r.original_text for r in storage.get_report_history("r1")], versions)
+        self.assertEqual(storage.get_report_at("r1", 7).original_text, versions[6])
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="после уплотнения"))
+        storage.close()
+
+        for checkpoint in (True, False):
+            if not checkpoint:
+                (self.directory / "checkpoint.bin").unlink()
+            reopened = self.open(segment_size=4096)
+            history = [r.original_text for r in reopened.get_report_history("r1")]
+            self.assertEqual(history, versions + ["после уплотнения"])
+            reopened.close()
+
+    def test_history_keeps_shared_texts_alive(self):
+        storage = self.open()
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=DEDUP_TEXT))
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text="короткий"))
+        # Общий текст первой версии нужен истории — сборщик мусора его не убирает
+        self.assertEqual(storage.collect_garbage(), 0)
+        self.assertEqual(storage.get_report_at("r1", 1).original_text, DEDUP_TEXT)
+
+    def test_background_compaction(self):
+        storage = self.open(segment_size=2048, compaction_interval=0.01, history=False)
+        for version in range(30):
+            storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=f"версия {version} " * 20))
+        deadline = time.monotonic() + 5
+        while len(self.segments()) > 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertLessEqual(len(self.segments()), 2)
+        self.assertEqual(storage.get_report("r1").original_text, "версия 29 " * 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+"""Тесты SqliteStorage."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта adapters
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from adapters.storage.sqlite_storage import SCHEMA_VERSION, SqliteStorage
+from domain.entities import Modality, Report, Template
+from domain.template_cache import TemplateCache
+from tests.adapters.storage.storage_contract import (
+    DEDUP_TEXT, DedupContract, HistoryContract, StorageContract,
+)
+
+
+class TestSqliteStorageContract(StorageContract, HistoryContract, DedupContract, unittest.TestCase):
+    """Общий контракт хранилища."""
+
+    def make_storage(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        return SqliteStorage(Path(self._tmp.name) / "reports.db", template_cache=TemplateCache())
+
+
+class TestSqliteStorage(unittest.TestCase):
+    """Особенности постоянного хранилища."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = Path(self._tmp.name) / "reports.db"
+
+    def open(self) -> SqliteStorage:
+        storage = SqliteStorage(self.path, template_cache=TemplateCache())
+        self.addCleanup(storage.close)
+        return storage
+
+    def test_wal_mode(self):
+        storage = self.open()
+        self.assertEqual(storage._conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_data_survives_reopen(self):
+        storage = self.open()
+        storage.save_report(Report(id="r1", modality=Modality.DENSITOMETRY, original_text="остеопения"))
+        storage.save_template(Template(name="Свой", modality=Modality.XRAY, replacements={"x": "y"}))
+        storage.delete_template("Формализованный")
+        storage.close()
+
+        reopened = self.open()
+        self.assertEqual(reopened.get_report("r1").original_text, "остеопения")
+        self.assertEqual(reopened.get_template("Свой").replacements, {"x": "y"})
+        # Шаблоны по умолчанию не пересоздаются в существующей базе
+        self.assertIsNone(reopened.get_template("Формализованный"))
+
+    def test_bulk_save_commits_per_chunk(self):
+        storage = self.open()
+        reports = [Report(id=str(i), modality=Modality.XRAY, original_text=f"текст {i}") for i in range(1000)]
+        storage.save_reports(reports, chunk_size=300)
+        self.assertEqual(len(storage.get_all_reports()), 1000)
+
+        def broken():
+            for i in range(5):
+                yield Report(id=f"ok{i}", modality=Modality.XRAY, original_text="a")
+            raise RuntimeError("сбой на середине пачки")
+
+        with self.assertRaises(RuntimeError):
+            storage.save_reports(broken(), chunk_size=3)
+        # Первая порция записана, незавершённая — нет
+        self.assertEqual([r is not None for r in storage.get_reports(f"ok{i}" for i in range(5))], [True] * 3 + [False] * 2)
+
+    def test_get_reports_spans_several_queries(self):
+        storage = self.open()
+        storage.GET_CHUNK_SIZE = 7
+        storage.save_reports(Report(id=f"r{i}", modality=Modality.XRAY, original_text=str(i)) for i in range(20))
+        ids = [f"r{i}" for i in reversed(range(25))]
+        self.assertEqual([r.id if r else None for r in storage.get_reports(ids)], [None] * 5 + ids[5:])
+
+    def test_new_database_gets_current_schema_version(self):
+        storage = self.open()
+        self.assertEqual(storage._conn.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+        storage.close()
+        reopened = self.open()
+        self.assertEqual(len(reopened.get_templates_by_modality(Modality.XRAY)), 2)
+
+    def test_unknown_schema_version_rejected(self):
+        storage = self.open()
+        with storage._conn:
+            storage._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        storage.close()
+        with self.assertRaises(ValueError):
+            self.open()
+
+    def test_version_read_from_nearest_keyframe(self):
+        storage = self.open()
+        storage.HISTORY_KEYFRAME_INTERVAL = 4
+        for i in range(10):
+            storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=f"правка {i} без изменений в остальном тексте"))
+        keyframes = [row[0] for row in storage._conn.execute(
+            "SELECT version FROM report_revisions WHERE report_id = 'r1' AND keyframe = 1 ORDER BY version"
+        )]
+        self.assertEqual(keyframes, [1, 5, 9])
+        self.assertEqual(storage.get_report_at("r1", 7).original_text, "правка 6 без изменений в остальном тексте")
+
+    def test_text_stored_compressed(self):
+        storage = self.open()
+        text = "В легких без видимых очагово-инфильтративных теней, корни структурны, легочный рисунок не изменен"
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=text, processed_text=text))
+        kind = storage._conn.execute("SELECT typeof(original_text) FROM reports WHERE id = 'r1'").fetchone()[0]
+        self.assertEqual(kind, "blob")
+        self.assertEqual(storage.get_report("r1").processed_text, text)
+        self.assertEqual([r.id for r in storage.search_reports("инфильтративных")], ["r1"])
+
+    def test_uncompressed_rows_and_old_dictionaries_readable(self):
+        storage = SqliteStorage(self.path, template_cache=TemplateCache(), compression=False)
+        storage.save_report(Report(id="plain", modality=Modality.XRAY, original_text="синусы свободны " * 5))
+        storage.close()
+
+        storage = self.open()
+        storage.save_report(Report(id="v1", modality=Modality.XRAY, original_text="корни структурны " * 5))
+        self.assertEqual(storage.rebuild_compression_dictionary(), 2)
+        storage.save_report(Report(id="v2", modality=Modality.XRAY, original_text="корни структурны " * 6))
+        storage.close()
+
+        reopened = self.open()
+        texts = [r.original_text for r in reopened.get_reports(["plain", "v1", "v2"])]
+        self.assertEqual(texts, ["синусы свободны " * 5, "корни структурны " * 5, "корни структурны " * 6])
+
+    def test_identical_texts_share_one_row(self):
+        storage = self.open()
+        versions = [DEDUP_TEXT, DEDUP_TEXT + " Заключение: норма.", DEDUP_TEXT + " Заключение: без патологии."]
+        for text in versions:
+            storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=text))
+        storage.save_report(Report(id="r2", modality=Modality.XRAY, original_text=versions[-1]))
+        length = storage._conn.execute("SELECT length(original_text) FROM reports WHERE id = 'r2'").fetchone()[0]
+        self.assertEqual(length, 21)
+        self.assertEqual(storage._conn.execute("SELECT COUNT(*) FROM text_blobs").fetchone()[0], 3)
+        # Вторая версия — дельта в истории; ссылок на её полный текст больше нет
+        self.assertEqual(storage.collect_garbage(), 1)
+        self.assertEqual([r.original_text for r in storage.get_report_history("r1")], versions)
+        self.assertEqual(storage.dedup_stats().blobs, 2)
+
+    def test_deduplication_off_keeps_texts_inline(self):
+        storage = SqliteStorage(self.path, template_cache=TemplateCache(), deduplication=False)
+        self.addCleanup(storage.close)
+        storage.save_report(Report(id="r1", modality=Modality.XRAY, original_text=DEDUP_TEXT))
+        self.assertEqual(storage._conn.execute("SELECT COUNT(*) FROM text_blobs").fetchone()[0], 0)
+        self.assertEqual(storage.dedup_stats().references, 0)
+        self.assertEqual(storage.get_report("r1").original_text, DEDUP_TEXT)
+
+    def test_modality_filter_uses_index(self):
+        storage = self.open()
+        plan = storage._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM reports WHERE modality = ?", ("xray",)
+        ).fetchall()
+        self.assertIn("idx_reports_modality_id", " ".join(str(row) for row in plan))
+
+    def test_pages_use_key_order_without_sorting(self):
+        storage = self.open()
+        for sql, params in (
+            ("SELECT * FROM reports WHERE id > ? ORDER BY id LIMIT ?", ("a", 10)),
+            ("SELECT * FROM reports WHERE modality = ? AND id > ? ORDER BY id LIMIT ?", ("xray", "a", 10)),
+        ):
+            plan = " ".join(str(row) for row in storage._conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
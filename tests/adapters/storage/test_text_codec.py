@@ -0,0 +1,59 @@
+"""Тесты сжатия текста со словарём."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта adapters
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from adapters.storage.text_codec import TextCodec, build_dictionary, plugin_seed_texts
+
+XRAY_DEFAULT = (
+    "В легких без видимых очагово-инфильтративных теней, корни структурны, легочный рисунок не изменен, "
+    "синусы свободны, средостение и диафрагма без особенностей"
+)
+
+
+class TestTextCodec(unittest.TestCase):
+    """Кодирование, версии словаря и построение словаря."""
+
+    def setUp(self):
+        self.codec = TextCodec()
+        self.codec.add_dictionary(1, build_dictionary(plugin_seed_texts()))
+
+    def test_seed_texts_come_from_plugins(self):
+        self.assertIn(XRAY_DEFAULT, plugin_seed_texts())
+
+    def test_roundtrip_and_ratio(self):
+        text = f"{XRAY_DEFAULT}. Без видимой патологии в легких."
+        encoded = self.codec.encode(text)
+        self.assertIsInstance(encoded, bytes)
+        self.assertLess(len(encoded) * 4, len(text.encode("utf-8")))
+        self.assertEqual(self.codec.decode(encoded), text)
+
+    def test_short_and_empty_text_kept_as_is(self):
+        for text in ("", "норма", None):
+            self.assertEqual(self.codec.encode(text), text)
+            self.assertEqual(self.codec.decode(text), text)
+
+    def test_old_versions_still_decode(self):
+        old = self.codec.encode(XRAY_DEFAULT)
+        self.codec.add_dictionary(2, build_dictionary(["совсем другой текст заключения. " * 10]))
+        self.assertEqual(self.codec.version, 2)
+        self.assertEqual(self.codec.decode(old), XRAY_DEFAULT)
+        self.assertEqual(self.codec.decode(self.codec.encode(XRAY_DEFAULT)), XRAY_DEFAULT)
+        with self.assertRaises(ValueError):
+            TextCodec().decode(old)
+
+    def test_dictionary_bounded_and_best_fragment_last(self):
+        samples = ["Частая фраза заключения. Редкая фраза номер {}.".format(i) for i in range(50)]
+        dictionary = build_dictionary(samples, size=200)
+        self.assertLessEqual(len(dictionary), 200)
+        self.assertTrue(dictionary.endswith("Частая фраза заключения. ".encode("utf-8")))
+
+
+if __name__ == "__main__":
+    unittest.main()
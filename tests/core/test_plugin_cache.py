@@ -0,0 +1,147 @@
+"""Тесты кэша поиска плагинов."""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Корень проекта в path для импорта core
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core import plugin_loader
+from core.plugin_cache import CACHE_FILE_NAME, PluginDiscoveryCache
+from core.plugin_loader import LazyPlugin, discover_plugins
+from tests.core.test_plugin_loader import PLUGIN_SOURCE
+
+
+class TestPluginDiscoveryCache(unittest.TestCase):
+    """Повторный поиск по кэшу и перепроверка изменённых плагинов."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        root = Path(self._tmp.name)
+        self.plugins_dir = root / "plugins"
+        self.plugins_dir.mkdir()
+        self.cache_path = root / "cache" / CACHE_FILE_NAME
+
+    def make_plugin(self, dirname, name, manifest=True, source=None):
+        plugin_dir = self.plugins_dir / dirname
+        plugin_dir.mkdir()
+        (plugin_dir / "plugin.py").write_text(source or PLUGIN_SOURCE.format(name=name), encoding="utf-8")
+        if manifest:
+            self.write_manifest(dirname, name)
+        self.addCleanup(sys.modules.pop, f"plugin_{dirname}", None)
+        return plugin_dir
+
+    def write_manifest(self, dirname, name):
+        path = self.plugins_dir / dirname / "plugin.json"
+        path.write_text(json.dumps({"name": name, "modality": "xray"}, ensure_ascii=False), encoding="utf-8")
+        # Время изменения — вперёд, чтобы перезапись была видна и на ФС с грубым mtime
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def discover(self):
+        return discover_plugins(self.plugins_dir, cache=PluginDiscoveryCache(self.cache_path))
+
+    def test_unchanged_plugins_come_from_cache(self):
+        self.make_plugin("cache_a", "Первый")
+        self.make_plugin("cache_b", "Второй")
+        (self.plugins_dir / "not_a_plugin").mkdir()
+        names = [p.get_name() for p in self.discover()[0]]
+        self.assertTrue(self.cache_path.exists())
+
+        with mock.patch.object(plugin_loader, "read_manifest", side_effect=AssertionError("манифест перечитан")), \
+                mock.patch.object(Path, "iterdir", side_effect=AssertionError("plugins/ перечитана")):
+            plugins, report = self.discover()
+        self.assertEqual([p.get_name() for p in plugins], names)
+        self.assertTrue(all(r.cached for r in report.results))
+        self.assertEqual([r.directory for r in report.results], ["cache_a", "cache_b"])
+        self.assertIn("(кэш)", report.format())
+
+    def test_changed_manifest_revalidated(self):
+        self.make_plugin("changed", "Старое имя")
+        self.discover()
+        self.write_manifest("changed", "Новое имя")
+        plugins, report = self.discover()
+        self.assertEqual(plugins[0].get_name(), "Новое имя")
+        self.assertFalse(report.get("changed").cached)
+        self.assertEqual(self.discover()[0][0].get_name(), "Новое имя")
+
+    def test_added_and_removed_plugins(self):
+        self.make_plugin("keep", "Остаётся")
+        gone = self.make_plugin("gone", "Удалённый")
+        self.discover()
+        for path in gone.iterdir():
+            path.unlink()
+        gone.rmdir()
+        self.make_plugin("added", "Новый")
+        self.assertEqual(sorted(p.get_name() for p in self.discover()[0]), ["Новый", "Остаётся"])
+        cached = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        self.assertEqual(sorted(cached["plugins"]), ["added", "keep"])
+
+    def test_plugin_without_manifest_lazy_after_first_import(self):
+        self.make_plugin("legacy", "Старый", manifest=False)
+        first = self.discover()[0][0]
+        self.assertNotIsInstance(first, LazyPlugin)
+        sys.modules.pop("plugin_legacy", None)
+
+        second = self.discover()[0][0]
+        self.assertIsInstance(second, LazyPlugin)
+        self.assertEqual(second.get_name(), "Старый")
+        self.assertNotIn("plugin_legacy", sys.modules)
+        self.assertEqual(second.create_widget()[:2], ("виджет", "Старый"))
+
+    def test_validated_class_recorded(self):
+        self.make_plugin("validated", "Проверенный")
+        plugin = self.discover()[0][0]
+        entry = json.loads(self.cache_path.read_text(encoding="utf-8"))["plugins"]["validated"]
+        self.assertIsNone(entry["class_name"])
+        plugin.load()
+        entry = json.loads(self.cache_path.read_text(encoding="utf-8"))["plugins"]["validated"]
+        self.assertEqual(entry["class_name"], "Plugin")
+        self.assertEqual(entry["manifest"]["name"], "Проверенный")
+
+    def test_failed_plugin_not_cached(self):
+        self.make_plugin("good", "Рабочий")
+        bad = self.plugins_dir / "bad"
+        bad.mkdir()
+        (bad / "plugin.json").write_text("{не json", encoding="utf-8")
+        self.discover()
+        self.assertNotIn("bad", json.loads(self.cache_path.read_text(encoding="utf-8"))["plugins"])
+        self.assertEqual(self.discover()[1].get("bad").status, plugin_loader.STATUS_FAILED)
+
+    def test_unreadable_or_foreign_cache_ignored(self):
+        self.make_plugin("fresh", "Плагин")
+        self.cache_path.parent.mkdir(parents=True)
+        for content in ("{испорчен", json.dumps({"version": 999, "plugins": {}})):
+            self.cache_path.write_text(content, encoding="utf-8")
+            plugins, report = self.discover()
+            self.assertEqual([p.get_name() for p in plugins], ["Плагин"])
+            self.assertFalse(report.get("fresh").cached)
+
+
+    def test_timed_out_plugin_not_cached_after_it_finishes(self):
+        self.make_plugin("fast", "Быстрый")
+        self.make_plugin("slow", "Зависший", manifest=False,
+                         source="import time\ntime.sleep(0.6)\n" + PLUGIN_SOURCE.format(name="Зависший"))
+        cache = PluginDiscoveryCache(self.cache_path)
+        plugins, report = discover_plugins(self.plugins_dir, timeout=0.2, cache=cache)
+        self.assertEqual([p.get_name() for p in plugins], ["Быстрый"])
+        self.assertEqual(report.get("slow").status, plugin_loader.STATUS_TIMEOUT)
+        # Зависший поток заканчивает импорт уже после поиска — его результат в кэш не попадает
+        time.sleep(0.8)
+        cache.save()
+        self.assertIsNone(cache.lookup(self.plugins_dir / "slow"))
+        saved = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        self.assertEqual(sorted(saved["plugins"]), ["fast"])
+
+
+if __name__ == "__main__":
+    unittest.main()
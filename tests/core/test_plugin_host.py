@@ -0,0 +1,198 @@
+"""Тесты движка в отдельном процессе: протокол, ошибки, таймауты и перезапуск."""
+
+import json
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта core
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.plugin_base import ReportText
+from core.plugin_host import EngineHost, PluginHostError, PluginHostTimeout
+from core.plugin_loader import LazyPlugin, read_manifest
+
+ENGINE_SOURCE = textwrap.dedent('''
+    import os
+    import time
+    from core.plugin_base import ReportEngine, ReportText
+
+    class Engine(ReportEngine):
+        def __init__(self):
+            self.started_pid = os.getpid()
+            self.loads = 1
+            print("в stdout движка — не в протокол")
+
+        def reload_data(self):
+            self.loads += 1
+
+        def get_modality(self):
+            return "xray"
+
+        def build_report(self, params):
+            if "text" not in params:
+                raise ValueError("нет текста")
+            return ReportText(params["text"], str(self.started_pid))
+
+        def sleep(self, seconds):
+            time.sleep(seconds)
+            return seconds
+
+        def crash(self):
+            os._exit(3)
+
+        def fail(self):
+            raise KeyError("ключ")
+
+        def unpicklable(self):
+            return lambda: None
+''')
+
+PLUGIN_SOURCE = textwrap.dedent('''
+    from core.plugin_base import ModalityPlugin
+
+    class Plugin(ModalityPlugin):
+        def __init__(self, engine=None):
+            self.engine = engine
+
+        def get_name(self):
+            return "Хост"
+
+        def get_description(self):
+            return ""
+
+        def get_engine(self):
+            return self.engine
+
+        def create_widget(self, on_report_generated=None):
+            return None
+''')
+
+
+class TestEngineHost(unittest.TestCase):
+    """Запросы к движку в дочернем процессе."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.engine_path = Path(self._tmp.name) / "engine.py"
+        self.engine_path.write_text(ENGINE_SOURCE, encoding="utf-8")
+        self.host = self.make_host()
+
+    def make_host(self, **kwargs):
+        host = EngineHost(self.engine_path, "plugins.host_demo.engine", **kwargs)
+        self.addCleanup(host.close)
+        return host
+
+    def test_report_built_in_child_process(self):
+        report = self.host.build_report({"text": "описание"})
+        self.assertIsInstance(report, ReportText)
+        self.assertEqual(report.description, "описание")
+        self.assertNotEqual(int(report.conclusion), os.getpid())
+        self.assertEqual(self.host.pid, int(report.conclusion))
+        self.assertEqual(self.host.get_modality(), "xray")
+        self.assertEqual(self.host.split_report(" текст "), ("текст", ""))
+
+    def test_engine_specific_methods_and_attributes(self):
+        self.assertEqual(self.host.sleep(0), 0)
+        self.assertEqual(self.host.started_pid, self.host.pid)
+        with self.assertRaises(AttributeError):
+            self.host.missing
+
+    def test_attributes_cached_until_reload_data(self):
+        self.assertEqual((self.host.loads, self.host.get_modality()), (1, "xray"))
+        self.assertEqual(self.host.stats.requests, 0)
+        self.host.reload_data()
+        self.assertEqual(self.host.loads, 2)
+        requests = self.host.stats.requests
+        self.assertEqual(self.host.loads, 2)
+        self.assertEqual(self.host.stats.requests, requests)
+
+    def test_errors_cross_process_boundary(self):
+        with self.assertRaisesRegex(ValueError, "нет текста"):
+            self.host.build_report({})
+        with self.assertRaisesRegex(PluginHostError, "KeyError"):
+            self.host.fail()
+        with self.assertRaises(PluginHostError):
+            self.host.unpicklable()
+        self.assertEqual(self.host.build_report({"text": "ок"}).description, "ок")
+        self.assertEqual(self.host.stats.crashes, 0)
+
+    def test_timeout_kills_hung_process_and_next_request_restarts(self):
+        host = self.make_host(timeout=0.3)
+        first_pid = int(host.build_report({"text": ""}).conclusion)
+        with self.assertRaises(PluginHostTimeout):
+            host.sleep(30)
+        self.assertFalse(host.running)
+        self.assertNotEqual(int(host.build_report({"text": ""}).conclusion), first_pid)
+        self.assertEqual((host.stats.timeouts, host.stats.restarts), (1, 1))
+
+    def test_crash_restarts_process(self):
+        with self.assertRaisesRegex(PluginHostError, "завершился"):
+            self.host.crash()
+        self.assertEqual(self.host.stats.crashes, 2)  # запрос повторяется один раз
+        self.assertEqual(self.host.build_report({"text": "после"}).description, "после")
+
+    def test_budget_and_async_call(self):
+        host = self.make_host(latency_budget=0.05)
+        self.assertEqual(host.call_async("sleep", 0.1).result(timeout=10), 0.1)
+        self.assertEqual(host.stats.over_budget, 1)
+        self.assertGreaterEqual(host.stats.max_latency, 0.1)
+
+    def test_engine_failing_at_import_stops_restarting(self):
+        self.engine_path.write_text("raise RuntimeError('сломан')\n", encoding="utf-8")
+        host = self.make_host(max_restarts=2)
+        for _ in range(2):
+            with self.assertRaisesRegex(PluginHostError, "не запустился"):
+                host.start()
+        with self.assertRaisesRegex(PluginHostError, "падает при запуске"):
+            host.start()
+        self.engine_path.write_text(ENGINE_SOURCE, encoding="utf-8")
+        host.restart()
+        self.assertEqual(host.get_modality(), "xray")
+
+
+class TestLazyPluginEngineHost(unittest.TestCase):
+    """engine_host: "process" в манифесте — виджет получает прокси движка."""
+
+    def test_manifest_selects_process_host(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            plugin_dir = Path(tmp) / "host_demo"
+            plugin_dir.mkdir()
+            (plugin_dir / "engine.py").write_text(ENGINE_SOURCE, encoding="utf-8")
+            (plugin_dir / "plugin.py").write_text(PLUGIN_SOURCE, encoding="utf-8")
+            manifest = {"name": "Хост", "engine_host": "process"}
+            (plugin_dir / "plugin.json").write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+            self.addCleanup(sys.modules.pop, "plugin_host_demo", None)
+
+            plugin = LazyPlugin(read_manifest(plugin_dir))
+            self.addCleanup(plugin.close)
+            plugin.load()
+            engine = plugin.get_engine()
+            self.assertIsInstance(engine, EngineHost)
+            self.assertNotEqual(int(engine.build_report({"text": ""}).conclusion), os.getpid())
+            plugin.close()
+            self.assertFalse(engine.running)
+
+    def test_invalid_engine_host_rejected(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "plugin.json").write_text(json.dumps({"name": "x", "engine_host": "thread"}), encoding="utf-8")
+            with self.assertRaisesRegex(ValueError, "engine_host"):
+                read_manifest(Path(tmp))
+
+    def test_project_engine_same_report_in_process(self):
+        from plugins.mammography.engine import MammographyEngine
+        host = EngineHost(project_root / "plugins" / "mammography" / "engine.py", "plugins.mammography.engine")
+        self.addCleanup(host.close)
+        params = {"density": "C", "pathology": "локальная_асимметрия", "side": "левая"}
+        self.assertEqual(host.build_report(params), MammographyEngine().build_report(params))
+        self.assertEqual(host.pathologies, MammographyEngine().pathologies)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""Тесты поиска плагинов по манифестам и отложенной загрузки."""
+
+import json
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта core
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.plugin_loader import (
+    STATUS_FAILED, STATUS_FOUND, STATUS_LOADED, STATUS_TIMEOUT, LazyPlugin, discover_plugins, read_manifest,
+)
+
+PLUGIN_SOURCE = textwrap.dedent('''
+    from core.plugin_base import ModalityPlugin
+
+    class Plugin(ModalityPlugin):
+        def get_name(self):
+            return {name!r}
+
+        def get_description(self):
+            return "из модуля"
+
+        def create_widget(self, on_report_generated=None):
+            return ("виджет", {name!r}, on_report_generated)
+
+        def get_conclusion_text(self):
+            return "заключение"
+''')
+
+
+class TestPluginLoader(unittest.TestCase):
+    """Манифесты, порядок и импорт при первом обращении."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.plugins_dir = Path(self._tmp.name)
+
+    def make_plugin(self, dirname, name, manifest=True, order=None, source=None):
+        plugin_dir = self.plugins_dir / dirname
+        plugin_dir.mkdir()
+        (plugin_dir / "plugin.py").write_text(source or PLUGIN_SOURCE.format(name=name), encoding="utf-8")
+        if manifest:
+            data = {"name": name, "description": f"описание {name}", "modality": "xray"}
+            if order is not None:
+                data["order"] = order
+            (plugin_dir / "plugin.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        self.addCleanup(sys.modules.pop, f"plugin_{dirname}", None)
+        return plugin_dir
+
+    def test_buttons_from_manifest_without_import(self):
+        self.make_plugin("lazy_a", "Первый")
+        plugin = discover_plugins(self.plugins_dir)[0][0]
+        self.assertIsInstance(plugin, LazyPlugin)
+        self.assertEqual((plugin.get_name(), plugin.get_description(), plugin.get_modality()),
+                         ("Первый", "описание Первый", "xray"))
+        self.assertEqual(plugin.get_conclusion_text(), "")
+        self.assertFalse(plugin.loaded)
+        self.assertNotIn("plugin_lazy_a", sys.modules)
+
+        callback = object()
+        self.assertEqual(plugin.create_widget(on_report_generated=callback), ("виджет", "Первый", callback))
+        self.assertTrue(plugin.loaded)
+        self.assertIn("plugin_lazy_a", sys.modules)
+        self.assertIs(plugin.load(), plugin.load())
+        self.assertEqual(plugin.get_conclusion_text(), "заключение")
+
+    def test_order_from_manifest_then_directory_name(self):
+        self.make_plugin("order_c", "В", order=5)
+        self.make_plugin("order_b", "Б")
+        self.make_plugin("order_a", "А")
+        self.make_plugin("order_z", "Первый", order=0)
+        names = [plugin.get_name() for plugin in discover_plugins(self.plugins_dir)[0]]
+        self.assertEqual(names, ["Первый", "В", "А", "Б"])
+
+    def test_plugin_without_manifest_loaded_eagerly(self):
+        self.make_plugin("legacy_plugin", "Старый", manifest=False)
+        plugin = discover_plugins(self.plugins_dir)[0][0]
+        self.assertNotIsInstance(plugin, LazyPlugin)
+        self.assertEqual(plugin.get_name(), "Старый")
+
+    def test_broken_plugins_skipped(self):
+        self.make_plugin("broken_ok", "Рабочий")
+        bad = self.plugins_dir / "broken_manifest"
+        bad.mkdir()
+        (bad / "plugin.json").write_text("{не json", encoding="utf-8")
+        (self.plugins_dir / "broken_entry").mkdir()
+        (self.plugins_dir / "broken_entry" / "plugin.json").write_text('{"name": "Без кода"}', encoding="utf-8")
+        self.assertEqual([p.get_name() for p in discover_plugins(self.plugins_dir)[0]], ["Рабочий"])
+
+    def test_import_error_raised_on_first_use(self):
+        self.make_plugin("broken_import", "Сломанный", source="raise RuntimeError('нет зависимости')\n")
+        plugin = discover_plugins(self.plugins_dir)[0][0]
+        with self.assertRaises(RuntimeError):
+            plugin.create_widget()
+        self.assertFalse(plugin.loaded)
+
+    def test_load_report(self):
+        self.make_plugin("report_lazy", "Ленивый")
+        self.make_plugin("report_legacy", "Старый", manifest=False)
+        self.make_plugin("report_broken", "Сломанный", source="raise RuntimeError('нет зависимости')\n")
+        plugins, report = discover_plugins(self.plugins_dir)
+        self.assertEqual([r.status for r in report.results], [STATUS_FOUND, STATUS_FOUND, STATUS_LOADED])
+        self.assertEqual(report.get("report_legacy").name, "Старый")
+        self.assertIsNone(report.get("report_lazy").import_seconds)
+
+        plugins[1].load()
+        self.assertEqual(report.get("report_lazy").status, STATUS_LOADED)
+        self.assertGreater(report.get("report_lazy").import_seconds, 0)
+        with self.assertRaises(RuntimeError):
+            plugins[0].load()
+        failed = report.failures()
+        self.assertEqual([r.directory for r in failed], ["report_broken"])
+        self.assertEqual(failed[0].status, STATUS_FAILED)
+        self.assertIn("нет зависимости", failed[0].error)
+        self.assertIn("report_broken", report.format())
+
+    def test_hanging_plugin_times_out_without_blocking_others(self):
+        slow = "import time\ntime.sleep(3)\n" + PLUGIN_SOURCE.format(name="Зависший")
+        self.make_plugin("hang_a", "Зависший", manifest=False, source=slow)
+        self.make_plugin("hang_b", "Старый", manifest=False)
+        self.make_plugin("hang_c", "Первый", order=0)
+        started = time.perf_counter()
+        plugins, report = discover_plugins(self.plugins_dir, max_workers=2, timeout=0.3)
+        self.assertLess(time.perf_counter() - started, 2)
+        self.assertEqual([p.get_name() for p in plugins], ["Первый", "Старый"])
+        self.assertEqual(report.get("hang_a").status, STATUS_TIMEOUT)
+
+    def test_plugins_imported_concurrently(self):
+        for name in ("slow_a", "slow_b", "slow_c"):
+            self.make_plugin(name, name, manifest=False, source="import time\ntime.sleep(0.3)\n" + PLUGIN_SOURCE.format(name=name))
+        started = time.perf_counter()
+        plugins, _ = discover_plugins(self.plugins_dir, max_workers=3)
+        self.assertLess(time.perf_counter() - started, 0.8)
+        self.assertEqual([p.get_name() for p in plugins], ["slow_a", "slow_b", "slow_c"])
+
+    def test_project_plugins_have_manifests(self):
+        plugins_dir = project_root / "plugins"
+        manifests = [read_manifest(d) for d in sorted(plugins_dir.iterdir()) if (d / "plugin.py").exists()]
+        self.assertEqual(len(manifests), 3)
+        self.assertEqual(min(manifests, key=lambda m: m.order).directory.name, "xray_constructor")
+        self.assertEqual({m.modality for m in manifests}, {"xray", "mammography", "densitometry"})
+
+
+if __name__ == "__main__":
+    unittest.main()
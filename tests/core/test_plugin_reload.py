@@ -0,0 +1,158 @@
+"""Тесты горячей перезагрузки плагинов: вид изменения и LazyPlugin.reload."""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта core
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.plugin_loader import LazyPlugin, read_manifest
+from core.plugin_reload import (
+    CHANGE_CODE, CHANGE_DATA, CHANGE_MANIFEST, classify_changes, purge_plugin_modules, snapshot,
+)
+
+# Плагин с движком, который читает data.json; VERSION меняется между «правками кода»
+RELOAD_SOURCE = '''
+import json
+from pathlib import Path
+from core.plugin_base import ModalityPlugin, ReportEngine, ReportText
+
+VERSION = "@VERSION@"
+
+
+class Engine(ReportEngine):
+    def __init__(self):
+        self.reload_data()
+
+    def reload_data(self):
+        self.data = json.loads((Path(__file__).parent / "data.json").read_text(encoding="utf-8"))
+
+    def get_modality(self):
+        return "xray"
+
+    def build_report(self, params):
+        return ReportText(self.data["text"], VERSION)
+
+
+class Plugin(ModalityPlugin):
+    def __init__(self):
+        self.engine = Engine()
+
+    def get_name(self):
+        return "из модуля"
+
+    def get_description(self):
+        return ""
+
+    def get_engine(self):
+        return self.engine
+
+    def create_widget(self, on_report_generated=None):
+        return None
+'''
+
+
+class TestClassifyChanges(unittest.TestCase):
+    """Снимок папки и вид изменения по именам файлов."""
+
+    def test_heaviest_kind_wins(self):
+        before = {"plugin.py": [1, 10], "plugin.json": [1, 5], "data.json": [1, 7]}
+        self.assertIsNone(classify_changes(before, dict(before)))
+        self.assertEqual(classify_changes(before, {**before, "data.json": [2, 7]}), CHANGE_DATA)
+        self.assertEqual(classify_changes(before, {**before, "data.json": [2, 7], "plugin.json": [2, 6]}),
+                         CHANGE_MANIFEST)
+        self.assertEqual(classify_changes(before, {**before, "data.json": [2, 7], "plugin.py": [2, 11]}), CHANGE_CODE)
+        self.assertEqual(classify_changes(before, {**before, "engine.py": [1, 3]}), CHANGE_CODE)
+
+    def test_snapshot_skips_editor_and_bytecode_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            plugin_dir = Path(tmp)
+            for name in ("plugin.py", "data.json", ".plugin.py.swp", "data.json~", "x.tmp"):
+                (plugin_dir / name).write_text("1", encoding="utf-8")
+            (plugin_dir / "__pycache__").mkdir()
+            self.assertEqual(sorted(snapshot(plugin_dir)), ["data.json", "plugin.py"])
+
+
+class TestLazyPluginReload(unittest.TestCase):
+    """Перечитывание данных, манифеста и кода; откат при ошибке в новом коде."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.plugin_dir = Path(self._tmp.name) / "reload_demo"
+        self.plugin_dir.mkdir()
+        self.write_code("v1")
+        self.write_data("первый")
+        self.write_manifest("Демо")
+        self.addCleanup(sys.modules.pop, "plugin_reload_demo", None)
+        self.plugin = LazyPlugin(read_manifest(self.plugin_dir))
+
+    def write_code(self, version):
+        (self.plugin_dir / "plugin.py").write_text(RELOAD_SOURCE.replace("@VERSION@", version), encoding="utf-8")
+
+    def write_data(self, text):
+        (self.plugin_dir / "data.json").write_text(json.dumps({"text": text}, ensure_ascii=False), encoding="utf-8")
+
+    def write_manifest(self, name):
+        data = {"name": name, "description": "", "modality": "xray"}
+        (self.plugin_dir / "plugin.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    def report(self):
+        return tuple(self.plugin.get_engine().build_report({}))
+
+    def test_data_reload_keeps_plugin_instance(self):
+        loaded = self.plugin.load()
+        self.write_data("второй")
+        self.plugin.reload(CHANGE_DATA)
+        self.assertIs(self.plugin.load(), loaded)
+        self.assertEqual(self.report(), ("второй", "v1"))
+
+    def test_code_reload_creates_new_plugin(self):
+        loaded = self.plugin.load()
+        self.write_code("v22")  # другой размер — .pyc из __pycache__ не подойдёт
+        self.plugin.reload(CHANGE_CODE)
+        self.assertIsNot(self.plugin.load(), loaded)
+        self.assertEqual(self.report(), ("первый", "v22"))
+
+    def test_manifest_reload_renames_button_without_import(self):
+        self.write_manifest("Новое имя")
+        self.plugin.reload(CHANGE_MANIFEST)
+        self.assertEqual(self.plugin.get_name(), "Новое имя")
+        self.assertFalse(self.plugin.loaded)
+
+    def test_broken_code_keeps_previous_version(self):
+        self.plugin.load()
+        module = sys.modules["plugin_reload_demo"]
+        (self.plugin_dir / "plugin.py").write_text("def broken(:\n", encoding="utf-8")
+        with self.assertRaises(SyntaxError):
+            self.plugin.reload(CHANGE_CODE)
+        self.assertIs(sys.modules["plugin_reload_demo"], module)
+        self.assertEqual(self.report(), ("первый", "v1"))
+
+    def test_not_loaded_plugin_loads_new_code_on_first_use(self):
+        self.plugin.load()
+        self.plugin._plugin = None
+        self.write_code("v333")
+        self.plugin.reload(CHANGE_CODE)
+        self.assertFalse(self.plugin.loaded)
+        self.plugin.load()
+        self.assertEqual(self.report(), ("первый", "v333"))
+
+    def test_purge_removes_plugin_package_modules(self):
+        sentinel = object()
+        names = ["plugins.reload_demo", "plugins.reload_demo.engine", "plugin_reload_demo", "plugins.reload_demo_x"]
+        for name in names:
+            sys.modules.setdefault(name, sentinel)
+            self.addCleanup(sys.modules.pop, name, None)
+        purged = purge_plugin_modules("reload_demo", "plugin_reload_demo")
+        self.assertEqual(sorted(purged), sorted(names[:3]))
+        self.assertIn("plugins.reload_demo_x", sys.modules)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""Тесты статистики открытия плагинов."""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта core
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.plugin_usage import PluginUsageStats
+
+
+class TestPluginUsageStats(unittest.TestCase):
+    """Порядок по числу открытий и сохранение между запусками."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = Path(self._tmp.name) / "data" / "plugin_usage.json"
+
+    def test_ranked_by_opens_then_original_order(self):
+        usage = PluginUsageStats(self.path)
+        for key in ("mammography", "densitometry", "mammography"):
+            usage.record(key)
+        self.assertEqual(usage.ranked(["xray", "densitometry", "mammography", "new"]),
+                         ["mammography", "densitometry", "xray", "new"])
+
+    def test_saved_between_sessions(self):
+        usage = PluginUsageStats(self.path)
+        usage.record("xray")
+        usage.save()
+        again = PluginUsageStats(self.path)
+        self.assertEqual(again.opens, {"xray": 1})
+        again.record("xray")
+        again.save()
+        self.assertEqual(PluginUsageStats(self.path).opens, {"xray": 2})
+
+    def test_unreadable_file_ignored(self):
+        self.path.parent.mkdir(parents=True)
+        for content in ("не json", json.dumps({"version": 99, "opens": {"xray": 5}}), json.dumps({"version": 1})):
+            self.path.write_text(content, encoding="utf-8")
+            self.assertEqual(PluginUsageStats(self.path).opens, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Тесты профиля запуска (--profile-startup)."""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта core
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.startup_profiler import DEFAULT_TRACE_PATH, StartupProfiler
+
+
+class TestStartupProfiler(unittest.TestCase):
+    """Этапы, таблица, Chrome trace и замер импортов."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.profilers = []
+
+    def tearDown(self):
+        for profiler in self.profilers:
+            if profiler.imports is not None:
+                profiler.imports.uninstall()
+        self.tmp.cleanup()
+
+    def _profiler(self, argv) -> StartupProfiler:
+        profiler = StartupProfiler.from_argv(argv)
+        self.profilers.append(profiler)
+        return profiler
+
+    def test_from_argv(self):
+        self.assertFalse(self._profiler(["main.py"]).enabled)
+        profiler = self._profiler(["main.py", "--profile-startup"])
+        self.assertTrue(profiler.enabled)
+        self.assertEqual(profiler.trace_path, Path(DEFAULT_TRACE_PATH))
+        trace = str(self.dir / "t.json")
+        self.assertEqual(self._profiler(["main.py", f"--profile-startup={trace}"]).trace_path, Path(trace))
+
+    def test_disabled_records_nothing(self):
+        profiler = self._profiler(["main.py"])
+        with profiler.phase("этап"):
+            pass
+        profiler.add_span("отрезок", 0.0, 1.0)
+        self.assertEqual(profiler.spans, [])
+        self.assertIsNone(profiler.imports)
+        self.assertNotIn(profiler.imports, sys.meta_path)
+        self.assertEqual(profiler.finish(), "")
+
+    def test_phases_sorted_by_duration(self):
+        profiler = self._profiler(["main.py", "--profile-startup"])
+        with profiler.phase("короткий"):
+            pass
+        with profiler.phase("длинный"):
+            time.sleep(0.02)
+        self.assertEqual([span.name for span in profiler.spans], ["короткий", "длинный"])
+        self.assertGreaterEqual(profiler.spans[1].duration, 0.02)
+        lines = profiler.format_report().splitlines()
+        rows = [line for line in lines if line.startswith(("короткий", "длинный"))]
+        self.assertEqual([row.split()[0] for row in rows], ["длинный", "короткий"])
+
+    def test_chrome_trace(self):
+        trace = self.dir / "trace.json"
+        profiler = self._profiler(["main.py", f"--profile-startup={trace}"])
+        with profiler.phase("главный поток"):
+            pass
+        worker = threading.Thread(target=lambda: profiler.add_span("в потоке", profiler.now(), 0.001, "plugin"))
+        worker.start()
+        worker.join()
+        profiler.finish()
+        self.assertNotIn(profiler.imports, sys.meta_path)
+
+        events = json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]
+        spans = {event["name"]: event for event in events if event["ph"] == "X" and event["cat"] != "import"}
+        self.assertEqual(spans["главный поток"]["tid"], 0)
+        self.assertNotEqual(spans["в потоке"]["tid"], 0)
+        self.assertEqual(spans["в потоке"]["dur"], 1000.0)
+        for event in spans.values():
+            self.assertIn("ts", event)
+            self.assertIn("pid", event)
+        thread_names = [event for event in events if event["ph"] == "M"]
+        self.assertEqual(len(thread_names), 2)
+
+    def test_import_timer(self):
+        package = self.dir / "profiled_pkg"
+        package.mkdir()
+        (package / "__init__.py").write_text("from . import heavy\n", encoding="utf-8")
+        (package / "heavy.py").write_text("import time\ntime.sleep(0.02)\n", encoding="utf-8")
+        sys.path.insert(0, str(self.dir))
+        try:
+            profiler = self._profiler(["main.py", "--profile-startup"])
+            with profiler.phase("импорт"):
+                import profiled_pkg
+        finally:
+            sys.path.remove(str(self.dir))
+            for name in ("profiled_pkg", "profiled_pkg.heavy"):
+                sys.modules.pop(name, None)
+
+        records = {record.module: record for record in profiler.imports.records}
+        package_record, heavy = records["profiled_pkg"], records["profiled_pkg.heavy"]
+        self.assertEqual((package_record.depth, heavy.depth), (0, 1))
+        self.assertGreaterEqual(heavy.self_seconds, 0.02)
+        self.assertGreaterEqual(package_record.cumulative_seconds, heavy.cumulative_seconds)
+        self.assertLess(package_record.self_seconds, 0.02)
+        self.assertEqual(profiler.heaviest_imports(1)[0].module, "profiled_pkg")
+        self.assertGreaterEqual(profiler.spans[0].import_seconds, 0.02)
+        # Обёртка exec_module снята с загрузчика после выполнения модуля
+        self.assertNotIn("exec_module", vars(profiled_pkg.__spec__.loader))
+
+
+if __name__ == "__main__":
+    unittest.main()
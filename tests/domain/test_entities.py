@@ -0,0 +1,90 @@
+"""Тесты доменных сущностей: __slots__, интернирование имён шаблонов, неизменяемые варианты."""
+
+import copy
+import dataclasses
+import pickle
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта domain
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from domain.entities import FrozenReport, FrozenTemplate, Modality, Report, Template
+
+
+class TestReport(unittest.TestCase):
+    """Report и FrozenReport."""
+
+    def test_no_instance_dict(self):
+        report = Report("r1", Modality.XRAY, "норма")
+        self.assertFalse(hasattr(report, "__dict__"))
+        with self.assertRaises(AttributeError):
+            report.comment = "лишнее поле"
+
+    def test_constructor_signature_unchanged(self):
+        positional = Report("r1", Modality.XRAY, "норма", "без патологии", "Стандартный")
+        keywords = Report(id="r1", modality=Modality.XRAY, original_text="норма",
+                          processed_text="без патологии", template_name="Стандартный")
+        self.assertEqual(positional, keywords)
+        self.assertIsNone(Report("r2", Modality.XRAY, "норма").template_name)
+
+    def test_template_name_interned(self):
+        first = Report("r1", Modality.XRAY, "норма", template_name="".join(["Станда", "ртный"]))
+        second = Report("r2", Modality.XRAY, "норма", template_name="".join(["Стан", "дартный"]))
+        self.assertIs(first.template_name, second.template_name)
+        self.assertIs(dataclasses.replace(first, id="r3").template_name, first.template_name)
+
+    def test_freeze_and_thaw(self):
+        report = Report("r1", Modality.XRAY, "норма", "без патологии", "Стандартный")
+        frozen = report.freeze()
+        self.assertIsInstance(frozen, FrozenReport)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            frozen.original_text = "правка"
+        self.assertEqual(len({frozen, report.freeze()}), 1)
+        self.assertEqual(frozen.thaw(), report)
+        self.assertIsNot(frozen.thaw(), report)
+
+    def test_frozen_report_hash_and_pickle(self):
+        frozen = FrozenReport("r1", Modality.XRAY, "норма", template_name="".join(["Станда", "ртный"]))
+        self.assertIs(frozen.template_name, Report("r2", Modality.XRAY, "", template_name="Стандартный").template_name)
+        self.assertNotEqual(hash(frozen), hash(dataclasses.replace(frozen, processed_text="без патологии")))
+        restored = pickle.loads(pickle.dumps(frozen))
+        self.assertEqual(restored, frozen)
+        self.assertEqual(hash(restored), hash(frozen))
+
+
+class TestTemplate(unittest.TestCase):
+    """Template и FrozenTemplate."""
+
+    def test_name_interned_and_slotted(self):
+        template = Template("".join(["Станда", "ртный"]), Modality.XRAY, {"норма": "без патологии"})
+        self.assertIs(template.name, Template("".join(["Стан", "дартный"]), Modality.XRAY, {}).name)
+        self.assertFalse(hasattr(template, "__dict__"))
+
+    def test_frozen_template_is_read_only_copy(self):
+        replacements = {"норма": "без патологии"}
+        frozen = Template("Свой", Modality.XRAY, replacements).freeze()
+        replacements["норма"] = "изменено"
+        self.assertEqual(frozen.replacements["норма"], "без патологии")
+        with self.assertRaises(TypeError):
+            frozen.replacements["новое"] = "значение"
+        self.assertEqual(frozen, FrozenTemplate("Свой", Modality.XRAY, {"норма": "без патологии"}))
+        self.assertEqual(hash(frozen), hash(FrozenTemplate("Свой", Modality.XRAY, {})))
+        thawed = frozen.thaw()
+        thawed.replacements["новое"] = "значение"
+        self.assertNotIn("новое", frozen.replacements)
+
+    def test_frozen_template_pickle_and_deepcopy(self):
+        frozen = FrozenTemplate("Свой", Modality.XRAY, {"норма": "без патологии"})
+        for restored in (pickle.loads(pickle.dumps(frozen)), copy.deepcopy(frozen)):
+            self.assertEqual(restored, frozen)
+            self.assertIs(restored.name, frozen.name)
+            with self.assertRaises(TypeError):
+                restored.replacements["новое"] = "значение"
+
+
+if __name__ == "__main__":
+    unittest.main()
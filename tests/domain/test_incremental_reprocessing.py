@@ -0,0 +1,99 @@
+"""Свойства инкрементальной переобработки: результат всегда равен полной переобработке."""
+
+import sys
+import random
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта domain
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from domain.entities import Modality, Report, Template
+from domain.replacement import ReplacementMatcher
+from domain.services import ReportService
+from domain.template_cache import TemplateCache
+
+
+def random_edit(rnd: random.Random, text: str, alphabet: str):
+    offset = rnd.randint(0, len(text))
+    removed = rnd.randint(0, min(len(text) - offset, 8))
+    inserted = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 8)))
+    return offset, removed, inserted
+
+
+class TestApplyEditProperties(unittest.TestCase):
+    """Случайные шаблоны, тексты и цепочки правок (фиксированные seed для воспроизводимости)."""
+
+    def assert_same_as_full(self, matcher, result):
+        full = matcher.replace_tracked(result.source)
+        self.assertEqual(result.output, full.output)
+        self.assertEqual(
+            (result.starts, result.ends, result.out_starts, result.out_ends),
+            (full.starts, full.ends, full.out_starts, full.out_ends),
+        )
+
+    def test_edit_chains_match_full_reprocess(self):
+        alphabet = "аб в"
+        for seed in range(300):
+            rnd = random.Random(seed)
+            keys = {
+                "".join(rnd.choice("аб ") for _ in range(rnd.randint(1, 6))): "x" * rnd.randint(0, 5)
+                for _ in range(rnd.randint(0, 10))
+            }
+            matcher = ReplacementMatcher(keys)
+            result = matcher.replace_tracked("".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 80))))
+            for _ in range(10):
+                with self.subTest(seed=seed, keys=keys, source=result.source):
+                    result = matcher.apply_edit(result, *random_edit(rnd, result.source, alphabet))
+                    self.assert_same_as_full(matcher, result)
+
+    def test_edit_creating_and_breaking_overlapping_keys(self):
+        matcher = ReplacementMatcher({"без изменений": "N", "без патологических изменений": "P"})
+        result = matcher.replace_tracked("Легкие без изменений. Сердце без изменений.")
+        result = matcher.apply_edit(result, len("Легкие без "), 0, "патологических ")
+        self.assertEqual(result.output, "Легкие P. Сердце N.")
+        result = matcher.apply_edit(result, len("Легкие бе"), 1, "")
+        self.assertEqual(result.output, "Легкие бе патологических изменений. Сердце N.")
+        self.assert_same_as_full(matcher, result)
+
+    def test_edit_out_of_bounds(self):
+        matcher = ReplacementMatcher({"а": "б"})
+        result = matcher.replace_tracked("ааа")
+        with self.assertRaises(ValueError):
+            matcher.apply_edit(result, 2, 5, "")
+
+
+class TestReportServiceReprocessEdit(unittest.TestCase):
+    """reprocess_edit обновляет отчёт так же, как полная обработка."""
+
+    def test_sequence_of_edits(self):
+        template = Template(
+            name="Стандартный",
+            modality=Modality.XRAY,
+            replacements={
+                "без патологических изменений": "без патологических изменений в легких",
+                "сердце в норме": "сердце без патологических изменений",
+                "без изменений": "без патологических изменений",
+            },
+        )
+        service = ReportService(template, template_cache=TemplateCache())
+        report = service.process_report(Report(id="1", modality=Modality.XRAY, original_text="сердце в норме, без изменений"))
+        rnd = random.Random(7)
+        for _ in range(50):
+            service.reprocess_edit(report, *random_edit(rnd, report.original_text, "серд внормабезиз"))
+            expected = ReportService(template, template_cache=TemplateCache()).process_report(
+                Report(id="x", modality=Modality.XRAY, original_text=report.original_text)
+            )
+            self.assertEqual(report.processed_text, expected.processed_text)
+            self.assertEqual(report.template_name, "Стандартный")
+
+    def test_edit_without_template(self):
+        report = Report(id="1", modality=Modality.XRAY, original_text="норма")
+        ReportService().reprocess_edit(report, 0, 0, "все ")
+        self.assertEqual((report.original_text, report.processed_text), ("все норма", "все норма"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Тесты пакетной обработки ReportService.process_reports."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта domain
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from domain.entities import Modality, Report, Template
+from domain.services import ReportService
+from domain.template_cache import TemplateCache
+
+
+def make_reports(n: int):
+    texts = ["сердце в норме", "без изменений", "легкие без особенностей, без изменений", "текст без ключей"]
+    return [Report(id=str(i), modality=Modality.XRAY, original_text=texts[i % len(texts)] + f" №{i}") for i in range(n)]
+
+
+class TestProcessReports(unittest.TestCase):
+    """Результаты совпадают с поштучной обработкой и идут в порядке входа."""
+
+    def setUp(self):
+        self.template = Template(
+            name="Стандартный",
+            modality=Modality.XRAY,
+            replacements={
+                "без патологических изменений": "без патологических изменений в легких",
+                "легкие без особенностей": "легкие без патологических изменений",
+                "сердце в норме": "сердце без патологических изменений",
+                "без изменений": "без патологических изменений",
+            },
+        )
+        self.service = ReportService(self.template, template_cache=TemplateCache())
+
+    def expected(self, n: int):
+        return [self.service.process_report(r).processed_text for r in make_reports(n)]
+
+    def test_sequential_matches_process_report(self):
+        results = list(self.service.process_reports(make_reports(10)))
+        self.assertEqual([r.processed_text for r in results], self.expected(10))
+
+    def test_process_pool_keeps_input_order(self):
+        reports = make_reports(103)
+        results = list(self.service.process_reports(iter(reports), workers=2, chunk_size=7))
+        self.assertEqual([r.id for r in results], [r.id for r in reports])
+        self.assertEqual([r.processed_text for r in results], self.expected(103))
+        self.assertTrue(all(r.template_name == "Стандартный" for r in results))
+
+    def test_without_template_copies_text(self):
+        results = list(ReportService().process_reports(make_reports(3), workers=2))
+        self.assertEqual([r.processed_text for r in results], [r.original_text for r in make_reports(3)])
+
+    def test_rejects_non_positive_sizes(self):
+        # Ошибка — при вызове, до чтения входа: иначе пустой результат молча терял бы заключения
+        for kwargs in ({"workers": 0}, {"workers": -1}, {"workers": 2, "chunk_size": 0}, {"chunk_size": -5}):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                self.service.process_reports(make_reports(3), **kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
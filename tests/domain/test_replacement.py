@@ -0,0 +1,149 @@
+"""Тесты однопроходной замены по шаблону и ReportService.process_report."""
+
+import io
+import sys
+import random
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта domain
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from domain.entities import Modality, Report, Template
+from domain.replacement import ReplacementMatcher
+from domain.services import ReportService
+
+
+def reference_replace(replacements: dict, text: str) -> str:
+    """Эталон: самое левое, затем самое длинное вхождение; результат не пересканируется."""
+    out = []
+    i = 0
+    while i < len(text):
+        best = None
+        for key in replacements:
+            if key and text.startswith(key, i) and (best is None or len(key) > len(best)):
+                best = key
+        if best:
+            out.append(replacements[best])
+            i += len(best)
+        else:
+            out.append(text[i])
+            i += 1
+    return "".join(out)
+
+
+class TestReplacementMatcher(unittest.TestCase):
+    """Приоритет ключей и эквивалентность эталонной реализации."""
+
+    def test_longest_key_wins_at_same_position(self):
+        matcher = ReplacementMatcher({
+            "без изменений": "без патологических изменений",
+            "без патологических изменений": "без патологических изменений в легких",
+        })
+        self.assertEqual(
+            matcher.replace("Сердце без изменений. Легкие без патологических изменений."),
+            "Сердце без патологических изменений. Легкие без патологических изменений в легких.",
+        )
+
+    def test_leftmost_match_wins_over_longer_overlapping(self):
+        matcher = ReplacementMatcher({"ab": "1", "bcd": "2"})
+        self.assertEqual(matcher.replace("abcd"), "1cd")
+
+    def test_replacement_is_not_rescanned(self):
+        matcher = ReplacementMatcher({"норма": "здоров", "здоров": "признаков патологии нет"})
+        self.assertEqual(matcher.replace("норма"), "здоров")
+
+    def test_empty_key_and_empty_template_are_ignored(self):
+        self.assertEqual(ReplacementMatcher({"": "x"}).replace("текст"), "текст")
+        self.assertEqual(ReplacementMatcher({}).replace("текст"), "текст")
+
+    def test_special_characters_are_literal(self):
+        matcher = ReplacementMatcher({"a.b": "1", "(c)": "2", "d*": "3"})
+        self.assertEqual(matcher.replace("axb a.b (c) c d* dd"), "axb 1 2 c 3 dd")
+
+    def test_matches_reference_on_random_inputs(self):
+        rnd = random.Random(1234)
+        for _ in range(500):
+            keys = {
+                "".join(rnd.choice("аб ") for _ in range(rnd.randint(1, 5))): str(i)
+                for i in range(rnd.randint(1, 8))
+            }
+            text = "".join(rnd.choice("аб в") for _ in range(rnd.randint(0, 60)))
+            with self.subTest(keys=keys, text=text):
+                self.assertEqual(ReplacementMatcher(keys).replace(text), reference_replace(keys, text))
+
+
+class TestStreamingReplacement(unittest.TestCase):
+    """Потоковая замена совпадает с заменой цельного текста при любом разбиении на куски."""
+
+    def test_match_spanning_chunk_boundary(self):
+        matcher = ReplacementMatcher({"без изменений": "N", "без патологических изменений": "P"})
+        chunks = ["Легкие бе", "з патологических изм", "енений; сердце без изм", "енений"]
+        self.assertEqual("".join(matcher.iter_replace(chunks)), "Легкие P; сердце N")
+
+    def test_random_chunking_matches_reference(self):
+        rnd = random.Random(4321)
+        for _ in range(500):
+            keys = {
+                "".join(rnd.choice("аб ") for _ in range(rnd.randint(1, 5))): str(i)
+                for i in range(rnd.randint(1, 8))
+            }
+            text = "".join(rnd.choice("аб в") for _ in range(rnd.randint(0, 60)))
+            cuts = sorted(rnd.sample(range(len(text) + 1), min(len(text) + 1, rnd.randint(0, 8))))
+            chunks = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+            with self.subTest(keys=keys, chunks=chunks):
+                self.assertEqual("".join(ReplacementMatcher(keys).iter_replace(chunks)), reference_replace(keys, text))
+
+    def test_output_is_produced_before_input_is_exhausted(self):
+        matcher = ReplacementMatcher({"норма": "без патологии"})
+        consumed = []
+
+        def chunks():
+            for i in range(1000):
+                consumed.append(i)
+                yield "норма, " * 100
+
+        stream = matcher.iter_replace(chunks())
+        first = next(stream)
+        self.assertTrue(first.startswith("без патологии, "))
+        self.assertLessEqual(len(consumed), 1)
+
+    def test_service_writes_stream_to_sink(self):
+        template = Template(name="t", modality=Modality.XRAY, replacements={"все ок": "патологических изменений не обнаружено"})
+        sink = io.StringIO()
+        written = ReportService(template).write_stream(["все", " ок. все ", "ок"], sink)
+        expected = "патологических изменений не обнаружено. патологических изменений не обнаружено"
+        self.assertEqual(sink.getvalue(), expected)
+        self.assertEqual(written, len(expected))
+
+
+class TestReportServiceProcess(unittest.TestCase):
+    """process_report использует скомпилированный набор замен."""
+
+    def test_process_report_with_template(self):
+        template = Template(
+            name="Стандартный",
+            modality=Modality.XRAY,
+            replacements={"сердце в норме": "сердце без патологических изменений"},
+        )
+        service = ReportService(template)
+        report = service.process_report(Report(id="1", modality=Modality.XRAY, original_text="сердце в норме"))
+        self.assertEqual(report.processed_text, "сердце без патологических изменений")
+        self.assertEqual(report.template_name, "Стандартный")
+
+    def test_process_report_without_template(self):
+        report = ReportService().process_report(Report(id="1", modality=Modality.XRAY, original_text="текст"))
+        self.assertEqual(report.processed_text, "текст")
+        self.assertIsNone(report.template_name)
+
+    def test_template_switch_recompiles(self):
+        service = ReportService(Template(name="a", modality=Modality.XRAY, replacements={"x": "1"}))
+        service.set_template(Template(name="b", modality=Modality.XRAY, replacements={"x": "2"}))
+        report = service.process_report(Report(id="1", modality=Modality.XRAY, original_text="x"))
+        self.assertEqual(report.processed_text, "2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Тесты дельт и истории версий заключений."""
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта domain
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from domain.entities import Modality, Report
+from domain.report_history import ReportHistory
+from domain.text_delta import apply_delta, make_delta
+
+WORDS = ["в", "легких", "без", "очаговых", "теней", ",", ".", "корни", "структурны", "синусы", "свободны", "\n", "  "]
+
+
+def random_text(rnd: random.Random) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(0, 40)))
+
+
+def edit(rnd: random.Random, text: str) -> str:
+    """Случайная правка: вставка, удаление или замена куска текста"""
+    i = rnd.randint(0, len(text))
+    j = rnd.randint(i, min(len(text), i + 20))
+    return text[:i] + random_text(rnd)[: rnd.randint(0, 15)] + text[j:]
+
+
+class TestTextDelta(unittest.TestCase):
+    """Дельта восстанавливает новый текст по старому."""
+
+    def test_roundtrip_random_edits(self):
+        rnd = random.Random(5)
+        for case in range(500):
+            old = random_text(rnd)
+            new = edit(rnd, old) if case % 5 else random_text(rnd)
+            with self.subTest(old=old, new=new):
+                self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+    def test_small_edit_gives_small_delta(self):
+        old = "В легких без видимых очагово-инфильтративных теней. Корни структурны. " * 20
+        new = old.replace("Корни структурны", "Корни расширены", 1)
+        delta = make_delta(old, new)
+        self.assertLess(len(delta), 60)
+        self.assertEqual(apply_delta(old, delta), new)
+
+
+class TestReportHistory(unittest.TestCase):
+    """Ключевые версии и восстановление любой версии."""
+
+    def test_every_version_restored(self):
+        rnd = random.Random(7)
+        history = ReportHistory(interval=5)
+        versions = []
+        text = random_text(rnd)
+        for i in range(40):
+            text = edit(rnd, text)
+            processed = None if i % 3 == 0 else f"заключение {i // 2}"
+            report = Report(id="r1", modality=Modality.XRAY, original_text=text, processed_text=processed)
+            if history.record(report):
+                versions.append(report)
+        self.assertEqual(history.versions("r1"), versions)
+        for number, report in enumerate(versions, start=1):
+            self.assertEqual(history.at("r1", number), report)
+        # Обязательные ключевые версии — 1, 6, 11, ...
+        self.assertTrue(all(r.keyframe for r in history.revisions[::5]))
+        self.assertIsNone(history.at("r1", len(versions) + 1))
+
+    def test_saved_object_changed_in_place(self):
+        history = ReportHistory()
+        report = Report(id="r1", modality=Modality.XRAY, original_text="первая")
+        history.record(report)
+        report.original_text = "вторая"
+        self.assertTrue(history.record(report))
+        self.assertEqual([r.original_text for r in history.versions("r1")], ["первая", "вторая"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Тесты кэша скомпилированных шаблонов."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта domain
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from adapters.storage.in_memory_storage import InMemoryStorage
+from domain.entities import Modality, Report, Template
+from domain.services import ReportService
+from domain.template_cache import TemplateCache, template_content_hash
+
+
+def make_template(name: str = "Стандартный", **replacements) -> Template:
+    return Template(name=name, modality=Modality.XRAY, replacements=replacements or {"норма": "без патологии"})
+
+
+class TestTemplateCache(unittest.TestCase):
+    """Попадания, версии и LRU-вытеснение."""
+
+    def test_repeated_get_hits(self):
+        cache = TemplateCache()
+        template = make_template()
+        first = cache.get(template)
+        second = cache.get(template)
+        self.assertIs(first, second)
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+
+    def test_content_hash_ignores_key_order(self):
+        a = Template(name="a", modality=Modality.XRAY, replacements={"x": "1", "y": "2"})
+        b = Template(name="a", modality=Modality.XRAY, replacements={"y": "2", "x": "1"})
+        self.assertEqual(template_content_hash(a), template_content_hash(b))
+
+    def test_changed_template_replaces_old_version(self):
+        cache = TemplateCache()
+        template = make_template()
+        old = cache.put(template)
+        template.replacements["норма"] = "патологии не выявлено"
+        new = cache.put(template)
+        self.assertNotEqual(old.content_hash, new.content_hash)
+        self.assertEqual(cache.stats().size, 1)
+        self.assertEqual(new.apply("норма"), "патологии не выявлено")
+
+    def test_lru_eviction(self):
+        cache = TemplateCache(max_size=2)
+        t1, t2, t3 = make_template("1"), make_template("2"), make_template("3")
+        cache.put(t1)
+        cache.put(t2)
+        cache.get(t1)
+        cache.put(t3)
+        stats = cache.stats()
+        self.assertEqual((stats.size, stats.evictions), (2, 1))
+        cache.get(t1)
+        self.assertEqual(cache.stats().hits, 2)
+        cache.get(t2)
+        self.assertEqual(cache.stats().misses, 1)
+
+    def test_invalidate(self):
+        cache = TemplateCache()
+        template = make_template()
+        cache.put(template)
+        cache.invalidate(template.modality, template.name)
+        self.assertEqual(cache.stats().size, 0)
+
+
+class TestCacheWiring(unittest.TestCase):
+    """Хранилище заполняет кэш, ReportService из него читает."""
+
+    def test_saved_template_is_served_from_cache(self):
+        cache = TemplateCache()
+        storage = InMemoryStorage(template_cache=cache)
+        template = storage.get_template("Стандартный")
+        service = ReportService(template_cache=cache)
+        service.set_template(template)
+        for i in range(5):
+            report = service.process_report(Report(id=str(i), modality=Modality.XRAY, original_text="сердце в норме"))
+            self.assertEqual(report.processed_text, "сердце без патологических изменений")
+        stats = cache.stats()
+        self.assertEqual(stats.misses, 0)
+        self.assertEqual(stats.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
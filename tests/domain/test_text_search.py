@@ -0,0 +1,146 @@
+"""Тесты полнотекстового индекса."""
+
+import math
+import random
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+# Корень проекта в path для импорта domain
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from domain.entities import Modality, Report
+from collections import Counter
+from domain.text_search import SearchIndex, normalize_token, report_tokens, tokenize
+
+
+def make_report(report_id: str, text: str, modality: Modality = Modality.XRAY) -> Report:
+    return Report(id=report_id, modality=modality, original_text=text)
+
+
+def reference_search(reports, query, modality=None, limit=20):
+    """Эталон: BM25 по всем заключениям подряд"""
+    docs = [(r, Counter(report_tokens(r))) for r in reports]
+    avg = sum(sum(c.values()) for _, c in docs) / len(docs)
+    terms = set(tokenize(query))
+    df = {t: sum(1 for _, c in docs if t in c) for t in terms}
+    scored = []
+    for order, (report, counts) in enumerate(docs):
+        if not terms or any(t not in counts for t in terms):
+            continue
+        if modality is not None and report.modality != modality:
+            continue
+        length = sum(counts.values())
+        score = 0.0
+        for t in terms:
+            idf = math.log(1 + (len(docs) - df[t] + 0.5) / (df[t] + 0.5))
+            tf = counts[t]
+            score += idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / avg))
+        scored.append((-score, order, report.id))
+    return [report_id for _, _, report_id in sorted(scored)[:limit]]
+
+
+class TestTokenize(unittest.TestCase):
+    """Нормализация русских слов."""
+
+    def test_case_yo_and_suffixes(self):
+        self.assertEqual(tokenize("Зелёные ЛЁГКИЕ"), tokenize("зеленых легкое"))
+        self.assertEqual(normalize_token("остеопорозом"), normalize_token("остеопороз"))
+        self.assertEqual(normalize_token("очагами"), normalize_token("очаги"))
+
+    def test_short_words_keep_endings(self):
+        self.assertEqual(normalize_token("без"), "без")
+        self.assertEqual(tokenize("L1-L4, T-критерий -1.2"), ["l1", "l4", "t", "критер", "1", "2"])
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Поиск, ранжирование и сохранение."""
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add(make_report("a", "очаговых теней в легких нет"))
+        self.index.add(make_report("b", "остеопения шейки бедра", Modality.DENSITOMETRY))
+        self.index.add(make_report("c", "очаговые тени, очаговая тень в правом легком"))
+        self.index.add(make_report("d", "остеопороз позвоночника", Modality.DENSITOMETRY))
+
+    def test_all_terms_required(self):
+        self.assertEqual(sorted(self.index.search("легкие очаговые")), ["a", "c"])
+        self.assertEqual(self.index.search("легкие остеопения"), [])
+        self.assertEqual(self.index.search("несуществующее"), [])
+        self.assertEqual(self.index.search("  ,. "), [])
+
+    def test_ranking_prefers_higher_term_frequency(self):
+        self.assertEqual(self.index.search("очаговая тень"), ["c", "a"])
+
+    def test_modality_filter_and_limit(self):
+        self.assertEqual(self.index.search("тени", modality=Modality.DENSITOMETRY), [])
+        self.assertEqual(len(self.index.search("очаговые", limit=1)), 1)
+
+    def test_resave_replaces_previous_version(self):
+        self.index.add(make_report("a", "остеопения"))
+        self.assertEqual(self.index.search("легкие"), ["c"])
+        self.assertEqual(sorted(self.index.search("остеопения")), ["a", "b"])
+        self.assertEqual(len(self.index), 4)
+
+    def test_vacuum_keeps_results(self):
+        for version in range(20):
+            self.index.add(make_report("a", f"очаговые тени версия{version}"))
+        self.assertEqual(self.index.search("версия19"), ["a"])
+        self.assertEqual(self.index.search("версия3"), [])
+        self.assertEqual(sorted(self.index.search("очаговые")), ["a", "c"])
+
+    def test_vacuum_renumbers_documents(self):
+        ranked = self.index.search("очаговая тень")
+        for version in range(1000):
+            self.index.add(make_report("a", f"легкие версия{version % 3}"))
+        # Таблицы документов — не больше чем вдвое больше живых, а не по числу сохранений
+        self.assertLessEqual(len(self.index._doc_ids), 2 * len(self.index) + 1)
+        self.assertLessEqual(len(self.index._doc_lengths), 2 * len(self.index) + 1)
+        self.assertEqual(self.index.search("версия2"), [])
+        self.assertEqual(self.index.search("версия0"), ["a"])
+        self.assertEqual(self.index.search("очаговая тень"), [r for r in ranked if r != "a"])
+        self.index.add(make_report("e", "легкие"))
+        self.assertEqual(sorted(self.index.search("легкие")), ["a", "c", "e"])
+        self.assertEqual(self.index._doc_numbers["e"], len(self.index._doc_ids) - 1)
+
+    def test_matches_reference_ranking(self):
+        rnd = random.Random(7)
+        words = ["легкие", "тень", "очаг", "синус", "корни", "бедро", "остеопения", "норма", "контур", "доля"]
+        reports = []
+        for i in range(600):
+            text = " ".join(rnd.choice(words[:rnd.randint(2, 10)]) for _ in range(rnd.randint(1, 12)))
+            reports.append(make_report(f"r{i}", text, rnd.choice(list(Modality))))
+        index = SearchIndex()
+        for report in reports:
+            index.add(report)
+        for _ in range(200):
+            query = " ".join(rnd.sample(words, rnd.randint(1, 3)))
+            modality = rnd.choice([None, *Modality])
+            limit = rnd.choice([1, 5, 20, 1000])
+            # Порог мал — проверяются обход групп с ранней остановкой и отложенное пересечение
+            threshold = rnd.choice([0, 8, 4096])
+            with self.subTest(query=query, modality=modality, limit=limit, threshold=threshold):
+                with mock.patch("domain.text_search._SMALL_CANDIDATE_SET", threshold):
+                    found = index.search(query, modality, limit)
+                self.assertEqual(found, reference_search(reports, query, modality, limit))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "search.idx"
+            self.index.save(path, stamp=(1, 42))
+            loaded = SearchIndex.load(path, stamp=(1, 42))
+            self.assertIsNotNone(loaded)
+            self.assertEqual(loaded.search("очаговая тень"), ["c", "a"])
+            loaded.add(make_report("e", "очаговая тень"))
+            self.assertIn("e", loaded.search("тень"))
+            # Индекс от другого состояния хранилища не подходит
+            self.assertIsNone(SearchIndex.load(path, stamp=(1, 43)))
+            self.assertIsNone(SearchIndex.load(Path(tmp) / "нет.idx"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Тесты DensitometryEngine: диагноз, валидация и текст без UI."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта plugins
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from plugins.densitometry.engine import DensitometryEngine
+
+SPINE = {"t": -1.6, "z": None, "bmd": 0.9}
+FEMUR = {"t": -0.5, "z": None, "bmd": 1.0, "frax": 3.5}
+TOTAL_HIP = {"t": -2.6, "z": None, "bmd": 0.7}
+
+
+class TestDensitometryEngine(unittest.TestCase):
+    """Диагноз по T/Z, проверки полей и отчёты по участкам."""
+
+    def setUp(self):
+        self.engine = DensitometryEngine()
+
+    def test_diagnosis_thresholds(self):
+        cases = [(-2.5, "Остеопороз"), (-2.0, "Остеопения 3 ст."), (-1.5, "Остеопения 2 ст"),
+                 (-1.1, "Остеопения 1 ст"), (-1.0, "Норма")]
+        for score, expected in cases:
+            with self.subTest(score=score):
+                self.assertEqual(self.engine.diagnosis(score, "T"), expected)
+        self.assertEqual(self.engine.diagnosis(-2.0, "Z"), "Остеопороз")
+        self.assertEqual(self.engine.diagnosis(-1.9, "Z"), "Норма")
+
+    def test_spine_report(self):
+        report = self.engine.build_report({"spine": SPINE})
+        self.assertEqual(report.description, "Поясничный отдел позвоночника. Поясничные позвонки: L1–L4. "
+                                             "Среднее значение МПК составило 0.900 г/см. Т-критерий – -1.6")
+        self.assertEqual(report.conclusion, "Заключение. Позвоночник - Остеопения 2 ст")
+
+    def test_femur_report(self):
+        report = self.engine.build_report({"femur": FEMUR, "total_hip": TOTAL_HIP})
+        self.assertIn("FRAX – 3.5%", report.description)
+        self.assertEqual(report.conclusion, "Заключение: Проксимальный отдел бедра в целом: Остеопороз. "
+                                            "Шейка бедренной кости: Норма.")
+
+    def test_combined_report(self):
+        report = self.engine.build_report({"spine": SPINE, "femur": FEMUR, "total_hip": TOTAL_HIP})
+        spine, femur = self.engine.spine_report(SPINE), self.engine.femur_report(FEMUR, TOTAL_HIP)
+        self.assertEqual(report.description, f"{spine.description}\n\n{femur.description}")
+        self.assertEqual(report.conclusion, f"{spine.conclusion}\n\n{femur.conclusion}")
+        self.assertEqual(self.engine.combine([self.engine.full_text(spine), "", self.engine.full_text(femur)]), report)
+
+    def test_validation_errors(self):
+        with self.assertRaisesRegex(ValueError, "позвоночника заполните"):
+            self.engine.build_report({"spine": {"t": None, "z": None, "bmd": 1.0}})
+        with self.assertRaisesRegex(ValueError, "FRAX"):
+            self.engine.build_report({"femur": {**FEMUR, "frax": None}, "total_hip": TOTAL_HIP})
+        with self.assertRaisesRegex(ValueError, "один тип критерия"):
+            self.engine.build_report({"spine": {"t": None, "z": -1.0, "bmd": 1.0}, "femur": FEMUR, "total_hip": TOTAL_HIP})
+        with self.assertRaises(ValueError):
+            self.engine.build_report({})
+
+    def test_split_report(self):
+        self.assertEqual(self.engine.split_report("Описание.\n\nЗаключение: норма"), ("Описание.", "Заключение: норма"))
+        self.assertEqual(self.engine.split_report("Описание. Заключение: в строке"), ("Описание. Заключение: в строке", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""Тесты MammographyEngine: текст маммографии без UI."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта plugins
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from plugins.mammography.engine import MammographyEngine
+
+
+class TestMammographyEngine(unittest.TestCase):
+    """Плотность, сторона и локализация в тексте; деление на описание и заключение."""
+
+    def setUp(self):
+        self.engine = MammographyEngine()
+
+    def test_norm_defaults(self):
+        report = self.engine.build_report({})
+        self.assertIn("от 25% до 50%", report.description)  # плотность B
+        self.assertTrue(report.conclusion.startswith("ЗАКЛЮЧЕНИЕ:"))
+        self.assertIn("BIRADS 1 СПРАВА И СЛЕВА", report.conclusion)
+        self.assertNotIn("ЗАКЛЮЧЕНИЕ", report.description)
+
+    def test_asymmetry_on_selected_side_with_localization(self):
+        report = self.engine.build_report({
+            "pathology": "локальная_асимметрия", "side": "левая", "density": "C",
+            "localization": "В нижне-наружном квадранте",
+        })
+        right, left = report.description.split("\n\n")
+        self.assertIn("ACR-C", right)
+        self.assertNotIn("асимметрия", right)
+        self.assertIn("В нижне-наружном квадранте отмечается локальная асимметрия", left)
+        self.assertIn("(слева)", report.conclusion)
+        self.assertIn("BIRADS 2 справа, BIRADS 4a слева", report.conclusion)
+
+    def test_unknown_pathology_gives_empty_report(self):
+        self.assertEqual(self.engine.build_report({"pathology": "нет такой"}), ("", ""))
+
+    def test_split_edited_text(self):
+        self.assertEqual(self.engine.split_report("Описание.\n\nзаключение : текст\nBIRADS 1"),
+                         ("Описание.", "заключение : текст\nBIRADS 1"))
+        self.assertEqual(self.engine.split_report("Только описание"), ("Только описание", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
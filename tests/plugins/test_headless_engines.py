@@ -0,0 +1,46 @@
+"""Движки плагинов и ядро импортируются без PySide6 (серверное использование)."""
+
+import subprocess
+import sys
+import textwrap
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта plugins
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+# В дочернем процессе PySide6 недоступен: любой его импорт — ImportError
+HEADLESS_SCRIPT = textwrap.dedent('''
+    import sys
+    sys.modules["PySide6"] = None
+    import core.plugin_base, core.plugin_loader, core.plugin_cache, core.startup_profiler
+    from plugins.densitometry.engine import Engine as DensitometryEngine
+    from plugins.mammography.engine import Engine as MammographyEngine
+    from plugins.xray_constructor.engine import Engine as XrayEngine
+
+    print(MammographyEngine().build_report({"pathology": "норма"}).conclusion.splitlines()[0])
+    print(DensitometryEngine().build_report({"spine": {"t": -2.7, "z": None, "bmd": 0.8}}).conclusion)
+    print(XrayEngine().get_modality())
+    print(sorted(name for name in sys.modules if name.startswith("PySide6")))
+''')
+
+
+class TestHeadlessEngines(unittest.TestCase):
+    """Движки строят отчёты в процессе без PySide6."""
+
+    def test_engines_without_pyside(self):
+        result = subprocess.run(
+            [sys.executable, "-c", HEADLESS_SCRIPT], cwd=project_root, capture_output=True, text=True, timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        lines = result.stdout.splitlines()
+        self.assertTrue(lines[0].startswith("ЗАКЛЮЧЕНИЕ:"))
+        self.assertEqual(lines[1], "Заключение. Позвоночник - Остеопороз")
+        self.assertEqual(lines[2], "xray")
+        self.assertEqual(lines[3], "['PySide6']")  # только заглушка None из скрипта
+
+
+if __name__ == "__main__":
+    unittest.main()
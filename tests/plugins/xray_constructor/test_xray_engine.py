@@ -0,0 +1,55 @@
+"""Тесты XrayEngine: описание и заключение рентгенографии без UI."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта plugins
+project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from plugins.xray_constructor.engine import DEFAULT_SIDE_TEXTS, XrayEngine
+
+
+class TestXrayEngine(unittest.TestCase):
+    """Заголовок, стороны, двусторонние патологии и текст по умолчанию."""
+
+    def setUp(self):
+        self.engine = XrayEngine()
+        self.study = self.engine.studies[0]["id"]
+
+    def test_norm_uses_default_texts(self):
+        report = self.engine.build_report({"study": self.study, "pathologies": []})
+        header = self.engine.build_header(self.study)
+        self.assertTrue(header)
+        self.assertTrue(report.description.startswith(f"{header}\n\n"))
+        self.assertEqual(report.conclusion, self.engine.get_study(self.study)["текст_по_умолчанию_заключение"])
+
+    def test_one_side_pathology_keeps_default_other_side(self):
+        report = self.engine.build_report({"study": self.study, "pathologies": [["пневмония", "слева"]]})
+        paragraphs = report.description.split("\n\n")[1:]
+        self.assertTrue(paragraphs[0].startswith("Слева:"))
+        self.assertNotEqual(paragraphs[0], DEFAULT_SIDE_TEXTS["слева"])
+        self.assertEqual(paragraphs[1], DEFAULT_SIDE_TEXTS["справа"])
+        self.assertEqual(report.conclusion, "Левосторонняя пневмония.")
+
+    def test_bilateral_pathology_replaces_side_defaults(self):
+        report = self.engine.build_report({"study": self.study, "pathologies": [["пневмония", "двусторонняя"]]})
+        paragraphs = report.description.split("\n\n")[1:]
+        self.assertEqual(len(paragraphs), 1)
+        self.assertTrue(paragraphs[0].startswith("Справа и слева:"))
+
+    def test_several_pathologies_joined(self):
+        choices = [["пневмония", "справа"], ["плеврит", "справа"]]
+        report = self.engine.build_report({"study": self.study, "pathologies": choices})
+        self.assertIn("Правосторонняя пневмония.", report.conclusion)
+        self.assertIn("Правосторонний плеврит.", report.conclusion)
+
+    def test_unknown_pathology_ignored(self):
+        self.assertEqual(self.engine.build_report({"study": self.study, "pathologies": [["нет", "слева"]]}),
+                         self.engine.build_report({"study": self.study}))
+
+
+if __name__ == "__main__":
+    unittest.main()
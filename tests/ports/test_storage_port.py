@@ -0,0 +1,63 @@
+"""Тесты методов StorageAdapter по умолчанию для адаптеров, реализующих только абстрактные методы."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта ports
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from domain.entities import Modality, Report, Template
+from ports.storage_port import StorageAdapter
+
+
+class MinimalStorage(StorageAdapter):
+    """Адаптер, написанный под первую версию порта"""
+
+    def __init__(self):
+        self.reports = {}
+        self.templates = {}
+
+    def save_report(self, report):
+        self.reports[report.id] = report
+
+    def get_report(self, report_id):
+        return self.reports.get(report_id)
+
+    def get_all_reports(self):
+        return list(self.reports.values())
+
+    def save_template(self, template):
+        self.templates[template.name] = template
+
+    def get_template(self, template_name):
+        return self.templates.get(template_name)
+
+    def get_all_templates(self):
+        return list(self.templates.values())
+
+    def get_templates_by_modality(self, modality):
+        return [t for t in self.templates.values() if t.modality == modality]
+
+
+class TestStorageAdapterDefaults(unittest.TestCase):
+    """Новые методы порта не ломают существующие адаптеры."""
+
+    def test_minimal_adapter_instantiable(self):
+        storage = MinimalStorage()
+        storage.save_reports([Report("2", Modality.XRAY, "норма"), Report("1", Modality.MAMMOGRAPHY, "норма")])
+        self.assertEqual([r.id for r in storage.iter_reports()], ["1", "2"])
+        self.assertEqual([r.id for r in storage.search_reports("норма", Modality.XRAY)], ["2"])
+        self.assertEqual(len(storage.get_report_history("1")), 1)
+
+    def test_delete_template_not_supported_by_default(self):
+        storage = MinimalStorage()
+        storage.save_template(Template("Стандартный", Modality.XRAY, {}))
+        self.assertFalse(storage.delete_template("Стандартный"))
+        self.assertIsNotNone(storage.get_template("Стандартный"))
+
+
+if __name__ == "__main__":
+    unittest.main()
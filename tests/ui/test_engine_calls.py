@@ -0,0 +1,150 @@
+"""Тесты вызовов движка из виджета: без ожидания в потоке UI для движка в отдельном процессе."""
+
+import sys
+import textwrap
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта ui
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from PySide6.QtCore import QEvent, QObject
+from PySide6.QtWidgets import QApplication
+
+from core.plugin_host import EngineHost
+from ui.engine_calls import call_engine
+
+SLOW_ENGINE_SOURCE = textwrap.dedent('''
+    import os
+    import time
+    from core.plugin_base import ReportEngine, ReportText
+
+    class Engine(ReportEngine):
+        def get_modality(self):
+            return "xray"
+
+        def build_report(self, params):
+            # gate — файл-событие: движок в другом процессе ждёт, пока тест его создаст
+            while params.get("gate") and not os.path.exists(params["gate"]):
+                time.sleep(0.005)
+            time.sleep(params.get("delay", 0))
+            if "text" not in params:
+                raise ValueError("нет текста")
+            return ReportText(params["text"], "")
+''')
+
+
+def get_app():
+    """Возвращает экземпляр QApplication (создаёт при необходимости)."""
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+    return app
+
+
+def wait_until(condition, timeout: float = 10.0) -> bool:
+    """Обрабатывает события, пока condition() не станет истинным"""
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+class TestCallEngineInline(unittest.TestCase):
+    """Движок в процессе приложения вызывается сразу."""
+
+    @classmethod
+    def setUpClass(cls):
+        get_app()
+
+    def test_result_and_error_delivered_before_return(self):
+        from plugins.mammography.engine import MammographyEngine
+        engine, context, results = MammographyEngine(), QObject(), []
+        call_engine(engine, context, "split_report", "описание\nЗАКЛЮЧЕНИЕ: норма", on_result=results.append)
+        self.assertEqual(results, [("описание", "ЗАКЛЮЧЕНИЕ: норма")])
+        call_engine(engine, context, "pathology", None, on_result=results.append, on_error=results.append)
+        self.assertEqual(results[-1], {})
+        with self.assertRaises(AttributeError):
+            call_engine(engine, context, "missing", on_result=results.append)
+
+
+class TestCallEngineHost(unittest.TestCase):
+    """EngineHost: управление возвращается сразу, ответ — из цикла событий."""
+
+    @classmethod
+    def setUpClass(cls):
+        get_app()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        engine_path = Path(self._tmp.name) / "engine.py"
+        engine_path.write_text(SLOW_ENGINE_SOURCE, encoding="utf-8")
+        self.host = EngineHost(engine_path, "plugins.slow_demo.engine")
+        self.addCleanup(self.host.close)
+        self.host.start()
+
+    def test_slow_engine_does_not_block_caller(self):
+        context, results, errors = QObject(), [], []
+        gate = Path(self._tmp.name) / "gate"
+        call_engine(self.host, context, "build_report", {"text": "готово", "gate": str(gate)},
+                    on_result=results.append)
+        call_engine(self.host, context, "build_report", {}, on_result=results.append, on_error=errors.append)
+        # Управление вернулось, а движок ещё ждёт gate — ответ придёт только из цикла событий
+        self.assertEqual((results, errors), ([], []))
+        gate.touch()
+        self.assertTrue(wait_until(lambda: errors))
+        self.assertEqual([report.description for report in results], ["готово"])  # ответы — в порядке вызовов
+        self.assertIsInstance(errors[0], ValueError)
+
+    def test_reply_dropped_when_context_deleted(self):
+        context, results = QObject(), []
+        call_engine(self.host, context, "build_report", {"text": "поздно", "delay": 0.1}, on_result=results.append)
+        context.deleteLater()
+        QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        alive = QObject()
+        call_engine(self.host, alive, "build_report", {"text": "после"}, on_result=results.append)
+        self.assertTrue(wait_until(lambda: results))
+        self.assertEqual([report.description for report in results], ["после"])
+
+
+class TestViewOnEngineHost(unittest.TestCase):
+    """Виджет маммографии с движком в отдельном процессе."""
+
+    @classmethod
+    def setUpClass(cls):
+        get_app()
+
+    def test_widget_reads_cached_data_and_gets_report_asynchronously(self):
+        from plugins.mammography.engine import MammographyEngine
+        from plugins.mammography.plugin import MammographyPlugin
+        host = EngineHost(project_root / "plugins" / "mammography" / "engine.py", "plugins.mammography.engine")
+        self.addCleanup(host.close)
+        host.start()
+        plugin = MammographyPlugin(engine=host)
+        widget = plugin.create_widget()
+        self.addCleanup(widget.deleteLater)
+        self.assertTrue(wait_until(lambda: plugin.text_edit.toPlainText()))  # начальный текст
+        requests = host.stats.requests
+        self.assertEqual(plugin.get_modality(), "mammography")
+        for _ in range(3):
+            self.assertEqual(plugin.pathologies, MammographyEngine().pathologies)
+        plugin._on_pathology_changed(plugin.pathology_buttons.buttons()[-1])
+        self.assertEqual(host.stats.requests, requests)  # справочники — копия, без запросов
+
+        expected = MammographyEngine().build_full_report(plugin._params())
+        plugin.text_edit.setPlainText("")
+        reports = []
+        plugin._on_report_generated = lambda description, conclusion: reports.append(description)
+        plugin._generate_report()
+        self.assertTrue(wait_until(lambda: reports))
+        self.assertEqual(plugin.text_edit.toPlainText(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Тесты MainWindow и хранилища: сохранение отчёта, ошибки записи при закрытии и в фоне."""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Корень проекта в path для импорта ui
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from PySide6.QtWidgets import QMessageBox
+
+from adapters.storage.in_memory_storage import InMemoryStorage
+from domain.template_cache import TemplateCache
+from tests.ui.test_widget_cache import FormPlugin, get_app
+from ui.main_window import MainWindow, report_text
+
+
+class FailingStorage(InMemoryStorage):
+    """Хранилище, у которого первые failures вызовов close() падают"""
+
+    def __init__(self, failures):
+        super().__init__(template_cache=TemplateCache())
+        self.failures = failures
+        self.close_calls = 0
+        self.closed = False
+
+    def close(self):
+        self.close_calls += 1
+        if self.close_calls <= self.failures:
+            raise OSError("диск недоступен")
+        self.closed = True
+
+
+class TestCloseWithFailingStorage(unittest.TestCase):
+    """Ошибка записи при закрытии: повтор, отмена закрытия, закрытие без сохранения."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = get_app()
+
+    def close_window(self, storage, answers):
+        window = MainWindow([FormPlugin("А")], storage=storage, prewarm=False)
+        self.addCleanup(window.deleteLater)
+        window.show()
+        with mock.patch("ui.main_window.QMessageBox.warning", side_effect=answers) as warning, \
+                mock.patch("ui.main_window.traceback.print_exc"):
+            accepted = window.close()
+        return window, accepted, warning.call_count
+
+    def test_retry_closes_after_successful_flush(self):
+        storage = FailingStorage(failures=1)
+        window, accepted, asked = self.close_window(storage, [QMessageBox.Retry])
+        self.assertTrue(accepted)
+        self.assertEqual(asked, 1)
+        self.assertTrue(storage.closed)
+        self.assertIsNone(window.storage)
+
+    def test_cancel_keeps_window_open(self):
+        storage = FailingStorage(failures=1)
+        window, accepted, asked = self.close_window(storage, [QMessageBox.Cancel])
+        self.assertFalse(accepted)
+        self.assertTrue(window.isVisible())
+        self.assertIs(window.storage, storage)
+        # Повторное закрытие окна снова пробует записать отчёты
+        window.close()
+        self.assertTrue(storage.closed)
+
+    def test_discard_closes_without_saving(self):
+        storage = FailingStorage(failures=5)
+        window, accepted, asked = self.close_window(storage, [QMessageBox.Retry, QMessageBox.Discard])
+        self.assertTrue(accepted)
+        self.assertEqual(asked, 2)
+        self.assertFalse(storage.closed)
+        self.assertIsNone(window.storage)
+
+
+class TestStorageErrorStatus(unittest.TestCase):
+    """Ошибка фоновой записи — в строке состояния окна."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = get_app()
+
+    def test_error_from_other_thread_shown_in_status_bar(self):
+        window = MainWindow([FormPlugin("А")], prewarm=False)
+        self.addCleanup(window.deleteLater)
+        thread = threading.Thread(target=window.report_storage_error, args=(OSError("диск недоступен"),))
+        thread.start()
+        thread.join()
+        self.app.processEvents()
+        self.assertIn("диск недоступен", window.statusBar().currentMessage())
+
+
+class XrayFormPlugin(FormPlugin):
+    def get_modality(self):
+        return "xray"
+
+
+class TestStoredReport(unittest.TestCase):
+    """Сформированный отчёт в хранилище: полный текст в original_text и processed_text."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = get_app()
+
+    def test_report_text_stored_unprocessed(self):
+        storage = InMemoryStorage(template_cache=TemplateCache())
+        plugin = XrayFormPlugin("Рентген")
+        window = MainWindow([plugin], storage=storage, prewarm=False)
+        self.addCleanup(window.deleteLater)
+        window._on_plugin_selected(plugin)
+        window._store_report("Легкие без очагов.", "Норма.")
+        [report] = storage.get_all_reports()
+        self.assertEqual(report.original_text, "Легкие без очагов.\n\nНорма.")
+        self.assertEqual(report.processed_text, report.original_text)
+        self.assertEqual(window._last_conclusion, "Норма.")
+        self.assertEqual(report_text("", "Норма."), "Норма.")
+
+
+if __name__ == "__main__":
+    unittest.main()
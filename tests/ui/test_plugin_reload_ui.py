@@ -0,0 +1,108 @@
+"""Тесты горячей перезагрузки в интерфейсе: PluginWatcher и MainWindow.reload_plugin."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта ui и plugins
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from PySide6.QtWidgets import QApplication
+
+from core.plugin_loader import LazyPlugin, read_manifest
+from core.plugin_reload import CHANGE_CODE, CHANGE_DATA, CHANGE_MANIFEST
+from ui.main_window import MainWindow
+from ui.plugin_watcher import PluginWatcher
+
+
+def get_app():
+    """Возвращает экземпляр QApplication (создаёт при необходимости)."""
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+    return app
+
+
+class TestPluginWatcher(unittest.TestCase):
+    """Сравнение папки со снимком и сигнал plugin_changed."""
+
+    @classmethod
+    def setUpClass(cls):
+        get_app()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.plugin_dir = Path(self._tmp.name) / "demo"
+        self.plugin_dir.mkdir()
+        for name in ("plugin.py", "plugin.json", "data.json"):
+            (self.plugin_dir / name).write_text("1", encoding="utf-8")
+        self.watcher = PluginWatcher([self.plugin_dir])
+        self.emitted = []
+        self.watcher.plugin_changed.connect(lambda directory, kind: self.emitted.append((directory, kind)))
+
+    def test_no_changes_no_signal(self):
+        self.assertEqual(self.watcher.check_now(), [])
+        self.assertEqual(self.emitted, [])
+
+    def test_kind_of_change_reported_once(self):
+        (self.plugin_dir / "data.json").write_text("22", encoding="utf-8")
+        self.assertEqual(self.watcher.check_now(), [("demo", CHANGE_DATA)])
+        (self.plugin_dir / "plugin.json").write_text("22", encoding="utf-8")
+        (self.plugin_dir / "engine.py").write_text("", encoding="utf-8")
+        self.assertEqual(self.watcher.check_now(), [("demo", CHANGE_CODE)])
+        self.assertEqual(self.watcher.check_now(), [])
+        self.assertEqual(self.emitted, [("demo", CHANGE_DATA), ("demo", CHANGE_CODE)])
+
+
+class TestMainWindowReload(unittest.TestCase):
+    """Открытый плагин пересоздаёт виджет и сохраняет выбор и текст формы."""
+
+    @classmethod
+    def setUpClass(cls):
+        get_app()
+
+    def setUp(self):
+        manifest = read_manifest(project_root / "plugins" / "mammography")
+        self.plugin = LazyPlugin(manifest)
+        self.window = MainWindow([self.plugin])
+        self.addCleanup(self.window.deleteLater)
+        self.window._on_plugin_selected(self.plugin)
+        view = self.plugin.load()
+        for btn in view.density_buttons.buttons():
+            if btn.text() == "D":
+                btn.click()
+        for btn in view.pathology_buttons.buttons():
+            if btn.property("pathology_key") == "локальная_асимметрия":
+                btn.click()
+        view.localization_combo.setCurrentIndex(2)
+        view.text_edit.setPlainText("правка врача")
+        self.expected = view.save_state()
+
+    def test_code_reload_restores_form(self):
+        old_view, old_widget = self.plugin.load(), self.window.current_widget
+        self.assertTrue(self.window.reload_plugin("mammography", CHANGE_CODE))
+        view = self.plugin.load()
+        self.assertIsNot(view, old_view)
+        self.assertIsNot(self.window.current_widget, old_widget)
+        self.assertEqual(view.save_state(), self.expected)
+        self.assertEqual(view.density_buttons.checkedButton().text(), "D")
+        self.assertTrue(view.localization_group.isVisibleTo(self.window.current_widget))
+
+    def test_data_reload_keeps_view(self):
+        view = self.plugin.load()
+        self.assertTrue(self.window.reload_plugin("mammography", CHANGE_DATA))
+        self.assertIs(self.plugin.load(), view)
+        self.assertEqual(view.save_state(), self.expected)
+
+    def test_manifest_reload_and_unknown_directory(self):
+        self.assertTrue(self.window.reload_plugin("mammography", CHANGE_MANIFEST))
+        self.assertEqual(self.window.plugin_buttons[0].text(), self.plugin.get_name())
+        self.assertFalse(self.window.reload_plugin("нет_такого", CHANGE_CODE))
+
+
+if __name__ == "__main__":
+    unittest.main()
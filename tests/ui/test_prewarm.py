@@ -0,0 +1,109 @@
+"""Тесты фонового прогрева виджетов плагинов после первой отрисовки."""
+
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта ui
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from PySide6.QtWidgets import QApplication
+
+from core.plugin_loader import LazyPlugin, read_manifest
+from core.plugin_usage import PluginUsageStats
+from tests.ui.test_widget_cache import FormPlugin
+from ui.main_window import MainWindow
+
+
+def get_app():
+    """Возвращает экземпляр QApplication (создаёт при необходимости)."""
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+    return app
+
+
+class TestPrewarm(unittest.TestCase):
+    """Порядок по статистике, шаги в цикле событий, ограничение кэшем."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = get_app()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.usage = PluginUsageStats(Path(self._tmp.name) / "plugin_usage.json")
+
+    def make_window(self, plugins, **kwargs):
+        window = MainWindow(plugins, usage=self.usage, prewarm=False, **kwargs)
+        self.addCleanup(window.deleteLater)
+        return window
+
+    def run_prewarm(self, window):
+        """Проходы цикла событий до конца прогрева; число шагов"""
+        window.start_prewarm()
+        steps = 0
+        while window.prewarming:
+            self.app.processEvents()
+            steps += 1
+        return steps
+
+    def test_most_opened_plugins_prewarmed_first_without_showing(self):
+        plugins = [FormPlugin("А"), FormPlugin("Б"), FormPlugin("В")]
+        self.usage.record("В")
+        self.usage.record("В")
+        self.usage.record("Б")
+        window = self.make_window(plugins, widget_cache_size=2)
+        self.assertGreaterEqual(self.run_prewarm(window), 1)
+        self.assertEqual([plugin.created for plugin in plugins], [0, 1, 1])
+        self.assertIsNone(window.current_widget)
+        self.assertEqual(window.plugin_stack.currentIndex(), 0)
+
+        window._on_plugin_selected(plugins[2])
+        self.assertEqual(plugins[2].created, 1)
+        self.assertIs(window.current_widget, plugins[2].edit)
+        self.assertEqual(self.usage.opens["В"], 3)
+
+    def test_prewarmed_widget_evicted_before_opened_ones(self):
+        plugins = [FormPlugin("А"), FormPlugin("Б"), FormPlugin("В")]
+        window = self.make_window(plugins, widget_cache_size=2)
+        window._on_plugin_selected(plugins[2])
+        self.run_prewarm(window)
+        self.assertEqual([plugin.created for plugin in plugins], [1, 0, 1])
+        window._on_plugin_selected(plugins[1])  # вытесняет прогретый «А», а не открытый «В»
+        window._on_plugin_selected(plugins[2])
+        self.assertEqual(plugins[2].created, 1)
+        self.assertEqual(plugins[0].created, 1)
+
+    def test_engine_prepared_off_ui_thread_then_imported_and_created_in_separate_steps(self):
+        plugin = LazyPlugin(read_manifest(project_root / "plugins" / "densitometry"))
+        prepare, threads = plugin.prepare_engine, []
+
+        def recording_prepare():
+            threads.append(threading.current_thread())
+            prepare()
+
+        plugin.prepare_engine = recording_prepare
+        window = self.make_window([plugin])
+        window.start_prewarm()
+        deadline = time.monotonic() + 10
+        while window._prewarm_prepared is not plugin and time.monotonic() < deadline:
+            self.app.processEvents()
+        self.assertIsNot(threads[0], threading.main_thread())
+        self.assertFalse(plugin.loaded)
+        self.app.processEvents()
+        self.assertTrue(plugin.loaded)
+        self.assertNotIn(plugin, window._widgets)
+        while window.prewarming:
+            self.app.processEvents()
+        self.assertIn(plugin, window._widgets)
+
+
+if __name__ == "__main__":
+    unittest.main()
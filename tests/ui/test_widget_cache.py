@@ -0,0 +1,149 @@
+"""Тесты кэша виджетов плагинов в MainWindow (QStackedWidget, вытеснение давних)."""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Корень проекта в path для импорта ui
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from PySide6.QtWidgets import QApplication, QLineEdit, QVBoxLayout, QWidget
+
+from core.plugin_base import ModalityPlugin
+from ui.main_window import MainWindow
+
+
+def get_app():
+    """Возвращает экземпляр QApplication (создаёт при необходимости)."""
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+    return app
+
+
+class FormPlugin(ModalityPlugin):
+    """Плагин с одним полем ввода; считает созданные виджеты"""
+
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.created = 0
+        self.restored = []
+
+    def get_name(self):
+        return self.name
+
+    def get_description(self):
+        return ""
+
+    def create_widget(self, on_report_generated=None):
+        if self.fail:
+            raise RuntimeError("не загрузился")
+        self.created += 1
+        self.edit = QLineEdit()
+        return self.edit
+
+    def save_state(self):
+        return {"text": self.edit.text()}
+
+    def restore_state(self, state):
+        self.restored.append(state)
+        self.edit.setText(state["text"])
+
+
+class TallPlugin(FormPlugin):
+    """Плагин со страницей высотой 900 пикселей"""
+
+    def create_widget(self, on_report_generated=None):
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        layout.addWidget(super().create_widget(on_report_generated))
+        self.edit.setMinimumHeight(900)
+        return page
+
+
+class TestWidgetCache(unittest.TestCase):
+    """Переключение без пересоздания, ограничение и повторная загрузка после ошибки."""
+
+    @classmethod
+    def setUpClass(cls):
+        get_app()
+
+    def make_window(self, plugins, **kwargs):
+        window = MainWindow(plugins, **kwargs)
+        self.addCleanup(window.deleteLater)
+        return window
+
+    def pages(self, window):
+        """Страницы стека без пустой страницы «до выбора модальности»"""
+        return window.plugin_stack.count() - 1
+
+    def test_switch_back_shows_same_widget_with_typed_text(self):
+        first, second = FormPlugin("Первый"), FormPlugin("Второй")
+        window = self.make_window([first, second])
+        window._on_plugin_selected(first)
+        widget = window.current_widget
+        first.edit.setText("набранный текст")
+        window._on_plugin_selected(second)
+        window._on_plugin_selected(first)
+        self.assertIs(window.current_widget, widget)
+        self.assertIs(window.plugin_stack.currentWidget(), widget)
+        self.assertEqual(first.edit.text(), "набранный текст")
+        self.assertEqual((first.created, second.created), (1, 1))
+        self.assertEqual(self.pages(window), 2)
+
+    def test_least_recently_used_widget_evicted_and_state_restored(self):
+        plugins = [FormPlugin("А"), FormPlugin("Б"), FormPlugin("В")]
+        window = self.make_window(plugins, widget_cache_size=2)
+        window._on_plugin_selected(plugins[0])
+        plugins[0].edit.setText("черновик")
+        window._on_plugin_selected(plugins[1])
+        plugins[1].edit.setText("б")
+        window._on_plugin_selected(plugins[0])  # «Б» теперь самый давний
+        window._on_plugin_selected(plugins[2])
+        self.assertEqual(self.pages(window), 2)
+        self.assertEqual(plugins[0].created, 1)
+
+        window._on_plugin_selected(plugins[1])
+        self.assertEqual(plugins[1].created, 2)
+        self.assertEqual(plugins[1].restored, [{"text": "б"}])
+        self.assertEqual(plugins[1].edit.text(), "б")
+        window._on_plugin_selected(plugins[0])
+        self.assertEqual(plugins[0].created, 2)
+        self.assertEqual(plugins[0].edit.text(), "черновик")
+
+    def test_stack_sized_by_current_page(self):
+        tall, short = TallPlugin("Высокий"), FormPlugin("Низкий")
+        window = self.make_window([tall, short])
+        window.show()  # раскладка скрытого окна не пересчитывается
+
+        def height(hint):
+            QApplication.processEvents()  # пересчёт раскладки после смены страницы
+            return getattr(window.plugin_container, hint)().height()
+
+        window._on_plugin_selected(tall)
+        self.assertGreaterEqual(height("sizeHint"), 900)
+        window._on_plugin_selected(short)
+        # Скрытая высокая страница не растягивает низкую и не даёт прокрутку под свой размер
+        self.assertLess(height("sizeHint"), 200)
+        self.assertLess(height("minimumSizeHint"), 200)
+        window._on_plugin_selected(tall)
+        self.assertGreaterEqual(height("minimumSizeHint"), 900)
+
+    def test_failed_plugin_not_cached(self):
+        broken, ok = FormPlugin("Сломанный", fail=True), FormPlugin("Рабочий")
+        window = self.make_window([broken, ok])
+        window._on_plugin_selected(broken)
+        self.assertIn("не загрузился", window.current_widget.text())
+        window._on_plugin_selected(ok)
+        self.assertEqual(self.pages(window), 1)
+        broken.fail = False
+        window._on_plugin_selected(broken)
+        self.assertEqual(broken.created, 1)
+        self.assertIs(window.current_widget, broken.edit)
+
+
+if __name__ == "__main__":
+    unittest.main()
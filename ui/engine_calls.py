@@ -0,0 +1,107 @@
+"""Вызовы движка плагина из виджета без ожидания в потоке UI"""
+
+import sys
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# Добавляем корневую директорию проекта в sys.path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import shiboken6
+from PySide6.QtCore import QObject, Signal, Slot
+from core.plugin_base import ReportEngine
+from core.plugin_host import EngineHost
+
+
+class _Dispatcher(QObject):
+    """Передаёт ответы EngineHost из его потока в поток UI: сигнал между потоками ставится в очередь.
+
+    Один объект на приложение и не удаляется — сигнал из другого потока никогда
+    не испускается удалённым объектом; удалённый context проверяется уже в потоке UI.
+    """
+
+    finished = Signal(object, object, object)  # (context, on_result, on_error), результат, исключение
+
+    def __init__(self):
+        super().__init__()
+        self.finished.connect(self._deliver)
+
+    @Slot(object, object, object)
+    def _deliver(self, call: tuple, result: Any, error: Optional[Exception]) -> None:
+        context, on_result, on_error = call
+        if not shiboken6.isValid(context):
+            # Виджет удалён до ответа (вытеснен из кэша) — ответ никому не нужен
+            return
+        if error is None:
+            on_result(result)
+        elif on_error is not None:
+            on_error(error)
+        else:
+            raise error
+
+
+_dispatcher: Optional[_Dispatcher] = None
+
+
+def _deliver_later(context: QObject, on_result: Callable[[Any], None],
+                   on_error: Optional[Callable[[Exception], None]]) -> Callable[[Future], None]:
+    """Обработчик завершения Future: результат передаётся в поток UI через _Dispatcher"""
+    global _dispatcher
+    if _dispatcher is None:
+        # Создаётся в потоке UI (первый вызов — из виджета или окна): в нём и выполняется _deliver
+        _dispatcher = _Dispatcher()
+    call, dispatcher = (context, on_result, on_error), _dispatcher
+
+    def done(future: Future) -> None:
+        error = future.exception()
+        dispatcher.finished.emit(call, None if error is not None else future.result(), error)
+
+    return done
+
+
+def call_engine(engine: ReportEngine, context: QObject, name: str, *args: Any,
+                on_result: Callable[[Any], None], on_error: Optional[Callable[[Exception], None]] = None) -> None:
+    """Вызвать метод name движка и передать результат в on_result (в потоке UI).
+
+    Движок в процессе приложения вызывается сразу — on_result выполняется до
+    возврата, как при обычном вызове. EngineHost (движок в отдельном процессе)
+    вызывается через call_async: управление сразу возвращается в цикл событий,
+    on_result — когда придёт ответ; медленный или зависший процесс не
+    останавливает окно. Ответы приходят в порядке вызовов. Ответ отбрасывается,
+    если context (виджет плагина или его часть) удалён раньше. Исключение
+    вызова — в on_error; без него оно пробрасывается.
+    """
+    if not isinstance(engine, EngineHost):
+        try:
+            result = getattr(engine, name)(*args)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(e)
+            return
+        on_result(result)
+        return
+    engine.call_async(name, *args).add_done_callback(_deliver_later(context, on_result, on_error))
+
+
+def call_in_thread(context: QObject, function: Callable[..., Any], *args: Any,
+                   on_result: Callable[[Any], None], on_error: Optional[Callable[[Exception], None]] = None) -> None:
+    """Выполнить function(*args) в фоновом потоке, результат — в on_result в потоке UI.
+
+    Для работы без виджетов (импорт плагина, создание движка). Как и в
+    call_engine, ответ отбрасывается, если context удалён раньше.
+    """
+    future: Future = Future()
+    future.add_done_callback(_deliver_later(context, on_result, on_error))
+
+    def run() -> None:
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
@@ -1,8 +1,11 @@
 """Главное окно приложения"""
 
 import sys
+import traceback
+import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 # Добавляем корневую директорию проекта в sys.path
 project_root = Path(__file__).parent.parent
@@ -11,11 +14,17 @@ if str(project_root) not in sys.path:
 
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QApplication,
-    QPushButton, QScrollArea, QLabel, QSplitter
+    QPushButton, QScrollArea, QLabel, QSplitter, QStackedWidget, QSizePolicy, QMessageBox
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtGui import QShortcut, QKeySequence
 from core.plugin_base import ModalityPlugin
+from core.plugin_loader import LazyPlugin
+from core.plugin_reload import CHANGE_MANIFEST
+from core.plugin_usage import PluginUsageStats
+from domain.entities import Modality, Report
+from ports.storage_port import StorageAdapter
+from ui.engine_calls import call_in_thread
 
 
 def _simulate_paste():
@@ -32,23 +41,66 @@ def _simulate_paste():
         pass
 
 
+_SELECTED_BUTTON_STYLE = "background-color: #4CAF50; color: white; font-weight: bold;"
+
+# Сколько виджетов плагинов держать созданными (вместе с текущим); None — без ограничения
+DEFAULT_WIDGET_CACHE_SIZE = 8
+
+
+def report_text(description: str, conclusion: str) -> str:
+    """Текст сформированного отчёта, как он сохраняется в хранилище: описание, пустая строка, заключение"""
+    return "\n\n".join(part for part in (description, conclusion) if part)
+
+
+def _plugin_key(plugin: ModalityPlugin) -> str:
+    """Ключ плагина в статистике открытий: папка плагина (по манифесту) или его имя"""
+    return plugin.manifest.directory.name if isinstance(plugin, LazyPlugin) else plugin.get_name()
+
+
 class MainWindow(QMainWindow):
     """Главное окно с двумя панелями: список плагинов слева, виджет плагина справа"""
+
+    # Окно впервые отрисовано — конец запуска для --profile-startup
+    first_painted = Signal()
+    # Ошибка фоновой записи хранилища (report_storage_error, из любого потока)
+    storage_error = Signal(str)
     
-    def __init__(self, plugins: List[ModalityPlugin]):
+    def __init__(self, plugins: List[ModalityPlugin], storage: Optional[StorageAdapter] = None,
+                 widget_cache_size: Optional[int] = DEFAULT_WIDGET_CACHE_SIZE,
+                 usage: Optional[PluginUsageStats] = None, prewarm: bool = True):
         super().__init__()
         self.plugins = plugins
+        # Хранилище сформированных отчётов; закрывается вместе с окном
+        self.storage = storage
         self.current_plugin: Optional[ModalityPlugin] = None
         self.current_widget: Optional[QWidget] = None
+        # Созданные виджеты плагинов — страницы QStackedWidget, от давно не открытых к текущему.
+        # Сверх widget_cache_size самый давний удаляется; состояние его формы (save_state)
+        # восстанавливается, когда виджет создаётся снова
+        self.widget_cache_size = widget_cache_size
+        self._widgets: "OrderedDict[ModalityPlugin, QWidget]" = OrderedDict()
+        self._saved_states: Dict[ModalityPlugin, Dict[str, Any]] = {}
+        # Собственная политика размера страниц: пока страница не видна, у неё Ignored (_add_page)
+        self._page_policies: Dict[QWidget, QSizePolicy] = {}
+        # Статистика открытий (порядок прогрева); после первой отрисовки виджеты плагинов
+        # создаются заранее, по шагу за проход цикла событий (start_prewarm)
+        self.usage = usage
+        self.prewarm = prewarm
+        self._prewarm_queue: List[ModalityPlugin] = []
+        # Плагин, движок которого готовится в фоновом потоке (прогрев ждёт его), и плагин с готовым движком
+        self._prewarm_loading: Optional[ModalityPlugin] = None
+        self._prewarm_prepared: Optional[ModalityPlugin] = None
         # Последний сформированный отчёт (обновляется при нажатии «Сформировать»/«Сформировать отчёт»)
         self._last_description = ""
         self._last_conclusion = ""
+        self._painted = False
 
         self.setWindowTitle("Конструктор рентгеновских заключений")
         self.setGeometry(100, 100, 1200, 800)
         
         self._setup_ui()
         self._setup_hotkeys()
+        self.storage_error.connect(self._show_storage_error)
     
     def _setup_ui(self):
         """Настройка интерфейса"""
@@ -77,6 +129,69 @@ class MainWindow(QMainWindow):
         """Вызывается плагином при нажатии «Сформировать»/«Сформировать отчёт» — для Ctrl+Shift+V."""
         self._last_description = description or ""
         self._last_conclusion = conclusion or ""
+        modality = self.current_plugin.get_modality() if self.current_plugin else None
+        if self.storage is not None and modality:
+            # Отчёт плагина шаблоном не обрабатывается: как у ReportService без шаблона,
+            # processed_text совпадает с original_text — полным текстом отчёта (report_text)
+            text = report_text(self._last_description, self._last_conclusion)
+            # Запись ставится в очередь (CachedStorage) — кнопка не ждёт диска
+            self.storage.save_report(Report(
+                id=uuid.uuid4().hex,
+                modality=Modality(modality),
+                original_text=text,
+                processed_text=text,
+            ))
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            self.first_painted.emit()
+            if self.prewarm:
+                # Прогрев — после того как первый кадр ушёл на экран
+                QTimer.singleShot(0, self.start_prewarm)
+
+    def closeEvent(self, event):
+        """При закрытии окна хранилище дописывает отложенные записи и закрывается, статистика открытий
+        записывается, процессы движков останавливаются. Если записать отчёты не удалось и пользователь
+        отменил закрытие, окно остаётся открытым."""
+        if self.storage is not None and not self._close_storage():
+            event.ignore()
+            return
+        self._prewarm_queue.clear()
+        if self.usage is not None:
+            self.usage.save()
+        for plugin in self.plugins:
+            if isinstance(plugin, LazyPlugin):
+                plugin.close()
+        super().closeEvent(event)
+
+    def report_storage_error(self, error: Exception):
+        """Показать ошибку фоновой записи отчётов в строке состояния; можно вызывать из любого потока
+        (CachedStorage.on_flush_error) — сигнал доставит её в поток UI"""
+        self.storage_error.emit(str(error))
+
+    def _show_storage_error(self, message: str):
+        self.statusBar().showMessage(f"Отчёты не записаны на диск, запись повторяется: {message}")
+
+    def _close_storage(self) -> bool:
+        """Закрывает хранилище. При ошибке записи спрашивает: повторить, закрыть без сохранения
+        или не закрывать окно (False)"""
+        while True:
+            try:
+                self.storage.close()
+            except Exception as e:
+                traceback.print_exc()
+                answer = QMessageBox.warning(
+                    self, "Ошибка сохранения", f"Не удалось сохранить отчёты: {e}",
+                    QMessageBox.Retry | QMessageBox.Discard | QMessageBox.Cancel, QMessageBox.Retry,
+                )
+                if answer == QMessageBox.Retry:
+                    continue
+                if answer != QMessageBox.Discard:
+                    return False
+            self.storage = None
+            return True
 
     def _on_paste_conclusion(self):
         """Вставляет сформированное заключение по Ctrl+Shift+V."""
@@ -141,6 +256,12 @@ class MainWindow(QMainWindow):
         self.plugin_container_layout = QVBoxLayout(self.plugin_container)
         self.plugin_container_layout.setAlignment(Qt.AlignTop)
         
+        # Виджеты открывавшихся плагинов — страницы стека: переключение только меняет видимую страницу
+        self.plugin_stack = QStackedWidget()
+        # Пустая страница до выбора модальности: прогретые виджеты не становятся видимыми сами
+        self._add_page(QWidget())
+        self.plugin_container_layout.addWidget(self.plugin_stack)
+        
         scroll_area.setWidget(self.plugin_container)
         layout.addWidget(scroll_area)
         
@@ -153,20 +274,192 @@ class MainWindow(QMainWindow):
         # При смене модальности сбрасываем сохранённый отчёт — горячие клавиши будут вставлять только отчёт, сформированный в текущей модальности
         self._last_description = ""
         self._last_conclusion = ""
+        if self.usage is not None:
+            self.usage.record(_plugin_key(plugin))
+        self._show_plugin_widget(plugin)
 
-        # Удаляем предыдущий виджет
-        if self.current_widget:
-            self.current_widget.setParent(None)
-            self.current_widget.deleteLater()
-        
-        # Создаем виджет; плагин при «Сформировать» вызывает _store_report — горячие клавиши вставляют этот текст
-        self.current_widget = plugin.create_widget(on_report_generated=self._store_report)
-        self.plugin_container_layout.addWidget(self.current_widget)
-        
-        # Выделяем выбранную кнопку
-        for btn in self.plugin_buttons:
-            btn.setStyleSheet("")
+        # Выделяем выбранную кнопку; стиль меняется только у кнопок, где он другой (setStyleSheet пересчитывает стиль)
+        selected = None
         for btn in self.plugin_buttons:
-            if btn.text() == plugin.get_name():
-                btn.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
-                break
+            if selected is None and btn.text() == plugin.get_name():
+                selected = btn
+            style = _SELECTED_BUTTON_STYLE if btn is selected else ""
+            if btn.styleSheet() != style:
+                btn.setStyleSheet(style)
+
+    def _show_plugin_widget(self, plugin: ModalityPlugin):
+        """Показывает виджет плагина из кэша или создаёт его"""
+        # Сообщение об ошибке загрузки не кэшируется — при следующем выборе плагин загружается снова
+        if self.current_widget is not None and self.current_widget not in self._widgets.values():
+            self._remove_page(self.current_widget)
+
+        widget = self._widgets.get(plugin)
+        if widget is None:
+            # Модуль плагина импортируется здесь, при первом выборе (LazyPlugin), если его не прогрели
+            try:
+                widget = self._create_page(plugin)
+            except Exception as e:
+                traceback.print_exc()
+                widget = QLabel(f"Не удалось загрузить плагин «{plugin.get_name()}»: {e}")
+                widget.setWordWrap(True)
+                self._add_page(widget)
+        if plugin in self._widgets:
+            self._widgets.move_to_end(plugin)
+        self._set_current_page(widget)
+        self.current_widget = widget
+        self._evict_widgets()
+
+    def _create_page(self, plugin: ModalityPlugin) -> QWidget:
+        """Создаёт виджет плагина страницей стека (не показывая) и кладёт в кэш; исключение — при ошибке"""
+        # Плагин при «Сформировать» вызывает _store_report — горячие клавиши вставляют этот текст
+        widget = plugin.create_widget(on_report_generated=self._store_report)
+        self._widgets[plugin] = widget
+        self._add_page(widget)
+        state = self._saved_states.pop(plugin, None)
+        if state:
+            try:
+                plugin.restore_state(state)
+            except Exception:
+                traceback.print_exc()
+        return widget
+
+    @property
+    def prewarming(self) -> bool:
+        return bool(self._prewarm_queue) or self._prewarm_loading is not None
+
+    def start_prewarm(self):
+        """Заранее создаёт виджеты ещё не открытых плагинов — самые открываемые (usage) первыми.
+
+        Движок плагина (LazyPlugin.prepare_engine: процесс движка или engine.py)
+        готовится в фоновом потоке; модуль плагина (он импортирует Qt) и виджет
+        создаются в потоке UI отдельными шагами по одному за QTimer 0 мс: между
+        шагами обрабатывается ввод пользователя. Прогрев не вытесняет открытые
+        виджеты — останавливается, когда кэш заполнен.
+        """
+        keys = [_plugin_key(plugin) for plugin in self.plugins]
+        order = self.usage.ranked(keys) if self.usage is not None else keys
+        by_key = dict(zip(keys, self.plugins))
+        self._prewarm_queue = [by_key[key] for key in order if by_key[key] not in self._widgets]
+        if self._prewarm_queue:
+            QTimer.singleShot(0, self._prewarm_step)
+
+    def _prewarm_step(self):
+        """Один шаг прогрева; следующий — в следующем проходе цикла событий"""
+        while self._prewarm_queue:
+            if self.widget_cache_size is not None and len(self._widgets) >= self.widget_cache_size:
+                self._prewarm_queue.clear()
+                return
+            plugin = self._prewarm_queue[0]
+            if plugin in self._widgets:
+                self._prewarm_queue.pop(0)
+                continue
+            lazy = isinstance(plugin, LazyPlugin) and not plugin.loaded
+            if lazy and plugin is not self._prewarm_prepared:
+                # Движок — в фоновом потоке; следующий шаг — когда он будет готов (_prewarm_loaded)
+                if self._prewarm_loading is None:
+                    self._prewarm_loading = plugin
+                    call_in_thread(self, plugin.prepare_engine, on_result=lambda _: self._prewarm_loaded(plugin),
+                                   on_error=lambda _: self._prewarm_loaded(plugin, failed=True))
+                return
+            try:
+                if lazy:
+                    plugin.load()
+                else:
+                    self._prewarm_queue.pop(0)
+                    self._create_page(plugin)
+                    # Прогретый виджет — давнее открытых пользователем: вытесняется первым
+                    self._widgets.move_to_end(plugin, last=False)
+            except Exception:
+                # Ошибка загрузки покажется при выборе плагина
+                if self._prewarm_queue and self._prewarm_queue[0] is plugin:
+                    self._prewarm_queue.pop(0)
+            break
+        if self._prewarm_queue:
+            QTimer.singleShot(0, self._prewarm_step)
+
+    def _prewarm_loaded(self, plugin: ModalityPlugin, failed: bool = False):
+        """Движок готов: модуль плагина импортируется следующим шагом прогрева, виджет — ещё одним"""
+        self._prewarm_loading = None
+        if not failed:
+            self._prewarm_prepared = plugin
+        elif self._prewarm_queue and self._prewarm_queue[0] is plugin:
+            # Ошибка загрузки покажется при выборе плагина
+            self._prewarm_queue.pop(0)
+        if self._prewarm_queue:
+            QTimer.singleShot(0, self._prewarm_step)
+
+    def _evict_widgets(self):
+        """Удаляет давно не открывавшиеся виджеты сверх widget_cache_size, запомнив состояние их форм"""
+        if self.widget_cache_size is None:
+            return
+        while len(self._widgets) > max(self.widget_cache_size, 1):
+            plugin = next(iter(self._widgets))
+            try:
+                self._saved_states[plugin] = plugin.save_state()
+            except Exception:
+                traceback.print_exc()
+            self._drop_widget(plugin)
+
+    def _drop_widget(self, plugin: ModalityPlugin):
+        widget = self._widgets.pop(plugin, None)
+        if widget is not None:
+            self._remove_page(widget)
+            if widget is self.current_widget:
+                self.current_widget = None
+
+    def _add_page(self, widget: QWidget):
+        """Страница стека, пока не показана, не влияет на его размер (политика Ignored):
+        иначе QStackedWidget занимает место самой большой страницы кэша"""
+        self._page_policies[widget] = widget.sizePolicy()
+        widget.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.plugin_stack.addWidget(widget)
+
+    def _set_current_page(self, widget: QWidget):
+        previous = self.plugin_stack.currentWidget()
+        if previous is not None and previous is not widget:
+            previous.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        widget.setSizePolicy(self._page_policies.get(widget, widget.sizePolicy()))
+        self.plugin_stack.setCurrentWidget(widget)
+
+    def _remove_page(self, widget: QWidget):
+        self._page_policies.pop(widget, None)
+        self.plugin_stack.removeWidget(widget)
+        widget.setParent(None)
+        widget.deleteLater()
+
+    def reload_plugin(self, directory: str, kind: str) -> bool:
+        """Применяет изменение файлов плагина (сигнал PluginWatcher) без перезапуска приложения.
+
+        Созданный виджет плагина пересоздаётся (для открытого — сразу, для остальных —
+        при следующем выборе) с восстановлением выбора и текста формы (save_state /
+        restore_state); правка манифеста меняет только подписи. False — плагин не
+        найден или перезагрузка не удалась: ошибка печатается, продолжает работать
+        прежняя версия.
+        """
+        idx = next((i for i, p in enumerate(self.plugins)
+                    if isinstance(p, LazyPlugin) and p.manifest.directory.name == directory), None)
+        if idx is None:
+            return False
+        plugin = self.plugins[idx]
+        is_current = plugin is self.current_plugin
+        state = plugin.save_state() if plugin in self._widgets else {}
+        try:
+            plugin.reload(kind)
+        except Exception:
+            print(f"Не удалось перезагрузить плагин {directory}, остаётся прежняя версия:")
+            traceback.print_exc()
+            return False
+
+        self.plugin_buttons[idx].setText(plugin.get_name())
+        self.plugin_buttons[idx].setToolTip(plugin.get_description())
+        if is_current:
+            self.plugin_title.setText(plugin.get_name())
+        if kind == CHANGE_MANIFEST:
+            return True
+        if plugin in self._widgets:
+            self._drop_widget(plugin)
+            if state:
+                self._saved_states[plugin] = state
+        if is_current:
+            self._show_plugin_widget(plugin)
+        return True
@@ -0,0 +1,84 @@
+"""Наблюдение за папками плагинов: изменения файлов → сигнал перезагрузки"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Добавляем корневую директорию проекта в sys.path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+from core.plugin_reload import classify_changes, snapshot
+
+# Редактор сохраняет файл несколькими операциями (запись, переименование) — ждём, пока они закончатся
+DEBOUNCE_MS = 150
+
+
+class PluginWatcher(QObject):
+    """Следит за папками плагинов через QFileSystemWatcher и сообщает, что изменилось.
+
+    Уведомления ОС только будят проверку: после паузы DEBOUNCE_MS папка
+    сравнивается со своим снимком (mtime, размер — core.plugin_reload), и при
+    изменениях испускается plugin_changed(имя папки, вид изменения). На сетевых
+    дисках, где уведомления не приходят, включается опрос poll_interval_ms.
+    """
+
+    plugin_changed = Signal(str, str)
+
+    def __init__(self, plugin_dirs: Iterable[Path], poll_interval_ms: int = 0, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._dirs: Dict[str, Path] = {path.name: path for path in plugin_dirs}
+        self._snapshots = {name: snapshot(path) for name, path in self._dirs.items()}
+        self._pending: Set[str] = set()
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_path_changed)
+        self._watcher.fileChanged.connect(self._on_path_changed)
+        for name in self._dirs:
+            self._watch(name)
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._check_pending)
+
+        self._poll: Optional[QTimer] = None
+        if poll_interval_ms > 0:
+            self._poll = QTimer(self)
+            self._poll.timeout.connect(self.check_now)
+            self._poll.start(poll_interval_ms)
+
+    def _watch(self, name: str) -> None:
+        """Папка и её файлы. Переименование при сохранении снимает файл с наблюдения — добавляем заново"""
+        plugin_dir = self._dirs[name]
+        watched = set(self._watcher.files()) | set(self._watcher.directories())
+        paths = [str(plugin_dir)] + [str(plugin_dir / file_name) for file_name in self._snapshots[name]]
+        new_paths = [path for path in paths if path not in watched and Path(path).exists()]
+        if new_paths:
+            self._watcher.addPaths(new_paths)
+
+    def _on_path_changed(self, path: str) -> None:
+        changed = Path(path)
+        name = changed.name if changed.name in self._dirs and changed == self._dirs[changed.name] else changed.parent.name
+        if name in self._dirs:
+            self._pending.add(name)
+            self._debounce.start()
+
+    def _check_pending(self) -> None:
+        names, self._pending = self._pending, set()
+        self.check_now(names)
+
+    def check_now(self, names: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+        """Сравнить папки со снимками (по умолчанию все) и испустить plugin_changed для изменённых"""
+        changes = []
+        for name in sorted(names if names is not None else self._dirs):
+            after = snapshot(self._dirs[name])
+            kind = classify_changes(self._snapshots[name], after)
+            self._snapshots[name] = after
+            self._watch(name)
+            if kind is not None:
+                changes.append((name, kind))
+                self.plugin_changed.emit(name, kind)
+        return changes